@@ -31,6 +31,7 @@ from logging import getLogger
 import re
 
 from plainbox.impl.transport import InvalidSecureIDError
+from plainbox.impl.transport import ResumableUpload
 from plainbox.impl.transport import SECURE_ID_PATTERN
 from plainbox.impl.transport import TransportBase
 from plainbox.impl.transport import TransportError
@@ -47,6 +48,8 @@ class SubmissionServiceTransport(TransportBase):
      - Payload can be in:
         * LZMA compressed tarball that includes a submission.json and results
           from checkbox.
+     - With the 'chunked' option the payload is sent in resumable chunks
+       (see :class:`~plainbox.impl.transport.ResumableUpload`)
     """
 
     def __init__(self, where, options):
@@ -92,6 +95,9 @@ class SubmissionServiceTransport(TransportBase):
             raise InvalidSecureIDError(_("Secure ID not specified"))
         self._validate_secure_id(secure_id)
         logger.debug(_("Sending to %s, Secure ID is %s"), self.url, secure_id)
+        if ResumableUpload.requested(self.options):
+            upload = ResumableUpload.from_options(self.url, self.options)
+            return upload.send(data)
         try:
             response = requests.post(self.url, data=data)
         except requests.exceptions.Timeout as exc:
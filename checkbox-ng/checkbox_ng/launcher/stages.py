@@ -599,10 +599,12 @@ class ReportsStage(CheckboxUiStage):
                     )
             if not secure_id and self.is_interactive:
                 secure_id = input(self.C.BLUE(_("Enter secure-id:")))
+            options = []
             if secure_id:
-                options = "secure_id={}".format(secure_id)
-            else:
-                options = ""
+                options.append("secure_id={}".format(secure_id))
+            if transport_cfg.get("chunked", False):
+                options.append("chunked=yes")
+            options = ",".join(options)
             if transport_cfg.get("staging", False):
                 url = (
                     "https://certification.staging.canonical.com/"
@@ -39,6 +39,8 @@ import tarfile
 import time
 
 from plainbox.abc import IJobResult
+from plainbox.impl.bootstrapcache import BootstrapSnapshot
+from plainbox.impl.bootstrapcache import get_snapshot_path
 from plainbox.impl.color import Colorizer
 from plainbox.impl.session.resume import IncompatibleJobError
 from plainbox.impl.execution import UnifiedRunner
@@ -54,6 +56,7 @@ from plainbox.impl.transport import TransportError
 from plainbox.impl.transport import get_all_transports
 from plainbox.impl.transport import SECURE_ID_PATTERN
 from plainbox.impl.unit.testplan import TestPlanUnitSupport
+from plainbox.impl.unitindex import UnitIndex
 from plainbox.impl.config import Configuration
 
 from checkbox_ng.config import load_configs
@@ -111,11 +114,18 @@ class Submit:
         parser.add_argument(
             "-m", "--message", help=_("Submission description")
         )
+        parser.add_argument(
+            "--chunked",
+            action="store_true",
+            help=_("Send the submission in resumable chunks"),
+        )
 
     def invoked(self, ctx):
         transport_cls = None
         mode = "rb"
         options_string = "secure_id={0}".format(ctx.args.secure_id)
+        if ctx.args.chunked:
+            options_string += ",chunked=yes"
         url = (
             "https://certification.canonical.com/"
             "api/v1/submission/{}/".format(ctx.args.secure_id)
@@ -1357,12 +1367,36 @@ class Expand:
 
     def invoked(self, ctx):
         self.ctx = ctx
-        session_title = "checkbox-expand-{}".format(ctx.args.TEST_PLAN)
+        index = UnitIndex(self.sa.get_selected_providers())
+        # expanding a test plan needs a session, reuse the previous expansion
+        # as long as the providers did not change
+        obj_list = index.get_expansion(ctx.args.TEST_PLAN)
+        if obj_list is None:
+            obj_list = self._expand(ctx.args.TEST_PLAN)
+            index.set_expansion(ctx.args.TEST_PLAN, obj_list)
+
+        if ctx.args.format == "json":
+            json.dump(obj_list, sys.stdout, sort_keys=True)
+        else:
+            for obj in obj_list:
+                if obj["unit"] == "template":
+                    print("Template '{}'".format(obj["template-id"]))
+                elif obj["unit"] == "manifest entry":
+                    print("Manifest '{}'".format(obj["id"]))
+                elif obj["unit"] == "job":
+                    print("Job '{}'".format(obj["id"]))
+                else:
+                    raise AssertionError(
+                        "Unknown unit type {}".format(obj["unit"])
+                    )
+
+    def _expand(self, test_plan):
+        session_title = "checkbox-expand-{}".format(test_plan)
         self.sa.start_new_session(session_title)
         tps = self.sa.get_test_plans()
-        if ctx.args.TEST_PLAN not in tps:
+        if test_plan not in tps:
             raise SystemExit("Test plan not found")
-        self.sa.select_test_plan(ctx.args.TEST_PLAN)
+        self.sa.select_test_plan(test_plan)
         all_jobs_and_templates = [
             unit
             for unit in self.sa._context.state.unit_list
@@ -1398,21 +1432,7 @@ class Expand:
             obj_list.append(obj)
 
         obj_list.sort(key=lambda x: x.get("template-id", x["id"]) or x["id"])
-
-        if ctx.args.format == "json":
-            json.dump(obj_list, sys.stdout, sort_keys=True)
-        else:
-            for obj in obj_list:
-                if obj["unit"] == "template":
-                    print("Template '{}'".format(obj["template-id"]))
-                elif obj["unit"] == "manifest entry":
-                    print("Manifest '{}'".format(obj["id"]))
-                elif obj["unit"] == "job":
-                    print("Job '{}'".format(obj["id"]))
-                else:
-                    raise AssertionError(
-                        "Unknown unit type {}".format(obj["unit"])
-                    )
+        return obj_list
 
     def get_effective_certification_status(self, unit):
         if unit.unit == "template":
@@ -1448,6 +1468,46 @@ class ListBootstrapped:
                 )
             ),
         )
+        resources_group = parser.add_mutually_exclusive_group()
+        resources_group.add_argument(
+            "--cached",
+            action="store_true",
+            help=_(
+                "reuse the bootstrap results recorded by a previous run with "
+                "the same providers on the same hardware, if any"
+            ),
+        )
+        resources_group.add_argument(
+            "--resources",
+            metavar="FILE",
+            help=_(
+                "use the bootstrap results saved in FILE (possibly on "
+                "another machine) instead of running the bootstrap jobs"
+            ),
+        )
+        parser.add_argument(
+            "--save-resources",
+            metavar="FILE",
+            help=_("save the bootstrap results to FILE"),
+        )
+
+    def _load_snapshot(self, path, required):
+        try:
+            snapshot = BootstrapSnapshot.load(path)
+        except (OSError, ValueError) as exc:
+            if required:
+                raise SystemExit(exc)
+            _logger.debug("Not using bootstrap snapshot %s: %s", path, exc)
+            return None
+        if snapshot.test_plan != self.ctx.args.TEST_PLAN:
+            if required:
+                raise SystemExit(
+                    _("{} was recorded for test plan {}").format(
+                        path, snapshot.test_plan
+                    )
+                )
+            return None
+        return snapshot
 
     def invoked(self, ctx):
         self.ctx = ctx
@@ -1456,7 +1516,35 @@ class ListBootstrapped:
         if ctx.args.TEST_PLAN not in tps:
             raise SystemExit("Test plan not found")
         self.sa.select_test_plan(ctx.args.TEST_PLAN)
-        self.sa.bootstrap()
+        snapshot = None
+        cache_path = None
+        if ctx.args.resources:
+            snapshot = self._load_snapshot(ctx.args.resources, required=True)
+        elif ctx.args.cached:
+            cache_path = get_snapshot_path(
+                ctx.args.TEST_PLAN, self.sa.get_selected_providers()
+            )
+            snapshot = self._load_snapshot(cache_path, required=False)
+        if snapshot:
+            self.sa.bootstrap(snapshot.get_job_results())
+        else:
+            self.sa.bootstrap()
+        if ctx.args.save_resources or (cache_path and not snapshot):
+            new_snapshot = BootstrapSnapshot.from_job_state_map(
+                ctx.args.TEST_PLAN,
+                self.sa._context.state.job_state_map,
+                # results loaded from a file are still from that machine
+                snapshot.hardware if snapshot else None,
+            )
+            if cache_path and not snapshot:
+                try:
+                    new_snapshot.save(cache_path)
+                except OSError as exc:
+                    _logger.warning(
+                        "Unable to record the bootstrap results: %s", exc
+                    )
+            if ctx.args.save_resources:
+                new_snapshot.save(ctx.args.save_resources)
         jobs = []
         for job in self.sa.get_static_todo_list():
             job_unit = self.sa.get_job(job)
@@ -1529,7 +1617,7 @@ class TestPlanExport:
 
 def get_all_jobs(sa):
     providers = sa.get_selected_providers()
-    root = Explorer(providers).get_object_tree()
+    root = UnitIndex(providers).get_object_tree()
 
     def get_jobs(obj):
         jobs = []
@@ -1548,7 +1636,7 @@ def get_all_jobs(sa):
 
 def print_objs(group, sa, show_attrs=False, filter_fun=None):
     providers = sa.get_selected_providers()
-    obj = Explorer(providers).get_object_tree()
+    obj = UnitIndex(providers).get_object_tree()
 
     def _show(obj, indent):
         if group is None or obj.group == group:
@@ -1580,8 +1668,15 @@ class Show:
     def invoked(self, ctx):
         providers = ctx.sa.get_selected_providers()
         self._searched_names = ctx.args.IDs
-        root = Explorer(providers).get_object_tree()
-        self._traverse_obj_tree(root)
+        index = UnitIndex(providers)
+        found = index.find(self._searched_names)
+        if {obj.name for obj in found} == set(self._searched_names):
+            for obj in found:
+                self._print_obj(obj)
+        else:
+            # the index only has providers and units, look for the others
+            # (like session storages) in the whole tree
+            self._traverse_obj_tree(index.get_object_tree())
 
     def _traverse_obj_tree(self, obj):
         if obj.name in self._searched_names:
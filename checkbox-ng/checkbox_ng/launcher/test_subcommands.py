@@ -18,6 +18,7 @@
 
 import textwrap
 import datetime
+import json
 
 from functools import partial
 from unittest import TestCase
@@ -720,7 +721,13 @@ class TestLListBootstrapped(TestCase):
     def setUp(self):
         self.launcher = ListBootstrapped()
         self.ctx = Mock()
-        self.ctx.args = Mock(TEST_PLAN="", format="")
+        self.ctx.args = Mock(
+            TEST_PLAN="",
+            format="",
+            cached=False,
+            resources=None,
+            save_resources=None,
+        )
         self.ctx.sa = Mock(
             start_new_session=Mock(),
             get_test_plans=Mock(return_value=["test-plan1", "test-plan2"]),
@@ -808,6 +815,65 @@ class TestLListBootstrapped(TestCase):
         self.launcher.invoked(self.ctx)
         self.assertEqual(stdout.getvalue(), expected_out)
 
+    @patch("sys.stdout", new=StringIO())
+    @patch("checkbox_ng.launcher.subcommands.get_snapshot_path")
+    @patch("checkbox_ng.launcher.subcommands.BootstrapSnapshot")
+    def test_invoke_cached_hit(self, mock_snapshot, mock_path):
+        self.ctx.args.TEST_PLAN = "test-plan1"
+        self.ctx.args.cached = True
+        snapshot = mock_snapshot.load.return_value
+        snapshot.test_plan = "test-plan1"
+        self.launcher.invoked(self.ctx)
+        mock_snapshot.load.assert_called_once_with(mock_path.return_value)
+        self.ctx.sa.bootstrap.assert_called_once_with(
+            snapshot.get_job_results.return_value
+        )
+        self.assertFalse(mock_snapshot.from_job_state_map.called)
+
+    @patch("sys.stdout", new=StringIO())
+    @patch("checkbox_ng.launcher.subcommands.get_snapshot_path")
+    @patch("checkbox_ng.launcher.subcommands.BootstrapSnapshot")
+    def test_invoke_cached_miss(self, mock_snapshot, mock_path):
+        self.ctx.args.TEST_PLAN = "test-plan1"
+        self.ctx.args.cached = True
+        mock_snapshot.load.side_effect = FileNotFoundError
+        self.launcher.invoked(self.ctx)
+        self.ctx.sa.bootstrap.assert_called_once_with()
+        mock_snapshot.from_job_state_map.assert_called_once_with(
+            "test-plan1", self.ctx.sa._context.state.job_state_map, None
+        )
+        new_snapshot = mock_snapshot.from_job_state_map.return_value
+        new_snapshot.save.assert_called_once_with(mock_path.return_value)
+
+    @patch("sys.stdout", new=StringIO())
+    @patch("checkbox_ng.launcher.subcommands.BootstrapSnapshot")
+    def test_invoke_resources(self, mock_snapshot):
+        self.ctx.args.TEST_PLAN = "test-plan1"
+        self.ctx.args.resources = "other-machine.json"
+        self.ctx.args.save_resources = "copy.json"
+        snapshot = mock_snapshot.load.return_value
+        snapshot.test_plan = "test-plan1"
+        self.launcher.invoked(self.ctx)
+        self.ctx.sa.bootstrap.assert_called_once_with(
+            snapshot.get_job_results.return_value
+        )
+        mock_snapshot.from_job_state_map.assert_called_once_with(
+            "test-plan1",
+            self.ctx.sa._context.state.job_state_map,
+            snapshot.hardware,
+        )
+        new_snapshot = mock_snapshot.from_job_state_map.return_value
+        new_snapshot.save.assert_called_once_with("copy.json")
+
+    @patch("checkbox_ng.launcher.subcommands.BootstrapSnapshot")
+    def test_invoke_resources_other_test_plan(self, mock_snapshot):
+        self.ctx.args.TEST_PLAN = "test-plan1"
+        self.ctx.args.resources = "other-machine.json"
+        mock_snapshot.load.return_value.test_plan = "test-plan2"
+        with self.assertRaisesRegex(SystemExit, "test plan test-plan2"):
+            self.launcher.invoked(self.ctx)
+        self.assertFalse(self.ctx.sa.bootstrap.called)
+
 
 class TestExpand(TestCase):
     def setUp(self):
@@ -835,6 +901,10 @@ class TestExpand(TestCase):
                 unit_list=[selected_1, selected_2, not_selected],
             ),
         )
+        patcher = patch("checkbox_ng.launcher.subcommands.UnitIndex")
+        self.mock_index = patcher.start().return_value
+        self.mock_index.get_expansion.return_value = None
+        self.addCleanup(patcher.stop)
 
     def test_register_arguments(self):
         parser_mock = Mock()
@@ -900,6 +970,21 @@ class TestExpand(TestCase):
         self.assertIn('"id": "some"', stdout.getvalue())
         self.assertIn('"id": "other"', stdout.getvalue())
         self.assertNotIn('"id": "not_selected"', stdout.getvalue())
+        self.mock_index.set_expansion.assert_called_once_with(
+            "test-plan1", json.loads(stdout.getvalue())
+        )
+
+    @patch("sys.stdout", new_callable=StringIO)
+    def test_invoke__stored_expansion(self, stdout):
+        self.mock_index.get_expansion.return_value = [
+            {"unit": "job", "id": "job1"}
+        ]
+        self.ctx.args.TEST_PLAN = "test-plan1"
+        self.launcher.invoked(self.ctx)
+        self.assertEqual(stdout.getvalue(), "Job 'job1'\n")
+        self.mock_index.get_expansion.assert_called_once_with("test-plan1")
+        self.assertFalse(self.ctx.sa.start_new_session.called)
+        self.assertFalse(self.mock_index.set_expansion.called)
 
     def test_get_effective_certificate_status(self):
         job1 = JobDefinition(
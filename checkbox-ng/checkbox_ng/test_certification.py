@@ -128,3 +128,14 @@ class SubmissionServiceTransportTests(TestCase):
         )
         with self.assertRaises(TransportError):
             transport.send(self.sample_archive)
+
+    @mock.patch("checkbox_ng.certification.ResumableUpload.from_options")
+    def test_send_chunked(self, mock_from_options):
+        transport = SubmissionServiceTransport(
+            self.valid_url, self.valid_option_string + ",chunked=yes"
+        )
+        result = transport.send(self.sample_archive)
+        upload = mock_from_options.return_value
+        upload.send.assert_called_once_with(self.sample_archive)
+        self.assertEqual(result, upload.send.return_value)
+        self.assertFalse(requests.post.called)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# This file is part of Checkbox.
+#
+# Copyright 2026 Canonical Ltd.
+#
+# Checkbox is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# Checkbox is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Checkbox.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Compare the reference and the fast-path RFC822 parsers.
+
+Two corpora are measured:
+
+- every ``.pxu`` file found below the given source tree (by default the
+  root of the checkbox repository)
+- ``udev_resource``-style output, either taken from files given with
+  ``--resource-output`` or rebuilt from the udevadm samples shipped with
+  checkbox-support, repeated ``--repeat`` times to simulate large machines
+
+Example::
+
+    $ python3 contrib/rfc822_benchmark.py --repeat 50
+"""
+
+import argparse
+import glob
+import os
+import timeit
+
+from plainbox.impl.secure.origin import FileTextSource
+from plainbox.impl.secure.rfc822 import load_rfc822_records
+from plainbox.impl.secure.rfc822 import load_rfc822_records_fast
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.normpath(os.path.join(HERE, "..", ".."))
+
+UDEV_RESOURCE_ATTRIBUTES = (
+    "path",
+    "name",
+    "bus",
+    "category",
+    "driver",
+    "product_id",
+    "vendor_id",
+    "subproduct_id",
+    "subvendor_id",
+    "product",
+    "vendor",
+    "interface",
+    "mac",
+    "product_slug",
+    "vendor_slug",
+    "symlink_uuid",
+)
+
+
+def load_pxu_corpus(root):
+    corpus = []
+    pattern = os.path.join(root, "**", "*.pxu")
+    for filename in sorted(glob.glob(pattern, recursive=True)):
+        with open(filename, encoding="UTF-8") as stream:
+            corpus.append((filename, stream.read()))
+    return corpus
+
+
+def build_udev_resource_output():
+    """Render the in-tree udevadm samples the way udev_resource.py does."""
+    from checkbox_support.parsers.udevadm import UdevadmParser
+    import checkbox_support.parsers.tests as parser_tests
+
+    data_dir = os.path.join(
+        os.path.dirname(parser_tests.__file__), "udevadm_data"
+    )
+    lines = []
+    for filename in sorted(glob.glob(os.path.join(data_dir, "*.txt"))):
+        with open(filename, encoding="UTF-8", errors="ignore") as stream:
+            udev = UdevadmParser(stream.read())
+        for device in udev.run():
+            for attribute in UDEV_RESOURCE_ATTRIBUTES:
+                value = getattr(device, attribute)
+                if value is not None:
+                    lines.append("{}: {}\n".format(attribute, value))
+            lines.append("\n")
+    return "".join(lines)
+
+
+def measure(name, func, number):
+    reference, fast = func(load_rfc822_records), func(load_rfc822_records_fast)
+    if reference != fast:
+        raise SystemExit("{}: parsers disagree".format(name))
+    t_ref = min(
+        timeit.repeat(lambda: func(load_rfc822_records), number=number)
+    )
+    t_fast = min(
+        timeit.repeat(lambda: func(load_rfc822_records_fast), number=number)
+    )
+    print(
+        "{:<20} {:>8} records  reference {:8.4f}s  fast {:8.4f}s  "
+        "speed-up {:5.2f}x".format(
+            name, len(fast), t_ref / number, t_fast / number, t_ref / t_fast
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--source-tree",
+        default=REPO_ROOT,
+        help="directory searched for .pxu files (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--resource-output",
+        nargs="*",
+        default=[],
+        help="files with saved udev_resource output to parse",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=20,
+        help="how many times the resource output is concatenated",
+    )
+    parser.add_argument(
+        "--number",
+        type=int,
+        default=3,
+        help="how many runs are averaged per measurement",
+    )
+    args = parser.parse_args()
+
+    pxu_corpus = load_pxu_corpus(args.source_tree)
+
+    def parse_pxu(loader):
+        records = []
+        for filename, text in pxu_corpus:
+            records.extend(loader(text, source=FileTextSource(filename)))
+        return records
+
+    measure("pxu corpus", parse_pxu, args.number)
+
+    if args.resource_output:
+        chunks = []
+        for filename in args.resource_output:
+            with open(filename, encoding="UTF-8") as stream:
+                chunks.append(stream.read())
+        resource_output = "\n".join(chunks)
+    else:
+        resource_output = build_udev_resource_output()
+    resource_lines = (resource_output * args.repeat).splitlines(True)
+
+    def parse_resource(loader):
+        return loader(iter(resource_lines))
+
+    measure("udev_resource", parse_resource, args.number)
+
+
+if __name__ == "__main__":
+    main()
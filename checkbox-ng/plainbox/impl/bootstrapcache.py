@@ -0,0 +1,213 @@
+# This file is part of Checkbox.
+#
+# Copyright 2026 Canonical Ltd.
+#
+# Checkbox is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# Checkbox is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Checkbox.  If not, see <http://www.gnu.org/licenses/>.
+"""
+:mod:`plainbox.impl.bootstrapcache` -- snapshots of bootstrap results
+=====================================================================
+
+Bootstrapping a test plan runs all its resource jobs, which is most of the
+time needed to know what the plan would run. A :class:`BootstrapSnapshot`
+keeps the results of those jobs so that a test plan can be bootstrapped
+again without running them, on the same machine or on another one.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import platform
+
+from plainbox.impl.result import MemoryJobResult
+from plainbox.impl.unitindex import get_providers_fingerprint
+
+SNAPSHOT_VERSION = 1
+
+# Identify the machine, but not the unit (no serial numbers)
+DMI_ATTRIBUTES = (
+    "sys_vendor",
+    "product_name",
+    "product_version",
+    "board_vendor",
+    "board_name",
+    "bios_version",
+)
+
+
+def _read_attribute(path):
+    try:
+        with open(path, "rt", encoding="UTF-8", errors="replace") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def get_hardware_fingerprint(sysfs="/sys"):
+    """
+    Compute a value that identifies the hardware and kernel of this machine
+
+    It covers the DMI identification of the machine and the ids of the PCI
+    and USB devices, which is what most resource jobs report on.
+    """
+    lines = [platform.machine(), platform.release()]
+    for attribute in DMI_ATTRIBUTES:
+        lines.append(
+            _read_attribute(os.path.join(sysfs, "class/dmi/id", attribute))
+        )
+    for bus, attributes in (
+        ("pci", ("vendor", "device", "class")),
+        ("usb", ("idVendor", "idProduct")),
+    ):
+        devices_dir = os.path.join(sysfs, "bus", bus, "devices")
+        try:
+            devices = sorted(os.listdir(devices_dir))
+        except OSError:
+            continue
+        for device in devices:
+            values = [
+                _read_attribute(os.path.join(devices_dir, device, attribute))
+                for attribute in attributes
+            ]
+            lines.append(" ".join([bus, device] + values))
+    return hashlib.sha256("\n".join(lines).encode("UTF-8")).hexdigest()
+
+
+def get_snapshot_path(test_plan, providers):
+    """
+    Get the path of the snapshot recorded on this machine for a test plan
+
+    The path changes when the providers or the hardware change, so that an
+    outdated snapshot is never used.
+    """
+    key = hashlib.sha256(
+        "\0".join(
+            (
+                test_plan,
+                get_providers_fingerprint(providers),
+                get_hardware_fingerprint(),
+            )
+        ).encode("UTF-8")
+    ).hexdigest()
+    suc = os.environ.get("SNAP_USER_COMMON")
+    if suc:
+        cache_dir = os.path.join(suc, ".cache", "plainbox", "bootstrap")
+    else:
+        xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+        if not xdg_cache_home:
+            xdg_cache_home = os.path.join(os.path.expanduser("~"), ".cache")
+        cache_dir = os.path.join(xdg_cache_home, "plainbox", "bootstrap")
+    return os.path.join(cache_dir, "{}.json".format(key))
+
+
+class BootstrapSnapshot:
+    """
+    Results of the bootstrap jobs of a test plan
+
+    :param test_plan:
+        Id of the test plan that was bootstrapped
+    :param results:
+        Dictionary mapping job ids to their result, as a JSON-friendly
+        dictionary
+    :param hardware:
+        Hardware fingerprint of the machine the jobs ran on
+    """
+
+    def __init__(self, test_plan, results, hardware=None):
+        self.test_plan = test_plan
+        self.results = results
+        self.hardware = hardware
+
+    @classmethod
+    def from_job_state_map(cls, test_plan, job_state_map, hardware=None):
+        """
+        Record the results of the jobs that ran in a bootstrapped session
+
+        The hardware fingerprint defaults to the one of this machine.
+        """
+        results = {}
+        for job_id, job_state in job_state_map.items():
+            if not job_state.result_history:
+                continue
+            result = job_state.result
+            io_log = [
+                [
+                    record.delay,
+                    record.stream_name,
+                    base64.standard_b64encode(record.data).decode("ASCII"),
+                ]
+                for record in result.get_io_log()
+            ]
+            results[job_id] = {
+                "outcome": result.outcome,
+                "return_code": result.return_code,
+                "io_log": io_log,
+            }
+        if hardware is None:
+            hardware = get_hardware_fingerprint()
+        return cls(test_plan, results, hardware)
+
+    def get_job_results(self):
+        """
+        Get the recorded results, as expected by
+        :meth:`SessionAssistant.bootstrap()`
+        """
+        return {
+            job_id: MemoryJobResult(
+                {
+                    "outcome": result["outcome"],
+                    "return_code": result["return_code"],
+                    "io_log": [
+                        (delay, stream_name, base64.standard_b64decode(data))
+                        for delay, stream_name, data in result["io_log"]
+                    ],
+                }
+            )
+            for job_id, result in self.results.items()
+        }
+
+    def save(self, path):
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "test_plan": self.test_plan,
+            "hardware": self.hardware,
+            "results": self.results,
+        }
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        new_path = "{}.{}.new".format(path, os.getpid())
+        with open(new_path, "wt", encoding="UTF-8") as stream:
+            json.dump(data, stream, sort_keys=True)
+        os.replace(new_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a snapshot saved by :meth:`save()`
+
+        :raises ValueError:
+            If the file is not a snapshot that can be used
+        """
+        with open(path, "rt", encoding="UTF-8") as stream:
+            data = json.load(stream)
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != SNAPSHOT_VERSION
+        ):
+            raise ValueError(
+                "{} is not a bootstrap snapshot (version {})".format(
+                    path, SNAPSHOT_VERSION
+                )
+            )
+        return cls(data["test_plan"], data["results"], data.get("hardware"))
@@ -465,6 +465,11 @@ CONFIG_SPEC = [
                 "staging": VarSpec(
                     bool, False, "Pushes to staging C3 instead of normal C3."
                 ),
+                "chunked": VarSpec(
+                    bool,
+                    False,
+                    "Send the submission in resumable chunks.",
+                ),
             }
         ),
     ),
@@ -48,6 +48,7 @@ import tempfile
 import subprocess
 import sys
 import threading
+import weakref
 from functools import partial
 from subprocess import check_output, CalledProcessError, STDOUT
 
@@ -64,7 +65,7 @@ from plainbox.impl.resource import Resource
 from plainbox.impl.secure.origin import JobOutputTextSource
 from plainbox.impl.secure.providers.v1 import Provider1
 from plainbox.impl.secure.rfc822 import RFC822SyntaxError
-from plainbox.impl.secure.rfc822 import gen_rfc822_records
+from plainbox.impl.secure.rfc822 import gen_rfc822_records_fast
 from plainbox.impl.session.jobs import InhibitionCause
 from plainbox.impl.session.jobs import JobReadinessInhibitor
 from plainbox.impl.unit.job import JobDefinition
@@ -103,6 +104,13 @@ class CheckBoxSessionStateController(ISessionStateController):
           of resource definitions.
     """
 
+    def __init__(self):
+        # job -> frozenset of ids of the suspend jobs that must run after it
+        self._impacted_suspend_map = weakref.WeakKeyDictionary()
+        # session state -> {suspend job id: {job id: job}}, see
+        # _get_suspend_index()
+        self._suspend_index_map = weakref.WeakKeyDictionary()
+
     def get_dependency_set(self, job, job_list=None):
         """
         Get the set of direct dependencies of a particular job.
@@ -180,17 +188,69 @@ class CheckBoxSessionStateController(ISessionStateController):
         flag, or if it defines a sibling that has a dependency on the suspend
         job.
         """
-        expected_flag = {
-            Suspend.AUTO_JOB_ID: Suspend.AUTO_FLAG,
-            Suspend.MANUAL_JOB_ID: Suspend.MANUAL_FLAG,
-        }.get(suspend_job_id)
-        if job.flags and expected_flag in job.flags:
-            return True
+        return suspend_job_id in self._get_impacted_suspend_set(job)
+
+    def _get_impacted_suspend_set(self, job):
+        """
+        Get the ids of the suspend jobs that need to be run after ``job``.
+
+        The result only depends on the definition of the job so it is
+        computed once per job.
+        """
+        try:
+            return self._impacted_suspend_map[job]
+        except KeyError:
+            pass
+        impacted = set()
+        for suspend_job_id, expected_flag in (
+            (Suspend.AUTO_JOB_ID, Suspend.AUTO_FLAG),
+            (Suspend.MANUAL_JOB_ID, Suspend.MANUAL_FLAG),
+        ):
+            if job.flags and expected_flag in job.flags:
+                impacted.add(suspend_job_id)
         if job.siblings:
             for sibling_data in json.loads(job.tr_siblings()):
-                if suspend_job_id in sibling_data.get("depends", []):
-                    return True
-        return False
+                depends = sibling_data.get("depends", [])
+                for suspend_job_id in (
+                    Suspend.AUTO_JOB_ID,
+                    Suspend.MANUAL_JOB_ID,
+                ):
+                    if suspend_job_id in depends:
+                        impacted.add(suspend_job_id)
+        impacted = frozenset(impacted)
+        self._impacted_suspend_map[job] = impacted
+        return impacted
+
+    def _get_suspend_index(self, session_state):
+        """
+        Get the index of the jobs impacting suspend jobs in a session.
+
+        The index maps the id of each suspend job to an (ordered) dictionary
+        of the jobs that need to be run before it, keyed by their id. It is
+        built from the job state map on first use and then kept up to date by
+        observing the jobs added to (e.g. by instantiating templates) and
+        removed from the session.
+        """
+        try:
+            return self._suspend_index_map[session_state]
+        except KeyError:
+            pass
+        index = {Suspend.AUTO_JOB_ID: {}, Suspend.MANUAL_JOB_ID: {}}
+
+        def on_job_added(job):
+            for suspend_job_id in self._get_impacted_suspend_set(job):
+                index[suspend_job_id][job.id] = job
+
+        def on_job_removed(job):
+            for suspend_job_id in self._get_impacted_suspend_set(job):
+                index[suspend_job_id].pop(job.id, None)
+
+        for state in session_state.job_state_map.values():
+            on_job_added(state.job)
+        session_state.on_job_added.connect(on_job_added)
+        session_state.on_job_removed.connect(on_job_removed)
+        self._suspend_index_map[session_state] = index
+        return index
 
     def get_inhibitor_list(self, session_state, job):
         """
@@ -325,24 +385,19 @@ class CheckBoxSessionStateController(ISessionStateController):
         undesired_inhibitor = JobReadinessInhibitor(
             cause=InhibitionCause.UNDESIRED
         )
-        # We are only interested in jobs that are actually going to run
-        run_list = [
-            state.job
-            for state in session_state.job_state_map.values()
-            if undesired_inhibitor not in state.readiness_inhibitor_list
-        ]
-        p_suspend_job_id = partial(
-            self._is_job_impacting_suspend, suspend_job.id
-        )
-        suspend_inhibitors_jobs = filter(p_suspend_job_id, run_list)
-        for job in suspend_inhibitors_jobs:
+        index = self._get_suspend_index(session_state)
+        for job_id in index[suspend_job.id]:
+            state = session_state.job_state_map.get(job_id)
+            # We are only interested in jobs that are actually going to run
             if (
-                session_state.job_state_map[job.id].result.outcome
-                == IJobResult.OUTCOME_NONE
+                state is None
+                or undesired_inhibitor in state.readiness_inhibitor_list
             ):
+                continue
+            if state.result.outcome == IJobResult.OUTCOME_NONE:
                 inhibitor = JobReadinessInhibitor(
                     cause=InhibitionCause.PENDING_DEP,
-                    related_job=job,
+                    related_job=state.job,
                 )
                 suspend_inhibitors.append(inhibitor)
         return suspend_inhibitors
@@ -395,9 +450,12 @@ class CheckBoxSessionStateController(ISessionStateController):
         """
         self._parse_and_store_resource(session_state, job, result)
         if session_state.resource_map[job.id] != [Resource({})]:
-            self._instantiate_templates(
-                session_state, job, result, fake_resources
-            )
+            # Adding each instantiated unit changes the job state map,
+            # coalesce the notifications
+            with session_state.bulk_update():
+                self._instantiate_templates(
+                    session_state, job, result, fake_resources
+                )
 
     def _parse_and_store_resource(self, session_state, job, result):
         # NOTE: https://bugs.launchpad.net/checkbox/+bug/1297928
@@ -467,6 +525,9 @@ class CheckBoxSessionStateController(ISessionStateController):
 def gen_rfc822_records_from_io_log(job, result):
     """
     Convert io_log from a job result to a sequence of rfc822 records
+
+    This uses the fast-path parser, the line-level origin of each record is
+    only computed if something asks for it.
     """
     logger.debug(_("processing output from a job: %r"), job)
     # Select all stdout lines from the io log
@@ -480,7 +541,7 @@ def gen_rfc822_records_from_io_log(job, result):
     source = JobOutputTextSource(job)
     try:
         # Parse rfc822 records from the subsequent lines
-        for record in gen_rfc822_records(line_gen, source=source):
+        for record in gen_rfc822_records_fast(line_gen, source=source):
             yield record
     except RFC822SyntaxError as exc:
         # When this exception happens we will _still_ store all the
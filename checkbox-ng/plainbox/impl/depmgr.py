@@ -34,6 +34,7 @@ from logging import getLogger
 import enum
 
 from plainbox.i18n import gettext as _
+from plainbox.suspend_consts import Suspend
 
 
 logger = getLogger("plainbox.depmgr")
@@ -260,7 +261,7 @@ class DependencyDuplicateError(DependencyError):
 
 class Color(enum.Enum):
     """
-    Three classic colors for recursive graph visitor.
+    Three classic colors for depth-first graph visitor.
 
     WHITE:
         For nodes have not been visited yet.
@@ -280,14 +281,25 @@ class DependencySolver:
     """
     Dependency solver for Jobs.
 
-    Uses a simple depth-first search to discover the sequence of jobs that can
-    run. Use the resolve_dependencies() class method to get the solution.
+    Uses a depth-first search to discover the sequence of jobs that can run.
+    Use the resolve_dependencies() class method to get the solution.
+
+    An instance can also be kept around as a persistent dependency graph of
+    a changing list of jobs: see :meth:`add_job()`, :meth:`remove_job()` and
+    :meth:`solve()`. The dependency set of each job is computed only once and
+    the last solution is reused (or extended) as long as the changes made
+    since then cannot affect it.
     """
 
     COLOR_WHITE = Color.WHITE
     COLOR_GRAY = Color.GRAY
     COLOR_BLACK = Color.BLACK
 
+    # Jobs whose dependency set depends on the list of jobs being visited
+    # (see ``CheckBoxSessionStateController.get_dependency_set()``). Their
+    # dependencies are never cached.
+    VOLATILE_JOB_IDS = frozenset([Suspend.AUTO_JOB_ID, Suspend.MANUAL_JOB_ID])
+
     @classmethod
     def resolve_dependencies(cls, job_list, visit_list=None):
         """
@@ -320,12 +332,124 @@ class DependencySolver:
         self._job_list = job_list
         # Build a map of jobs (by id)
         self._job_map = self._get_job_map(job_list)
-        # Job colors, maps from job.id to COLOR_xxx
-        self._job_color_map = {job.id: self.COLOR_WHITE for job in job_list}
+        # Dependency sets of jobs, maps from job.id to a list of
+        # (dep_type, job_id) pairs
+        self._dependency_cache = {}
+        # Outcome of the last call to solve(), see _reset() for the rest
+        self._last_visit_list = None
+        self._reset()
+
+    def _reset(self):
+        # Job colors, maps from job.id to COLOR_xxx (all jobs start white)
+        self._job_color_map = {}
         # The computed solution, made out of job instances. This is not
         # necessarily the only solution but the algorithm computes the same
         # value each time, given the same input.
         self._solution = []
+        # Problems found so far, None when the first problem is to be raised
+        self._problems = None
+        # Ids of jobs that had to be dropped because of a problem
+        self._broken_id_set = set()
+        # Ids of jobs that were visited and of those that were looked up
+        # but are not known
+        self._visited_id_set = set()
+        self._missing_id_set = set()
+        # Whether any job from VOLATILE_JOB_IDS was visited
+        self._saw_volatile = False
+        # The jobs to visit, indices of the entries dropped from that list
+        # and the list without those entries (computed on demand)
+        self._visit_list = []
+        self._visit_index_map = {}
+        self._dropped_index_set = set()
+        self._live_visit_list = []
+        # Dropped jobs that are not (yet) on the list of jobs to visit
+        self._pending_drop_list = []
+
+    def add_job(self, job):
+        """
+        Add a job to the graph.
+
+        :raises DependencyDuplicateError:
+            if a different job with the same id is already known
+        """
+        if job.id in self._job_map:
+            if self._job_map[job.id] != job:
+                raise DependencyDuplicateError(self._job_map[job.id], job)
+            return
+        self._job_map[job.id] = job
+        # The last solution only changes if something referred to this job
+        if job.id in self._missing_id_set:
+            self._last_visit_list = None
+
+    def remove_job(self, job):
+        """Remove a job from the graph."""
+        if self._job_map.get(job.id) is not job:
+            return
+        del self._job_map[job.id]
+        self._dependency_cache.pop(job.id, None)
+        # The last solution only changes if this job was considered in it
+        if job.id in self._visited_id_set:
+            self._last_visit_list = None
+
+    def solve(self, visit_list):
+        """
+        Solve the dependency graph for the given list of jobs to visit.
+
+        :param list visit_list: list of jobs to solve
+        :returns:
+            a tuple (solution, problems). The solution is the list of jobs
+            to execute in order. Problems is a list of DependencyError
+            instances, in the order they were found, one for each job that
+            had to be dropped from the graph (and from the visit list) to
+            come up with the solution.
+
+        This never raises, a job affected by a problem is dropped and the
+        search goes on. The outcome is the same as that of repeatedly calling
+        :meth:`resolve_dependencies()` and dropping the affected job after
+        each error but the graph is traversed only once.
+        """
+        visit_list = list(visit_list)
+        last_visit_list = self._last_visit_list
+        if last_visit_list is not None and (
+            visit_list[: len(last_visit_list)] == last_visit_list
+        ):
+            # Jobs were only appended (if anything), carry on from there
+            # unless the dependencies of an already visited job may depend
+            # on the appended jobs
+            if len(visit_list) == len(last_visit_list):
+                return list(self._solution), list(self._problems)
+            if not self._saw_volatile:
+                logger.debug(_("Extending the last solution"))
+                self._extend(visit_list)
+                return list(self._solution), list(self._problems)
+        self._reset()
+        self._problems = []
+        self._extend(visit_list)
+        return list(self._solution), list(self._problems)
+
+    @property
+    def visit_list(self):
+        """
+        List of jobs that were visited by the last call to :meth:`solve()`.
+
+        This is the list passed to :meth:`solve()` without the jobs that had
+        to be dropped.
+        """
+        return list(self._get_visit_list())
+
+    def _extend(self, visit_list):
+        start = len(self._visit_list)
+        self._visit_list = visit_list
+        self._live_visit_list = None
+        for index in range(start, len(visit_list)):
+            job = visit_list[index]
+            self._visit_index_map.setdefault(job.id, []).append(index)
+            if job in self._pending_drop_list:
+                self._pending_drop_list.remove(job)
+                self._dropped_index_set.add(index)
+        for index in range(start, len(visit_list)):
+            self._visit_root(index)
+        self._last_visit_list = list(visit_list)
 
     def _solve(self, visit_list=None):
         """
@@ -341,72 +465,196 @@ class DependencySolver:
         logger.debug(_("Solver visit list: %r"), visit_list)
         if visit_list is None:
             visit_list = self._job_list
-        for job in visit_list:
-            self._visit(job=job, visit_list=visit_list)
+        self._visit_list = visit_list
+        self._live_visit_list = visit_list
+        for index in range(len(visit_list)):
+            self._visit_root(index)
         logger.debug(_("Done solving"))
         # Return the solution
         return self._solution
 
-    def _visit(self, job, visit_list, trail=None):
+    def _visit_root(self, index):
+        if index in self._dropped_index_set:
+            return
+        job = self._visit_list[index]
+        if job.id not in self._job_map or job.id in self._broken_id_set:
+            logger.debug(_("Visiting job that's not on the job_list: %r"), job)
+            self._missing_id_set.add(job.id)
+            self._fail(DependencyUnknownError(job), [])
+            return
+        self._visit(job)
+
+    def _get_visit_list(self):
+        if self._live_visit_list is None:
+            self._live_visit_list = [
+                job
+                for index, job in enumerate(self._visit_list)
+                if index not in self._dropped_index_set
+            ]
+        return self._live_visit_list
+
+    def _get_dependency_list(self, job):
+        if job.id in self.VOLATILE_JOB_IDS:
+            self._saw_volatile = True
+            return list(
+                job.controller.get_dependency_set(job, self._get_visit_list())
+            )
+        try:
+            return self._dependency_cache[job.id]
+        except KeyError:
+            dependency_list = list(
+                job.controller.get_dependency_set(job, self._get_visit_list())
+            )
+            self._dependency_cache[job.id] = dependency_list
+            return dependency_list
+
+    def _visit(self, job):
         """
         Internal method of DependencySolver.
 
-        Called each time a node is visited. Nodes already seen in _visited are
-        skipped. Attempts to enumerate all dependencies (both direct and
-        resource) and resolve them. Missing jobs cause DependencyMissingError
-        to be raised. Calls _visit recursively on all dependencies.
+        Visits a job and (iteratively) all of its dependencies, both direct
+        and resource ones. Nodes already visited are skipped. Missing jobs
+        and dependency loops are reported with :meth:`_fail()`.
         """
-        try:
-            color = self._job_color_map[job.id]
-        except KeyError:
-            logger.debug(_("Visiting job that's not on the job_list: %r"), job)
-            raise DependencyUnknownError(job)
-        logger.debug(_("Visiting job %s (color %s)"), job.id, color)
-        if color == self.COLOR_WHITE:
-            # This node has not been visited yet. Let's mark it as GRAY (being
-            # visited) and iterate through the list of dependencies
-            self._job_color_map[job.id] = self.COLOR_GRAY
-            # If the trail was not specified start a trail for this node
-            if trail is None:
-                trail = [job]
-            for dep_type, job_id in job.controller.get_dependency_set(
-                job, visit_list
-            ):
-                # Dependency is just an id, we need to resolve it
-                # to a job instance. This can fail (missing dependencies)
-                # so let's guard against that.
-                try:
-                    next_job = self._job_map[job_id]
-                except KeyError:
-                    logger.debug(
-                        _("Found missing dependency: %r from %r"), job_id, job
-                    )
-                    raise DependencyMissingError(job, job_id, dep_type)
-                else:
-                    # For each dependency that we visit let's reuse the trail
-                    # to give proper error messages if a dependency loop exists
-                    logger.debug(_("Visiting dependency: %r"), next_job)
-                    # Update the trail as we visit that node
-                    trail.append(next_job)
-                    self._visit(next_job, visit_list, trail)
-                    trail.pop()
-            # We've visited (recursively) all dependencies of this node,
-            # let's color it black and append it to the solution list.
-            logger.debug(_("Appending %r to solution"), job)
-            self._job_color_map[job.id] = self.COLOR_BLACK
-            self._solution.append(job)
-        elif color == self.COLOR_GRAY:
-            # This node is not fully traced yet but has been visited already
-            # so we've found a dependency loop. We need to cut the initial
-            # part of the trail so that we only report the part that actually
-            # forms a loop
-            trail = trail[trail.index(job) :]
-            logger.debug(_("Found dependency cycle: %r"), trail)
-            raise DependencyCycleError(trail)
-        else:
-            assert color == self.COLOR_BLACK
+        logger.debug(
+            _("Visiting job %s (color %s)"),
+            job.id,
+            self._job_color_map.get(job.id, self.COLOR_WHITE),
+        )
+        if job.id in self._job_color_map:
             # This node has been visited and is fully traced.
             # We can just skip it and go back
+            return
+        # The stack of nodes being visited. Each frame is a list of the job,
+        # an iterator over its dependencies, the dependency that is being
+        # followed (or None) and the length of the solution when the visit
+        # started. The jobs on the stack also form the trail used to report
+        # dependency loops.
+        stack = []
+        self._push(stack, job)
+        while stack:
+            frame = stack[-1]
+            job, dep_iter, dep = frame[:3]
+            if dep is None:
+                dep = frame[2] = next(dep_iter, None)
+            if dep is None:
+                # We've visited all dependencies of this node, let's color
+                # it black and append it to the solution list.
+                logger.debug(_("Appending %r to solution"), job)
+                self._job_color_map[job.id] = self.COLOR_BLACK
+                self._solution.append(job)
+                stack.pop()
+                if stack:
+                    stack[-1][2] = None
+                continue
+            dep_type, job_id = dep
+            # Dependency is just an id, we need to resolve it to a job
+            # instance. This can fail (missing dependencies) so let's guard
+            # against that.
+            next_job = self._job_map.get(job_id)
+            if next_job is None or job_id in self._broken_id_set:
+                logger.debug(
+                    _("Found missing dependency: %r from %r"), job_id, job
+                )
+                self._missing_id_set.add(job_id)
+                self._fail(
+                    DependencyMissingError(job, job_id, dep_type), stack
+                )
+                continue
+            color = self._job_color_map.get(job_id, self.COLOR_WHITE)
+            if color == self.COLOR_WHITE:
+                logger.debug(_("Visiting dependency: %r"), next_job)
+                self._push(stack, next_job)
+            elif color == self.COLOR_GRAY:
+                # This node is not fully traced yet but has been visited
+                # already so we've found a dependency loop. We need to cut the
+                # initial part of the trail so that we only report the part
+                # that actually forms a loop
+                trail = [frame[0] for frame in stack]
+                trail = trail[trail.index(next_job) :] + [next_job]
+                logger.debug(_("Found dependency cycle: %r"), trail)
+                self._fail(DependencyCycleError(trail), stack)
+            else:
+                assert color == self.COLOR_BLACK
+                frame[2] = None
+
+    def _push(self, stack, job):
+        # This node has not been visited yet. Let's mark it as GRAY (being
+        # visited) and iterate through the list of dependencies
+        self._job_color_map[job.id] = self.COLOR_GRAY
+        self._visited_id_set.add(job.id)
+        stack.append(
+            [
+                job,
+                iter(self._get_dependency_list(job)),
+                None,
+                len(self._solution),
+            ]
+        )
+
+    def _fail(self, exc, stack):
+        """
+        Internal method of DependencySolver.
+
+        Raises the given DependencyError or, when solving with
+        :meth:`solve()`, records it and drops the affected job.
+
+        Dropping a job that is being visited unwinds the stack up to that
+        job. Everything visited since that job was reached is forgotten and
+        visited again later if anything else needs it, the job just below it
+        on the stack is left to find out that its dependency is gone. This
+        gives the same outcome as starting over without the affected job.
+        """
+        if self._problems is None:
+            raise exc
+        self._problems.append(exc)
+        job = exc.affected_job
+        self._broken_id_set.add(job.id)
+        # The affected job is dropped from the list of jobs to visit (once)
+        for index in self._visit_index_map.get(job.id, ()):
+            if (
+                index not in self._dropped_index_set
+                and self._visit_list[index] == job
+            ):
+                self._dropped_index_set.add(index)
+                self._live_visit_list = None
+                break
+        else:
+            self._pending_drop_list.append(job)
+        depth = next(
+            (i for i, frame in enumerate(stack) if frame[0] is job), None
+        )
+        if depth is None:
+            return
+        self._job_color_map[job.id] = self.COLOR_BLACK
+        # The dependencies of a volatile job depend on the visit list which
+        # was just changed. If one is being visited, the search has to go
+        # through its (new) dependencies again from the start.
+        volatile_depth = next(
+            (
+                i
+                for i, frame in enumerate(stack[:depth])
+                if frame[0].id in self.VOLATILE_JOB_IDS
+            ),
+            None,
+        )
+        if volatile_depth is None:
+            # Forget everything visited since the affected job was reached
+            mark = stack[depth][3]
+        else:
+            # Forget everything visited since the volatile job was reached
+            depth = volatile_depth + 1
+            mark = stack[volatile_depth][3]
+        for frame in stack[depth:]:
+            if frame[0] is not job:
+                del self._job_color_map[frame[0].id]
+        del stack[depth:]
+        for solved_job in self._solution[mark:]:
+            del self._job_color_map[solved_job.id]
+        del self._solution[mark:]
+        if volatile_depth is not None:
+            stack[-1][1] = iter(self._get_dependency_list(stack[-1][0]))
+            stack[-1][2] = None
 
     @staticmethod
     def _get_job_map(job_list):
@@ -26,15 +26,14 @@ import gzip
 import io
 import logging
 import os
-import select
 import subprocess
 import sys
 import tempfile
-import threading
 import time
 
 from plainbox.abc import IJobResult, IJobRunner
 from plainbox.i18n import gettext as _
+from plainbox.impl import pod
 from plainbox.impl.color import Colorizer
 from plainbox.impl.unit.job import supported_plugins
 from plainbox.impl.unit.unit import on_ubuntucore
@@ -45,6 +44,9 @@ from plainbox.impl.runner import IOLogRecordGenerator
 from plainbox.impl.runner import JobRunnerUIDelegate
 from plainbox.impl.runner import slugify
 from plainbox.impl.jobcache import ResourceJobCache
+from plainbox.impl.jobcgroup import JobCgroupManager
+from plainbox.impl.secure.privileged_broker import PrivilegedBroker
+from plainbox.impl.secure.privileged_broker import PrivilegedBrokerError
 from plainbox.impl.secure.sudo_broker import sudo_password_provider
 from plainbox.impl.session.storage import WellKnownDirsHelper
 from plainbox.vendor import extcmd
@@ -87,6 +89,11 @@ class UnifiedRunner(IJobRunner):
         self._password_provider = password_provider
         self._stdin = stdin
         self._running_jobs_pid = None
+        self._running_jobs_broker = None
+        # helper running the root jobs, started with the first one
+        # (False when it could not be started)
+        self._privileged_broker = None
+        self._cgroup_manager = JobCgroupManager()
         self._extra_env = extra_env
 
     def run_job(self, job, job_state, environ=None, ui=None):
@@ -184,7 +191,15 @@ class UnifiedRunner(IJobRunner):
                 ]
             )
             ecmd = extcmd.ExternalCommandWithDelegate(delegate)
-            return_code = self.execute_job(job, environ, ecmd, self._stdin)
+            cgroup = self._cgroup_manager.create(slug)
+            resource_usage = pod.UNSET
+            try:
+                return_code = self.execute_job(
+                    job, environ, ecmd, self._stdin, cgroup
+                )
+            finally:
+                if cgroup:
+                    resource_usage = cgroup.release()
             io_log_gen.on_new_record.disconnect(writer.write_record)
         if return_code == 0:
             outcome = IJobResult.OUTCOME_PASS
@@ -197,98 +212,100 @@ class UnifiedRunner(IJobRunner):
             return_code=return_code,
             io_log_filename=log,
             execution_duration=time.time() - start_time,
+            resource_usage=resource_usage,
         )
 
-    def execute_job(self, job, environ, extcmd_popen, stdin=None):
-        """Run the 'binary' associated with the job."""
+    def execute_job(self, job, environ, extcmd_popen, stdin=None, cgroup=None):
+        """
+        Run the 'binary' associated with the job.
+
+        When a :class:`~plainbox.impl.jobcgroup.JobCgroup` is given, the
+        process of the job is started in it.
+        """
         target_user = job.user or self._user_provider()
         if target_user == getpass.getuser():
             target_user = None
 
         def call(extcmd_popen, *args, **kwargs):
             """Handle low-level subprocess stuff."""
-            is_alive = True
             # Notify that the process is about to start
             extcmd_popen._delegate.on_begin(args, kwargs)
             # Setup stdout/stderr redirection
             kwargs["stdout"] = subprocess.PIPE
             kwargs["stderr"] = subprocess.PIPE
             kwargs["start_new_session"] = True
+            if cgroup:
+                kwargs["preexec_fn"] = cgroup.attach
             # Prepare stdio supply
             in_r, in_w = os.pipe()
-            # first let's punch the password in
-            # we need it only if the target user differs from the one that
-            # started checkbox and when changing the user (sudo) requires
-            # password
-            if target_user and self._password_provider:
-                password = self._password_provider()
-                if password:
-                    os.write(in_w, password + b"\n")
-
-            def stdin_forwarder(stdin):
-                """Forward data from one pipe to the other."""
-                # use systems stdin if the stdin pipe wasn't provided
-                stdin = stdin or sys.stdin
-                try:
-                    while is_alive:
-                        if stdin in select.select([stdin], [], [], 0)[0]:
-                            buf = stdin.readline()
-                            if buf == "":
-                                break
-                            os.write(in_w, buf.encode(stdin.encoding))
-                        else:
-                            time.sleep(0.1)
-                except BrokenPipeError:
-                    pass
-                os.close(in_w)
-
-            forwarder_thread = threading.Thread(
-                target=stdin_forwarder, args=(stdin,)
-            )
-            forwarder_thread.start()
             kwargs["stdin"] = in_r
+            broker = None
+            if target_user == "root":
+                broker = self._get_privileged_broker()
+
+            def interrupt():
+                import signal
+
+                self.send_signal(signal.SIGKILL, target_user)
+                if cgroup:
+                    # including what left the process group
+                    cgroup.kill()
+                # And send a notification about this
+                extcmd_popen._delegate.on_interrupt()
 
             # Start the process
-            proc = extcmd_popen._popen(*args, **kwargs)
+            proc = None
+            try:
+                if broker:
+                    # the helper already runs as root, skip sudo
+                    argv = args[0][len(get_sudo_command(target_user)) :]
+                    try:
+                        proc = broker.launch(
+                            argv,
+                            in_r,
+                            kwargs.get("cwd"),
+                            cgroup.path if cgroup else None,
+                        )
+                    except PrivilegedBrokerError as exc:
+                        logger.warning(
+                            _("Using sudo to run root jobs: %s"), exc
+                        )
+                        broker = None
+                if proc is None:
+                    # first let's punch the password in
+                    # we need it only if the target user differs from the one
+                    # that started checkbox and when changing the user (sudo)
+                    # requires password
+                    if target_user and self._password_provider:
+                        password = self._password_provider()
+                        if password:
+                            os.write(in_w, password + b"\n")
+                    proc = extcmd_popen._popen(*args, **kwargs)
+            except BaseException:
+                os.close(in_w)
+                raise
+            finally:
+                os.close(in_r)
             self._running_jobs_pid = proc.pid
-            # Setup all worker threads. By now the pipes have been created and
-            # proc.stdout/proc.stderr point to open pipe objects.
-            stdout_reader = threading.Thread(
-                target=extcmd_popen._read_stream, args=(proc.stdout, "stdout")
-            )
-            stderr_reader = threading.Thread(
-                target=extcmd_popen._read_stream, args=(proc.stderr, "stderr")
-            )
-            queue_worker = threading.Thread(target=extcmd_popen._drain_queue)
-            # Start all workers
-            queue_worker.start()
-            stdout_reader.start()
-            stderr_reader.start()
+            self._running_jobs_broker = broker
             try:
+                # Collect the output and forward the stdin (use systems
+                # stdin if the stdin pipe wasn't provided) until the child
+                # closes its output, all from this thread
+                extcmd_popen._multiplex(
+                    proc, stdin or sys.stdin, in_w, on_interrupt=interrupt
+                )
                 while True:
                     try:
                         proc.wait()
                         break
                     except KeyboardInterrupt:
-                        is_alive = False
-                        import signal
-
-                        self.send_signal(signal.SIGKILL, target_user)
-                        # And send a notification about this
-                        extcmd_popen._delegate.on_interrupt()
+                        interrupt()
             finally:
                 self._running_jobs_pid = None
-                # Wait until all worker threads shut down
-                stdout_reader.join()
+                self._running_jobs_broker = None
                 proc.stdout.close()
-                stderr_reader.join()
                 proc.stderr.close()
-                # Tell the queue worker to shut down
-                extcmd_popen._queue.put(None)
-                queue_worker.join()
-                os.close(in_r)
-                is_alive = False
-                forwarder_thread.join()
             # Notify that the process has finished
             extcmd_popen._delegate.on_end(proc.returncode)
             return proc.returncode
@@ -426,12 +443,33 @@ class UnifiedRunner(IJobRunner):
             self._jobs_io_log_dir, "{}.record.gz".format(slugify(job.id))
         )
 
+    def _get_privileged_broker(self):
+        """Get the helper that runs the root jobs, None to use sudo."""
+        if self._privileged_broker is None:
+            broker = PrivilegedBroker(self._password_provider)
+            try:
+                broker.start()
+            except OSError as exc:
+                logger.warning(_("Using sudo to run root jobs: %s"), exc)
+                broker = False
+            self._privileged_broker = broker
+        if self._privileged_broker and self._privileged_broker.is_running:
+            return self._privileged_broker
+        return None
+
     def send_signal(self, signal, target_user):
         if not self._running_jobs_pid:
             # this can happen because the kill command is issued
             # just as the job finishes
             logger.error("No job is currently running")
             return
+        broker = self._running_jobs_broker
+        if broker is not None:
+            try:
+                broker.send_signal(self._running_jobs_pid, signal)
+                return
+            except PrivilegedBrokerError as exc:
+                logger.warning(_("Using sudo to kill the job: %s"), exc)
         if not target_user:
             os.kill(self._running_jobs_pid, signal)
         else:
@@ -649,27 +687,32 @@ def get_differential_execution_environment(
     return delta_env
 
 
+def get_sudo_command(target_user):
+    """Generate the sudo prefix of the commands run as another user."""
+    # we want sudo to:
+    #   - have no prompt (--prompt '')
+    #   - reset the timestamp, so it predictably asks for password
+    #     (--reset-timestamp)
+    #   - gets password as the first line of stdin (--stdin)
+    #   - change the user to the target user (--user)
+    return [
+        "sudo",
+        "--prompt",
+        "",
+        "--reset-timestamp",
+        "--stdin",
+        "--user",
+        target_user,
+    ]
+
+
 def get_execution_command(
     job, environ, session_id, nest_dir, target_user=None, extra_env=None
 ):
     """Generate a command argv to run in the shell."""
     cmd = []
     if target_user:
-        # we want sudo to:
-        #   - have no prompt (--prompt '')
-        #   - reset the timestamp, so it predictably asks for password
-        #     (--reset-timestamp)
-        #   - gets password as the first line of stdin (--stdin)
-        #   - change the user to the target user (--user)
-        cmd = [
-            "sudo",
-            "--prompt",
-            "",
-            "--reset-timestamp",
-            "--stdin",
-            "--user",
-            target_user,
-        ]
+        cmd = get_sudo_command(target_user)
     cmd += ["env"]
     if target_user:
         env = get_differential_execution_environment(
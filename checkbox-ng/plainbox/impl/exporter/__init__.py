@@ -30,6 +30,7 @@ from collections import OrderedDict
 from io import RawIOBase
 from logging import getLogger
 import base64
+import codecs
 
 from plainbox.i18n import gettext as _
 from plainbox.abc import ISessionStateExporter
@@ -268,6 +269,10 @@ class SessionStateExporterBase(ISessionStateExporter):
                 data["result_map"][job_id][
                     "execution_duration"
                 ] = job_state.result.execution_duration
+            if job_state.result.resource_usage:
+                data["result_map"][job_id][
+                    "resource_usage"
+                ] = job_state.result.resource_usage
             if self.OPTION_WITH_COMMENTS in self._option_list:
                 data["result_map"][job_id][
                     "comments"
@@ -362,6 +367,34 @@ class SessionStateExporterBase(ISessionStateExporter):
             for record in io_log
         ]
 
+    @classmethod
+    def _iter_io_log_lines(cls, io_log, stream_name=None, errors="replace"):
+        """
+        Yield the lines of text (without line endings) of an IO log.
+
+        The log is decoded record by record so the memory used depends on
+        the length of the longest line, not on the size of the log. Only
+        the records of ``stream_name`` are considered, if given.
+        """
+        decoder = codecs.getincrementaldecoder("UTF-8")(errors)
+        pending = ""
+        for record in io_log:
+            if stream_name is not None and record.stream_name != stream_name:
+                continue
+            pending += decoder.decode(record.data)
+            lines = pending.splitlines(True)
+            pending = ""
+            # the last line may continue in the next record, including a
+            # "\r" that may be followed by "\n"
+            last = lines[-1] if lines else ""
+            if last.endswith("\r") or last.splitlines() == [last]:
+                pending = lines.pop()
+            for line in lines:
+                yield line.splitlines()[0]
+        pending += decoder.decode(b"", final=True)
+        for line in pending.splitlines():
+            yield line
+
     @staticmethod
     def _trim_session_manager(session_manager):
         """
@@ -25,6 +25,7 @@
     THIS MODULE DOES NOT HAVE A STABLE PUBLIC API
 """
 
+import codecs
 import json
 import re
 from collections import OrderedDict
@@ -82,6 +83,163 @@ def highlight_keys(text):
     return re.sub(r"(\w+:\s)", r"<b>\1</b>", text)
 
 
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_JSON_STRING_BODY = re.compile(
+    r'(?:[^"\\\x00-\x1f]+|\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4}))*'
+)
+_JSON_NUMBER_CHARS = re.compile(r"[-+0-9.eE]*")
+_JSON_NUMBER = re.compile(
+    r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?"
+)
+# json.loads() accepts, and json.dumps() emits, the non-standard NaN and
+# infinities
+_JSON_LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+_JSON_LITERAL_MAX = max(len(literal) for literal in _JSON_LITERALS)
+
+
+def validate_json_stream(stream, chunk_size=64 * 1024):
+    """
+    Check that a stream contains exactly one JSON document.
+
+    The stream is read in chunks and only its syntax is checked, values are
+    never decoded, so the memory used doesn't depend on the size of the
+    document (json.load() would hold the text and the decoded values).
+
+    :returns:
+        A list of problems, empty if the document is valid.
+    """
+    decoder = codecs.getincrementaldecoder("UTF-8")()
+    buf = ""
+    pos = 0
+    offset = 0
+    eof = False
+    stack = []
+    expect = "value"
+    in_string = False
+
+    def fill():
+        # keep the unprocessed tail and append the next chunk
+        nonlocal buf, pos, offset, eof
+        chunk = stream.read(chunk_size)
+        if isinstance(chunk, bytes):
+            text = decoder.decode(chunk, final=not chunk)
+        else:
+            text = chunk
+        eof = not chunk
+        offset += pos
+        buf = buf[pos:] + text
+        pos = 0
+
+    def problem(message):
+        return ["{} (char {})".format(message, offset + pos)]
+
+    try:
+        while True:
+            if pos >= len(buf):
+                if eof:
+                    break
+                fill()
+                continue
+            if in_string:
+                pos = _JSON_STRING_BODY.match(buf, pos).end()
+                if pos == len(buf):
+                    continue
+                if buf[pos] == '"':
+                    pos += 1
+                    in_string = False
+                elif buf[pos] == "\\" and not eof and len(buf) - pos < 6:
+                    # an escape sequence cut by the end of the chunk
+                    fill()
+                else:
+                    return problem("Invalid control character or escape")
+                continue
+            pos = _JSON_WHITESPACE.match(buf, pos).end()
+            if pos == len(buf):
+                continue
+            char = buf[pos]
+            closer = {"{": "}", "[": "]"}.get(stack[-1] if stack else None)
+            if expect in ("value", "value_or_close"):
+                if char == "]" and expect == "value_or_close":
+                    stack.pop()
+                    pos += 1
+                elif char in "{[":
+                    stack.append(char)
+                    expect = (
+                        "key_or_close" if char == "{" else "value_or_close"
+                    )
+                    pos += 1
+                    continue
+                elif char == '"':
+                    in_string = True
+                    pos += 1
+                elif buf.startswith(_JSON_LITERALS, pos):
+                    for literal in _JSON_LITERALS:
+                        if buf.startswith(literal, pos):
+                            pos += len(literal)
+                            break
+                elif (
+                    len(buf) - pos < _JSON_LITERAL_MAX
+                    and not eof
+                    and any(
+                        literal.startswith(buf[pos:])
+                        for literal in _JSON_LITERALS
+                    )
+                ):
+                    # the literal may continue in the next chunk
+                    fill()
+                    continue
+                elif char in "-0123456789":
+                    # the number may continue in the next chunk
+                    if (
+                        _JSON_NUMBER_CHARS.match(buf, pos).end() == len(buf)
+                        and not eof
+                    ):
+                        fill()
+                        continue
+                    match = _JSON_NUMBER.match(buf, pos)
+                    if match is None:
+                        return problem("Expecting value")
+                    pos = match.end()
+                else:
+                    return problem("Expecting value")
+                expect = "comma_or_close" if stack else "end"
+            elif expect in ("key", "key_or_close"):
+                if char == '"':
+                    in_string = True
+                    expect = "colon"
+                elif char == "}" and expect == "key_or_close":
+                    stack.pop()
+                    expect = "comma_or_close" if stack else "end"
+                else:
+                    return problem(
+                        "Expecting property name enclosed in double quotes"
+                    )
+                pos += 1
+            elif expect == "colon":
+                if char != ":":
+                    return problem("Expecting ':' delimiter")
+                expect = "value"
+                pos += 1
+            elif expect == "comma_or_close":
+                if char == ",":
+                    expect = "key" if closer == "}" else "value"
+                elif char == closer:
+                    stack.pop()
+                    expect = "comma_or_close" if stack else "end"
+                else:
+                    return problem("Expecting ',' delimiter")
+                pos += 1
+            else:
+                return problem("Extra data")
+    except UnicodeDecodeError as exc:
+        return [str(exc)]
+    if in_string:
+        return problem("Unterminated string")
+    if expect != "end":
+        return problem("Unexpected end of document")
+    return []
+
+
 class Jinja2SessionStateExporter(SessionStateExporterBase):
     """Session state exporter that renders output using jinja2 template."""
 
@@ -261,10 +419,6 @@ class Jinja2SessionStateExporter(SessionStateExporterBase):
         # keeping it as a method to make it tidy and consistent with
         # any other possible validator that may use self
         try:
-            # manually reading the stream to ensure decoding
-            raw = stream.read()
-            s = raw.decode("utf-8") if type(raw) == bytes else raw
-            json.loads(s)
-            return []
+            return validate_json_stream(stream)
         except Exception as exc:
             return [str(exc)]
@@ -315,6 +315,29 @@ class SessionStateExporterBaseTests(TestCase):
             ],
         )
 
+    def test_iter_io_log_lines(self):
+        cls = self.TestSessionStateExporter
+        # lines split across records, a "\r\n" split in two and a
+        # multi-byte character split in two
+        io_log = (
+            IOLogRecord(0, "stdout", b"fo"),
+            IOLogRecord(1, "stderr", b"o\r"),
+            IOLogRecord(2, "stdout", b"\nb\xc3"),
+            IOLogRecord(3, "stdout", b"\xa9\n\nend"),
+        )
+        self.assertEqual(
+            list(cls._iter_io_log_lines(io_log)), ["foo", "b\xe9", "", "end"]
+        )
+        self.assertEqual(
+            list(cls._iter_io_log_lines(io_log, "stdout")),
+            ["fo", "b\xe9", "", "end"],
+        )
+        self.assertEqual(list(cls._iter_io_log_lines(())), [])
+        binary = (IOLogRecord(0, "stdout", b"\xff\n"),)
+        self.assertEqual(list(cls._iter_io_log_lines(binary)), ["\ufffd"])
+        with self.assertRaises(UnicodeDecodeError):
+            list(cls._iter_io_log_lines(binary, errors="strict"))
+
     def test_category_map(self):
         """
         Ensure that passing OPTION_WITH_CATEGORY_MAP causes a category id ->
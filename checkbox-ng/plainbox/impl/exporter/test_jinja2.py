@@ -24,12 +24,15 @@ Test definitions for plainbox.impl.exporter.jinja2 module
 """
 
 from io import BytesIO
+from io import StringIO
 from tempfile import TemporaryDirectory
 from textwrap import dedent
 from unittest import TestCase
+import json
 import os
 
 from plainbox.impl.exporter.jinja2 import Jinja2SessionStateExporter
+from plainbox.impl.exporter.jinja2 import validate_json_stream
 from plainbox.impl.result import MemoryJobResult
 from plainbox.impl.session.state import SessionMetaData
 from plainbox.impl.unit.exporter import ExporterError
@@ -137,3 +140,53 @@ class Jinja2SessionStateExporterTests(TestCase):
                 exporter.dump_from_session_manager(
                     self.manager_single_job, stream
                 )
+
+
+class ValidateJSONStreamTests(TestCase):
+    def validate(self, text, chunk_size=3):
+        return validate_json_stream(BytesIO(text.encode("UTF-8")), chunk_size)
+
+    def test_valid(self):
+        for text in (
+            '{"a": [1, -2.5e+3, true, false, null, "x\\"\\u00e9"]}',
+            '  "caf\u00e9"  ',
+            "[]",
+            "{}",
+            "0",
+        ):
+            self.assertEqual(self.validate(text), [], text)
+            self.assertEqual(self.validate(text, 1024), [], text)
+
+    def test_invalid(self):
+        for text in (
+            "",
+            '{"a": 1,}',
+            "[1 2]",
+            '{"a" 1}',
+            '{"a": 1} x',
+            '"unterminated',
+            '"bad \\q escape"',
+            "[01]",
+            "[-]",
+            "[tru]",
+            '{"a": [1}',
+        ):
+            self.assertNotEqual(self.validate(text), [], text)
+
+    def test_non_finite_numbers(self):
+        # same verdict as json.loads(), which the jsonify filter matches
+        for value in (float("nan"), float("inf"), float("-inf")):
+            text = json.dumps({"a": [value, 1]})
+            self.assertEqual(json.loads(text)["a"][1], 1)
+            for chunk_size in (1, 3, 1024):
+                self.assertEqual(self.validate(text, chunk_size), [], text)
+        for text in ("[-Inf]", "[nan]", "[Infinit]", "[- Infinity]"):
+            with self.assertRaises(ValueError):
+                json.loads(text)
+            self.assertNotEqual(self.validate(text), [], text)
+
+    def test_invalid_utf8(self):
+        self.assertNotEqual(validate_json_stream(BytesIO(b'"\xff"')), [])
+
+    def test_text_stream(self):
+        self.assertEqual(validate_json_stream(StringIO("[1]")), [])
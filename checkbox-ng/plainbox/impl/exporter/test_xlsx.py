@@ -21,6 +21,8 @@ from unittest import TestCase
 from unittest.mock import MagicMock, ANY
 
 from plainbox.impl.exporter.xlsx import XLSXSessionStateExporter
+from plainbox.impl.result import IOLogRecord
+from plainbox.impl.result import MemoryJobResult
 from plainbox.impl.session import SessionState
 from plainbox.impl.unit.job import JobDefinition
 from plainbox.impl.unit.category import CategoryUnit
@@ -104,3 +106,43 @@ class XLSXSessionStateExporterTests(TestCase):
         self_mock.worksheet4.write_row.assert_any_call(
             ANY, 0, ["B", "blocker", "B"], ANY
         )
+
+    def _data(self, job, io_log):
+        state = SessionState([job])
+        state.update_job_result(
+            job, MemoryJobResult({"outcome": "pass", "io_log": io_log})
+        )
+        data = {"manager": MagicMock()}
+        data["manager"].state = state
+        return data
+
+    def test_io_log_preview(self):
+        exporter = XLSXSessionStateExporter()
+        job = JobDefinition({"id": "A", "plugin": "shell"})
+        data = self._data(job, [IOLogRecord(0, "stdout", b"1\n2\n3\n\n  \n")])
+        self.assertEqual(exporter._io_log_preview(data, "A"), "1\n2\n3")
+        data = self._data(
+            job,
+            [
+                IOLogRecord(0, "stdout", "{}\n".format(i).encode())
+                for i in range(10000)
+            ],
+        )
+        self.assertEqual(exporter._io_log_preview(data, "A"), "0\n1\n2\n[...]")
+
+    def test_write_attachments(self):
+        self_mock = MagicMock()
+        job = JobDefinition({"id": "A", "plugin": "attachment"})
+        data = self._data(job, [IOLogRecord(0, "stdout", b"line1\nline2\n")])
+        exporter = XLSXSessionStateExporter()
+        for name in ("_attachment_list", "_is_text", "_iter_job_io_log_lines"):
+            setattr(self_mock, name, getattr(exporter, name))
+        XLSXSessionStateExporter.write_attachments(self_mock, data)
+        self_mock.worksheet5.write.assert_any_call(4, 1, "A", ANY)
+        self_mock.worksheet5.write.assert_any_call(6, 1, "line1", ANY)
+        self_mock.worksheet5.write.assert_any_call(7, 1, "line2", ANY)
+        # binary attachments are skipped
+        data = self._data(job, [IOLogRecord(0, "stdout", b"\xff")])
+        self_mock.worksheet5.reset_mock()
+        XLSXSessionStateExporter.write_attachments(self_mock, data)
+        self.assertFalse(self_mock.worksheet5.write.called)
@@ -27,8 +27,8 @@ XLSX exporter
     THIS MODULE DOES NOT HAVE A STABLE PUBLIC API
 """
 
-from base64 import standard_b64decode
 from collections import defaultdict, OrderedDict
+from itertools import islice
 import re
 
 # Lazy load these modules
@@ -94,13 +94,14 @@ class XLSXSessionStateExporter(SessionStateExporterBase):
                     raise ValueError(
                         _("Unsupported option: {}").format(option)
                     )
+        # IO logs and attachments are not part of the session data subset,
+        # they are streamed from the job results while the report is written
+        # (see _iter_job_io_log_lines) so that memory usage doesn't grow with
+        # the size of the session.
         self._option_list = (
-            SessionStateExporterBase.OPTION_WITH_IO_LOG,
-            SessionStateExporterBase.OPTION_FLATTEN_IO_LOG,
             SessionStateExporterBase.OPTION_WITH_COMMENTS,
             SessionStateExporterBase.OPTION_WITH_JOB_DEFS,
             SessionStateExporterBase.OPTION_WITH_RESOURCE_MAP,
-            SessionStateExporterBase.OPTION_WITH_ATTACHMENTS,
             SessionStateExporterBase.OPTION_WITH_CATEGORY_MAP,
             SessionStateExporterBase.OPTION_WITH_CERTIFICATION_STATUS,
         )
@@ -337,9 +338,10 @@ class XLSXSessionStateExporter(SessionStateExporterBase):
             if result:
                 hw_info["processors"] = result.pop()
         resource = "com.canonical.certification::lspci_attachment"
-        if resource in data["attachment_map"]:
-            lspci = data["attachment_map"][resource]
-            content = standard_b64decode(lspci.encode()).decode("UTF-8")
+        if resource in self._attachment_list(data):
+            content = "\n".join(
+                self._iter_job_io_log_lines(data, resource, "stdout")
+            )
             match = re.search(
                 r"ISA bridge.*?:\s(?P<chipset>.*?)\sLPC", content
             )
@@ -391,6 +393,46 @@ class XLSXSessionStateExporter(SessionStateExporterBase):
             hw_info["bluetooth"] = bluetooth
         return hw_info
 
+    def _job_state_map(self, data):
+        return data["manager"].state.job_state_map
+
+    def _attachment_list(self, data):
+        """List of attachment jobs that have a result."""
+        return [
+            job_id
+            for job_id, job_state in self._job_state_map(data).items()
+            if job_state.job.plugin == "attachment"
+            and job_state.result.outcome is not None
+        ]
+
+    def _iter_job_io_log_lines(
+        self, data, job_id, stream_name=None, errors="replace"
+    ):
+        """Yield the lines of the IO log of a job, read from its result."""
+        io_log = self._job_state_map(data)[job_id].result.get_io_log()
+        return self._iter_io_log_lines(io_log, stream_name, errors)
+
+    def _is_text(self, data, job_id, stream_name=None):
+        try:
+            for _line in self._iter_job_io_log_lines(
+                data, job_id, stream_name, errors="strict"
+            ):
+                pass
+        except UnicodeDecodeError:
+            return False
+        return True
+
+    def _io_log_preview(self, data, job_id):
+        """First three lines of the IO log of a job (with a marker if cut)."""
+        lines = self._iter_job_io_log_lines(data, job_id)
+        head = list(islice(lines, 3))
+        # trailing blank lines are not worth a marker
+        cut = any(line.strip() for line in lines)
+        io_log = "\n".join(head)
+        if cut:
+            return io_log + "\n[...]"
+        return io_log.rstrip()
+
     def _get_resource_list(self, data, resource_id):
         """
         Get a list of resource objects associated with the specified job
@@ -762,18 +804,8 @@ class XLSXSessionStateExporter(SessionStateExporterBase):
                 )
                 io_log = " "
                 if result_map[job]["plugin"] not in ("resource", "attachment"):
-                    if result_map[job]["io_log"]:
-                        io_log = (
-                            standard_b64decode(
-                                result_map[job]["io_log"].encode()
-                            )
-                            .decode("UTF-8")
-                            .rstrip()
-                        )
+                    io_log = self._io_log_preview(self._data, job) or " "
                 io_lines = len(io_log.splitlines()) - 1
-                if io_lines > 2:
-                    io_log = "\n".join(io_log.splitlines()[:3]) + "\n[...]"
-                    io_lines = len(io_log.splitlines()) - 1
                 desc_lines = len(
                     result_map[job].get("description", "").splitlines()
                 )
@@ -953,12 +985,8 @@ class XLSXSessionStateExporter(SessionStateExporterBase):
         self.worksheet5.set_column(0, 0, 5)
         self.worksheet5.set_column(1, 1, 120)
         i = 4
-        for name in data["attachment_map"]:
-            try:
-                content = standard_b64decode(
-                    data["attachment_map"][name].encode()
-                ).decode("UTF-8")
-            except UnicodeDecodeError:
+        for name in self._attachment_list(data):
+            if not self._is_text(data, name, "stdout"):
                 # Skip binary attachments
                 continue
             self.worksheet5.write(i, 1, name, self.format03)
@@ -967,7 +995,7 @@ class XLSXSessionStateExporter(SessionStateExporterBase):
                 i, None, None, {"level": 1, "hidden": True}
             )
             j = 1
-            for line in content.splitlines():
+            for line in self._iter_job_io_log_lines(data, name, "stdout"):
                 self.worksheet5.write(j + i, 1, line, self.format13)
                 self.worksheet5.set_row(
                     j + i, None, None, {"level": 1, "hidden": True}
@@ -985,13 +1013,7 @@ class XLSXSessionStateExporter(SessionStateExporterBase):
             for job_id in data["result_map"]
             if data["result_map"][job_id]["plugin"] == "resource"
         ]:
-            io_log = " "
-            try:
-                if data["result_map"][name]["io_log"]:
-                    io_log = standard_b64decode(
-                        data["result_map"][name]["io_log"].encode()
-                    ).decode("UTF-8")
-            except UnicodeDecodeError:
+            if not self._is_text(data, name):
                 # Skip binary output
                 continue
             self.worksheet6.write(i, 1, name, self.format03)
@@ -1000,7 +1022,7 @@ class XLSXSessionStateExporter(SessionStateExporterBase):
                 i, None, None, {"level": 1, "hidden": True}
             )
             j = 1
-            for line in io_log.splitlines():
+            for line in self._iter_job_io_log_lines(data, name):
                 self.worksheet6.write(j + i, 1, line, self.format13)
                 self.worksheet6.set_row(
                     j + i, None, None, {"level": 1, "hidden": True}
@@ -1030,7 +1052,10 @@ class XLSXSessionStateExporter(SessionStateExporterBase):
         """
         from xlsxwriter.workbook import Workbook
 
+        # constant_memory flushes every row to disk once the next row is
+        # started, rows must be written in order
         self.workbook = Workbook(stream, {"constant_memory": True})
+        self._data = data
         self._set_formats()
         if self.OPTION_WITH_SYSTEM_INFO in self._option_list:
             self.worksheet1 = self.workbook.add_worksheet(_("System Info"))
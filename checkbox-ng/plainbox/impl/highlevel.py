@@ -199,6 +199,14 @@ class Explorer:
             for unit in provider.unit_list:
                 provider_obj.children.append(self._unit_to_obj(unit))
             service_obj.children.append(provider_obj)
+        service_obj.children.extend(self.get_storage_objects())
+        return service_obj
+
+    def get_storage_objects(self):
+        """
+        Get a list of :class:`PlainBoxObject` for all the session storages
+        """
+        storage_obj_list = []
         for storage in WellKnownDirsHelper.get_storage_list():
             storage_obj = PlainBoxObject(
                 storage,
@@ -211,8 +219,8 @@ class Explorer:
                     )
                 ),
             )
-            service_obj.children.append(storage_obj)
-        return service_obj
+            storage_obj_list.append(storage_obj)
+        return storage_obj_list
 
     def _unit_to_obj(self, unit):
         # Yes, this should be moved to member methods
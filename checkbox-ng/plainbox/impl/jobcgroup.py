@@ -0,0 +1,298 @@
+# This file is part of Checkbox.
+#
+# Copyright 2026 Canonical Ltd.
+#
+# Checkbox is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# Checkbox is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Checkbox.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Job containment with cgroup v2.
+
+:mod:`plainbox.impl.jobcgroup` -- per-job control groups
+========================================================
+
+Each job can be run in its own cgroup, created below the cgroup of Checkbox
+when the unified (v2) hierarchy is mounted and that cgroup is delegated to
+the user running Checkbox. All the processes started by the job stay in the
+cgroup, even the ones that daemonize, so they can all be killed when the job
+ends and the resources they used can be accounted for.
+
+When cgroups cannot be used, :meth:`JobCgroupManager.create()` returns None
+and the jobs run as they used to.
+"""
+
+import itertools
+import logging
+import os
+import signal
+import time
+
+logger = logging.getLogger("plainbox.jobcgroup")
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+# controllers enabled for the job cgroups when they are available
+_CONTROLLERS = ("memory", "io")
+
+
+def get_own_cgroup(proc_path="/proc/self/cgroup"):
+    """
+    Get the path of the cgroup v2 of this process.
+
+    :returns:
+        The path relative to the root of the hierarchy or None if the
+        process is not in a unified hierarchy.
+    """
+    try:
+        with open(proc_path, "rt", encoding="UTF-8") as stream:
+            for line in stream:
+                hierarchy, controllers, path = line.rstrip("\n").split(":", 2)
+                if hierarchy == "0" and not controllers:
+                    return path
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class JobCgroup:
+    """A cgroup containing the processes of one job."""
+
+    def __init__(self, path):
+        self.path = path
+        # computed now as attach() runs in the child, between fork and exec
+        self._procs_path = os.fsencode(os.path.join(path, "cgroup.procs"))
+
+    def attach(self):
+        """
+        Move the calling process to the cgroup.
+
+        This is meant to be used as ``preexec_fn`` so it only makes system
+        calls and never raises: a job that cannot be moved still runs.
+        """
+        try:
+            fd = os.open(self._procs_path, os.O_WRONLY)
+            try:
+                os.write(fd, b"0")
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+
+    def get_pid_list(self):
+        """Get the processes in the cgroup."""
+        try:
+            with open(self._procs_path, "rt") as stream:
+                return [int(line) for line in stream if line.strip()]
+        except OSError:
+            return []
+
+    def is_populated(self):
+        """Check if there is any process left in the cgroup."""
+        fields = self._read_keyed("cgroup.events")
+        if "populated" in fields:
+            return fields["populated"] != "0"
+        return bool(self.get_pid_list())
+
+    def kill(self):
+        """Kill all the processes in the cgroup."""
+        try:
+            with open(os.path.join(self.path, "cgroup.kill"), "wt") as stream:
+                stream.write("1")
+            return
+        except OSError:
+            # cgroup.kill is available since Linux 5.14
+            pass
+        for pid in self.get_pid_list():
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+    def get_usage(self):
+        """
+        Get the resources used by the processes of the cgroup.
+
+        :returns:
+            A dictionary with the CPU time (``cpu_usec``, ``cpu_user_usec``
+            and ``cpu_system_usec``), the ``memory_peak`` and the bytes read
+            and written (``io_read_bytes`` and ``io_write_bytes``) and, for
+            each resource, the total time in microseconds some or all of the
+            processes were stalled waiting for it (e.g.
+            ``memory_pressure_some_usec``). Only the values the kernel
+            provides are included.
+        """
+        usage = {}
+        cpu_stat = self._read_keyed("cpu.stat")
+        for key, name in (
+            ("usage_usec", "cpu_usec"),
+            ("user_usec", "cpu_user_usec"),
+            ("system_usec", "cpu_system_usec"),
+        ):
+            if key in cpu_stat:
+                usage[name] = int(cpu_stat[key])
+        memory_peak = self._read("memory.peak")
+        if memory_peak and memory_peak.isdigit():
+            usage["memory_peak"] = int(memory_peak)
+        io_stat = self._read("io.stat")
+        if io_stat is not None:
+            read_bytes = write_bytes = 0
+            for line in io_stat.splitlines():
+                for field in line.split()[1:]:
+                    key, _, value = field.partition("=")
+                    if key == "rbytes":
+                        read_bytes += int(value)
+                    elif key == "wbytes":
+                        write_bytes += int(value)
+            usage["io_read_bytes"] = read_bytes
+            usage["io_write_bytes"] = write_bytes
+        for resource in ("cpu", "memory", "io"):
+            pressure = self._read("{}.pressure".format(resource))
+            if pressure is None:
+                continue
+            for line in pressure.splitlines():
+                kind, *fields = line.split()
+                for field in fields:
+                    key, _, value = field.partition("=")
+                    if key == "total":
+                        usage["{}_pressure_{}_usec".format(resource, kind)] = (
+                            int(value)
+                        )
+        return usage
+
+    def release(self, timeout=5):
+        """
+        Kill what is left of the job, account for it and remove the cgroup.
+
+        :returns:
+            The resource usage of the job, see :meth:`get_usage()`.
+        """
+        pid_list = self.get_pid_list()
+        if pid_list:
+            logger.warning(
+                "Killing %d process(es) left behind by the job: %s",
+                len(pid_list),
+                " ".join(str(pid) for pid in pid_list),
+            )
+            self.kill()
+        deadline = time.monotonic() + timeout
+        while self.is_populated() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        usage = self.get_usage()
+        try:
+            os.rmdir(self.path)
+        except OSError as exc:
+            logger.warning("Cannot remove cgroup %s: %s", self.path, exc)
+        return usage
+
+    def _read(self, name):
+        try:
+            with open(os.path.join(self.path, name), "rt") as stream:
+                return stream.read().strip()
+        except OSError:
+            return None
+
+    def _read_keyed(self, name):
+        text = self._read(name)
+        if text is None:
+            return {}
+        return dict(
+            line.split(None, 1) for line in text.splitlines() if " " in line
+        )
+
+
+class JobCgroupManager:
+    """Create the cgroups of the jobs below the cgroup of this process."""
+
+    def __init__(self, root=CGROUP_ROOT, own_cgroup=None):
+        self._root = root
+        self._own_cgroup = own_cgroup
+        self._base = None
+        self._counter = itertools.count()
+
+    @property
+    def base(self):
+        """
+        The cgroup the job cgroups are created in.
+
+        This is None when cgroups cannot be used to run the jobs.
+        """
+        if self._base is None:
+            self._base = self._find_base() or False
+        return self._base or None
+
+    def _find_base(self):
+        root = self._root
+        if not os.path.isfile(os.path.join(root, "cgroup.controllers")):
+            # hybrid hierarchy, the unified one has no controller
+            root = os.path.join(root, "unified")
+        if not os.path.isfile(os.path.join(root, "cgroup.controllers")):
+            logger.debug("No cgroup v2 hierarchy in %s", self._root)
+            return None
+        own_cgroup = self._own_cgroup or get_own_cgroup()
+        if own_cgroup is None:
+            return None
+        base = os.path.normpath(os.path.join(root, own_cgroup.lstrip("/")))
+        # Moving a process from the base to a job cgroup needs write access
+        # to the cgroup.procs file of both
+        if not (
+            os.access(base, os.W_OK)
+            and os.access(os.path.join(base, "cgroup.procs"), os.W_OK)
+        ):
+            logger.debug("Cgroup %s is not delegated to this user", base)
+            return None
+        self._enable_controllers(base)
+        return base
+
+    def _enable_controllers(self, base):
+        try:
+            with open(os.path.join(base, "cgroup.controllers")) as stream:
+                available = stream.read().split()
+            with open(os.path.join(base, "cgroup.subtree_control")) as stream:
+                enabled = stream.read().split()
+        except OSError:
+            return
+        for controller in _CONTROLLERS:
+            if controller not in available or controller in enabled:
+                continue
+            try:
+                with open(
+                    os.path.join(base, "cgroup.subtree_control"), "wt"
+                ) as stream:
+                    stream.write("+{}".format(controller))
+            except OSError as exc:
+                # the base cgroup has processes (it is not the root cgroup)
+                logger.debug(
+                    "Cannot enable the %s controller: %s", controller, exc
+                )
+
+    def create(self, name):
+        """
+        Create the cgroup of a job.
+
+        :param name:
+            A name for the cgroup, unique among the running jobs.
+        :returns:
+            A :class:`JobCgroup` or None if cgroups cannot be used.
+        """
+        if self.base is None:
+            return None
+        path = os.path.join(
+            self.base,
+            "checkbox-{}-{}-{}".format(
+                os.getpid(), next(self._counter), name[:100]
+            ),
+        )
+        try:
+            os.mkdir(path)
+        except OSError as exc:
+            logger.warning("Cannot create cgroup %s: %s", path, exc)
+            return None
+        return JobCgroup(path)
@@ -59,7 +59,9 @@ For a full description check out the documentation of the :class:`POD` and
 """
 from collections import OrderedDict
 from collections import namedtuple
+from contextlib import contextmanager
 from functools import total_ordering
+from logging import DEBUG
 from logging import getLogger
 from textwrap import dedent
 
@@ -77,6 +79,8 @@ __all__ = (
     "type_convert_assign_filter",
     "type_check_assign_filter",
     "modify_field_docstring",
+    "batched_signal",
+    "batch_signals",
 )
 
 
@@ -359,12 +363,32 @@ class Field:
         if self.notify and hasattr(instance, self.instance_attr):
             if new_value != old_value:
                 setattr(instance, self.instance_attr, new_value)
-                on_field_change = getattr(instance, self.signal_name)
-                on_field_change(old_value, new_value)
+                self._notify(instance, old_value, new_value)
         else:
             # Or just fire away
             setattr(instance, self.instance_attr, new_value)
 
+    def _notify(self, instance: object, old: "Any", new: "Any") -> None:
+        """
+        Fire the change notification signal of an object.
+
+        The signal of each object is only created when something accesses it,
+        typically to connect a listener. Until then, nothing but the first
+        responder can be listening so it is called directly, and not at all
+        if all it would do is to log a debug message that nobody wants.
+        """
+        signal_def = getattr(type(instance), self.signal_name, None)
+        if not isinstance(signal_def, morris.signal) or (
+            signal_def.name in instance.__dict__.get("__signals__", ())
+        ):
+            getattr(instance, self.signal_name)(old, new)
+            return
+        first_responder = signal_def.first_responder
+        if getattr(
+            first_responder, "__func__", None
+        ) is not Field.on_changed or _logger.isEnabledFor(DEBUG):
+            first_responder(instance, old, new)
+
     def on_changed(self, pod: "POD", old: "Any", new: "Any") -> None:
         """
         The first responder of the per-field modification signal.
@@ -386,6 +410,64 @@ class Field:
         )
 
 
+class batched_signal(morris.signal):
+    """
+    Signal whose notifications can be coalesced during bulk updates.
+
+    It is defined and used just like :class:`morris.signal`, typically as a
+    method decorator. While :func:`batch_signals()` is active for an object,
+    firing such a signal of that object only records that it is due. It is
+    then fired once, with the last arguments it was fired with, when the
+    batch is over.
+    """
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        signals = instance.__dict__.setdefault("__signals__", {})
+        if self._name not in signals:
+            signal = _BatchedObjectSignal(self._name, instance)
+            signal.connect(morris.boundmethod(instance, self._first_responder))
+            signals[self._name] = signal
+        return signals[self._name]
+
+
+class _BatchedObjectSignal(morris.signal):
+    """A :class:`batched_signal` specific to one object."""
+
+    def __init__(self, name, instance):
+        super().__init__(name)
+        self._instance = instance
+
+    def fire(self, args, kwargs):
+        pending = self._instance.__dict__.get("__pending_signals__")
+        if pending is not None:
+            pending[self] = (args, kwargs)
+        else:
+            super().fire(args, kwargs)
+
+
+@contextmanager
+def batch_signals(instance):
+    """
+    Coalesce the notifications of the batched signals of an object.
+
+    Each :class:`batched_signal` of the object fired in the ``with`` block is
+    fired once when the block is over (only by the outermost block, if they
+    are nested).
+    """
+    if "__pending_signals__" in instance.__dict__:
+        yield
+        return
+    pending = instance.__dict__["__pending_signals__"] = {}
+    try:
+        yield
+    finally:
+        del instance.__dict__["__pending_signals__"]
+        for signal, (args, kwargs) in pending.items():
+            signal.fire(args, kwargs)
+
+
 @total_ordering
 class PODBase:
     """Base class for POD-like classes."""
@@ -254,6 +254,12 @@ class JobResultBuilder(pod.POD):
         pod.UNSET,
         assign_filter_list=[pod.unset_or_typed],
     )
+    resource_usage = pod.Field(
+        "resources used by the (optional) test process",
+        dict,
+        pod.UNSET,
+        assign_filter_list=[pod.unset_or_typed],
+    )
 
     def add_comment(self, comment):
         """
@@ -398,6 +404,15 @@ class _JobResultBase(IJobResult):
         """return code of the command associated with the job, if any."""
         return self._data.get("return_code")
 
+    @property
+    def resource_usage(self):
+        """
+        resources used by the command associated with the job, if known.
+
+        See :meth:`plainbox.impl.jobcgroup.JobCgroup.get_usage()`.
+        """
+        return self._data.get("resource_usage")
+
     @property
     def io_log(self):
         return tuple(self.get_io_log())
@@ -0,0 +1,473 @@
+# This file is part of Checkbox.
+#
+# Copyright 2026 Canonical Ltd.
+#
+# Checkbox is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# Checkbox is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Checkbox.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Persistent privileged helper for the jobs that run as root.
+
+Running a job through ``sudo`` costs a complete authentication and start-up
+of sudo for each job, and once more to deliver a signal to it. Instead, the
+:class:`PrivilegedBroker` uses sudo once to start a helper process as root
+(the ``__main__`` part of this module). The helper connects back to the
+broker over a Unix socket and then launches, signals and reaps the jobs on
+its behalf. The standard streams of the jobs are passed to the helper as
+file descriptors so the output of the jobs is read directly by the caller.
+
+The helper is started as a script and only depends on the standard library.
+Its environment is the one sudo gives to the commands it runs, so the jobs
+launched by the helper get the same environment as with a sudo call per job.
+"""
+
+import array
+import json
+import logging
+import os
+import selectors
+import shutil
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger("plainbox.secure.privileged_broker")
+
+_HEADER = struct.Struct("!I")
+# stdin, stdout and stderr of a job
+_MAX_FDS = 3
+_RECV_SIZE = 65536
+
+
+class PrivilegedBrokerError(OSError):
+    """Exception raised when the privileged helper is not usable."""
+
+
+def _send(sock, message, fds=()):
+    """Send a message, along with the given file descriptors."""
+    data = json.dumps(message).encode("UTF-8")
+    data = _HEADER.pack(len(data)) + data
+    ancillary = []
+    if fds:
+        ancillary = [
+            (socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", fds))
+        ]
+    sent = sock.sendmsg([data], ancillary)
+    if sent < len(data):
+        sock.sendall(data[sent:])
+
+
+class _Receiver:
+    """Split the data received on a stream socket into messages."""
+
+    def __init__(self, sock):
+        self._sock = sock
+        self._buffer = bytearray()
+        self._fds = []
+
+    def receive(self):
+        """
+        Receive the next message.
+
+        :returns:
+            A tuple (message, fds) with the file descriptors received since
+            the previous message, message being None at the end of the
+            stream.
+        """
+        while True:
+            if len(self._buffer) >= _HEADER.size:
+                (size,) = _HEADER.unpack_from(self._buffer)
+                end = _HEADER.size + size
+                if len(self._buffer) >= end:
+                    message = json.loads(
+                        self._buffer[_HEADER.size : end].decode("UTF-8")
+                    )
+                    del self._buffer[:end]
+                    fds, self._fds = self._fds, []
+                    return message, fds
+            fds = array.array("i")
+            data, ancdata, flags, addr = self._sock.recvmsg(
+                _RECV_SIZE, socket.CMSG_SPACE(_MAX_FDS * fds.itemsize)
+            )
+            for level, kind, cdata in ancdata:
+                if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                    fds.frombytes(
+                        cdata[: len(cdata) - len(cdata) % fds.itemsize]
+                    )
+            self._fds.extend(fds)
+            if not data:
+                fds, self._fds = self._fds, []
+                return None, fds
+            self._buffer += data
+
+
+def _get_peer_uid(sock):
+    creds = sock.getsockopt(
+        socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+    )
+    pid, uid, gid = struct.unpack("3i", creds)
+    return uid
+
+
+class BrokeredProcess:
+    """
+    A job started by the privileged helper.
+
+    This implements the part of :class:`subprocess.Popen` used to run jobs.
+    """
+
+    def __init__(self, broker, pid, stdout, stderr):
+        self._broker = broker
+        self.pid = pid
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = None
+
+    def wait(self):
+        if self.returncode is None:
+            self.returncode = self._broker.wait(self.pid)
+        return self.returncode
+
+    def send_signal(self, sig):
+        self._broker.send_signal(self.pid, sig)
+
+
+class PrivilegedBroker:
+    """
+    Client of the privileged helper.
+
+    The helper is started by :meth:`start()` and exits when the broker is
+    closed (or when the process that owns the broker exits).
+    """
+
+    # uid the helper has to run as
+    helper_uid = 0
+
+    def __init__(self, password_provider=None, timeout=30):
+        self._password_provider = password_provider
+        self._timeout = timeout
+        self._helper = None
+        self._sock = None
+        self._receiver = None
+        self._send_lock = threading.Lock()
+        self._exit_map = {}
+
+    @property
+    def is_running(self):
+        """Check if the helper can be used."""
+        return self._sock is not None and self._helper.poll() is None
+
+    def get_helper_command(self, path):
+        """Get the command that starts the helper connecting to path."""
+        # Same sudo options as when running a job (see
+        # plainbox.impl.execution.get_execution_command())
+        return [
+            "sudo",
+            "--prompt",
+            "",
+            "--reset-timestamp",
+            "--stdin",
+            "--user",
+            "root",
+            sys.executable,
+            os.path.abspath(__file__),
+            path,
+        ]
+
+    def start(self):
+        """
+        Start the helper and wait for it to connect.
+
+        :raises PrivilegedBrokerError:
+            If the helper could not be started.
+        """
+        if not hasattr(socket, "SO_PEERCRED"):
+            raise PrivilegedBrokerError("SO_PEERCRED is not supported")
+        # Only the owner (and root) can access this directory
+        socket_dir = tempfile.mkdtemp(prefix="checkbox-broker-")
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            path = os.path.join(socket_dir, "socket")
+            listener.bind(path)
+            listener.listen(1)
+            listener.settimeout(0.1)
+            in_r, in_w = os.pipe()
+            try:
+                password = None
+                if self._password_provider:
+                    password = self._password_provider()
+                if password:
+                    os.write(in_w, password + b"\n")
+                os.close(in_w)
+                self._helper = subprocess.Popen(
+                    self.get_helper_command(path),
+                    stdin=in_r,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    start_new_session=True,
+                )
+            finally:
+                os.close(in_r)
+            self._sock = self._accept(listener)
+        finally:
+            listener.close()
+            shutil.rmtree(socket_dir, ignore_errors=True)
+        self._receiver = _Receiver(self._sock)
+        logger.debug("Privileged helper started (pid %s)", self._helper.pid)
+
+    def _accept(self, listener):
+        deadline = time.monotonic() + self._timeout
+        while time.monotonic() < deadline:
+            if self._helper.poll() is not None:
+                raise PrivilegedBrokerError(
+                    "privileged helper exited with {}".format(
+                        self._helper.returncode
+                    )
+                )
+            try:
+                conn, addr = listener.accept()
+            except socket.timeout:
+                continue
+            if _get_peer_uid(conn) != self.helper_uid:
+                # not the helper
+                conn.close()
+                continue
+            conn.settimeout(None)
+            return conn
+        self._helper.kill()
+        self._helper.wait()
+        raise PrivilegedBrokerError("privileged helper did not connect")
+
+    def close(self):
+        """Stop the helper."""
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        if self._helper is not None:
+            try:
+                self._helper.wait(self._timeout)
+            except subprocess.TimeoutExpired:
+                logger.warning("Privileged helper did not exit")
+            self._helper = None
+
+    def launch(self, argv, stdin, cwd=None, cgroup=None):
+        """
+        Launch a command as root.
+
+        :param argv:
+            The command to run. It is run with the environment sudo gave to
+            the helper.
+        :param stdin:
+            File descriptor to use as standard input.
+        :param cwd:
+            The working directory of the command.
+        :param cgroup:
+            Path of the cgroup to start the command in.
+        :returns:
+            A :class:`BrokeredProcess` whose stdout and stderr are readable.
+            The command runs in a new session.
+        :raises PrivilegedBrokerError:
+            If the helper cannot be used.
+        :raises OSError:
+            If the command could not be started.
+        """
+        if self._sock is None:
+            raise PrivilegedBrokerError("privileged helper is not running")
+        out_r, out_w = os.pipe()
+        err_r, err_w = os.pipe()
+        try:
+            try:
+                with self._send_lock:
+                    _send(
+                        self._sock,
+                        {
+                            "op": "launch",
+                            "argv": argv,
+                            "cwd": cwd,
+                            "cgroup": cgroup,
+                        },
+                        [stdin, out_w, err_w],
+                    )
+            finally:
+                os.close(out_w)
+                os.close(err_w)
+            reply = self._receive_reply()
+        except BaseException:
+            os.close(out_r)
+            os.close(err_r)
+            raise
+        if "error" in reply:
+            os.close(out_r)
+            os.close(err_r)
+            raise OSError(reply.get("errno"), reply["error"])
+        return BrokeredProcess(
+            self, reply["pid"], os.fdopen(out_r, "rb"), os.fdopen(err_r, "rb")
+        )
+
+    def send_signal(self, pid, sig):
+        """
+        Send a signal to the process group of a launched command.
+
+        Unlike the other methods, this one can be called from any thread.
+        """
+        if self._sock is None:
+            raise PrivilegedBrokerError("privileged helper is not running")
+        with self._send_lock:
+            _send(self._sock, {"op": "signal", "pid": pid, "signal": sig})
+
+    def wait(self, pid):
+        """Wait for a launched command to exit, return its return code."""
+        while pid not in self._exit_map:
+            self._handle_event(self._receive())
+        return self._exit_map.pop(pid)
+
+    def _receive(self):
+        try:
+            message, fds = self._receiver.receive()
+        except OSError as exc:
+            raise PrivilegedBrokerError(
+                "lost the privileged helper: {}".format(exc)
+            )
+        for fd in fds:
+            os.close(fd)
+        if message is None:
+            self._sock.close()
+            self._sock = None
+            raise PrivilegedBrokerError("privileged helper exited")
+        return message
+
+    def _receive_reply(self):
+        while True:
+            message = self._receive()
+            if "event" not in message:
+                return message
+            self._handle_event(message)
+
+    def _handle_event(self, message):
+        if message.get("event") == "exit":
+            self._exit_map[message["pid"]] = message["returncode"]
+
+
+def serve(path):
+    """
+    Run the privileged helper, connecting to the broker listening on path.
+
+    :returns:
+        The exit code of the helper.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    # Only serve the user that started the helper
+    sudo_uid = os.environ.get("SUDO_UID")
+    if sudo_uid is not None and _get_peer_uid(sock) != int(sudo_uid):
+        return 1
+    receiver = _Receiver(sock)
+    children = {}
+    wakeup_r, wakeup_w = os.pipe()
+    os.set_blocking(wakeup_r, False)
+    os.set_blocking(wakeup_w, False)
+    signal.set_wakeup_fd(wakeup_w)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+    selector = selectors.DefaultSelector()
+    selector.register(sock, selectors.EVENT_READ)
+    selector.register(wakeup_r, selectors.EVENT_READ)
+    while True:
+        for key, events in selector.select():
+            if key.fileobj is sock:
+                message, fds = receiver.receive()
+                if message is None:
+                    return 0
+                _handle_request(sock, message, fds, children)
+            else:
+                while True:
+                    try:
+                        if not os.read(wakeup_r, 512):
+                            break
+                    except BlockingIOError:
+                        break
+        # Reap the commands that exited
+        for pid, proc in list(children.items()):
+            if proc.poll() is not None:
+                del children[pid]
+                _send(
+                    sock,
+                    {
+                        "event": "exit",
+                        "pid": pid,
+                        "returncode": proc.returncode,
+                    },
+                )
+
+
+def _get_cgroup_attach(cgroup):
+    """Get the preexec_fn moving the command to a cgroup, if any."""
+    if not cgroup:
+        return None
+    procs_path = os.fsencode(os.path.join(cgroup, "cgroup.procs"))
+
+    def attach():
+        # Same as plainbox.impl.jobcgroup.JobCgroup.attach()
+        try:
+            fd = os.open(procs_path, os.O_WRONLY)
+            try:
+                os.write(fd, b"0")
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+
+    return attach
+
+
+def _handle_request(sock, message, fds, children):
+    if message.get("op") == "launch":
+        try:
+            if len(fds) != _MAX_FDS:
+                raise OSError(None, "expected {} descriptors".format(_MAX_FDS))
+            proc = subprocess.Popen(
+                message["argv"],
+                stdin=fds[0],
+                stdout=fds[1],
+                stderr=fds[2],
+                cwd=message.get("cwd"),
+                start_new_session=True,
+                preexec_fn=_get_cgroup_attach(message.get("cgroup")),
+            )
+        except OSError as exc:
+            reply = {"error": str(exc), "errno": exc.errno}
+        else:
+            children[proc.pid] = proc
+            reply = {"pid": proc.pid}
+        finally:
+            for fd in fds:
+                os.close(fd)
+        _send(sock, reply)
+    elif message.get("op") == "signal":
+        for fd in fds:
+            os.close(fd)
+        # Only the commands launched by the helper can be signalled
+        if message["pid"] in children:
+            try:
+                os.killpg(message["pid"], message["signal"])
+            except ProcessLookupError:
+                pass
+    else:
+        for fd in fds:
+            os.close(fd)
+
+
+if __name__ == "__main__":
+    sys.exit(serve(sys.argv[1]))
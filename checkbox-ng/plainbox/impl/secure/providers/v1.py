@@ -47,7 +47,7 @@ from plainbox.impl.secure.plugins import PlugInError
 from plainbox.impl.secure.plugins import now
 from plainbox.impl.secure.rfc822 import FileTextSource
 from plainbox.impl.secure.rfc822 import RFC822SyntaxError
-from plainbox.impl.secure.rfc822 import load_rfc822_records
+from plainbox.impl.secure.rfc822 import load_rfc822_records_fast
 from plainbox.impl.unit import all_units
 from plainbox.impl.unit.file import FileRole
 from plainbox.impl.unit.file import FileUnit
@@ -208,7 +208,7 @@ class UnitPlugIn(ProviderContentPlugIn):
         """
         logger.debug(_("Loading units from %r..."), filename)
         try:
-            records = load_rfc822_records(
+            records = load_rfc822_records_fast(
                 text, source=FileTextSource(filename)
             )
         except RFC822SyntaxError as exc:
@@ -432,3 +432,171 @@ def gen_rfc822_records(stream, data_cls=dict, source=None):
     if record.data:
         logger.debug(_("yielding record: %r"), record)
         yield record
+
+
+class _LazyOriginRFC822Record(RFC822Record):
+    """
+    RFC822Record that builds its origin and field offsets on first access.
+
+    Records produced by :func:`gen_rfc822_records_fast()` only remember the
+    source and a handful of line numbers. The :class:`Origin` instance and the
+    field offset map are constructed (and cached) only if something actually
+    looks at them, which is rare for resource job output.
+    """
+
+    def __init__(
+        self, data, raw_data, source, line_start, line_end, field_lineno_map
+    ):
+        self._data = data
+        self._raw_data = raw_data
+        self._source = source
+        self._line_start = line_start
+        self._line_end = line_end
+        self._field_lineno_map = field_lineno_map
+        self._lazy_origin = None
+        self._lazy_field_offset_map = None
+
+    @property
+    def _origin(self):
+        if self._lazy_origin is None:
+            self._lazy_origin = Origin(
+                self._source, self._line_start, self._line_end
+            )
+        return self._lazy_origin
+
+    @property
+    def field_offset_map(self):
+        if self._lazy_field_offset_map is None:
+            line_start = self._line_start
+            self._lazy_field_offset_map = {
+                key: lineno - line_start
+                for key, lineno in self._field_lineno_map.items()
+            }
+        return self._lazy_field_offset_map
+
+
+def load_rfc822_records_fast(stream, data_cls=dict, source=None):
+    """
+    Load a sequence of rfc822-like records from a text stream (fast path).
+
+    This is the list-returning counterpart of
+    :func:`gen_rfc822_records_fast()`. The arguments and the return value are
+    the same as in :func:`load_rfc822_records()`.
+    """
+    return list(gen_rfc822_records_fast(stream, data_cls, source))
+
+
+def gen_rfc822_records_fast(stream, data_cls=dict, source=None):
+    """
+    Load a sequence of rfc822-like records from a text stream (fast path).
+
+    The arguments, the accepted syntax, the produced records and the raised
+    :class:`RFC822SyntaxError` exceptions are the same as in
+    :func:`gen_rfc822_records()`. The difference is in how the work is done:
+
+    - the whole record is tokenized in one tight loop, without helper
+      closures and without any per-line or per-key debug logging
+    - origins and field offset maps are only computed when they are first
+      accessed (see :class:`_LazyOriginRFC822Record`)
+
+    This makes it suitable for high-volume input such as the output of
+    resource jobs, where the line-level origin is almost never looked at.
+    """
+    if source is None:
+        try:
+            source = FileTextSource(stream.name)
+        except AttributeError:
+            source = UnknownTextSource()
+    # Remember the original stream to report the file name in syntax errors
+    named_stream = stream
+    if isinstance(stream, str):
+        stream = stream.splitlines(True)
+    normalize = normalize_rfc822_value
+    data = data_cls()
+    raw_data = data_cls()
+    field_lineno_map = {}
+    key = None
+    value_list = None
+    line_start = None
+    line_end = None
+    lineno = 0
+    for lineno, line in enumerate(stream, start=1):
+        # Treat # as comments
+        if line.startswith("#"):
+            continue
+        # Treat empty lines as record separators
+        if not line.strip():
+            if key is not None:
+                raw_value = "".join(value_list)
+                raw_data[key] = raw_value
+                data[key] = normalize(raw_value)
+                key = None
+            if data:
+                yield _LazyOriginRFC822Record(
+                    data,
+                    raw_data,
+                    source,
+                    line_start,
+                    line_end,
+                    field_lineno_map,
+                )
+                data = data_cls()
+                raw_data = data_cls()
+                field_lineno_map = {}
+                line_start = line_end = None
+            continue
+        # Treat lines staring with whitespace as multi-line continuation of the
+        # most recently seen key-value
+        if line.startswith(" "):
+            if key is None:
+                raise RFC822SyntaxError(
+                    getattr(named_stream, "name", None),
+                    lineno,
+                    _("Unexpected multi-line value"),
+                )
+            value_list.append(line[1:])
+            line_end = lineno
+            continue
+        # Treat lines with a colon as new key-value pairs
+        if ":" not in line:
+            raise RFC822SyntaxError(
+                getattr(named_stream, "name", None),
+                lineno,
+                _("Unexpected non-empty line: {!r}").format(line),
+            )
+        if line_start is None:
+            line_start = lineno
+        if key is not None:
+            raw_value = "".join(value_list)
+            raw_data[key] = raw_value
+            data[key] = normalize(raw_value)
+        key, value = line.split(":", 1)
+        key = key.strip()
+        value = value.lstrip()
+        if key in data:
+            raise RFC822SyntaxError(
+                getattr(named_stream, "name", None),
+                lineno,
+                _(
+                    "Job has a duplicate key {!r} "
+                    "with old value {!r} and new value {!r}"
+                ).format(key, raw_data[key], value),
+            )
+        if value.strip():
+            value_list = [value]
+            field_lineno_map[key] = lineno
+        else:
+            # See gen_rfc822_records() for the +1 explanation
+            value_list = []
+            field_lineno_map[key] = lineno + 1
+        line_end = lineno
+    # Make sure to commit the last key from the record
+    if key is not None:
+        raw_value = "".join(value_list)
+        raw_data[key] = raw_value
+        data[key] = normalize(raw_value)
+    # Once we've seen the whole file return the last record, if any
+    if data:
+        yield _LazyOriginRFC822Record(
+            data, raw_data, source, line_start, line_end, field_lineno_map
+        )
@@ -0,0 +1,104 @@
+# This file is part of Checkbox.
+#
+# Copyright 2026 Canonical Ltd.
+#
+# Checkbox is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# Checkbox is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Checkbox.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import signal
+import sys
+from unittest import TestCase
+
+from plainbox.impl.secure import privileged_broker
+from plainbox.impl.secure.privileged_broker import PrivilegedBroker
+from plainbox.impl.secure.privileged_broker import PrivilegedBrokerError
+
+
+class UserBroker(PrivilegedBroker):
+    """Broker whose helper runs as the current user, without sudo."""
+
+    helper_uid = os.getuid()
+
+    def get_helper_command(self, path):
+        return [sys.executable, privileged_broker.__file__, path]
+
+
+class PrivilegedBrokerTests(TestCase):
+    def setUp(self):
+        self.broker = UserBroker(timeout=10)
+        self.broker.start()
+        self.addCleanup(self.broker.close)
+
+    def run_command(self, script, stdin_data=b""):
+        in_r, in_w = os.pipe()
+        os.write(in_w, stdin_data)
+        os.close(in_w)
+        try:
+            proc = self.broker.launch(["sh", "-c", script], in_r, "/")
+        finally:
+            os.close(in_r)
+        self.addCleanup(proc.stdout.close)
+        self.addCleanup(proc.stderr.close)
+        return proc
+
+    def test_launch(self):
+        proc = self.run_command(
+            "read x; echo $x $PWD; echo e >&2; exit 3", b"a\n"
+        )
+        self.assertEqual(proc.stdout.read(), b"a /\n")
+        self.assertEqual(proc.stderr.read(), b"e\n")
+        self.assertEqual(proc.wait(), 3)
+        self.assertEqual(proc.returncode, 3)
+
+    def test_concurrent_exits(self):
+        slow = self.run_command("sleep 0.3")
+        fast = self.run_command("exit 1")
+        self.assertEqual(slow.wait(), 0)
+        # the exit of the other command was kept
+        self.assertEqual(fast.wait(), 1)
+
+    def test_signal(self):
+        proc = self.run_command("echo ready; exec sleep 60")
+        self.assertEqual(proc.stdout.readline(), b"ready\n")
+        proc.send_signal(signal.SIGKILL)
+        self.assertEqual(proc.wait(), -signal.SIGKILL)
+
+    def test_launch_error(self):
+        in_r, in_w = os.pipe()
+        os.close(in_w)
+        with self.assertRaises(OSError):
+            self.broker.launch(["/nonexistent"], in_r)
+        os.close(in_r)
+        # the helper is still usable
+        self.assertEqual(self.run_command("exit 0").wait(), 0)
+
+    def test_close(self):
+        self.assertTrue(self.broker.is_running)
+        self.broker.close()
+        self.assertFalse(self.broker.is_running)
+        with self.assertRaises(PrivilegedBrokerError):
+            self.broker.launch(["true"], 0)
+
+
+class PrivilegedBrokerStartTests(TestCase):
+    def test_helper_failure(self):
+        broker = UserBroker(timeout=10)
+        broker.get_helper_command = lambda path: ["false"]
+        with self.assertRaises(PrivilegedBrokerError):
+            broker.start()
+
+    def test_wrong_user(self):
+        broker = UserBroker(timeout=0.5)
+        broker.helper_uid = os.getuid() + 1
+        with self.assertRaises(PrivilegedBrokerError):
+            broker.start()
@@ -33,6 +33,7 @@ from plainbox.impl.secure.origin import UnknownTextSource
 from plainbox.impl.secure.rfc822 import RFC822Record
 from plainbox.impl.secure.rfc822 import RFC822SyntaxError
 from plainbox.impl.secure.rfc822 import load_rfc822_records
+from plainbox.impl.secure.rfc822 import load_rfc822_records_fast
 from plainbox.impl.secure.rfc822 import normalize_rfc822_value
 
 
@@ -449,6 +450,47 @@ class RFC822ParserTests(TestCase):
         )
 
 
+class RFC822FastParserTests(RFC822ParserTests):
+    """
+    Run the same parser tests against the fast-path parser
+    """
+
+    loader = load_rfc822_records_fast
+
+    def test_same_records_as_reference_parser(self):
+        text = (
+            "# comment\n"
+            "a: value-a\n"
+            "b:\n"
+            " value-b.1\n"
+            " .\n"
+            " value-b.2\n"
+            "\n"
+            "\n"
+            "c: value-c\n"
+        )
+        self.assertEqual(
+            load_rfc822_records_fast(text), load_rfc822_records(text)
+        )
+
+    def test_syntax_error_lineno(self):
+        text = "key1: value1\n" "\n" "garbage\n"
+        with NamedStringIO(text, fake_filename="file.txt") as stream:
+            with self.assertRaises(RFC822SyntaxError) as call:
+                load_rfc822_records_fast(stream)
+        self.assertEqual(
+            call.exception,
+            RFC822SyntaxError(
+                "file.txt", 3, "Unexpected non-empty line: 'garbage\\n'"
+            ),
+        )
+
+    def test_origin_is_cached(self):
+        records = load_rfc822_records_fast("key: value\n")
+        self.assertIs(records[0].origin, records[0].origin)
+        self.assertEqual(records[0].origin, Origin(UnknownTextSource(), 1, 1))
+
+
 class NamedStringIO(StringIO):
     """
     Subclass of StringIO with a name attribute.
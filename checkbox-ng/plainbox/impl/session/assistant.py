@@ -501,6 +501,9 @@ class SessionAssistant:
         UsageExpectation.of(self).enforce()
         self._manager = SessionManager.create(prefix=title + "-")
         self._context = self._manager.add_local_device_context()
+        # Collecting the system information is slow, do it while the
+        # session is being set up instead of on first use
+        self._context.state.start_system_information_collection()
         for provider in self._selected_providers:
             if provider.problem_list:
                 _logger.error(
@@ -779,10 +782,15 @@ class SessionAssistant:
         }
 
     @raises(UnexpectedMethodCall)
-    def bootstrap(self):
+    def bootstrap(self, results=None):
         """
         Perform session bootstrap process to discover all content.
 
+        :param results:
+            Optional dictionary mapping job ids to results to use instead of
+            running the bootstrapping jobs, for instance the results recorded
+            by a previous bootstrap. Jobs without a result there are run.
+
         :raises UnexpectedMethodCall:
             If the call is made at an unexpected time. Do not catch this error.
             It is a bug in your program. The error message will indicate what
@@ -823,6 +831,9 @@ class SessionAssistant:
         for job in self._context.state.run_list:
             if self._context.state.job_state_map[job.id].result_history:
                 continue
+            if results and job.id in results:
+                self._context.state.update_job_result(job, results[job.id])
+                continue
             UsageExpectation.of(self).allowed_calls[
                 self.run_job
             ] = "to run bootstrapping job"
@@ -985,6 +996,7 @@ class SessionAssistant:
         # No bootstrap is done update the cache of jobs that were run
         # during bootstrap phase
         self._bootstrap_done_list = self.get_dynamic_done_list()
+        self._context.state.progress.set_ignored(self._bootstrap_done_list)
 
     @raises(KeyError, UnexpectedMethodCall)
     def use_alternate_selection(self, selection: "Iterable[str]"):
@@ -1250,15 +1262,7 @@ class SessionAssistant:
             It is a bug in your program. The error message will indicate what
             is the likely cause.
         """
-        jsm = self._context.state.job_state_map
-        return [
-            job_id
-            for job_id, state in jsm.items()
-            if (
-                state.result.outcome is not None
-                and job_id not in self._bootstrap_done_list
-            )
-        ]
+        return self._context.state.progress.get_done_list()
 
     @raises(UnexpectedMethodCall)
     def get_dynamic_todo_list(self) -> "List[str]":
@@ -1294,13 +1298,45 @@ class SessionAssistant:
             method.
         """
         UsageExpectation.of(self).enforce()
-        # XXX: job_state_map is a bit low level, can we avoid that?
-        jsm = self._context.state.job_state_map
-        return [
-            job.id
-            for job in self._context.state.run_list
-            if jsm[job.id].result.outcome is None
-        ]
+        return self._context.state.progress.get_todo_list()
+
+    @raises(UnexpectedMethodCall)
+    def get_dynamic_todo_count(self) -> int:
+        """
+        Get the number of jobs to run.
+
+        :returns:
+            The length of :meth:`get_dynamic_todo_list()`, computed in
+            constant time.
+        :raises UnexpectedMethodCall:
+            If the call is made at an unexpected time. Do not catch this error.
+            It is a bug in your program. The error message will indicate what
+            is the likely cause.
+        """
+        UsageExpectation.of(self).enforce()
+        return self._context.state.progress.todo_count
+
+    @raises(UnexpectedMethodCall)
+    def get_progress_delta(self, revision=None) -> "Dict[str, Any]":
+        """
+        Get the changes of the done and todo lists since a given revision.
+
+        :param revision:
+            The ``revision`` value of a previous call, or None to get the
+            complete lists.
+        :returns:
+            A dictionary, see :meth:`SessionProgress.get_delta()`. Jobs run
+            during the bootstrap phase are never reported as done.
+        :raises UnexpectedMethodCall:
+            If the call is made at an unexpected time. Do not catch this error.
+            It is a bug in your program. The error message will indicate what
+            is the likely cause.
+
+        This method lets applications that poll the progress after each job
+        (e.g. remote controllers) only transfer what changed.
+        """
+        UsageExpectation.of(self).enforce()
+        return self._context.state.progress.get_delta(revision)
 
     def _strtobool(self, val):
         return val.lower() in ("y", "yes", "t", "true", "on", "1")
@@ -1968,6 +2004,8 @@ class SessionAssistant:
             self.remove_all_filters: "to remove all filters",
             self.get_static_todo_list: "to see what is meant to be executed",
             self.get_dynamic_todo_list: "to see what is yet to be executed",
+            self.get_dynamic_todo_count: "to count what is yet to be executed",
+            self.get_progress_delta: "to see what changed in the progress",
             self.get_manifest_repr: ("to get participating manifest units"),
             self.run_job: "to run a given job",
             self.use_alternate_selection: "to change the selection",
@@ -0,0 +1,218 @@
+# This file is part of Checkbox.
+#
+# Copyright 2026 Canonical Ltd.
+#
+# Checkbox is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# Checkbox is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Checkbox.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Session progress.
+
+:mod:`plainbox.impl.session.progress` -- incremental progress tracking
+=====================================================================
+
+This module contains the :class:`SessionProgress` class that keeps track of
+the jobs that were run (done) and of the jobs that are yet to be run (todo)
+in a session, without looking at every job each time the question is asked.
+"""
+
+import logging
+
+logger = logging.getLogger("plainbox.session.progress")
+
+
+class SessionProgress:
+    """
+    Incrementally maintained progress of a session.
+
+    The progress keeps the ordered indexes of the jobs that have an outcome
+    (done) and of the jobs on the run list that don't (todo). They are
+    updated as results are set on the job states so both counters are
+    available in constant time and listing the jobs only costs the length of
+    the list, whatever the number of jobs in the session.
+
+    Each change is also given a revision number so that remote controllers
+    can only fetch what changed since their last refresh, see
+    :meth:`get_delta()`.
+    """
+
+    def __init__(self, state):
+        self._state = state
+        # job id -> position of the job in the job state map
+        self._position_map = {}
+        self._next_position = 0
+        # jobs that are never reported as done (e.g. bootstrap jobs)
+        self._ignored_id_set = frozenset()
+        # job id -> position, sorted lazily into _done_list
+        self._done_map = {}
+        self._done_list = None
+        # the run list the todo index was built for
+        self._run_list = None
+        self._run_id_set = frozenset()
+        # job id -> None, in run list order; None when it needs a rebuild
+        self._todo_map = None
+        # revision of the last change and of the last change that cannot be
+        # described by the journal (a new run list)
+        self._revision = 0
+        self._reset_revision = 0
+        # (job id, done) for each change after _reset_revision
+        self._journal = []
+        for job_state in state.job_state_map.values():
+            self._on_job_added(job_state.job)
+        state.on_job_added.connect(self._on_job_added)
+        state.on_job_removed.connect(self._on_job_removed)
+
+    @property
+    def revision(self):
+        """Revision of the last change of the progress."""
+        self._sync_run_list()
+        return self._revision
+
+    @property
+    def done_count(self):
+        """Number of jobs that have an outcome."""
+        return len(self._done_map)
+
+    @property
+    def todo_count(self):
+        """Number of jobs on the run list that don't have an outcome yet."""
+        return len(self._get_todo_map())
+
+    def get_done_list(self):
+        """
+        Get the identifiers of the jobs that have an outcome.
+
+        The jobs are listed in the order they were added to the session.
+        """
+        if self._done_list is None:
+            self._done_list = sorted(self._done_map, key=self._done_map.get)
+        return list(self._done_list)
+
+    def get_todo_list(self):
+        """
+        Get the identifiers of the jobs that are yet to be run.
+
+        The jobs are listed in the order of the run list.
+        """
+        return list(self._get_todo_map())
+
+    def set_ignored(self, job_id_list):
+        """Stop reporting the given jobs as done."""
+        self._ignored_id_set = frozenset(job_id_list)
+        for job_id in self._ignored_id_set:
+            if self._done_map.pop(job_id, None) is not None:
+                self._done_list = None
+        self._revision += 1
+        self._reset_revision = self._revision
+        self._journal = []
+
+    def get_delta(self, revision=None):
+        """
+        Get the changes of the progress since a given revision.
+
+        :param revision:
+            The revision returned by a previous call or None
+        :returns:
+            A dictionary with the current ``revision``, ``done_count`` and
+            ``todo_count``. When ``revision`` is None or too old to be
+            described as a sequence of changes ``reset`` is True and ``done``
+            and ``todo`` are the complete lists. Otherwise ``done`` lists the
+            jobs that got an outcome since ``revision`` and ``todo`` the ones
+            that lost it (e.g. to be run again).
+        """
+        self._sync_run_list()
+        delta = {
+            "revision": self._revision,
+            "done_count": self.done_count,
+            "todo_count": self.todo_count,
+        }
+        if revision is None or revision < self._reset_revision:
+            delta["reset"] = True
+            delta["done"] = self.get_done_list()
+            delta["todo"] = self.get_todo_list()
+            return delta
+        delta["reset"] = False
+        delta["done"] = []
+        delta["todo"] = []
+        last_change = {}
+        start = revision - self._reset_revision
+        for job_id, done in self._journal[start:]:
+            last_change.pop(job_id, None)
+            last_change[job_id] = done
+        for job_id, done in last_change.items():
+            if done and job_id in self._done_map:
+                delta["done"].append(job_id)
+            elif not done and job_id in self._run_id_set:
+                delta["todo"].append(job_id)
+        return delta
+
+    def _record(self, job_id, done):
+        self._revision += 1
+        self._journal.append((job_id, done))
+
+    def _sync_run_list(self):
+        run_list = self._state.run_list
+        if run_list is self._run_list:
+            return
+        logger.debug("Run list changed, rebuilding the todo index")
+        self._run_list = run_list
+        self._run_id_set = frozenset(job.id for job in run_list)
+        self._todo_map = None
+        self._revision += 1
+        self._reset_revision = self._revision
+        self._journal = []
+
+    def _get_todo_map(self):
+        self._sync_run_list()
+        if self._todo_map is None:
+            job_state_map = self._state.job_state_map
+            self._todo_map = {
+                job.id: None
+                for job in self._run_list
+                if job_state_map[job.id].result.outcome is None
+            }
+        return self._todo_map
+
+    def _on_job_added(self, job):
+        self._position_map[job.id] = self._next_position
+        self._next_position += 1
+        job_state = self._state.job_state_map[job.id]
+        job_state.on_result_changed.connect(
+            lambda old, new: self._on_result_changed(job.id, new)
+        )
+        if job_state.result.outcome is not None:
+            self._on_result_changed(job.id, job_state.result)
+
+    def _on_job_removed(self, job):
+        self._position_map.pop(job.id, None)
+        if self._done_map.pop(job.id, None) is not None:
+            self._done_list = None
+        if self._todo_map is not None:
+            self._todo_map.pop(job.id, None)
+
+    def _on_result_changed(self, job_id, result):
+        if job_id not in self._position_map:
+            return
+        done = result.outcome is not None
+        if done:
+            if job_id not in self._ignored_id_set:
+                if job_id not in self._done_map:
+                    self._done_list = None
+                self._done_map[job_id] = self._position_map[job_id]
+            if self._todo_map is not None:
+                self._todo_map.pop(job_id, None)
+        else:
+            if self._done_map.pop(job_id, None) is not None:
+                self._done_list = None
+            if job_id in self._run_id_set:
+                # put back in run list order on the next lookup
+                self._todo_map = None
+        self._record(job_id, done)
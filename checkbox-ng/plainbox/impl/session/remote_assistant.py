@@ -395,7 +395,7 @@ class RemoteSessionAssistant:
         self._sa.use_alternate_selection(chosen_jobs)
 
     def finish_job_selection(self):
-        self._jobs_count = len(self._sa.get_dynamic_todo_list())
+        self._jobs_count = self._sa.get_dynamic_todo_count()
         self._state = TestsSelected
 
     @allowed_when(Interacting, TestsSelected)
@@ -435,7 +435,7 @@ class RemoteSessionAssistant:
         """
         _logger.debug("run_job: %r", job_id)
         self._job_index = (
-            self._jobs_count - len(self._sa.get_dynamic_todo_list()) + 1
+            self._jobs_count - self._sa.get_dynamic_todo_count() + 1
         )
         self._currently_running_job = job_id
         self._current_comments = ""
@@ -591,6 +591,17 @@ class RemoteSessionAssistant:
             "todo": self._sa.get_dynamic_todo_list(),
         }
 
+    def get_session_progress_delta(self, revision=None):
+        """
+        Return what changed in the session progress since ``revision``.
+
+        Controllers that refresh their view after every job can pass the
+        ``revision`` of the previous answer to only get the jobs whose
+        state changed, see :meth:`SessionAssistant.get_progress_delta()`.
+        """
+        _logger.debug("get_session_progress_delta(%r)", revision)
+        return self._sa.get_progress_delta(revision)
+
     def finish_job(self, result=None):
         # assert the thread completed
         self.session_change_lock.acquire(blocking=False)
@@ -616,7 +627,7 @@ class RemoteSessionAssistant:
                 result = self._be.wait().get_result()
         self._sa.use_job_result(self._currently_running_job, result)
         if self._state != Bootstrapping:
-            if not self._sa.get_dynamic_todo_list():
+            if not self._sa.get_dynamic_todo_count():
                 if self._launcher.get_value(
                     "ui", "auto_retry"
                 ) and self.get_rerun_candidates("auto"):
@@ -653,7 +664,7 @@ class RemoteSessionAssistant:
         :returns:
             list of dicts representing jobs
         """
-        test_info_list = tuple()
+        test_info_list = []
         for job_no, job_id in enumerate(job_ids, start=offset + 1):
             job = self._sa.get_job(job_id)
             cat_id = self._sa.get_job_state(job.id).effective_category_id
@@ -685,7 +696,7 @@ class RemoteSessionAssistant:
                 "num": job_no,
                 "plugin": job.plugin,
             }
-            test_info_list = test_info_list + ((test_info,))
+            test_info_list.append(test_info)
         return json.dumps(test_info_list)
 
     def delete_sessions(self, session_list):
@@ -201,6 +201,8 @@ class SessionPeekHelper(EnvelopeUnpackMixIn):
             return SessionPeekHelper7().peek_json(json_repr)
         elif version == 8:
             return SessionPeekHelper8().peek_json(json_repr)
+        elif version == 9:
+            return SessionPeekHelper9().peek_json(json_repr)
         else:
             raise IncompatibleSessionError(
                 _("Unsupported version {}").format(version)
@@ -345,6 +347,10 @@ class SessionResumeHelper(EnvelopeUnpackMixIn):
             helper = SessionResumeHelper8(
                 self.job_list, self.flags, self.location
             )
+        elif version == 9:
+            helper = SessionResumeHelper9(
+                self.job_list, self.flags, self.location
+            )
         else:
             raise IncompatibleSessionError(
                 _("Unsupported version {}").format(version)
@@ -624,6 +630,19 @@ class SessionPeekHelper8(MetaDataHelper7MixIn, SessionPeekHelper6):
     """
 
 
+class SessionPeekHelper9(MetaDataHelper7MixIn, SessionPeekHelper6):
+    """
+    Helper class for implementing session peek feature
+
+    This class works with data constructed by
+    :class:`~plainbox.impl.session.suspend.SessionSuspendHelper9` which has
+    been pre-processed by :class:`SessionPeekHelper` (to strip the initial
+    envelope).
+
+    The only goal of this class is to reconstruct session state meta-data.
+    """
+
+
 class SessionResumeHelper1(MetaDataHelper1MixIn):
     """
     Helper class for implementing session resume feature.
@@ -759,26 +778,35 @@ class SessionResumeHelper1(MetaDataHelper1MixIn):
         Any jobs that cannot be processed (generated job) is saved for further
         processing.
         """
-        # Representation of all of the job definitions
-        jobs_repr = _validate(session_repr, key="jobs", value_type=dict)
-        # Representation of all of the job results
-        results_repr = _validate(session_repr, key="results", value_type=dict)
-        # List of jobs (ids) that could not be processed on the first pass
-        leftover_jobs = deque()
-        # Ensure siblings are generated in the session
-        [session.add_unit(u) for u in self.job_list if u.Meta.name == "job"]
-        # Run a first pass through jobs and results. Anything that didn't
-        # work (generated jobs) gets added to leftover_jobs list.
-        # To make this bit deterministic (we like determinism) we're always
-        # going to process job results in alphabetic orderer.
-        first_pass_list = sorted(
-            set(jobs_repr.keys()) | set(results_repr.keys())
-        )
-        for job_id in first_pass_list:
-            try:
-                self._process_job(session, jobs_repr, results_repr, job_id)
-            except KeyError:
-                leftover_jobs.append(job_id)
+        # The intermediate states are not observed, so readiness is only
+        # computed once, at the end
+        with session.bulk_update():
+            # Representation of all of the job definitions
+            jobs_repr = _validate(session_repr, key="jobs", value_type=dict)
+            # Representation of all of the job results
+            results_repr = _validate(
+                session_repr, key="results", value_type=dict
+            )
+            # List of jobs (ids) that could not be processed on the first pass
+            leftover_jobs = deque()
+            # Ensure siblings are generated in the session
+            [
+                session.add_unit(u)
+                for u in self.job_list
+                if u.Meta.name == "job"
+            ]
+            # Run a first pass through jobs and results. Anything that didn't
+            # work (generated jobs) gets added to leftover_jobs list.
+            # To make this bit deterministic (we like determinism) we're always
+            # going to process job results in alphabetic orderer.
+            first_pass_list = sorted(
+                set(jobs_repr.keys()) | set(results_repr.keys())
+            )
+            for job_id in first_pass_list:
+                try:
+                    self._process_job(session, jobs_repr, results_repr, job_id)
+                except KeyError:
+                    leftover_jobs.append(job_id)
 
         leftover_jobs += session_repr.get("metadata", {}).get(
             "rejected_jobs", []
@@ -1016,6 +1044,10 @@ class SessionResumeHelper1(MetaDataHelper1MixIn):
             value_type=float,
             value_none=True,
         )
+        # Only present when it is known
+        resource_usage = result_repr.get("resource_usage")
+        if not isinstance(resource_usage, dict):
+            resource_usage = None
         # Construct either DiskJobResult or MemoryJobResult
         if "io_log_filename" in result_repr:
             io_log_filename = cls._load_io_log_filename(
@@ -1049,6 +1081,7 @@ class SessionResumeHelper1(MetaDataHelper1MixIn):
                     "execution_duration": execution_duration,
                     "io_log_filename": io_log_filename,
                     "return_code": return_code,
+                    "resource_usage": resource_usage,
                 }
             )
         else:
@@ -1065,6 +1098,7 @@ class SessionResumeHelper1(MetaDataHelper1MixIn):
                     "execution_duration": execution_duration,
                     "io_log": io_log,
                     "return_code": return_code,
+                    "resource_usage": resource_usage,
                 }
             )
 
@@ -1266,15 +1300,21 @@ class SessionResumeHelper8(SessionResumeHelper7):
         self, session_state, session_repr
     ):
         _validate(session_repr, key="system_information", value_type=dict)
-        system_information = CollectorOutputs(
+        session_state.system_information = self._build_CollectorOutputs(
+            session_repr["system_information"]
+        )
+
+    @staticmethod
+    def _build_CollectorOutputs(system_information_repr):
+        return CollectorOutputs(
             {
                 tool_name: CollectionOutput.from_dict(tool_output_json)
-                for (tool_name, tool_output_json) in session_repr[
-                    "system_information"
-                ].items()
+                for (
+                    tool_name,
+                    tool_output_json,
+                ) in system_information_repr.items()
             }
         )
-        session_state.system_information = system_information
 
     def _build_SessionState(self, session_repr, early_cb=None):
         session_state = super()._build_SessionState(session_repr, early_cb)
@@ -1284,6 +1324,47 @@ class SessionResumeHelper8(SessionResumeHelper7):
         return session_state
 
 
+class SessionResumeHelper9(SessionResumeHelper8):
+    def _restore_SessionState_system_information(
+        self, session_state, session_repr
+    ):
+        """
+        Restore the system information referenced by the session.
+
+        The system information is either embedded (no session directory was
+        known at suspend time) or saved to a file in the session directory.
+        It is missing if the session was suspended before the collection
+        completed, in which case it is collected again when needed.
+        """
+        if "system_information" in session_repr:
+            super()._restore_SessionState_system_information(
+                session_state, session_repr
+            )
+            return
+        if "system_information_file" not in session_repr:
+            return
+        filename = _validate(
+            session_repr, key="system_information_file", value_type=str
+        )
+        if self.location is None:
+            return
+        pathname = os.path.join(self.location, filename)
+        try:
+            with open(pathname, "rt", encoding="UTF-8") as stream:
+                system_information_repr = json.load(stream)
+        except (OSError, ValueError) as exc:
+            logger.warning(
+                _("Cannot load system information from %s: %s"),
+                pathname,
+                exc,
+            )
+            return
+        _validate(system_information_repr, value_type=dict)
+        session_state.system_information = self._build_CollectorOutputs(
+            system_information_repr
+        )
+
+
 def _validate(obj, **flags):
     """Multi-purpose extraction and validation function."""
     # Fetch data from the container OR use json_repr directly
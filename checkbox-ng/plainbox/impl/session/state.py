@@ -22,6 +22,7 @@ Session State Handling.
 ============================================================
 """
 import collections
+import contextlib
 import json
 import logging
 import re
@@ -29,12 +30,14 @@ import re
 from plainbox.abc import IJobResult
 from plainbox.i18n import gettext as _
 from plainbox.impl import deprecated
+from plainbox.impl import pod
 from plainbox.impl.depmgr import DependencyDuplicateError
-from plainbox.impl.depmgr import DependencyError
 from plainbox.impl.depmgr import DependencySolver
 from plainbox.impl.secure.qualifiers import select_units
 from plainbox.impl.session.jobs import JobState
 from plainbox.impl.session.jobs import UndesiredJobReadinessInhibitor
+from plainbox.impl.session.progress import SessionProgress
+from plainbox.impl.session.system_information import BackgroundCollection
 from plainbox.impl.session.system_information import (
     collect as collect_system_information,
 )
@@ -667,13 +670,15 @@ class SessionState:
     :ivar dict metadata: instance of :class:`SessionMetaData`
     """
 
-    @morris.signal
+    @pod.batched_signal
     def on_job_state_map_changed(self):
         """
         Signal fired after job_state_map is changed in any way.
 
         This signal is always fired before any more specialized signals
-        such as :meth:`on_job_result_changed()` and :meth:`on_job_added()`.
+        such as :meth:`on_job_result_changed()` and :meth:`on_job_added()`,
+        except during :meth:`bulk_update()` where it is only fired once, at
+        the end.
 
         This signal is fired pretty often, each time a job result is
         presented to the session and each time a job is added. When
@@ -743,7 +748,9 @@ class SessionState:
                 # Since this problem can happen any number of times (many
                 # duplicates) this is performed in a loop. The loop breaks when
                 # we cannot solve the problem _OR_ when no error occurs.
-                DependencySolver(job_list)
+                #
+                # The solver is kept as the dependency graph of the session.
+                dependency_solver = DependencySolver(job_list)
             except DependencyDuplicateError as exc:
                 # If both jobs are identical then silently fix the problem by
                 # removing one of the jobs (here the second one we've seen but
@@ -759,6 +766,7 @@ class SessionState:
                 # If there are no problems then break the loop
                 break
         self._job_list = job_list
+        self._dependency_solver = dependency_solver
         self._unit_list = unit_list
         self._job_state_map = {job.id: JobState(job) for job in self._job_list}
         self._desired_job_list = []
@@ -766,9 +774,13 @@ class SessionState:
         self._run_list = []
         self._resource_map = {}
         self._fake_resources = False
+        self._bulk_update_depth = 0
+        self._readiness_outdated = False
         self._metadata = SessionMetaData()
         # If unset, this is loaded via system_information
         self._system_information = None
+        self._system_information_collection = None
+        self._progress = None
 
         super(SessionState, self).__init__()
 
@@ -841,6 +853,8 @@ class SessionState:
         ]
         # Replace job list with the filtered list
         self._job_list = retain_list
+        for job in remove_list:
+            self._dependency_solver.remove_job(job)
         if remove_list:
             # Notify that the job state map has changed
             self.on_job_state_map_changed()
@@ -849,11 +863,37 @@ class SessionState:
                 self.on_job_removed(job)
                 self.on_unit_removed(job)
 
+    def start_system_information_collection(self):
+        """
+        Start collecting the system information in the background.
+
+        Accessing :attr:`system_information` later waits for this collection
+        instead of starting a new one. Nothing is done if the system
+        information is already known (e.g. restored from a suspended session).
+        """
+        if self._system_information or self._system_information_collection:
+            return
+        self._system_information_collection = BackgroundCollection()
+
+    @property
+    def system_information_ready(self):
+        """Flag indicating that system_information can be read right away."""
+        if self._system_information:
+            return True
+        collection = self._system_information_collection
+        return collection is not None and collection.done()
+
     @property
     def system_information(self):
         if not self._system_information:
-            # This is a new session, we need to query this infos
-            self._system_information = collect_system_information()
+            if self._system_information_collection is not None:
+                self._system_information = (
+                    self._system_information_collection.result()
+                )
+            else:
+                # This is a new session, we need to query this infos
+                self._system_information = collect_system_information()
+            self._system_information_collection = None
         return self._system_information
 
     @system_information.setter
@@ -896,41 +936,16 @@ class SessionState:
         self._desired_job_list += list(desired_job_list)
         # Reset run list just in case desired_job_list is empty
         self._run_list = []
-        # Try to solve the dependency graph. This is done in a loop as may need
-        # to remove a problematic job and re-try. The loop provides a stop
-        # condition as we will eventually run out of jobs.
         problems = []
-        # Get a copy of all the jobs as we'll be removing elements from this
-        # list to come to a stable set in the loop below.
-        job_list = self._job_list[:]
-        while self._desired_job_list:
-            # XXX: it might be more efficient to incorporate this 'recovery
-            # mode' right into the solver, this way we'd probably save some
-            # resources or runtime complexity.
-            try:
-                self._run_list = DependencySolver.resolve_dependencies(
-                    job_list, self._desired_job_list
-                )
-            except DependencyError as exc:
-                # When a dependency error is detected remove the affected job
-                # form _desired_job_list and try again.
-                if exc.affected_job in self._desired_job_list:
-                    # The job may have been removed by now:
-                    # https://bugs.launchpad.net/plainbox/+bug/1444126
-                    self._desired_job_list.remove(exc.affected_job)
-                if exc.affected_job in job_list:
-                    # If the affected job is in the job list, remove it from
-                    # the job list we're going to consider in the next run.
-                    # This is done so that if a job depends on a broken but
-                    # existing job, it won't constantly re-add the same broken
-                    # job over and over (so that the algorithm can stop).
-                    job_list.remove(exc.affected_job)
-                # Remember each problem, this can be presented by the UI
-                problems.append(exc)
-                continue
-            else:
-                # Don't iterate the loop if there was no exception
-                break
+        if self._desired_job_list:
+            # Solve the dependency graph. Each problem found means that the
+            # affected job had to be removed (from the graph and from the
+            # desired job list) so that the rest could be solved.
+            self._run_list, problems = self._dependency_solver.solve(
+                self._desired_job_list
+            )
+            if problems:
+                self._desired_job_list = self._dependency_solver.visit_list
         # Update all job readiness state
         self._recompute_job_readiness()
         # Return all dependency problems to the caller
@@ -1086,6 +1101,7 @@ class SessionState:
             # Register the new job in our state
             self.job_state_map[new_job.id] = JobState(new_job)
             self.job_list.append(new_job)
+            self._dependency_solver.add_job(new_job)
             self.unit_list.append(new_job)
             self.on_job_state_map_changed()
             self.on_unit_added(new_job)
@@ -1203,6 +1219,7 @@ class SessionState:
         self.on_unit_removed(unit)
         if unit.Meta.name == "job":
             self._job_list.remove(unit)
+            self._dependency_solver.remove_job(unit)
             del self._job_state_map[unit.id]
             try:
                 del self._resource_map[unit.id]
@@ -1274,6 +1291,18 @@ class SessionState:
         """Map from job id to JobState associated with each job."""
         return self._job_state_map
 
+    @property
+    def progress(self):
+        """
+        The :class:`SessionProgress` of this session.
+
+        It is created on first access and then follows the changes of the
+        session incrementally.
+        """
+        if self._progress is None:
+            self._progress = SessionProgress(self)
+        return self._progress
+
     @property
     def resource_map(self):
         """Map from resource id to a list of resource records."""
@@ -1486,6 +1515,25 @@ class SessionState:
         """meta-data object associated with this session state."""
         return self._metadata
 
+    @contextlib.contextmanager
+    def bulk_update(self):
+        """
+        Context manager for updating many jobs at once.
+
+        Within the ``with`` block, the readiness of the jobs is not recomputed
+        and :meth:`on_job_state_map_changed()` is not fired. Both happen once,
+        when the block is over. This is meant for bulk operations such as
+        resuming a session, where the intermediate states are not observed.
+        """
+        with pod.batch_signals(self):
+            self._bulk_update_depth += 1
+            try:
+                yield
+            finally:
+                self._bulk_update_depth -= 1
+                if not self._bulk_update_depth and self._readiness_outdated:
+                    self._recompute_job_readiness()
+
     def _recompute_job_readiness(self):
         """
         Internal method of SessionState.
@@ -1493,6 +1541,11 @@ class SessionState:
         Re-computes [job_state.ready
                      for job_state in _job_state_map.values()]
         """
+        if self._bulk_update_depth:
+            # done once by bulk_update()
+            self._readiness_outdated = True
+            return
+        self._readiness_outdated = False
         # Reset the state of all jobs to have the undesired inhibitor. Since
         # we maintain a state object for _all_ jobs (including ones not in the
         # _run_list this correctly updates all values in the _job_state_map
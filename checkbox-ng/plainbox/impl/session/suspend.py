@@ -83,6 +83,10 @@ Serialization format versions
 5) Same as '4' but DiskJobResult is stored with a relative pathname to the log
    file if session_dir is provided.
 6) Same as '5' plus store the list of mandatory jobs.
+7) Same as '6' plus store the start time of the last job.
+8) Same as '7' plus store the system information.
+9) Same as '8' but the system information is saved once to a separate file
+   if session_dir is provided and only that file is referenced.
 """
 
 import base64
@@ -90,6 +94,7 @@ import gzip
 import json
 import logging
 import os
+import tempfile
 
 from plainbox.impl.result import DiskJobResult
 from plainbox.impl.result import MemoryJobResult
@@ -273,16 +278,23 @@ class SessionSuspendHelper1:
             ``return_code``
                 The exit code of the application.
 
+            ``resource_usage``
+                The resources used by the test command, only when they are
+                known.
+
         .. note::
             return_code can have unexpected values when the process was killed
             by a signal
         """
-        return {
+        result = {
             "outcome": obj.outcome,
             "execution_duration": obj.execution_duration,
             "comments": obj.comments,
             "return_code": obj.return_code,
         }
+        if obj.resource_usage is not None:
+            result["resource_usage"] = obj.resource_usage
+        return result
 
     def _repr_MemoryJobResult(self, obj, session_dir):
         """
@@ -670,12 +682,67 @@ class SessionSuspendHelper8(SessionSuspendHelper7):
 
     def _repr_SessionState(self, obj, session_dir):
         data = super()._repr_SessionState(obj, session_dir)
-        data["system_information"] = {
+        self._repr_SessionState_system_information(data, obj, session_dir)
+        return data
+
+    def _repr_SessionState_system_information(self, data, obj, session_dir):
+        """Store the system information of the session in data."""
+        data["system_information"] = self._repr_CollectorOutputs(
+            obj.system_information
+        )
+
+    def _repr_CollectorOutputs(self, obj):
+        return {
             tool_name: tool_output.to_dict()
-            for (tool_name, tool_output) in obj.system_information.items()
+            for (tool_name, tool_output) in obj.items()
         }
-        return data
+
+
+class SessionSuspendHelper9(SessionSuspendHelper8):
+    """
+    Helper class for computing binary representation of a session.
+
+    This class creates version '9' snapshots. The system information is
+    written once to a file in the session directory and every snapshot only
+    references that file. Snapshots taken while the system information is
+    still being collected don't mention it at all.
+    """
+
+    VERSION = 9
+
+    SYSTEM_INFORMATION_FILE = "system_information.json"
+
+    def _repr_SessionState_system_information(self, data, obj, session_dir):
+        if session_dir is None:
+            super()._repr_SessionState_system_information(
+                data, obj, session_dir
+            )
+            return
+        if not obj.system_information_ready:
+            return
+        pathname = os.path.join(session_dir, self.SYSTEM_INFORMATION_FILE)
+        if not os.path.exists(pathname):
+            self._save_system_information(
+                pathname, self._repr_CollectorOutputs(obj.system_information)
+            )
+        data["system_information_file"] = self.SYSTEM_INFORMATION_FILE
+
+    def _save_system_information(self, pathname, system_information):
+        # Write to a temporary file first so that a crash never leaves a
+        # truncated file behind for the next checkpoint to reference
+        fd, tmp_pathname = tempfile.mkstemp(
+            dir=os.path.dirname(pathname), suffix=".tmp"
+        )
+        try:
+            with open(fd, "wt", encoding="UTF-8") as stream:
+                json.dump(system_information, stream, ensure_ascii=False)
+                stream.flush()
+                os.fsync(stream.fileno())
+            os.replace(tmp_pathname, pathname)
+        except BaseException:
+            os.remove(tmp_pathname)
+            raise
 
 
 # Alias for the most recent version
-SessionSuspendHelper = SessionSuspendHelper8
+SessionSuspendHelper = SessionSuspendHelper9
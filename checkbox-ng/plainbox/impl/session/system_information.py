@@ -2,7 +2,16 @@
 
 import abc
 import json
-from subprocess import run, PIPE, check_output, STDOUT, CalledProcessError
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from subprocess import (
+    run,
+    PIPE,
+    check_output,
+    STDOUT,
+    CalledProcessError,
+    TimeoutExpired,
+)
 
 from plainbox import vendor
 
@@ -71,18 +80,66 @@ class CollectorMeta(type):
 
     @classmethod
     def collect(cls) -> CollectorOutputs:
-        return CollectorOutputs(
-            {
-                name: collector().collect()
+        """
+        Run all the registered collectors concurrently.
+
+        Every collector enforces its own timeout, so the collection takes as
+        long as the slowest collector and never longer than the biggest
+        timeout.
+        """
+        if not cls.collectors:
+            return CollectorOutputs()
+        with ThreadPoolExecutor(max_workers=len(cls.collectors)) as executor:
+            futures = {
+                name: executor.submit(lambda c: c().collect(), collector)
                 for (name, collector) in cls.collectors.items()
             }
-        )
+            return CollectorOutputs(
+                {name: future.result() for (name, future) in futures.items()}
+            )
 
 
 def collect() -> dict:
     return CollectorMeta.collect()
 
 
+class BackgroundCollection:
+    """
+    Collection of the system information running in a background thread.
+
+    The collection starts as soon as the object is created, use
+    :meth:`result()` to wait for it and fetch the collected outputs.
+    """
+
+    def __init__(self):
+        self._result = None
+        self._exception = None
+        self._thread = threading.Thread(
+            target=self._run, name="system-information", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        try:
+            self._result = collect()
+        except Exception as exc:
+            self._exception = exc
+
+    def done(self) -> bool:
+        return not self._thread.is_alive()
+
+    def result(self) -> CollectorOutputs:
+        """
+        Wait for the collection to complete and return its outputs.
+
+        Exceptions raised while collecting are raised again here.
+        """
+        self._thread.join()
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+
 class OutputABC:
     @abc.abstractmethod
     def to_dict(self):
@@ -163,7 +220,18 @@ class CollectionOutput:
         return cls(dct["tool_version"], outputs)
 
 
+def _decode(output) -> str:
+    # TimeoutExpired carries bytes even when text output was requested
+    if isinstance(output, bytes):
+        return output.decode("utf-8", "replace")
+    return output or ""
+
+
 class Collector(metaclass=CollectorMeta):
+    # Seconds each command is allowed to run for
+    COLLECTION_TIMEOUT = 120
+    VERSION_TIMEOUT = 10
+
     def __init__(self, collection_cmd: list, version_cmd: list):
         self.collection_cmd = collection_cmd
         self.version_cmd = version_cmd
@@ -182,8 +250,9 @@ class Collector(metaclass=CollectorMeta):
                 self.version_cmd,
                 universal_newlines=True,
                 stderr=STDOUT,
+                timeout=self.VERSION_TIMEOUT,
             )
-        except CalledProcessError as e:
+        except (CalledProcessError, TimeoutExpired) as e:
             return "Failed to collect with error: {}".format(e)
 
     def collect_outputs(self) -> "(OutputSuccess|OutputFailure)":
@@ -194,13 +263,25 @@ class Collector(metaclass=CollectorMeta):
                   is json parsable
         :returns: (OutputFailure, N) if the command returns (N != 0) or the
                   output is not json parsable
+        :returns: (OutputFailure, None) if the command doesn't complete
+                  within COLLECTION_TIMEOUT seconds
         """
-        collection_result = run(
-            self.collection_cmd,
-            universal_newlines=True,
-            stdout=PIPE,
-            stderr=PIPE,
-        )
+        try:
+            collection_result = run(
+                self.collection_cmd,
+                universal_newlines=True,
+                stdout=PIPE,
+                stderr=PIPE,
+                timeout=self.COLLECTION_TIMEOUT,
+            )
+        except TimeoutExpired as e:
+            return OutputFailure(
+                stdout="Collection timed out after {} seconds".format(
+                    e.timeout
+                ),
+                stderr=_decode(e.stderr),
+                return_code=None,
+            )
         if collection_result.returncode != 0:
             outputs = OutputFailure(
                 stdout=collection_result.stdout,
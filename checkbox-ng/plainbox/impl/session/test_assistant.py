@@ -79,6 +79,9 @@ class SessionAssistantTests(morris.SignalTestCase):
         # system_information in tests
         with mock.patch(
             "plainbox.impl.session.state.SessionState.system_information"
+        ), mock.patch(
+            "plainbox.impl.session.state.SessionState."
+            "start_system_information_collection"
         ):
             # Call SessionAssistant.start_new_session()
             self.sa.start_new_session("just for testing")
@@ -207,6 +210,27 @@ class SessionAssistantTests(morris.SignalTestCase):
             self_mock._context.state.update_desired_job_list.call_count, 2
         )
 
+    @mock.patch("plainbox.impl.session.state.select_units")
+    @mock.patch("plainbox.impl.unit.testplan.TestPlanUnit")
+    def test_bootstrap_with_results(
+        self, mock_tpu, mock_su, mock_get_providers
+    ):
+        self_mock = mock.MagicMock()
+        job1 = mock.Mock(id="job1")
+        job2 = mock.Mock(id="job2")
+        self_mock._context.state.run_list = [job1, job2]
+        self_mock._context.state.job_state_map = {
+            "job1": mock.Mock(result_history=()),
+            "job2": mock.Mock(result_history=()),
+        }
+        result = mock.Mock()
+        SessionAssistant.bootstrap(self_mock, {"job1": result})
+        # job1 is not run, its result is used instead
+        self_mock._context.state.update_job_result.assert_called_once_with(
+            job1, result
+        )
+        self_mock.run_job.assert_called_once_with("job2", "silent", False)
+
     @mock.patch("plainbox.impl.session.state.select_units")
     def test_hand_pick_jobs(self, mock_su, mock_get_providers):
         self_mock = mock.MagicMock()
@@ -0,0 +1,146 @@
+# This file is part of Checkbox.
+#
+# Copyright 2026 Canonical Ltd.
+#
+# Checkbox is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# Checkbox is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Checkbox.  If not, see <http://www.gnu.org/licenses/>.
+"""
+plainbox.impl.session.test_progress
+===================================
+
+Test definitions for plainbox.impl.session.progress module
+"""
+
+from unittest import TestCase
+
+from plainbox.abc import IJobResult
+from plainbox.impl.result import MemoryJobResult
+from plainbox.impl.session import SessionState
+from plainbox.impl.testing_utils import make_job
+
+
+class SessionProgressTests(TestCase):
+    def setUp(self):
+        self.job_list = [make_job("j{}".format(i)) for i in range(5)]
+        self.state = SessionState(list(self.job_list))
+        # run the jobs in reverse order
+        self.state.update_desired_job_list(self.job_list[::-1])
+        self.progress = self.state.progress
+
+    def pass_job(self, job):
+        self.state.update_job_result(
+            job, MemoryJobResult({"outcome": IJobResult.OUTCOME_PASS})
+        )
+
+    def expected_done_list(self):
+        return [
+            job_id
+            for job_id, job_state in self.state.job_state_map.items()
+            if job_state.result.outcome is not None
+        ]
+
+    def expected_todo_list(self):
+        return [
+            job.id
+            for job in self.state.run_list
+            if self.state.job_state_map[job.id].result.outcome is None
+        ]
+
+    def assertProgress(self):
+        self.assertEqual(
+            self.progress.get_done_list(), self.expected_done_list()
+        )
+        self.assertEqual(
+            self.progress.get_todo_list(), self.expected_todo_list()
+        )
+        self.assertEqual(
+            self.progress.done_count, len(self.expected_done_list())
+        )
+        self.assertEqual(
+            self.progress.todo_count, len(self.expected_todo_list())
+        )
+
+    def test_results(self):
+        self.assertProgress()
+        self.pass_job(self.job_list[3])
+        self.pass_job(self.job_list[1])
+        self.assertEqual(self.progress.get_done_list(), ["j1", "j3"])
+        self.assertEqual(self.progress.get_todo_list(), ["j4", "j2", "j0"])
+        self.assertProgress()
+        # a job re-armed to be run again goes back to its place in the list
+        self.state.job_state_map["j3"].result = MemoryJobResult({})
+        self.assertEqual(
+            self.progress.get_todo_list(), ["j4", "j3", "j2", "j0"]
+        )
+        self.assertProgress()
+
+    def test_jobs_added_and_removed(self):
+        self.pass_job(self.job_list[0])
+        new_job = make_job("new")
+        self.state.add_unit(new_job)
+        self.pass_job(new_job)
+        self.state.update_desired_job_list(self.job_list + [new_job])
+        self.assertProgress()
+        self.state.update_desired_job_list(self.job_list)
+        self.state.remove_unit(new_job)
+        self.assertProgress()
+
+    def test_existing_results(self):
+        self.pass_job(self.job_list[2])
+        state = SessionState(list(self.job_list))
+        state.job_state_map["j2"].result = MemoryJobResult(
+            {"outcome": IJobResult.OUTCOME_FAIL}
+        )
+        self.assertEqual(state.progress.get_done_list(), ["j2"])
+
+    def test_ignored(self):
+        self.pass_job(self.job_list[0])
+        self.progress.set_ignored(["j0"])
+        self.pass_job(self.job_list[1])
+        self.pass_job(self.job_list[0])
+        self.assertEqual(self.progress.get_done_list(), ["j1"])
+        self.assertEqual(self.progress.done_count, 1)
+
+    def test_delta(self):
+        delta = self.progress.get_delta()
+        self.assertTrue(delta["reset"])
+        self.assertEqual(delta["todo"], ["j4", "j3", "j2", "j1", "j0"])
+        revision = delta["revision"]
+        delta = self.progress.get_delta(revision)
+        self.assertEqual(
+            delta,
+            {
+                "revision": revision,
+                "reset": False,
+                "done": [],
+                "todo": [],
+                "done_count": 0,
+                "todo_count": 5,
+            },
+        )
+        self.pass_job(self.job_list[4])
+        self.pass_job(self.job_list[3])
+        self.state.job_state_map["j4"].result = MemoryJobResult({})
+        delta = self.progress.get_delta(revision)
+        self.assertFalse(delta["reset"])
+        self.assertEqual(delta["done"], ["j3"])
+        self.assertEqual(delta["todo"], ["j4"])
+        self.assertEqual(delta["todo_count"], 4)
+        self.assertEqual(
+            self.progress.get_delta(delta["revision"])["done"], []
+        )
+        # a new run list cannot be described as a delta
+        self.state.update_desired_job_list(self.job_list[:2])
+        delta = self.progress.get_delta(delta["revision"])
+        self.assertTrue(delta["reset"])
+        self.assertEqual(delta["done"], ["j3"])
+        self.assertEqual(delta["todo"], ["j0", "j1"])
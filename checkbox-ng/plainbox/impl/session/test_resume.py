@@ -30,6 +30,9 @@ import binascii
 import copy
 import gzip
 import json
+import os
+import shutil
+import tempfile
 
 from plainbox.abc import IUnitQualifier
 from plainbox.abc import IJobResult
@@ -51,6 +54,7 @@ from plainbox.impl.session.resume import SessionPeekHelper5
 from plainbox.impl.session.resume import SessionPeekHelper6
 from plainbox.impl.session.resume import SessionPeekHelper7
 from plainbox.impl.session.resume import SessionPeekHelper8
+from plainbox.impl.session.resume import SessionPeekHelper9
 from plainbox.impl.session.resume import SessionResumeError
 from plainbox.impl.session.resume import SessionResumeHelper
 from plainbox.impl.session.resume import SessionResumeHelper1
@@ -61,6 +65,7 @@ from plainbox.impl.session.resume import SessionResumeHelper5
 from plainbox.impl.session.resume import SessionResumeHelper6
 from plainbox.impl.session.resume import SessionResumeHelper7
 from plainbox.impl.session.resume import SessionResumeHelper8
+from plainbox.impl.session.resume import SessionResumeHelper9
 from plainbox.impl.session.state import SessionState
 from plainbox.impl.testing_utils import make_job
 from plainbox.testing_utils.testcases import TestCaseWithParameters
@@ -375,10 +380,28 @@ class SessionResumeHelperTests(TestCase):
             )
 
     def test_resume_dispatch_v9(self):
-        data = gzip.compress(b'{"version":9}')
+        helper9 = SessionResumeHelper9
+        with mock.patch.object(helper9, "resume_json"):
+            data = gzip.compress(
+                b'{"session":{"system_information_file":'
+                b'"system_information.json"},"version":9}'
+            )
+            SessionResumeHelper([], None, None).resume(data)
+            helper9.resume_json.assert_called_once_with(
+                {
+                    "session": {
+                        "system_information_file": "system_information.json"
+                    },
+                    "version": 9,
+                },
+                None,
+            )
+
+    def test_resume_dispatch_v10(self):
+        data = gzip.compress(b'{"version":10}')
         with self.assertRaises(IncompatibleSessionError) as boom:
             SessionResumeHelper([], None, None).resume(data)
-        self.assertEqual(str(boom.exception), "Unsupported version 9")
+        self.assertEqual(str(boom.exception), "Unsupported version 10")
 
 
 class SessionPeekHelperTests(TestCase):
@@ -597,10 +620,19 @@ class SessionPeekHelperTests(TestCase):
             )
 
     def test_peek_dispatch_v9(self):
-        data = gzip.compress(b'{"version":9}')
+        helper9 = SessionPeekHelper9
+        with mock.patch.object(helper9, "peek_json"):
+            data = gzip.compress(b'{"session":{},"version":9}')
+            SessionPeekHelper().peek(data)
+            helper9.peek_json.assert_called_once_with(
+                {"session": {}, "version": 9}
+            )
+
+    def test_peek_dispatch_v10(self):
+        data = gzip.compress(b'{"version":10}')
         with self.assertRaises(IncompatibleSessionError) as boom:
             SessionPeekHelper().peek(data)
-        self.assertEqual(str(boom.exception), "Unsupported version 9")
+        self.assertEqual(str(boom.exception), "Unsupported version 10")
 
 
 class SessionResumeTests(TestCase):
@@ -677,6 +709,53 @@ class SessionStateResumeHelper8Tests(TestCase):
         self.assertFalse(collect_mock.called)
 
 
+class SessionStateResumeHelper9Tests(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.system_information = {
+            "inxi": {
+                "tool_version": "1.0",
+                "success": True,
+                "outputs": {"payload": {"key": "value"}, "stderr": ""},
+            }
+        }
+
+    def test_restore_from_file(self):
+        with open(
+            os.path.join(self.location, "system_information.json"), "wt"
+        ) as stream:
+            json.dump(self.system_information, stream)
+        session_state = mock.MagicMock()
+        helper = SessionResumeHelper9([], None, self.location)
+        helper._restore_SessionState_system_information(
+            session_state,
+            {"system_information_file": "system_information.json"},
+        )
+        restored = session_state.system_information
+        self.assertEqual(restored["inxi"].outputs.payload, {"key": "value"})
+
+    def test_restore_embedded(self):
+        session_state = mock.MagicMock()
+        helper = SessionResumeHelper9([], None, None)
+        helper._restore_SessionState_system_information(
+            session_state, {"system_information": self.system_information}
+        )
+        self.assertTrue(session_state.system_information["inxi"].success)
+
+    def test_restore_missing(self):
+        # suspended before the collection completed or file removed, the
+        # information will be collected again
+        session_state = SessionState([])
+        helper = SessionResumeHelper9([], None, self.location)
+        helper._restore_SessionState_system_information(session_state, {})
+        helper._restore_SessionState_system_information(
+            session_state,
+            {"system_information_file": "system_information.json"},
+        )
+        self.assertIsNone(session_state._system_information)
+
+
 class SessionStateResumeTests(TestCaseWithParameters):
     """
     Tests for :class:`~plainbox.impl.session.resume.SessionResumeHelper1`,
@@ -956,6 +1035,18 @@ class JobResultResumeMixIn:
         obj = self.parameters.resume_cls._build_JobResult(obj_repr, 0, None)
         self.assertEqual(obj.outcome, "fail")
 
+    def test_build_JobResult_restores_resource_usage(self):
+        """
+        verify that _build_JobResult() restores the optional value of
+        ``resource_usage``
+        """
+        obj_repr = copy.copy(self.good_repr)
+        obj = self.parameters.resume_cls._build_JobResult(obj_repr, 0, None)
+        self.assertIsNone(obj.resource_usage)
+        obj_repr["resource_usage"] = {"cpu_usec": 5}
+        obj = self.parameters.resume_cls._build_JobResult(obj_repr, 0, None)
+        self.assertEqual(obj.resource_usage, {"cpu_usec": 5})
+
     def test_build_JobResult_checks_for_missing_comments(self):
         """
         verify that _build_JobResult() checks if ``comments`` is present
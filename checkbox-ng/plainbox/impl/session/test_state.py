@@ -469,6 +469,7 @@ class SessionStateAPITests(TestCase):
 
         self_mock = MagicMock()
         self_mock._system_information = None
+        self_mock._system_information_collection = None
         with patch(
             "plainbox.impl.session.state.collect_system_information"
         ) as collect_system_information_mock:
@@ -478,6 +479,36 @@ class SessionStateAPITests(TestCase):
                 collect_system_information_mock.return_value,
             )
 
+    @patch("plainbox.impl.session.state.BackgroundCollection")
+    @patch("plainbox.impl.session.state.collect_system_information")
+    def test_system_information_background_collection(
+        self, collect_mock, background_mock
+    ):
+        session = SessionState([])
+        background_mock.return_value.done.return_value = False
+        session.start_system_information_collection()
+        self.assertFalse(session.system_information_ready)
+        # starting it twice doesn't start a second collection
+        session.start_system_information_collection()
+        self.assertEqual(background_mock.call_count, 1)
+        background_mock.return_value.done.return_value = True
+        self.assertTrue(session.system_information_ready)
+        self.assertEqual(
+            session.system_information,
+            background_mock.return_value.result.return_value,
+        )
+        self.assertFalse(collect_mock.called)
+
+    @patch("plainbox.impl.session.state.BackgroundCollection")
+    def test_system_information_collection_not_restarted(
+        self, background_mock
+    ):
+        session = SessionState([])
+        session.system_information = {"inxi": {}}
+        session.start_system_information_collection()
+        self.assertFalse(background_mock.called)
+        self.assertTrue(session.system_information_ready)
+
     def test_system_information_collection_cached(self):
         getter = SessionState.system_information.__get__
         setter = SessionState.system_information.__set__
@@ -682,6 +713,29 @@ class SessionStateReactionToJobResultTests(TestCase):
         )
         self.assertFalse(self.job_state("A").can_start())
 
+    def test_bulk_update(self):
+        # Readiness and on_job_state_map_changed() are only updated once, at
+        # the end of a bulk update.
+        self.session.update_desired_job_list([self.job_A, self.job_X])
+        callback = Mock(name="on_job_state_map_changed")
+        self.session.on_job_state_map_changed.connect(callback)
+        result_R = MemoryJobResult(
+            {
+                "outcome": IJobResult.OUTCOME_PASS,
+                "io_log": [(0, "stdout", b"attr: value\n")],
+            }
+        )
+        result_Y = MemoryJobResult({"outcome": IJobResult.OUTCOME_PASS})
+        with self.session.bulk_update():
+            self.session.update_job_result(self.job_R, result_R)
+            self.session.update_job_result(self.job_Y, result_Y)
+            self.assertFalse(self.job_state("A").can_start())
+            self.assertFalse(self.job_state("X").can_start())
+            callback.assert_not_called()
+        callback.assert_called_once_with()
+        self.assertTrue(self.job_state("A").can_start())
+        self.assertTrue(self.job_state("X").can_start())
+
     def test_resource_job_result_updates_resource_and_job_states(self):
         # This function checks what happens when a JobResult for job R (which
         # is a resource job via the resource plugin) is presented to the
@@ -27,6 +27,10 @@ Test definitions for :mod:`plainbox.impl.session.suspend` module
 from functools import partial
 from unittest import TestCase
 import gzip
+import json
+import os
+import shutil
+import tempfile
 
 from plainbox.abc import IJobResult
 from plainbox.impl.job import JobDefinition
@@ -41,6 +45,10 @@ from plainbox.impl.session.suspend import SessionSuspendHelper3
 from plainbox.impl.session.suspend import SessionSuspendHelper4
 from plainbox.impl.session.suspend import SessionSuspendHelper5
 from plainbox.impl.session.suspend import SessionSuspendHelper6
+from plainbox.impl.session.suspend import SessionSuspendHelper9
+from plainbox.impl.session.system_information import CollectionOutput
+from plainbox.impl.session.system_information import CollectorOutputs
+from plainbox.impl.session.system_information import OutputSuccess
 from plainbox.impl.testing_utils import make_job
 from plainbox.vendor import mock
 
@@ -109,6 +117,16 @@ class BaseJobResultTestsTestsMixIn:
         data = self.repr_method(self.typical_result, self.session_dir)
         self.assertEqual(data["return_code"], 1)
 
+    def test_repr_xxxJobResult_resource_usage(self):
+        """
+        verify that the resource usage is only serialized when known
+        """
+        data = self.repr_method(self.typical_result, self.session_dir)
+        self.assertNotIn("resource_usage", data)
+        result = self.TESTED_CLS({"resource_usage": {"cpu_usec": 5}})
+        data = self.repr_method(result, self.session_dir)
+        self.assertEqual(data["resource_usage"], {"cpu_usec": 5})
+
 
 class SuspendMemoryJobResultTests(BaseJobResultTestsTestsMixIn, TestCase):
     """
@@ -930,6 +948,57 @@ class SessionSuspendHelper6Tests(SessionSuspendHelper5Tests):
         )
 
 
+class SessionSuspendHelper9Tests(TestCase):
+    """
+    Tests for :class:`~plainbox.impl.session.suspend.SessionSuspendHelper9`
+    """
+
+    def setUp(self):
+        self.helper = SessionSuspendHelper9()
+        self.session_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.session_dir)
+        self.session = SessionState([])
+        self.session.system_information = CollectorOutputs(
+            {"inxi": CollectionOutput("1.0", OutputSuccess({"k": "v"}, ""))}
+        )
+
+    def test_system_information_saved_once(self):
+        data = self.helper._repr_SessionState(self.session, self.session_dir)
+        self.assertNotIn("system_information", data)
+        self.assertEqual(
+            data["system_information_file"], "system_information.json"
+        )
+        pathname = os.path.join(self.session_dir, "system_information.json")
+        with open(pathname) as stream:
+            saved = json.load(stream)
+        self.assertEqual(saved["inxi"]["outputs"]["payload"], {"k": "v"})
+        with mock.patch.object(
+            self.helper, "_save_system_information"
+        ) as save_mock:
+            data = self.helper._repr_SessionState(
+                self.session, self.session_dir
+            )
+        self.assertFalse(save_mock.called)
+        self.assertEqual(
+            data["system_information_file"], "system_information.json"
+        )
+
+    def test_system_information_not_ready(self):
+        session = SessionState([])
+        session._system_information_collection = mock.Mock()
+        session._system_information_collection.done.return_value = False
+        data = self.helper._repr_SessionState(session, self.session_dir)
+        self.assertNotIn("system_information", data)
+        self.assertNotIn("system_information_file", data)
+        self.assertFalse(session._system_information_collection.result.called)
+        self.assertEqual(os.listdir(self.session_dir), [])
+
+    def test_system_information_embedded_without_session_dir(self):
+        data = self.helper._repr_SessionState(self.session, None)
+        self.assertNotIn("system_information_file", data)
+        self.assertEqual(data["system_information"]["inxi"]["success"], True)
+
+
 class RegressionTests(TestCase):
 
     def test_1388055(self):
@@ -1,11 +1,13 @@
 import json
+import threading
 from copy import copy
 from unittest import TestCase
 from contextlib import contextmanager
-from subprocess import CalledProcessError
+from subprocess import CalledProcessError, TimeoutExpired
 from unittest.mock import MagicMock, patch
 
 from plainbox.impl.session.system_information import (
+    BackgroundCollection,
     Collector,
     CollectorMeta,
     OutputSuccess,
@@ -102,6 +104,21 @@ class TestCollector(TestCase):
         self.assertIn(collection_result.stdout, outputs.stdout)
         self.assertIn(exception_str, outputs.stdout)
 
+    def test_collect_outputs_timeout(self):
+        self_mock = MagicMock()
+        self_mock.COLLECTION_TIMEOUT = 5
+
+        with patch("plainbox.impl.session.system_information.run") as run_mock:
+            run_mock.side_effect = TimeoutExpired(
+                "inxi", 5, output=b"partial", stderr=b"slow"
+            )
+            outputs = Collector.collect_outputs(self_mock)
+        self.assertTrue(isinstance(outputs, OutputFailure))
+        self.assertIn("timed out", outputs.stdout)
+        self.assertEqual(outputs.stderr, "slow")
+        self.assertIsNone(outputs.return_code)
+        self.assertEqual(run_mock.call_args[1]["timeout"], 5)
+
     def test_collect_ok(self):
         collector = Collector(version_cmd=[], collection_cmd=[])
         with patch(
@@ -209,6 +226,59 @@ class TestCollectionOutput(TestCase):
         self.assertFalse(collection_output.success)
 
 
+class TestCollect(TestCase):
+    @contextmanager
+    def _collectors(self, collectors):
+        saved = CollectorMeta.collectors
+        CollectorMeta.collectors = collectors
+        try:
+            yield
+        finally:
+            CollectorMeta.collectors = saved
+
+    def test_collectors_run_concurrently(self):
+        # every collector waits for all the others, this only completes if
+        # they run at the same time
+        barrier = threading.Barrier(3, timeout=5)
+
+        def make_collector(name):
+            def collect_after_barrier():
+                barrier.wait()
+                return name
+
+            collector_mock = MagicMock()
+            collector_mock.return_value.collect = collect_after_barrier
+            return collector_mock
+
+        with self._collectors(
+            {name: make_collector(name) for name in ("a", "b", "c")}
+        ):
+            outputs = collect()
+        self.assertEqual(outputs, {"a": "a", "b": "b", "c": "c"})
+        self.assertEqual(list(outputs), ["a", "b", "c"])
+
+    def test_no_collectors(self):
+        with self._collectors({}):
+            self.assertEqual(collect(), {})
+
+    def test_background_collection(self):
+        with patch(
+            "plainbox.impl.session.system_information.collect"
+        ) as collect_mock:
+            collection = BackgroundCollection()
+            self.assertEqual(collection.result(), collect_mock.return_value)
+        self.assertTrue(collection.done())
+
+    def test_background_collection_error(self):
+        with patch(
+            "plainbox.impl.session.system_information.collect"
+        ) as collect_mock:
+            collect_mock.side_effect = OSError("boom")
+            collection = BackgroundCollection()
+            with self.assertRaises(OSError):
+                collection.result()
+
+
 class TestCollectorMeta(TestCase):
     @contextmanager
     def _preserve_collectors(self):
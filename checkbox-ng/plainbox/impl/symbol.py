@@ -116,6 +116,12 @@ class Symbol:
         """
         return hash(self._name)
 
+    def __getnewargs__(self):
+        """
+        Pickle symbols by name so that unpickling returns the interned object
+        """
+        return (self._name,)
+
 
 class SymbolDefNs:
     """
@@ -0,0 +1,100 @@
+# This file is part of Checkbox.
+#
+# Copyright 2026 Canonical Ltd.
+#
+# Checkbox is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# Checkbox is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Checkbox.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from plainbox.impl.bootstrapcache import BootstrapSnapshot
+from plainbox.impl.bootstrapcache import get_hardware_fingerprint
+from plainbox.impl.bootstrapcache import get_snapshot_path
+from plainbox.impl.result import MemoryJobResult
+
+
+class HardwareFingerprintTests(TestCase):
+    def setUp(self):
+        self.sysfs = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.sysfs)
+
+    def write(self, path, value):
+        path = os.path.join(self.sysfs, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(value + "\n")
+
+    def test_get_hardware_fingerprint(self):
+        self.write("class/dmi/id/product_name", "Laptop")
+        self.write("bus/pci/devices/0000:00:02.0/device", "0x46a6")
+        fingerprint = get_hardware_fingerprint(self.sysfs)
+        self.assertEqual(get_hardware_fingerprint(self.sysfs), fingerprint)
+        # the serial number is not part of it
+        self.write("class/dmi/id/product_serial", "1234")
+        self.assertEqual(get_hardware_fingerprint(self.sysfs), fingerprint)
+        self.write("bus/usb/devices/1-1/idVendor", "046d")
+        self.assertNotEqual(get_hardware_fingerprint(self.sysfs), fingerprint)
+
+    @patch.dict(os.environ, {"SNAP_USER_COMMON": "/snap"})
+    @patch("plainbox.impl.bootstrapcache.get_hardware_fingerprint")
+    def test_get_snapshot_path(self, mock_fingerprint):
+        mock_fingerprint.return_value = "machine1"
+        path = get_snapshot_path("tp", [])
+        self.assertTrue(path.startswith("/snap/.cache/plainbox/bootstrap/"))
+        self.assertEqual(get_snapshot_path("tp", []), path)
+        self.assertNotEqual(get_snapshot_path("other-tp", []), path)
+        mock_fingerprint.return_value = "machine2"
+        self.assertNotEqual(get_snapshot_path("tp", []), path)
+
+
+class BootstrapSnapshotTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def test_save_load(self):
+        result = MemoryJobResult(
+            {
+                "outcome": "pass",
+                "return_code": 0,
+                "io_log": [(0.5, "stdout", b"name: eth0\n\xff")],
+            }
+        )
+        job_state_map = {
+            "resource": Mock(result_history=(result,), result=result),
+            "not-run": Mock(result_history=()),
+        }
+        snapshot = BootstrapSnapshot.from_job_state_map(
+            "tp", job_state_map, "machine"
+        )
+        path = os.path.join(self.tmp, "sub", "snapshot.json")
+        snapshot.save(path)
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["snapshot.json"])
+        snapshot = BootstrapSnapshot.load(path)
+        self.assertEqual(snapshot.test_plan, "tp")
+        self.assertEqual(snapshot.hardware, "machine")
+        self.assertEqual(snapshot.get_job_results(), {"resource": result})
+
+    def test_load_not_a_snapshot(self):
+        path = os.path.join(self.tmp, "snapshot.json")
+        with open(path, "w") as f:
+            f.write('{"version": 0}')
+        with self.assertRaises(ValueError):
+            BootstrapSnapshot.load(path)
+        with open(path, "w") as f:
+            f.write("garbage")
+        with self.assertRaises(ValueError):
+            BootstrapSnapshot.load(path)
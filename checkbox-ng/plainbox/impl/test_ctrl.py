@@ -345,6 +345,58 @@ class CheckBoxSessionStateControllerTests(TestCase):
             True,
         )
 
+    def test_is_job_impacting_suspend__computed_once(self):
+        job = JobDefinition(
+            {
+                "id": "job",
+                "siblings": json.dumps(
+                    [{"id": "sibling-j1", "depends": Suspend.AUTO_JOB_ID}]
+                ),
+            }
+        )
+        with mock.patch("json.loads", wraps=json.loads) as m_loads:
+            for _ in range(3):
+                self.ctrl._is_job_impacting_suspend(Suspend.AUTO_JOB_ID, job)
+                self.ctrl._is_job_impacting_suspend(Suspend.MANUAL_JOB_ID, job)
+        self.assertEqual(m_loads.call_count, 1)
+
+    def test_get_inhibitor_list__suspend_index(self):
+        j1 = JobDefinition({"id": "j1", "flags": Suspend.AUTO_FLAG})
+        j2 = JobDefinition({"id": "j2"})
+        suspend_job = JobDefinition({"id": Suspend.AUTO_JOB_ID})
+        session_state = SessionState([j1, j2, suspend_job])
+        session_state.update_desired_job_list([j1, j2, suspend_job])
+        self.assertEqual(
+            self.ctrl.get_inhibitor_list(session_state, suspend_job),
+            [JobReadinessInhibitor(InhibitionCause.PENDING_DEP, j1, None)],
+        )
+        # jobs added later (e.g. instantiated from a template) are indexed
+        j3 = JobDefinition({"id": "j3", "flags": Suspend.AUTO_FLAG})
+        session_state.add_unit(j3)
+        session_state.update_desired_job_list([j1, j2, j3, suspend_job])
+        self.assertEqual(
+            self.ctrl.get_inhibitor_list(session_state, suspend_job),
+            [
+                JobReadinessInhibitor(InhibitionCause.PENDING_DEP, j1, None),
+                JobReadinessInhibitor(InhibitionCause.PENDING_DEP, j3, None),
+            ],
+        )
+        # and removed ones are forgotten
+        session_state.update_desired_job_list([j2, j3, suspend_job])
+        session_state.remove_unit(j1)
+        self.assertEqual(
+            self.ctrl.get_inhibitor_list(session_state, suspend_job),
+            [JobReadinessInhibitor(InhibitionCause.PENDING_DEP, j3, None)],
+        )
+        self.assertEqual(
+            list(
+                self.ctrl._get_suspend_index(session_state)[
+                    Suspend.AUTO_JOB_ID
+                ]
+            ),
+            ["j3"],
+        )
+
     def test_observe_result__normal(self):
         job = mock.Mock(spec=JobDefinition)
         result = mock.Mock(spec=IJobResult)
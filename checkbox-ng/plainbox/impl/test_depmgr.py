@@ -25,12 +25,17 @@ Test definitions for plainbox.impl.depmgr module
 """
 
 from unittest import TestCase
+from unittest import mock
+import random
 
 from plainbox.impl.depmgr import DependencyCycleError
 from plainbox.impl.depmgr import DependencyDuplicateError
+from plainbox.impl.depmgr import DependencyError
 from plainbox.impl.depmgr import DependencyMissingError
+from plainbox.impl.depmgr import DependencyUnknownError
 from plainbox.impl.depmgr import DependencySolver
 from plainbox.impl.testing_utils import make_job
+from plainbox.suspend_consts import Suspend
 
 
 class DependencyCycleErrorTests(TestCase):
@@ -306,3 +311,146 @@ class TestDependencySolver(TestCase):
         with self.assertRaises(DependencyCycleError) as call:
             DependencySolver.resolve_dependencies(job_list)
         self.assertEqual(call.exception.job_list, [A, R, A])
+
+    def test_deep_chain(self):
+        # A long chain of dependencies doesn't hit the recursion limit
+        job_list = [
+            make_job(id="J{}".format(i), depends="J{}".format(i + 1))
+            for i in range(1500)
+        ]
+        job_list.append(make_job(id="J1500"))
+        observed = DependencySolver.resolve_dependencies(job_list)
+        self.assertEqual(observed, job_list[::-1])
+
+
+def solve_by_retrying(job_list, visit_list):
+    """Solve the graph the way the session state used to."""
+    job_list = job_list[:]
+    visit_list = visit_list[:]
+    problems = []
+    while visit_list:
+        try:
+            solution = DependencySolver.resolve_dependencies(
+                job_list, visit_list
+            )
+        except DependencyError as exc:
+            if exc.affected_job in visit_list:
+                visit_list.remove(exc.affected_job)
+            if exc.affected_job in job_list:
+                job_list.remove(exc.affected_job)
+            problems.append(exc)
+        else:
+            return solution, problems, visit_list
+    return [], problems, visit_list
+
+
+class TestDependencySolverSolve(TestCase):
+
+    def test_problems_in_one_pass(self):
+        # A -> B -> (inexisting X)
+        # C -> D -> C
+        # E
+        A = make_job(id="A", depends="B")
+        B = make_job(id="B", depends="X")
+        C = make_job(id="C", depends="D")
+        D = make_job(id="D", depends="C")
+        E = make_job(id="E")
+        U = make_job(id="U")
+        solver = DependencySolver([A, B, C, D, E])
+        with mock.patch.object(
+            DependencySolver,
+            "resolve_dependencies",
+            side_effect=AssertionError,
+        ):
+            solution, problems = solver.solve([A, C, E, U])
+        self.assertEqual(solution, [E])
+        self.assertEqual(
+            problems,
+            [
+                DependencyMissingError(B, "X", "direct"),
+                DependencyMissingError(A, "B", "direct"),
+                problems[2],
+                DependencyUnknownError(U),
+            ],
+        )
+        self.assertEqual(problems[2].job_list, [C, D, C])
+
+    def test_same_outcome_as_retrying(self):
+        rng = random.Random(1337)
+        for _ in range(300):
+            size = rng.randint(1, 12)
+            ids = ["J{}".format(i) for i in range(size + 2)]
+            # The suspend job is volatile: its dependencies are the jobs of
+            # the visit list flagged to run before it
+            ids[rng.randrange(size + 2)] = Suspend.AUTO_JOB_ID
+            job_list = [
+                make_job(
+                    id=ids[i],
+                    depends=" ".join(rng.sample(ids, rng.randint(0, 3))),
+                    flags=rng.choice(["", "", Suspend.AUTO_FLAG]),
+                )
+                for i in range(size)
+            ]
+            visit_list = [
+                rng.choice(job_list) for _ in range(rng.randint(1, size))
+            ]
+            solver = DependencySolver(job_list)
+            solution, problems = solver.solve(visit_list)
+            expected_solution, expected_problems, expected_visit_list = (
+                solve_by_retrying(job_list, visit_list)
+            )
+            self.assertEqual(solution, expected_solution)
+            self.assertEqual(solver.visit_list, expected_visit_list)
+            # DependencyCycleError doesn't compare by value
+            self.assertEqual(
+                [repr(exc) for exc in problems],
+                [repr(exc) for exc in expected_problems],
+            )
+
+    def test_dependencies_computed_once(self):
+        A = make_job(id="A", depends="B")
+        B = make_job(id="B")
+        C = make_job(id="C", depends="A")
+        solver = DependencySolver([A, B, C])
+        with mock.patch.object(
+            A.controller,
+            "get_dependency_set",
+            wraps=A.controller.get_dependency_set,
+        ) as get_dependency_set:
+            self.assertEqual(solver.solve([A]), ([B, A], []))
+            self.assertEqual(solver.solve([C]), ([B, A, C], []))
+            self.assertEqual(solver.solve([A, B]), ([B, A], []))
+        self.assertEqual(get_dependency_set.call_count, 3)
+
+    def test_last_solution_reused(self):
+        A = make_job(id="A", depends="B")
+        B = make_job(id="B")
+        solver = DependencySolver([A, B])
+        self.assertEqual(solver.solve([A]), ([B, A], []))
+        with mock.patch.object(solver, "_visit") as visit:
+            # nothing changed
+            self.assertEqual(solver.solve([A]), ([B, A], []))
+            # a job that nothing refers to was added
+            solver.add_job(make_job(id="C"))
+            self.assertEqual(solver.solve([A]), ([B, A], []))
+        visit.assert_not_called()
+        with mock.patch.object(solver, "_visit") as visit:
+            # a job was appended to the visit list
+            solver.solve([A, B])
+        visit.assert_called_once_with(B)
+
+    def test_graph_changes(self):
+        A = make_job(id="A", depends="B")
+        B = make_job(id="B")
+        solver = DependencySolver([A])
+        self.assertEqual(
+            solver.solve([A]), ([], [DependencyMissingError(A, "B", "direct")])
+        )
+        solver.add_job(B)
+        self.assertEqual(solver.solve([A]), ([B, A], []))
+        solver.remove_job(B)
+        self.assertEqual(
+            solver.solve([A]), ([], [DependencyMissingError(A, "B", "direct")])
+        )
+        with self.assertRaises(DependencyDuplicateError):
+            solver.add_job(make_job(id="A", plugin="shell"))
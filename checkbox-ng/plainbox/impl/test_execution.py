@@ -0,0 +1,242 @@
+# This file is part of Checkbox.
+#
+# Copyright 2026 Canonical Ltd.
+#
+# Checkbox is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# Checkbox is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Checkbox.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+plainbox.impl.test_execution
+============================
+
+Test definitions for the job I/O loop used by plainbox.impl.execution
+"""
+
+import os
+import subprocess
+from unittest import TestCase
+from unittest.mock import Mock
+from unittest.mock import patch
+
+from plainbox.impl.execution import UnifiedRunner
+from plainbox.impl.execution import get_sudo_command
+from plainbox.impl.jobcgroup import JobCgroupManager
+from plainbox.impl.secure.privileged_broker import PrivilegedBrokerError
+from plainbox.impl.secure.test_privileged_broker import UserBroker
+from plainbox.vendor import extcmd
+
+
+class Recorder(extcmd.DelegateBase):
+    def __init__(self):
+        self.events = []
+
+    def on_line(self, stream_name, line):
+        self.events.append((stream_name, line))
+
+    def on_chunk(self, stream_name, chunk):
+        self.events.append((stream_name, chunk))
+
+    def on_end(self, returncode):
+        self.events.append(("end", returncode))
+
+
+class MultiplexTests(TestCase):
+    def popen(self, script, **kwargs):
+        return subprocess.Popen(
+            ["sh", "-c", script],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            **kwargs
+        )
+
+    def test_lines(self):
+        recorder = Recorder()
+        ecmd = extcmd.ExternalCommandWithDelegate(recorder)
+        ecmd.call(
+            ["sh", "-c", "printf 'a\\nb\\n'; printf 'e\\n' >&2; printf c"]
+        )
+        self.assertEqual(
+            sorted(recorder.events[:-1]),
+            [
+                ("stderr", b"e\n"),
+                ("stdout", b"a\n"),
+                ("stdout", b"b\n"),
+                ("stdout", b"c"),
+            ],
+        )
+        self.assertEqual(recorder.events[-1], ("end", 0))
+
+    def test_chunks(self):
+        recorder = Recorder()
+        ecmd = extcmd.ExternalCommandWithDelegate(
+            recorder, flags=extcmd.CHUNKED_IO
+        )
+        ecmd.call(["sh", "-c", "printf 'a\\nb'"])
+        self.assertEqual(
+            b"".join(data for name, data in recorder.events[:-1]), b"a\nb"
+        )
+
+    def test_stdin_forwarding(self):
+        recorder = Recorder()
+        ecmd = extcmd.ExternalCommandWithDelegate(recorder)
+        source_r, source_w = os.pipe()
+        in_r, in_w = os.pipe()
+        proc = self.popen("cat", stdin=in_r)
+        os.close(in_r)
+        # more than a pipe can buffer so that writing has to wait for cat
+        payload = b"x" * 100000 + b"\n"
+        writer = os.fork()
+        if writer == 0:
+            os.write(source_w, payload)
+            os._exit(0)
+        os.close(source_w)
+        with open(source_r) as source:
+            ecmd._multiplex(proc, source, in_w)
+        os.waitpid(writer, 0)
+        self.assertEqual(proc.wait(), 0)
+        self.assertEqual(recorder.events, [("stdout", payload)])
+        # the write end was closed on EOF
+        with self.assertRaises(OSError):
+            os.close(in_w)
+
+    def test_stdin_without_fileno(self):
+        recorder = Recorder()
+        ecmd = extcmd.ExternalCommandWithDelegate(recorder)
+        in_r, in_w = os.pipe()
+        proc = self.popen("cat; echo done", stdin=in_r)
+        os.close(in_r)
+        ecmd._multiplex(proc, object(), in_w)
+        proc.wait()
+        self.assertEqual(recorder.events, [("stdout", b"done\n")])
+
+    def test_child_ignoring_stdin(self):
+        recorder = Recorder()
+        ecmd = extcmd.ExternalCommandWithDelegate(recorder)
+        source_r, source_w = os.pipe()
+        in_r, in_w = os.pipe()
+        proc = self.popen("exec 0<&-; echo done", stdin=in_r)
+        os.close(in_r)
+        with open(source_r) as source:
+            ecmd._multiplex(proc, source, in_w)
+        os.close(source_w)
+        proc.wait()
+        self.assertEqual(recorder.events, [("stdout", b"done\n")])
+
+    def test_interrupt(self):
+        recorder = Recorder()
+        ecmd = extcmd.ExternalCommandWithDelegate(recorder)
+        proc = self.popen("echo a")
+        interrupted = []
+
+        class Selector(extcmd.selectors.DefaultSelector):
+            raised = False
+
+            def select(self, timeout=None):
+                if not Selector.raised:
+                    Selector.raised = True
+                    raise KeyboardInterrupt
+                return super().select(timeout)
+
+        with patch.object(extcmd.selectors, "PollSelector", Selector):
+            ecmd._multiplex(proc, on_interrupt=lambda: interrupted.append(1))
+        proc.wait()
+        # the output is still collected after the interruption
+        self.assertEqual(interrupted, [1])
+        self.assertEqual(recorder.events, [("stdout", b"a\n")])
+
+
+class UnifiedRunnerCallTests(TestCase):
+    def make_runner(self):
+        runner = UnifiedRunner.__new__(UnifiedRunner)
+        runner._user_provider = lambda: None
+        runner._password_provider = None
+        runner._session_id = "session"
+        runner._extra_env = None
+        runner._running_jobs_pid = None
+        runner._running_jobs_broker = None
+        runner._privileged_broker = None
+        runner._cgroup_manager = JobCgroupManager(root="/nonexistent")
+        return runner
+
+    @patch("plainbox.impl.execution.get_execution_environment")
+    @patch("plainbox.impl.execution.get_execution_command")
+    @patch.object(UnifiedRunner, "temporary_cwd")
+    @patch.object(UnifiedRunner, "configured_filesystem")
+    def test_execute_job(self, m_fs, m_cwd, m_command, m_environment):
+        m_fs.return_value.__enter__.return_value = "/tmp"
+        m_cwd.return_value.__enter__.return_value = "/tmp"
+        m_command.return_value = ["sh", "-c", "read x; echo got $x; exit 3"]
+        m_environment.return_value = dict(os.environ)
+        runner = self.make_runner()
+        job = Mock(user=None, id="job")
+        job.get_flag_set.return_value = set()
+        recorder = Recorder()
+        source_r, source_w = os.pipe()
+        os.write(source_w, b"hello\n")
+        os.close(source_w)
+        with open(source_r) as source:
+            return_code = runner.execute_job(
+                job, {}, extcmd.ExternalCommandWithDelegate(recorder), source
+            )
+        self.assertEqual(return_code, 3)
+        self.assertEqual(
+            recorder.events, [("stdout", b"got hello\n"), ("end", 3)]
+        )
+        self.assertIsNone(runner._running_jobs_pid)
+
+    @patch("plainbox.impl.execution.getpass.getuser", return_value="user")
+    @patch("plainbox.impl.execution.get_execution_environment")
+    @patch("plainbox.impl.execution.get_execution_command")
+    @patch.object(UnifiedRunner, "temporary_cwd")
+    @patch.object(UnifiedRunner, "configured_filesystem")
+    def test_execute_job_privileged_broker(
+        self, m_fs, m_cwd, m_command, m_environment, m_getuser
+    ):
+        m_fs.return_value.__enter__.return_value = "/tmp"
+        m_cwd.return_value.__enter__.return_value = "/tmp"
+        # the helper runs the command without the sudo prefix
+        m_command.return_value = get_sudo_command("root") + [
+            "sh",
+            "-c",
+            "read x; echo got $x; exit 3",
+        ]
+        m_environment.return_value = dict(os.environ)
+        runner = self.make_runner()
+        runner._privileged_broker = UserBroker(timeout=10)
+        runner._privileged_broker.start()
+        self.addCleanup(runner._privileged_broker.close)
+        job = Mock(user="root", id="job")
+        job.get_flag_set.return_value = set()
+        recorder = Recorder()
+        source_r, source_w = os.pipe()
+        os.write(source_w, b"hello\n")
+        os.close(source_w)
+        with open(source_r) as source:
+            return_code = runner.execute_job(
+                job, {}, extcmd.ExternalCommandWithDelegate(recorder), source
+            )
+        self.assertEqual(return_code, 3)
+        self.assertEqual(
+            recorder.events, [("stdout", b"got hello\n"), ("end", 3)]
+        )
+        self.assertIsNone(runner._running_jobs_broker)
+
+    def test_privileged_broker_fallback(self):
+        runner = self.make_runner()
+        with patch(
+            "plainbox.impl.execution.PrivilegedBroker.start",
+            side_effect=PrivilegedBrokerError("no"),
+        ) as m_start:
+            self.assertIsNone(runner._get_privileged_broker())
+            self.assertIsNone(runner._get_privileged_broker())
+        # the helper is only tried once
+        m_start.assert_called_once_with()
@@ -0,0 +1,167 @@
+# This file is part of Checkbox.
+#
+# Copyright 2026 Canonical Ltd.
+#
+# Checkbox is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# Checkbox is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Checkbox.  If not, see <http://www.gnu.org/licenses/>.
+"""
+plainbox.impl.test_jobcgroup
+============================
+
+Test definitions for plainbox.impl.jobcgroup module
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from plainbox.impl.jobcgroup import JobCgroup
+from plainbox.impl.jobcgroup import JobCgroupManager
+from plainbox.impl.jobcgroup import get_own_cgroup
+
+
+class JobCgroupTestsBase(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def write(self, path, text):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wt") as stream:
+            stream.write(text)
+
+
+class GetOwnCgroupTests(JobCgroupTestsBase):
+    def test_unified(self):
+        self.write("cgroup", "1:name=systemd:/a\n0::/user.slice/x.scope\n")
+        self.assertEqual(
+            get_own_cgroup(os.path.join(self.root, "cgroup")),
+            "/user.slice/x.scope",
+        )
+
+    def test_legacy(self):
+        self.write("cgroup", "2:memory:/a\n1:name=systemd:/a\n")
+        self.assertIsNone(get_own_cgroup(os.path.join(self.root, "cgroup")))
+
+
+class JobCgroupManagerTests(JobCgroupTestsBase):
+    def test_no_cgroup2(self):
+        manager = JobCgroupManager(self.root, "/")
+        self.assertIsNone(manager.base)
+        self.assertIsNone(manager.create("job"))
+
+    def test_create(self):
+        self.write("cgroup.controllers", "cpu io memory pids")
+        self.write("app/cgroup.controllers", "cpu io memory")
+        self.write("app/cgroup.subtree_control", "")
+        self.write("app/cgroup.procs", "")
+        manager = JobCgroupManager(self.root, "/app")
+        cgroup = manager.create("job")
+        self.assertEqual(
+            os.path.dirname(cgroup.path), os.path.join(self.root, "app")
+        )
+        self.assertTrue(os.path.isdir(cgroup.path))
+        self.assertNotEqual(manager.create("job").path, cgroup.path)
+
+    def test_hybrid(self):
+        self.write("unified/cgroup.controllers", "")
+        self.write("unified/cgroup.procs", "")
+        manager = JobCgroupManager(self.root, "/")
+        self.assertEqual(manager.base, os.path.join(self.root, "unified"))
+
+    def test_not_delegated(self):
+        self.write("cgroup.controllers", "cpu")
+        self.write("cgroup.procs", "")
+        with patch("os.access", return_value=False):
+            self.assertIsNone(JobCgroupManager(self.root, "/").base)
+
+
+class JobCgroupTests(JobCgroupTestsBase):
+    def test_get_usage(self):
+        self.write(
+            "job/cpu.stat",
+            "usage_usec 300\nuser_usec 200\nsystem_usec 100\nnr_periods 0\n",
+        )
+        self.write("job/memory.peak", "4096\n")
+        self.write(
+            "job/io.stat",
+            "8:0 rbytes=10 wbytes=20 rios=1 wios=2\n"
+            "8:16 rbytes=1 wbytes=2 rios=1 wios=1\n",
+        )
+        self.write(
+            "job/memory.pressure",
+            "some avg10=0.00 avg60=0.00 avg300=0.00 total=7\n"
+            "full avg10=0.00 avg60=0.00 avg300=0.00 total=5\n",
+        )
+        cgroup = JobCgroup(os.path.join(self.root, "job"))
+        self.assertEqual(
+            cgroup.get_usage(),
+            {
+                "cpu_usec": 300,
+                "cpu_user_usec": 200,
+                "cpu_system_usec": 100,
+                "memory_peak": 4096,
+                "io_read_bytes": 11,
+                "io_write_bytes": 22,
+                "memory_pressure_some_usec": 7,
+                "memory_pressure_full_usec": 5,
+            },
+        )
+
+    def test_get_usage_nothing(self):
+        self.assertEqual(
+            JobCgroup(os.path.join(self.root, "job")).get_usage(), {}
+        )
+
+    def test_is_populated(self):
+        self.write("job/cgroup.events", "populated 1\nfrozen 0\n")
+        cgroup = JobCgroup(os.path.join(self.root, "job"))
+        self.assertTrue(cgroup.is_populated())
+        self.write("job/cgroup.events", "populated 0\nfrozen 0\n")
+        self.assertFalse(cgroup.is_populated())
+
+    @patch("os.kill")
+    def test_kill_without_cgroup_kill(self, mock_kill):
+        os.makedirs(os.path.join(self.root, "job"))
+        os.symlink(
+            os.path.join(self.root, "missing", "cgroup.kill"),
+            os.path.join(self.root, "job", "cgroup.kill"),
+        )
+        self.write("job/cgroup.procs", "12\n34\n")
+        JobCgroup(os.path.join(self.root, "job")).kill()
+        self.assertEqual(
+            [call.args[0] for call in mock_kill.call_args_list], [12, 34]
+        )
+
+
+class LiveJobCgroupTests(TestCase):
+    """Tests using the cgroups of the system, when they can be used."""
+
+    def setUp(self):
+        self.manager = JobCgroupManager()
+        if self.manager.base is None:
+            self.skipTest("cgroup v2 is not delegated")
+
+    def test_leftovers_are_killed(self):
+        cgroup = self.manager.create("test")
+        proc = subprocess.Popen(
+            ["sh", "-c", "sleep 60 > /dev/null &"], preexec_fn=cgroup.attach
+        )
+        self.assertEqual(proc.wait(), 0)
+        self.assertEqual(len(cgroup.get_pid_list()), 1)
+        usage = cgroup.release()
+        self.assertIn("cpu_usec", usage)
+        self.assertFalse(os.path.exists(cgroup.path))
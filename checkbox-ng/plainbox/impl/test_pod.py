@@ -25,6 +25,8 @@ from plainbox.impl.pod import Field
 from plainbox.impl.pod import MANDATORY
 from plainbox.impl.pod import POD
 from plainbox.impl.pod import UNSET
+from plainbox.impl.pod import batch_signals
+from plainbox.impl.pod import batched_signal
 from plainbox.impl.pod import _FieldCollection
 from plainbox.impl.pod import read_only_assign_filter
 from plainbox.impl.pod import sequence_type_check_assign_filter
@@ -470,6 +472,29 @@ class PODTests(TestCase):
         # Ensure signals fired
         field_callback.assert_called_with(None, 1)
 
+    def test_notifications_without_listeners(self):
+        """The notify function is called even if nothing is connected."""
+        calls = mock.Mock(name="calls")
+
+        def notify_fn(instance, old, new):
+            calls(instance, old, new)
+
+        class T(POD):
+            f = Field(notify=True, notify_fn=notify_fn)
+
+        pod = T()
+        calls.reset_mock()
+        pod.f = 1
+        calls.assert_called_once_with(pod, None, 1)
+        # The per-object signal was not needed
+        self.assertNotIn("__signals__", pod.__dict__)
+        # Listeners connected later are notified too
+        field_callback = mock.Mock(name="field_callback")
+        pod.on_f_changed.connect(field_callback)
+        pod.f = 2
+        field_callback.assert_called_once_with(1, 2)
+        calls.assert_called_with(pod, 1, 2)
+
     def test_pod_inheritance(self):
         """Check that PODs can be subclassed and new fields can be added."""
 
@@ -542,6 +567,48 @@ class PODTests(TestCase):
         self.assertFalse(A(1) == 1)
 
 
+class BatchedSignalTests(TestCase):
+    """Tests for batched_signal and batch_signals()."""
+
+    def setUp(self):
+        class T:
+            @batched_signal
+            def on_changed(self, value):
+                pass
+
+        self.obj = T()
+        self.callback = mock.Mock(name="callback")
+        self.obj.on_changed.connect(self.callback)
+
+    def test_fired_immediately(self):
+        """Outside of a batch, the signal is fired right away."""
+        self.obj.on_changed(1)
+        self.callback.assert_called_once_with(1)
+
+    def test_batch(self):
+        """In a batch, the signal is fired once at the end."""
+        with batch_signals(self.obj):
+            self.obj.on_changed(1)
+            with batch_signals(self.obj):
+                self.obj.on_changed(2)
+            self.callback.assert_not_called()
+            self.obj.on_changed(3)
+            self.callback.assert_not_called()
+        self.callback.assert_called_once_with(3)
+        self.obj.on_changed(4)
+        self.callback.assert_called_with(4)
+
+    def test_batch_other_objects(self):
+        """A batch only applies to one object."""
+        other = type(self.obj)()
+        other_callback = mock.Mock(name="other_callback")
+        other.on_changed.connect(other_callback)
+        with batch_signals(self.obj):
+            other.on_changed(1)
+        other_callback.assert_called_once_with(1)
+        self.callback.assert_not_called()
+
+
 class AssignFilterTests(TestCase):
     """Tests for assignment filters."""
 
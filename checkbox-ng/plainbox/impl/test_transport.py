@@ -25,9 +25,19 @@ plainbox.impl.transport.test_init
 Test definitions for plainbox.impl.transport module
 """
 
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from io import BytesIO
 from unittest import TestCase
+import hashlib
+import json
+import socketserver
+import threading
 
+from plainbox.impl.transport import ResumableUpload
 from plainbox.impl.transport import TransportBase
+from plainbox.impl.transport import TransportError
+from plainbox.vendor import mock
 
 
 class TransportBaseTests(TestCase):
@@ -68,3 +78,178 @@ class TransportBaseTests(TestCase):
         transport = self.TestTransport("", test_opt_string)
         self.assertEqual(["this"], list(transport.options.keys()))
         self.assertEqual("contains=equal", transport.options["this"])
+
+
+class _UploadServer(socketserver.ThreadingMixIn, HTTPServer):
+    """Stand-in for a server implementing the chunked upload protocol."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _UploadHandler)
+        self.lock = threading.Lock()
+        self.uploads = {}
+        self.requests = []
+        # number of 503 replies to give before accepting the request
+        self.failures = 0
+        self.start_requests = []
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:{}/submission".format(self.server_port)
+
+
+class _UploadHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, payload=None):
+        body = json.dumps(payload or {}).encode("UTF-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers["Content-Length"] or 0))
+
+    def _fail(self):
+        with self.server.lock:
+            self.server.requests.append((self.command, self.path))
+            if self.server.failures:
+                self.server.failures -= 1
+                return True
+        return False
+
+    def do_POST(self):
+        body = self._body()
+        if self._fail():
+            return self._reply(503)
+        if self.path == "/submission/uploads/":
+            description = json.loads(body.decode("UTF-8"))
+            self.server.start_requests.append(description)
+            upload = self.server.uploads.setdefault(
+                description["sha256"], {"description": description}
+            )
+            upload.setdefault("chunks", {})
+            return self._reply(
+                201,
+                {
+                    "upload_id": description["sha256"],
+                    "received": sorted(upload["chunks"]),
+                },
+            )
+        upload_id = self.path.split("/")[-2]
+        upload = self.server.uploads[upload_id]
+        chunks = upload["chunks"]
+        description = upload["description"]
+        if len(chunks) != len(description["chunks"]):
+            return self._reply(400, {"error": "missing chunks"})
+        data = b"".join(chunks[i] for i in range(len(chunks)))
+        if hashlib.sha256(data).hexdigest() != upload_id:
+            return self._reply(400, {"error": "corrupted"})
+        upload["data"] = data
+        return self._reply(200, {"id": 1, "url": "http://example/1"})
+
+    def do_PUT(self):
+        body = self._body()
+        if self._fail():
+            return self._reply(503)
+        _, _, _, upload_id, index = self.path.split("/")
+        digest = hashlib.sha256(body).hexdigest()
+        if digest != self.headers["X-Chunk-SHA256"]:
+            return self._reply(422, {"error": "bad chunk"})
+        with self.server.lock:
+            self.server.uploads[upload_id]["chunks"][int(index)] = body
+        return self._reply(204)
+
+
+class ResumableUploadTests(TestCase):
+    def setUp(self):
+        self.server = _UploadServer()
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.data = bytes(range(256)) * 41
+        self.digest = hashlib.sha256(self.data).hexdigest()
+        patcher = mock.patch("plainbox.impl.transport.time.sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _upload(self, **kwargs):
+        kwargs.setdefault("chunk_size", 1000)
+        return ResumableUpload(self.server.url, backoff=0.5, **kwargs)
+
+    def _puts(self):
+        return [
+            path for (method, path) in self.server.requests if method == "PUT"
+        ]
+
+    def test_upload(self):
+        result = self._upload().send(BytesIO(self.data), secure_id="x")
+        self.assertEqual(result, {"id": 1, "url": "http://example/1"})
+        self.assertEqual(self.server.uploads[self.digest]["data"], self.data)
+        self.assertEqual(len(self._puts()), 11)
+        description = self.server.start_requests[0]
+        self.assertEqual(description["size"], len(self.data))
+        self.assertEqual(description["secure_id"], "x")
+
+    def test_upload_bytes_and_unseekable_stream(self):
+        self._upload().send(self.data)
+        self.assertEqual(self.server.uploads[self.digest]["data"], self.data)
+        del self.server.uploads[self.digest]
+        stream = mock.Mock(wraps=BytesIO(self.data))
+        stream.seekable.return_value = False
+        self._upload().send(stream)
+        self.assertEqual(self.server.uploads[self.digest]["data"], self.data)
+
+    def test_resume(self):
+        # another attempt already sent the first chunks
+        self.server.uploads[self.digest] = {
+            "chunks": {0: self.data[:1000], 1: self.data[1000:2000]}
+        }
+        self.server.uploads[self.digest]["description"] = {"chunks": [0] * 11}
+        self._upload().send(BytesIO(self.data))
+        self.assertEqual(self.server.uploads[self.digest]["data"], self.data)
+        self.assertEqual(len(self._puts()), 9)
+        self.assertNotIn(
+            "/submission/uploads/{}/0".format(self.digest), self._puts()
+        )
+
+    def test_retry_with_backoff(self):
+        self.server.failures = 3
+        self._upload(workers=1).send(BytesIO(self.data))
+        self.assertEqual(self.server.uploads[self.digest]["data"], self.data)
+        self.assertEqual(
+            [c[0][0] for c in self.sleep.call_args_list], [0.5, 1.0, 2.0]
+        )
+
+    def test_too_many_failures(self):
+        self.server.failures = 100
+        with self.assertRaises(TransportError):
+            self._upload(retries=2).send(BytesIO(self.data))
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_connection_refused(self):
+        upload = ResumableUpload("http://127.0.0.1:1/x", retries=1)
+        with self.assertRaises(TransportError):
+            upload.send(self.data)
+        self.assertEqual(self.sleep.call_count, 1)
+
+    def test_from_options(self):
+        upload = ResumableUpload.from_options(
+            "http://example/",
+            {"chunked": "yes", "chunk_size": "10", "upload_workers": "2"},
+        )
+        self.assertEqual(upload.chunk_size, 10)
+        self.assertEqual(upload.workers, 2)
+        self.assertEqual(upload.url, "http://example")
+        self.assertTrue(ResumableUpload.requested({"chunked": "Yes"}))
+        self.assertFalse(ResumableUpload.requested({}))
+        with self.assertRaises(ValueError) as context:
+            ResumableUpload.from_options("", {"chunk_size": "big"})
+        self.assertIn("chunk_size", str(context.exception))
+        self.assertIsInstance(context.exception.__cause__, ValueError)
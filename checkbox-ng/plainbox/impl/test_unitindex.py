@@ -0,0 +1,170 @@
+# This file is part of Checkbox.
+#
+# Copyright 2026 Canonical Ltd.
+#
+# Checkbox is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# Checkbox is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Checkbox.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from plainbox.impl.highlevel import Explorer
+from plainbox.impl.secure.providers.v1 import Provider1
+from plainbox.impl.unitindex import UnitIndex
+from plainbox.impl.unitindex import get_index_path
+from plainbox.impl.unitindex import get_providers_fingerprint
+
+UNITS = """\
+id: job1
+plugin: shell
+command: true
+_summary: First job
+
+id: job2
+plugin: manual
+_summary: Second job
+_purpose: Check something
+
+unit: template
+template-resource: resource
+template-unit: job
+id: job-{name}
+plugin: shell
+command: true
+_summary: Job for {name}
+"""
+
+
+def walk(obj):
+    yield obj
+    for child in obj.children:
+        yield from walk(child)
+
+
+@patch("plainbox.impl.highlevel.WellKnownDirsHelper.get_storage_list")
+class UnitIndexTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.units_dir = os.path.join(self.tmp, "provider", "units")
+        os.makedirs(self.units_dir)
+        self.write_units(UNITS)
+        self.provider = self.make_provider()
+        self.path = os.path.join(self.tmp, "cache", "unit_index.sqlite")
+
+    def make_provider(self):
+        return Provider1(
+            "com.example:test",
+            "com.example",
+            "1.0",
+            "Test provider",
+            False,
+            None,
+            self.units_dir,
+            None,
+            None,
+            None,
+            None,
+            os.path.join(self.tmp, "provider"),
+        )
+
+    def write_units(self, text):
+        with open(os.path.join(self.units_dir, "units.pxu"), "w") as f:
+            f.write(text)
+
+    def assertSameTree(self, first, second):
+        self.assertEqual(
+            [(obj.name, obj.group, obj.attrs) for obj in walk(first)],
+            [(obj.name, obj.group, obj.attrs) for obj in walk(second)],
+        )
+
+    def test_get_object_tree(self, mock_storages):
+        mock_storages.return_value = []
+        index = UnitIndex([self.provider], self.path)
+        tree = index.get_object_tree()
+        self.assertTrue(os.path.exists(self.path))
+        self.assertSameTree(tree, Explorer([self.provider]).get_object_tree())
+        self.assertEqual(
+            tree.children[0].children[0]._impl._raw_data["command"], "true"
+        )
+        # the same tree comes from the stored index
+        with patch.object(UnitIndex, "_fill") as mock_fill:
+            tree = UnitIndex([self.provider], self.path).get_object_tree()
+        mock_fill.assert_not_called()
+        self.assertSameTree(tree, Explorer([self.provider]).get_object_tree())
+
+    def test_rebuilt_on_change(self, mock_storages):
+        mock_storages.return_value = []
+        index = UnitIndex([self.provider], self.path)
+        self.assertEqual(len(index.find(["com.example::job2"])), 1)
+        self.write_units(UNITS.replace("id: job2", "id: job3"))
+        index = UnitIndex([self.make_provider()], self.path)
+        self.assertEqual(index.find(["com.example::job2"]), [])
+        self.assertEqual(len(index.find(["com.example::job3"])), 1)
+
+    def test_find(self, mock_storages):
+        index = UnitIndex([self.provider], self.path)
+        found = index.find(
+            ["com.example::job2", "com.example::job1", "unknown"]
+        )
+        self.assertEqual(
+            [obj.name for obj in found],
+            ["com.example::job1", "com.example::job2"],
+        )
+        self.assertEqual(found[1].attrs["plugin"], "manual")
+        self.assertEqual(found[1].children, [])
+
+    def test_expansion(self, mock_storages):
+        index = UnitIndex([self.provider], self.path)
+        self.assertIsNone(index.get_expansion("tp"))
+        index.set_expansion("tp", [{"id": "job1"}])
+        index = UnitIndex([self.provider], self.path)
+        self.assertEqual(index.get_expansion("tp"), [{"id": "job1"}])
+        # expansions are dropped with the rest of the index
+        self.write_units(UNITS + "\nid: job4\nplugin: shell\ncommand: true\n")
+        index = UnitIndex([self.make_provider()], self.path)
+        self.assertIsNone(index.get_expansion("tp"))
+
+    def test_in_memory_fallback(self, mock_storages):
+        mock_storages.return_value = []
+        # a file where the cache directory should be
+        open(os.path.join(self.tmp, "cache"), "w").close()
+        with self.assertLogs("plainbox.unitindex", "WARNING"):
+            tree = UnitIndex([self.provider], self.path).get_object_tree()
+        self.assertSameTree(tree, Explorer([self.provider]).get_object_tree())
+        # nothing is left behind
+        self.assertEqual(sorted(os.listdir(self.tmp)), ["cache", "provider"])
+
+
+class FunctionTests(TestCase):
+    @patch.dict(os.environ, {"SNAP_USER_COMMON": "/snap"})
+    def test_get_index_path_snap(self):
+        self.assertEqual(
+            get_index_path(), "/snap/.cache/plainbox/unit_index.sqlite"
+        )
+
+    @patch.dict(os.environ, {"XDG_CACHE_HOME": "/xdg"})
+    def test_get_index_path(self):
+        with patch.dict(os.environ):
+            os.environ.pop("SNAP_USER_COMMON", None)
+            self.assertEqual(
+                get_index_path(), "/xdg/plainbox/unit_index.sqlite"
+            )
+
+    def test_get_providers_fingerprint_locale(self):
+        with patch.dict(os.environ, {"LANG": "C.UTF-8"}):
+            fingerprint = get_providers_fingerprint([])
+        with patch.dict(os.environ, {"LANG": "fr_FR.UTF-8"}):
+            self.assertNotEqual(get_providers_fingerprint([]), fingerprint)
@@ -29,12 +29,18 @@ Shared code for test data transports..
 """
 
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 from io import TextIOWrapper
 from logging import getLogger
+import hashlib
 import pkg_resources
 import re
 from shutil import copyfileobj
 import sys
+import tempfile
+import threading
+import time
 
 from plainbox.abc import ISessionStateTransport
 from plainbox.i18n import gettext as _
@@ -108,6 +114,255 @@ class TransportBase(ISessionStateTransport):
             raise ValueError(_("No valid options in option string"))
 
 
+class ResumableUpload:
+    """
+    Upload of a (potentially big) submission in content-hashed chunks.
+
+    The protocol, relative to the transport URL, is:
+
+    ``POST <url>/uploads/``
+        JSON body with the ``size`` and ``sha256`` of the whole submission,
+        the ``chunk_size`` and the list of ``chunks`` (sha256 of each
+        chunk). The server answers with the ``upload_id`` and the list of
+        chunk indices it has already ``received``, an upload interrupted
+        earlier (even by a different process) resumes from there.
+    ``PUT <url>/uploads/<upload_id>/<index>``
+        The content of one chunk, its sha256 in the ``X-Chunk-SHA256``
+        header. Several chunks are sent at the same time.
+    ``POST <url>/uploads/<upload_id>/complete``
+        Assemble the submission, the response is the same as for a
+        single-request upload.
+
+    Chunks are read from the submission stream when they are sent so only
+    a few of them are kept in memory. Requests that fail because of the
+    network or with a temporary server error are retried with an
+    exponential backoff.
+    """
+
+    DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+    DEFAULT_WORKERS = 4
+    DEFAULT_RETRIES = 5
+    # HTTP status codes worth retrying
+    RETRY_STATUS = (408, 429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        url,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        workers=DEFAULT_WORKERS,
+        retries=DEFAULT_RETRIES,
+        backoff=1.0,
+        timeout=60,
+        get_headers=None,
+    ):
+        """
+        Initialize the upload.
+
+        :param url:
+            Base URL of the upload endpoints.
+        :param get_headers:
+            Optional callable returning extra headers (e.g. authorization)
+            for a (method, url) pair.
+        """
+        self.url = url.rstrip("/")
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._get_headers = get_headers
+        self._local = threading.local()
+        self._read_lock = threading.Lock()
+
+    @staticmethod
+    def requested(options):
+        """Check if transport options ask for a chunked upload."""
+        value = options.get("chunked", "")
+        return value.lower() in ("1", "yes", "true", "on")
+
+    @classmethod
+    def from_options(cls, url, options, **kwargs):
+        """Create an upload configured from transport options."""
+        for option, name in (
+            ("chunk_size", "chunk_size"),
+            ("upload_workers", "workers"),
+            ("upload_retries", "retries"),
+        ):
+            if option in options:
+                try:
+                    kwargs[name] = int(options[option])
+                except ValueError as exc:
+                    raise ValueError(
+                        _("Invalid value for {}: {}").format(
+                            option, options[option]
+                        )
+                    ) from exc
+        return cls(url, **kwargs)
+
+    def send(self, data, **fields):
+        """
+        Upload data, skipping the chunks the server already has.
+
+        :param data:
+            Bytes or a file-like object with the submission.
+        :param fields:
+            Additional fields sent along with the description of the
+            submission when the upload starts.
+        :returns:
+            The JSON response of the server to the completed upload.
+        :raises TransportError:
+            If the upload cannot be completed.
+        """
+        stream = self._seekable(data)
+        size, digest, chunks = self._hash_chunks(stream)
+        response = self._request(
+            "POST",
+            self.url + "/uploads/",
+            json={
+                **fields,
+                "size": size,
+                "sha256": digest,
+                "chunk_size": self.chunk_size,
+                "chunks": chunks,
+            },
+        )
+        session = self._json(response)
+        try:
+            upload_id = session["upload_id"]
+            received = set(session.get("received", []))
+        except (KeyError, TypeError):
+            raise TransportError(
+                _("Unexpected response from {}: {}").format(
+                    self.url, response.text
+                )
+            )
+        missing = [i for i in range(len(chunks)) if i not in received]
+        logger.debug(
+            _("Uploading %d of %d chunks (upload %s)"),
+            len(missing),
+            len(chunks),
+            upload_id,
+        )
+        chunk_url = "{}/uploads/{}/".format(self.url, upload_id)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                executor.submit(
+                    self._send_chunk, stream, chunk_url, index, chunks[index]
+                )
+                for index in missing
+            ]
+            for future in futures:
+                # re-raises the first failure, the remaining chunks are
+                # still sent so that a later attempt has less to do
+                future.result()
+        response = self._request("POST", chunk_url + "complete")
+        return self._json(response)
+
+    def _seekable(self, data):
+        if isinstance(data, (bytes, bytearray)):
+            return BytesIO(data)
+        try:
+            if data.seekable():
+                return data
+        except AttributeError:
+            pass
+        # the stream is read twice (hashes, then upload), keep a copy on disk
+        spool = tempfile.TemporaryFile()
+        copyfileobj(data, spool)
+        return spool
+
+    def _read_chunk(self, stream, index):
+        with self._read_lock:
+            stream.seek(index * self.chunk_size)
+            return stream.read(self.chunk_size)
+
+    def _hash_chunks(self, stream):
+        stream.seek(0)
+        size = 0
+        digest = hashlib.sha256()
+        chunks = []
+        while True:
+            chunk = stream.read(self.chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            digest.update(chunk)
+            chunks.append(hashlib.sha256(chunk).hexdigest())
+        return size, digest.hexdigest(), chunks
+
+    def _send_chunk(self, stream, chunk_url, index, chunk_digest):
+        chunk = self._read_chunk(stream, index)
+        if hashlib.sha256(chunk).hexdigest() != chunk_digest:
+            raise TransportError(_("Submission changed while being uploaded"))
+        self._request(
+            "PUT",
+            chunk_url + str(index),
+            data=chunk,
+            headers={
+                "Content-Type": "application/octet-stream",
+                "X-Chunk-SHA256": chunk_digest,
+            },
+        )
+
+    def _session(self):
+        # requests.Session objects should not be shared between threads
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _request(self, method, url, headers=None, **kwargs):
+        headers = dict(headers or {})
+        attempt = 0
+        while True:
+            if self._get_headers:
+                headers.update(self._get_headers(method, url))
+            try:
+                response = self._session().request(
+                    method,
+                    url,
+                    headers=headers,
+                    timeout=self.timeout,
+                    **kwargs
+                )
+            except requests.exceptions.InvalidSchema as exc:
+                raise TransportError(
+                    _("Invalid destination URL: {0}").format(exc)
+                )
+            except (
+                requests.exceptions.Timeout,
+                requests.exceptions.ConnectionError,
+            ) as exc:
+                if attempt >= self.retries:
+                    raise TransportError(
+                        _("Unable to connect to {0}: {1}").format(url, exc)
+                    )
+            else:
+                if (
+                    response.status_code not in self.RETRY_STATUS
+                    or attempt >= self.retries
+                ):
+                    try:
+                        response.raise_for_status()
+                    except requests.exceptions.RequestException as exc:
+                        raise TransportError(
+                            " ".join([str(exc), response.text])
+                        )
+                    return response
+            delay = self.backoff * 2**attempt
+            attempt += 1
+            logger.debug(
+                _("%s %s failed, retrying in %.1fs"), method, url, delay
+            )
+            time.sleep(delay)
+
+    def _json(self, response):
+        try:
+            return response.json()
+        except ValueError as exc:
+            raise TransportError(str(exc)) from exc
+
+
 SECURE_ID_PATTERN = r"^[a-zA-Z0-9]{15,}$"
 
 
@@ -141,20 +396,30 @@ class _OAuthTransport(TransportBase):
         self.oauth_creds = transport_details.get("oauth_creds", {})
         self.uploader_email = transport_details["uploader_email"]
 
+    def _oauth_headers(self, method, url):
+        if not self.oauth_creds:
+            return {}
+        client = oauth1.Client(
+            client_key=self.oauth_creds["consumer_key"],
+            client_secret=self.oauth_creds["consumer_secret"],
+            resource_owner_key=self.oauth_creds["token_key"],
+            resource_owner_secret=self.oauth_creds["token_secret"],
+            signature_method=oauth1.SIGNATURE_HMAC,
+            realm="Checkbox",
+        )
+        uri, headers, body = client.sign(url, method)
+        return headers
+
     def send(self, data, config=None, session_state=None):
-        headers = {}
-        if self.oauth_creds:
-            client = oauth1.Client(
-                client_key=self.oauth_creds["consumer_key"],
-                client_secret=self.oauth_creds["consumer_secret"],
-                resource_owner_key=self.oauth_creds["token_key"],
-                resource_owner_secret=self.oauth_creds["token_secret"],
-                signature_method=oauth1.SIGNATURE_HMAC,
-                realm="Checkbox",
+        if ResumableUpload.requested(self.options):
+            upload = ResumableUpload.from_options(
+                self.url, self.options, get_headers=self._oauth_headers
             )
-            # The uri is unchanged from self.url, it's the headers we're
-            # interested in.
-            uri, headers, body = client.sign(self.url, "POST")
+            upload.send(data, uploader_email=self.uploader_email)
+            return dict(message="Upload successful.", status=200)
+        # The uri is unchanged from self.url, it's the headers we're
+        # interested in.
+        headers = self._oauth_headers("POST", self.url)
         form_payload = dict(data=data)
         form_data = dict(uploader_email=self.uploader_email)
         try:
@@ -29,6 +29,7 @@ import json
 import logging
 import os
 import string
+import time
 from functools import lru_cache
 
 from jinja2 import Template
@@ -111,6 +112,8 @@ class UnitValidator:
         Initialize a new validator
         """
         self.issue_list = []
+        # UnitValidationContext recording time spent in each field validator
+        self.timing_context = None
 
     def check(self, unit):
         """
@@ -123,7 +126,9 @@ class UnitValidator:
         """
         for field, validators in sorted(unit.Meta.field_validators.items()):
             for validator in validators:
-                for issue in validator.check(self, unit, field):
+                for issue in self._timed(
+                    validator, field, validator.check(self, unit, field)
+                ):
                     yield issue
 
     def check_in_context(self, unit, context):
@@ -139,11 +144,30 @@ class UnitValidator:
         """
         for field, validators in sorted(unit.Meta.field_validators.items()):
             for validator in validators:
-                for issue in validator.check_in_context(
-                    self, unit, field, context
+                for issue in self._timed(
+                    validator,
+                    field,
+                    validator.check_in_context(self, unit, field, context),
                 ):
                     yield issue
 
+    def _timed(self, validator, field, issue_iter):
+        """
+        Record the time it takes to run a field validator, if requested
+
+        :returns:
+            Either the original iterable of issues or, if timing is tracked,
+            a list with all the issues that it has produced
+        """
+        if self.timing_context is None:
+            return issue_iter
+        start = time.perf_counter()
+        issue_list = list(issue_iter)
+        self.timing_context.record_validator_time(
+            validator, field, time.perf_counter() - start
+        )
+        return issue_list
+
     def advice(
         self, unit, field, kind, message=None, *, offset=0, origin=None
     ):
@@ -1000,6 +1024,8 @@ class Unit(metaclass=UnitType):
 
     def _check_gen(self, context):
         validator = self.Meta.validator_cls()
+        if context is not None and context.validator_timing is not None:
+            validator.timing_context = context
         for issue in validator.check(self):
             yield issue
         if context is not None:
@@ -93,6 +93,12 @@ class UnitValidationContext(pod.POD):
         assign_filter_list=[pod.typed],
     )
 
+    validator_timing = pod.Field(
+        "time spent in each field validator (None if not tracked)",
+        dict,
+        None,
+    )
+
     def compute_shared(self, cache_key, func, *args, **kwargs):
         """
         Compute a shared helper.
@@ -119,6 +125,50 @@ class UnitValidationContext(pod.POD):
             self.shared_cache[cache_key] = func(*args, **kwargs)
         return self.shared_cache[cache_key]
 
+    def precompute_shared(self, unit_list):
+        """
+        Compute all the shared helpers needed to check the given units.
+
+        :param unit_list:
+            List of units that are going to be checked in this context
+
+        This is useful before the context is handed over to several worker
+        processes, as otherwise each of them would compute (and then throw
+        away) its own copy of each expensive helper.
+        """
+        field_set = {"id"}
+        for unit_cls in {type(unit) for unit in unit_list}:
+            for field, validators in unit_cls.Meta.field_validators.items():
+                if any(
+                    isinstance(v, UniqueValueValidator) for v in validators
+                ):
+                    field_set.add(str(field))
+        for field in sorted(field_set):
+            self.compute_shared(
+                "field_value_map[{}]".format(field),
+                compute_value_map,
+                self,
+                field,
+            )
+
+    def record_validator_time(self, validator, field, elapsed):
+        """
+        Add time spent in a field validator, if timing is tracked.
+
+        :param validator:
+            The :class:`IFieldValidator` that was used
+        :param field:
+            The field that was checked
+        :param elapsed:
+            Time (in seconds) spent checking the field
+        """
+        if self.validator_timing is None:
+            return
+        key = "{}[{}]".format(type(validator).__name__, field)
+        self.validator_timing[key] = (
+            self.validator_timing.get(key, 0.0) + elapsed
+        )
+
 
 class UnitFieldIssue(Issue):
     """
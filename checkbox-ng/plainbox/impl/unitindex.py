@@ -0,0 +1,297 @@
+# This file is part of Checkbox.
+#
+# Copyright 2026 Canonical Ltd.
+#
+# Checkbox is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# Checkbox is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Checkbox.  If not, see <http://www.gnu.org/licenses/>.
+"""
+:mod:`plainbox.impl.unitindex` -- persistent index of units
+===========================================================
+
+Introspection commands (show, list, expand) need every unit of every
+provider, which means loading and validating all the unit files. This
+module keeps what those commands print in an SQLite database in the cache
+directory, so that it is only computed again when a file of a provider
+changed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import urllib.request
+from collections import OrderedDict
+
+from plainbox import __version__
+from plainbox.impl.highlevel import Explorer
+from plainbox.impl.highlevel import PlainBoxObject
+
+logger = logging.getLogger("plainbox.unitindex")
+
+# Bump when the schema or the content of the index changes
+INDEX_VERSION = 1
+
+# The translated fields of the units depend on these
+LOCALE_VARIABLES = ("LANGUAGE", "LC_ALL", "LC_MESSAGES", "LANG")
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE objects (
+    position INTEGER PRIMARY KEY,
+    parent INTEGER,
+    name TEXT,
+    type TEXT,
+    origin TEXT,
+    attrs TEXT,
+    raw_data TEXT
+);
+CREATE INDEX objects_name ON objects (name);
+CREATE INDEX objects_type ON objects (type);
+CREATE TABLE expansions (test_plan TEXT PRIMARY KEY, units TEXT);
+"""
+
+
+def get_index_path():
+    suc = os.environ.get("SNAP_USER_COMMON")
+    if suc:
+        return os.path.join(suc, ".cache", "plainbox", "unit_index.sqlite")
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+    if not xdg_cache_home:
+        xdg_cache_home = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(xdg_cache_home, "plainbox", "unit_index.sqlite")
+
+
+def get_providers_fingerprint(providers):
+    """
+    Compute a value that changes whenever the units of providers may change
+
+    This only looks at the size and modification time of the files of the
+    providers, not at their content, so it is cheap to compute.
+    """
+    digest = hashlib.sha256()
+    digest.update(
+        json.dumps(
+            [
+                INDEX_VERSION,
+                __version__,
+                [os.environ.get(name) for name in LOCALE_VARIABLES],
+            ]
+        ).encode("UTF-8")
+    )
+    for provider in providers:
+        digest.update(
+            "{}\0{}\0{}\n".format(
+                provider.name, provider.version, provider.base_dir
+            ).encode("UTF-8")
+        )
+        for top in (
+            provider.units_dir,
+            provider.jobs_dir,
+            provider.locale_dir,
+        ):
+            if not top:
+                continue
+            for root, dirs, files in os.walk(top):
+                dirs.sort()
+                for filename in sorted(files):
+                    path = os.path.join(root, filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    digest.update(
+                        "{}\0{}\0{}\n".format(
+                            path, stat.st_size, stat.st_mtime_ns
+                        ).encode("UTF-8")
+                    )
+    return digest.hexdigest()
+
+
+class IndexedUnit:
+    """
+    Unit as found in the index
+
+    Only its raw data (for jobs and templates) is kept, like the
+    ``_raw_data`` of the unit it stands for.
+    """
+
+    def __init__(self, raw_data):
+        self._raw_data = raw_data
+
+
+class UnitIndex:
+    """
+    Index of the units of providers, keyed by id, type and origin
+
+    The index is opened, and built if it is missing or outdated, when it is
+    first used. If it cannot be stored on disk it is kept in memory, which
+    is still as fast as exploring the providers directly.
+    """
+
+    def __init__(self, providers, path=None):
+        self._providers = providers
+        self._path = path or get_index_path()
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            fingerprint = get_providers_fingerprint(self._providers)
+            self._connection = self._connect(fingerprint)
+            if self._connection is None:
+                self._connection = self._build(fingerprint)
+        return self._connection
+
+    def _connect(self, fingerprint):
+        """Open the index on disk, if it is up to date"""
+        uri = "file:{}?mode=rw".format(urllib.request.pathname2url(self._path))
+        try:
+            connection = sqlite3.connect(uri, uri=True)
+            row = connection.execute(
+                "SELECT value FROM meta WHERE key = 'fingerprint'"
+            ).fetchone()
+        except sqlite3.Error:
+            # missing or broken index
+            return None
+        if row is None or row[0] != fingerprint:
+            connection.close()
+            return None
+        return connection
+
+    def _build(self, fingerprint):
+        logger.debug("Building the unit index in %s", self._path)
+        new_path = "{}.{}.new".format(self._path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            connection = sqlite3.connect(new_path)
+            self._fill(connection, fingerprint)
+            connection.close()
+            # readers either see the old index or the new one
+            os.replace(new_path, self._path)
+            connection = self._connect(fingerprint)
+            if connection is not None:
+                return connection
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning("Unable to store the unit index: %s", exc)
+            try:
+                os.remove(new_path)
+            except OSError:
+                pass
+        connection = sqlite3.connect(":memory:")
+        self._fill(connection, fingerprint)
+        return connection
+
+    def _fill(self, connection, fingerprint):
+        root = Explorer(self._providers).get_object_tree()
+        rows = []
+        for provider_obj in root.children:
+            if provider_obj.group != "provider":
+                # storages are not part of the providers
+                continue
+            parent = len(rows)
+            rows.append(self._get_row(parent, None, provider_obj))
+            for unit_obj in provider_obj.children:
+                rows.append(self._get_row(len(rows), parent, unit_obj))
+        with connection:
+            connection.executescript(SCHEMA)
+            connection.executemany(
+                "INSERT INTO objects VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            connection.execute(
+                "INSERT INTO meta VALUES ('fingerprint', ?)", (fingerprint,)
+            )
+
+    def _get_row(self, position, parent, obj):
+        raw_data = None
+        if obj.group in ("job", "template"):
+            raw_data = json.dumps(obj._impl._raw_data)
+        return (
+            position,
+            parent,
+            obj.name,
+            obj.group,
+            obj.attrs.get("origin"),
+            json.dumps(list(obj.attrs.items())),
+            raw_data,
+        )
+
+    def _get_obj(self, row):
+        name, group, attrs, raw_data = row
+        impl = None
+        if raw_data is not None:
+            impl = IndexedUnit(json.loads(raw_data))
+        return PlainBoxObject(
+            impl, name=name, group=group, attrs=OrderedDict(json.loads(attrs))
+        )
+
+    def get_object_tree(self):
+        """
+        Get the same tree as :meth:`Explorer.get_object_tree()`
+        """
+        explorer = Explorer(self._providers)
+        service_obj = PlainBoxObject(
+            explorer, name="service object", group="service"
+        )
+        provider_obj = None
+        for row in self.connection.execute(
+            "SELECT parent, name, type, attrs, raw_data FROM objects"
+            " ORDER BY position"
+        ):
+            obj = self._get_obj(row[1:])
+            if row[0] is None:
+                provider_obj = obj
+                service_obj.children.append(provider_obj)
+            else:
+                provider_obj.children.append(obj)
+        service_obj.children.extend(explorer.get_storage_objects())
+        return service_obj
+
+    def find(self, names):
+        """
+        Get the provider and unit objects with one of the given names
+
+        The objects have no children and come in the order of the tree.
+        """
+        names = list(names)
+        query = (
+            "SELECT name, type, attrs, raw_data FROM objects"
+            " WHERE name IN ({}) ORDER BY position"
+        ).format(", ".join("?" * len(names)))
+        return [
+            self._get_obj(row) for row in self.connection.execute(query, names)
+        ]
+
+    def get_expansion(self, test_plan):
+        """
+        Get the units of an expanded test plan, if they were stored
+        """
+        row = self.connection.execute(
+            "SELECT units FROM expansions WHERE test_plan = ?", (test_plan,)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def set_expansion(self, test_plan, units):
+        """
+        Store the units of an expanded test plan
+        """
+        try:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO expansions VALUES (?, ?)",
+                    (test_plan, json.dumps(units)),
+                )
+        except sqlite3.Error as exc:
+            # read-only index, or another process is writing
+            logger.debug("Unable to store the expansion: %s", exc)
@@ -32,6 +32,7 @@ import argparse
 import inspect
 import itertools
 import logging
+import multiprocessing
 import os
 import re
 import shutil
@@ -1137,6 +1138,23 @@ class ValidateCommand(ManageCommand):
             action="store_true",
             help=argparse.SUPPRESS,
         )
+        group.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=1,
+            metavar=_("N"),
+            help=_(
+                "Validate units using N worker processes"
+                " (0 uses one process per CPU)"
+            ),
+        )
+        group.add_argument(
+            "-t",
+            "--timing",
+            action="store_true",
+            help=_("Show the time spent in each field validator"),
+        )
 
     def invoked(self, ns):
         if ns.new_validation_core:
@@ -1257,7 +1275,16 @@ class ValidateCommand(ManageCommand):
         unit_list, exc_list = self.collect_all_units(provider)
         early_issue_gen = self.get_early_issues(exc_list)
         context = UnitValidationContext(provider_list)
-        issue_gen = self.validate_units_in_context(context, unit_list)
+        if ns.timing:
+            context.validator_timing = {}
+        validator_timing = context.validator_timing
+        jobs = ns.jobs if ns.jobs > 0 else os.cpu_count() or 1
+        if jobs > 1 and len(unit_list) > 1:
+            issue_gen = self.validate_units_in_parallel(
+                context, unit_list, jobs
+            )
+        else:
+            issue_gen = self.validate_units_in_context(context, unit_list)
         del context
         failed = False
         hidden = 0
@@ -1288,6 +1315,8 @@ class ValidateCommand(ManageCommand):
             print(
                 _("Run 'manage.py validate --strict --deprecated' for details")
             )
+        if validator_timing is not None:
+            self.show_validator_timing(validator_timing)
         if failed:
             print(
                 _("Validation of provider {0} has failed").format(
@@ -1317,6 +1346,50 @@ class ValidateCommand(ManageCommand):
             for issue in unit.check(context=context, live=True):
                 yield issue
 
+    def validate_units_in_parallel(self, context, unit_list, jobs):
+        """
+        Validate units in a pool of worker processes.
+
+        The shared parts of the context are computed once, in this process,
+        and inherited (read-only) by the forked workers. Units are sent to
+        the workers in contiguous chunks and the results are collected in
+        order so the issues are reported exactly as in serial validation.
+        """
+        _logger.info(_("Computing shared validation data..."))
+        context.precompute_shared(unit_list)
+        chunk_size = max(1, len(unit_list) // (jobs * 4))
+        chunk_list = [
+            range(start, min(start + chunk_size, len(unit_list)))
+            for start in range(0, len(unit_list), chunk_size)
+        ]
+        _logger.info(
+            _("Validating %d units with %d processes..."),
+            len(unit_list),
+            jobs,
+        )
+        mp_context = multiprocessing.get_context("fork")
+        with mp_context.Pool(
+            jobs,
+            initializer=_init_validation_worker,
+            initargs=(context, unit_list),
+        ) as pool:
+            for issue_list, timing in pool.imap(
+                _validate_unit_chunk, chunk_list
+            ):
+                if context.validator_timing is not None:
+                    for key, elapsed in timing.items():
+                        context.validator_timing[key] = (
+                            context.validator_timing.get(key, 0.0) + elapsed
+                        )
+                yield from issue_list
+
+    def show_validator_timing(self, validator_timing):
+        print(_("Time spent in each field validator:"))
+        for key, elapsed in sorted(
+            validator_timing.items(), key=lambda item: (-item[1], item[0])
+        ):
+            print("{:10.3f}s {}".format(elapsed, key))
+
     def get_provider(self):
         """
         Get a Provider1 that describes the current provider
@@ -1330,6 +1403,45 @@ class ValidateCommand(ManageCommand):
         )
 
 
+# State of a validation worker process, see _init_validation_worker()
+_worker_context = None
+_worker_unit_list = None
+
+
+def _init_validation_worker(context, unit_list):
+    """
+    Initialize a process forked by ValidateCommand.validate_units_in_parallel()
+    """
+    global _worker_context, _worker_unit_list
+    _worker_context = context
+    _worker_unit_list = unit_list
+
+
+def _validate_unit_chunk(index_range):
+    """
+    Validate a range of units in a worker process
+
+    :param index_range:
+        A range of indices into the unit list given to the worker
+    :returns:
+        A tuple (issue_list, timing) where issue_list contains plain, picklable
+        :class:`Issue` objects and timing is a dictionary with time spent in
+        each field validator (empty if timing is not tracked).
+    """
+    if _worker_context.validator_timing is not None:
+        _worker_context.validator_timing = {}
+    issue_list = []
+    for index in index_range:
+        unit = _worker_unit_list[index]
+        for issue in unit.check(context=_worker_context, live=True):
+            # Units (and their providers) referenced by the issue are not
+            # needed for reporting and are expensive (or impossible) to pickle
+            issue_list.append(
+                Issue(issue.message, issue.severity, issue.kind, issue.origin)
+            )
+    return issue_list, _worker_context.validator_timing or {}
+
+
 def exc2issue(exc):
     """
     Convert an arbitrary exception to an Issue
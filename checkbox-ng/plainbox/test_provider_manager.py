@@ -549,6 +549,44 @@ class ProviderManagerToolTests(TestCase):
             ),
         )
 
+    def test_validate__parallel(self):
+        """
+        verify that ``validate -N -j 2`` reports the same issues, in the same
+        order, as the serial validation does
+        """
+        filename = os.path.join(self.tmpdir, "jobs", "broken.pxu")
+        with open(filename, "wt", encoding="UTF-8") as stream:
+            print("id: broken", file=stream)
+            print("plugin: magic", file=stream)
+            print("", file=stream)
+            print("id: broken-too", file=stream)
+            print("plugin: shell", file=stream)
+        with TestIO() as test_io:
+            self.tool.main(["validate", "-N", "-j", "2"])
+        self.assertEqual(
+            test_io.stdout,
+            inline_output(
+                """
+            error: jobs/broken.pxu:1-2: job 'broken', field 'command', command is mandatory for non-manual jobs
+            error: jobs/broken.pxu:2: job 'broken', field 'plugin', valid values are: attachment, manual, resource, shell, user-interact, user-interact-verify, user-verify
+            error: jobs/broken.pxu:4-5: job 'broken-too', field 'command', command is mandatory for non-manual jobs
+            Validation of provider com.example:test has failed
+            """
+            ),
+        )
+
+    def test_validate__timing(self):
+        """
+        verify that ``validate -N --timing`` shows time spent in validators
+        """
+        with TestIO() as test_io:
+            self.tool.main(["validate", "-N", "--timing"])
+        self.assertIn("Time spent in each field validator:", test_io.stdout)
+        self.assertIn("CorrectFieldValueValidator[id]", test_io.stdout)
+        self.assertTrue(
+            test_io.stdout.endswith("The provider seems to be valid\n")
+        )
+
     def test_info(self):
         """
         verify that ``info`` shows basic provider information
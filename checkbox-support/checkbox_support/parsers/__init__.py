@@ -20,38 +20,79 @@ This module provides an entry point to checkbox-support-parse.
 
 The commands turns an output of system commands and turns them into json.
 When a new parser is added, it should be added to AVAILABLE_PARSER mapping."
+
+Parser modules are only imported when a parser is first used. Besides
+parsing stdin, checkbox-support-parse can parse several files in one go,
+or handle a stream of requests, one JSON object per line, either on stdin
+(--batch) or on a Unix socket (--serve)::
+
+    {"id": 1, "parser": "udevadm", "text": "P: /devices/..."}
+
+Each request is answered with one line, in order::
+
+    {"id": 1, "result": [...]}
+    {"id": 2, "error": "Unknown parser: foo"}
 """
 
+import contextlib
+import importlib
 import io
 import json
+import os
 import re
+import socket
+import socketserver
+import stat
 import sys
 
 from argparse import ArgumentParser
+from collections.abc import Mapping
+
+
+class LazyParsers(Mapping):
+    """
+    Mapping of parser names to parser functions.
+
+    Values are given as "module:function" strings, relative to this package,
+    and the modules are imported on first access.
+    """
+
+    def __init__(self, parsers):
+        self._specs = parsers
+        self._loaded = {}
+
+    def __getitem__(self, name):
+        try:
+            return self._loaded[name]
+        except KeyError:
+            pass
+        module_name, function_name = self._specs[name].split(":")
+        module = importlib.import_module("{}.{}".format(__name__, module_name))
+        parser_fn = self._loaded[name] = getattr(module, function_name)
+        return parser_fn
+
+    def __iter__(self):
+        return iter(self._specs)
 
-from checkbox_support.parsers import dkms_info
-from checkbox_support.parsers import dmidecode
-from checkbox_support.parsers import image_info
-from checkbox_support.parsers import kernel_cmdline
-from checkbox_support.parsers import modinfo
-from checkbox_support.parsers import modprobe
-from checkbox_support.parsers import pactl
-from checkbox_support.parsers import pci_config
-from checkbox_support.parsers import udevadm
-
-AVAILABLE_PARSERS = {
-    "bto": image_info.parse_bto_attachment_output,
-    "buildstamp": image_info.parse_buildstamp_attachment_output,
-    "dkms-info": dkms_info.parse_dkms_info,
-    "dmidecode": dmidecode.parse_dmidecode_output,
-    "kernelcmdline": kernel_cmdline.parse_kernel_cmdline,
-    "modinfo": modinfo.parse_modinfo_attachment_output,
-    "modprobe": modprobe.parse_modprobe_d_output,
-    "pactl-list": pactl.parse_pactl_output,
-    "pci-subsys-id": pci_config.parse_pci_subsys_id,
-    "recovery-info": image_info.parse_recovery_info_attachment_output,
-    "udevadm": udevadm.parse_udevadm_output,
-}
+    def __len__(self):
+        return len(self._specs)
+
+
+AVAILABLE_PARSERS = LazyParsers(
+    {
+        "bto": "image_info:parse_bto_attachment_output",
+        "buildstamp": "image_info:parse_buildstamp_attachment_output",
+        "dkms-info": "dkms_info:parse_dkms_info",
+        "dmidecode": "dmidecode:parse_dmidecode_output",
+        "kernelcmdline": "kernel_cmdline:parse_kernel_cmdline",
+        "modinfo": "modinfo:parse_modinfo_attachment_output",
+        "modprobe": "modprobe:parse_modprobe_d_output",
+        "pactl-list": "pactl:parse_pactl_output",
+        "pci-subsys-id": "pci_config:parse_pci_subsys_id",
+        "recovery-info": "image_info:parse_recovery_info_attachment_output",
+        "udevadm": "udevadm:parse_udevadm_output",
+    }
+)
 PARSER_LIST = sorted(list(AVAILABLE_PARSERS.keys()))
 Pattern = type(re.compile(""))
 
@@ -64,15 +105,63 @@ def main():
     arg_parser.add_argument(
         "parser_name",
         metavar="PARSER-NAME",
+        nargs="?",
         choices=["?"] + PARSER_LIST,
         help="Name of the parser to use",
     )
+    arg_parser.add_argument(
+        "files",
+        metavar="FILE",
+        nargs="*",
+        help=(
+            "Parse these files instead of stdin, the output is a JSON object "
+            "mapping each file name to its parsed content"
+        ),
+    )
+    mode = arg_parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--batch",
+        action="store_true",
+        help="Read JSON requests from stdin, one per line",
+    )
+    mode.add_argument(
+        "--serve",
+        metavar="SOCKET",
+        help="Serve JSON requests on this Unix socket",
+    )
+    arg_parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="With --serve, exit after SECONDS without any connection",
+    )
     args = arg_parser.parse_args()
+    if args.batch or args.serve:
+        if args.parser_name or args.files:
+            arg_parser.error("--batch and --serve don't take a parser name")
+        if args.batch:
+            with io.TextIOWrapper(
+                sys.stdin.buffer, encoding="utf-8", errors="ignore"
+            ) as stdin:
+                serve_stream(stdin, sys.stdout)
+        else:
+            try:
+                serve_socket(args.serve, args.idle_timeout)
+            except OSError as exc:
+                msg = "Failed to serve on {}: {}".format(args.serve, exc)
+                raise SystemExit(msg) from exc
+        return
+    if args.parser_name is None:
+        arg_parser.error("the following arguments are required: PARSER-NAME")
     if args.parser_name == "?":
         print("The following parsers are available:")
         print("\n".join(PARSER_LIST))
         raise SystemExit()
     parser = AVAILABLE_PARSERS[args.parser_name]
+    if args.files:
+        print(run_parsing_files(parser, args.files))
+        return
     stdin = sys.stdin
     with io.TextIOWrapper(
         sys.stdin.buffer, encoding="utf-8", errors="ignore"
@@ -97,6 +186,119 @@ def run_parsing(parser_fn, text):
         raise SystemExit(msg) from exc
 
 
+def run_parsing_files(parser_fn, filenames):
+    """Parse each file, returning the results as a JSON object."""
+    results = {}
+    for filename in filenames:
+        with open(filename, encoding="utf-8", errors="ignore") as stream:
+            text = stream.read()
+        try:
+            results[filename] = parser_fn(text)
+        except Exception as exc:
+            msg = "Failed to parse {}: {}".format(filename, str(exc))
+            raise SystemExit(msg) from exc
+    return json.dumps(
+        results, indent=4, sort_keys=True, default=_json_fallback
+    )
+
+
+def handle_request(line):
+    """Parse the text of one JSON request, returning the JSON response."""
+    request_id = None
+    try:
+        request = json.loads(line)
+        request_id = request.get("id")
+        parser_name = request["parser"]
+        if parser_name not in AVAILABLE_PARSERS:
+            raise ValueError("Unknown parser: {}".format(parser_name))
+        result = AVAILABLE_PARSERS[parser_name](request["text"])
+        response = {"id": request_id, "result": result}
+        return json.dumps(response, sort_keys=True, default=_json_fallback)
+    except Exception as exc:
+        response = {
+            "id": request_id,
+            "error": "{}: {}".format(exc.__class__.__name__, str(exc)),
+        }
+        return json.dumps(response, sort_keys=True)
+
+
+def serve_stream(in_stream, out_stream):
+    """Answer the requests read from in_stream until it is closed."""
+    for line in in_stream:
+        if not line.strip():
+            continue
+        out_stream.write(handle_request(line) + "\n")
+        out_stream.flush()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        stdin = io.TextIOWrapper(self.rfile, encoding="utf-8", errors="ignore")
+        stdout = io.TextIOWrapper(self.wfile, encoding="utf-8")
+        serve_stream(stdin, stdout)
+
+
+class _ParseServer(socketserver.UnixStreamServer):
+    idle = False
+
+    def handle_timeout(self):
+        self.idle = True
+
+
+def serve_socket(path, idle_timeout=None):
+    """
+    Answer requests on a Unix socket until interrupted, or until no
+    connection was made for idle_timeout seconds.
+
+    Requests are handled one at a time, as not all the parsers are
+    thread-safe. A socket left at path is replaced, FileExistsError is
+    raised if anything else is there.
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        pass
+    else:
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError("{} exists and is not a socket".format(path))
+        os.remove(path)
+    # socketserver servers are only context managers since Python 3.6
+    server = _ParseServer(path, _RequestHandler)
+    server.timeout = idle_timeout
+    try:
+        while not server.idle:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+
+
+def parse_with_server(path, parser_name, text):
+    """
+    Parse text with the named parser in the server listening on path.
+
+    The parser is run in this process if the server cannot be reached.
+    Errors are raised as RuntimeError.
+    """
+    request = json.dumps({"id": 0, "parser": parser_name, "text": text})
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(path)
+            with sock.makefile("rw", encoding="utf-8") as stream:
+                stream.write(request + "\n")
+                stream.flush()
+                sock.shutdown(socket.SHUT_WR)
+                response = json.loads(stream.readline())
+    except (OSError, ValueError):
+        response = json.loads(handle_request(request))
+    if "error" in response:
+        raise RuntimeError(response["error"])
+    return response["result"]
+
+
 def _json_fallback(obj):
     """
     Helper method to convert arbitrary objects to their JSON
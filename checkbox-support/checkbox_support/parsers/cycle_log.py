@@ -0,0 +1,192 @@
+# This file is part of Checkbox.
+#
+# Copyright 2026 Canonical Ltd.
+#
+# Checkbox is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# Checkbox is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Checkbox.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Single-pass analysis of logs made of cycles.
+
+Suspend/resume, hibernate and reboot stress tests write one log covering
+all their cycles. :class:`CycleLogAnalyzer` reads such a log line by line,
+once, and dispatches the lines to the handlers registered for the patterns
+they match. The handlers split the log in cycles and record findings and
+timings for the current cycle, so the memory used only depends on the
+number of cycles, not on the size of the log.
+"""
+
+import collections
+import datetime
+import json
+import re
+
+
+class Cycle:
+    """Findings and timings of one cycle of a log."""
+
+    def __init__(self, number, line_number, start_time=None):
+        self.number = number
+        self.line_number = line_number
+        self.start_time = start_time
+        self.end_time = None
+        # name -> seconds
+        self.timings = {}
+        # kind -> count
+        self.findings = collections.Counter()
+
+    @property
+    def duration(self):
+        """Time between the start of this cycle and the next one, if known."""
+        if self.start_time is None or self.end_time is None:
+            return None
+        return (self.end_time - self.start_time).total_seconds()
+
+    def as_dict(self):
+        return {
+            "cycle": self.number,
+            "line": self.line_number,
+            "duration": self.duration,
+            "timings": dict(self.timings),
+            "findings": dict(self.findings),
+        }
+
+
+class CycleLogAnalyzer:
+    """
+    Analyze a log in a single pass.
+
+    :param timestamp_pattern:
+        Optional regular expression with a ``timestamp`` group, matched at
+        the start of each line, giving the time of the line.
+    :param timestamp_format:
+        The :func:`datetime.datetime.strptime()` format of the timestamps.
+    """
+
+    def __init__(self, timestamp_pattern=None, timestamp_format=None):
+        self._handlers = []
+        self._timestamp_match = None
+        if timestamp_pattern:
+            self._timestamp_match = re.compile(timestamp_pattern).match
+        self._timestamp_format = timestamp_format
+        self.line_number = 0
+        self.last_line = None
+        # only parsed when needed, see last_timestamp
+        self._last_timestamp_text = None
+        self.cycles = []
+        # findings of the whole log, including outside of the cycles
+        self.findings = collections.Counter()
+
+    @property
+    def last_timestamp(self):
+        """Time of the last line that had a timestamp, if any."""
+        if self._last_timestamp_text is None:
+            return None
+        try:
+            return datetime.datetime.strptime(
+                self._last_timestamp_text, self._timestamp_format
+            )
+        except ValueError:
+            return None
+
+    @property
+    def current_cycle(self):
+        return self.cycles[-1] if self.cycles else None
+
+    def on(self, pattern, callback, hint=None):
+        """
+        Call ``callback(match, line)`` for each line matching a pattern.
+
+        The pattern is searched anywhere in the line. The handlers are called
+        in the order they were registered.
+
+        :param hint:
+            A string that the lines matching the pattern always contain. The
+            pattern is only searched in the lines that contain it, which is
+            much faster than searching every line.
+        """
+        self._handlers.append((hint, re.compile(pattern).search, callback))
+
+    def start_cycle(self, number=None):
+        """Start a new cycle at the current line."""
+        if number is None:
+            number = len(self.cycles) + 1
+        self._end_cycle()
+        self.cycles.append(
+            Cycle(number, self.line_number, self.last_timestamp)
+        )
+        return self.cycles[-1]
+
+    def add_finding(self, kind, count=1):
+        """Record a finding in the current cycle (if any) and in the log."""
+        self.findings[kind] += count
+        if self.cycles:
+            self.cycles[-1].findings[kind] += count
+
+    def add_timing(self, name, seconds):
+        """Record a timing of the current cycle."""
+        if self.cycles:
+            self.cycles[-1].timings[name] = seconds
+
+    def feed(self, line):
+        """Analyze the next line of the log."""
+        self.line_number += 1
+        self.last_line = line
+        if self._timestamp_match:
+            match = self._timestamp_match(line)
+            if match:
+                self._last_timestamp_text = match.group("timestamp")
+        for hint, search, callback in self._handlers:
+            if hint is not None and hint not in line:
+                continue
+            match = search(line)
+            if match:
+                callback(match, line)
+
+    def skip(self, line):
+        """
+        Account for a line the caller knows nothing has to be done with.
+
+        This is a faster alternative to :meth:`feed()` for the lines that
+        neither match a handler nor have a timestamp.
+        """
+        self.line_number += 1
+        self.last_line = line
+
+    def finish(self):
+        """Mark the end of the log."""
+        self._end_cycle()
+
+    def analyze(self, stream):
+        """Analyze all the lines of a stream, then :meth:`finish()`."""
+        for line in stream:
+            self.feed(line)
+        self.finish()
+        return self
+
+    def _end_cycle(self):
+        if self.cycles and self.cycles[-1].end_time is None:
+            self.cycles[-1].end_time = self.last_timestamp
+
+    def get_summary(self):
+        """Get a JSON-friendly summary of the cycles."""
+        return {
+            "lines": self.line_number,
+            "cycles": [cycle.as_dict() for cycle in self.cycles],
+            "findings": dict(self.findings),
+        }
+
+    def write_summary(self, filename):
+        """Write the summary of the cycles as JSON."""
+        with open(filename, "wt", encoding="UTF-8") as stream:
+            json.dump(self.get_summary(), stream, indent=2)
+            stream.write("\n")
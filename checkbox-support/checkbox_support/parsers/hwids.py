@@ -0,0 +1,299 @@
+# This file is part of Checkbox.
+#
+# Copyright 2026 Canonical Ltd.
+#
+# Checkbox is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# Checkbox is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Checkbox.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Hardware ID databases (usb.ids, pci.ids) backed by an on-disk index.
+
+The text databases shipped by usbutils and pciutils are parsed once and
+stored as an SQLite index in the user's cache directory. The index is tied
+to the path, size and modification time of the source file, so it is
+rebuilt only when the file changes. It is opened on the first lookup and
+only the requested entries are read from it.
+"""
+import hashlib
+import os
+import sqlite3
+import string
+import tempfile
+from abc import ABC, abstractmethod
+
+# Bump when the layout of the index or the parsers change
+INDEX_VERSION = 1
+
+
+def ishex(chars):
+    """Checks if all `chars` are hexdigits [0-9a-f]."""
+    return all([x in string.hexdigits for x in chars])
+
+
+def get_cache_path():
+    """Return the directory where the indexes are kept."""
+    suc = os.environ.get("SNAP_USER_COMMON")
+    if suc:
+        return os.path.join(suc, ".cache", "checkbox-support", "hwids")
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+    if not xdg_cache_home:
+        xdg_cache_home = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(xdg_cache_home, "checkbox-support", "hwids")
+
+
+def _index_key(ids):
+    return ":".join("{:x}".format(i) for i in ids)
+
+
+class HwIdsDatabase(ABC):
+    """
+    Base class for databases in the usb.ids/pci.ids format.
+
+    Subclasses define `name`, `default_paths` and a `parse()` method
+    yielding (kind, ids, name) tuples, `ids` being a tuple of integers.
+    Every existing file is used, entries from later files win.
+    """
+
+    name = None
+    default_paths = ()
+    # at the time of writing this the usb_ids has one line that uses
+    # character from beyond standard ascii 7-bit set. namely 0xb4 (Accent
+    # Acute). I couldn't find information about the file's encoding, but iso
+    # match it nicely.
+    encoding = "iso8859"
+
+    def __init__(self, path=None, cache_dir=None):
+        if path:
+            self.paths = [path]
+        else:
+            self.paths = [p for p in self.default_paths if os.path.isfile(p)]
+        self._cache_dir = cache_dir
+        self._sources = None
+        self._memo = {}
+
+    @abstractmethod
+    def parse(self, content):
+        """Yield (kind, ids, name) tuples for the given file content."""
+
+    def lookup(self, kind, *ids):
+        """Return the name stored for kind and ids, or None."""
+        key = (kind,) + ids
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        if self._sources is None:
+            self._sources = [self._open(path) for path in self.paths]
+        name = None
+        for source in reversed(self._sources):
+            name = source(kind, ids)
+            if name is not None:
+                break
+        self._memo[key] = name
+        return name
+
+    def _open(self, path):
+        """Return a lookup function for the database file at path."""
+        if not os.path.isfile(path):
+            return lambda kind, ids: None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stat = None
+        if stat is not None:
+            signature = "{}:{}:{}:{}".format(
+                INDEX_VERSION,
+                os.path.abspath(path),
+                stat.st_size,
+                stat.st_mtime_ns,
+            )
+            try:
+                return self._open_index(path, signature)
+            except (OSError, sqlite3.Error):
+                # read-only or full cache directory, broken index...
+                pass
+        return self._load(path)
+
+    def _read(self, path):
+        with open(path, "rt", encoding=self.encoding) as ids_file:
+            return ids_file.read()
+
+    def _load(self, path):
+        """Parse the file at path into memory."""
+        table = {}
+        for kind, ids, name in self.parse(self._read(path)):
+            table[kind, ids] = name
+        return lambda kind, ids: table.get((kind, ids))
+
+    def _index_path(self, path):
+        digest = hashlib.sha1(os.path.abspath(path).encode("UTF-8"))
+        return os.path.join(
+            self._cache_dir or get_cache_path(),
+            "{}-{}.sqlite".format(self.name, digest.hexdigest()),
+        )
+
+    def _open_index(self, path, signature):
+        index_path = self._index_path(path)
+        connection = self._connect(index_path, signature)
+        if connection is None:
+            self._build_index(path, index_path, signature)
+            connection = self._connect(index_path, signature)
+            if connection is None:
+                raise sqlite3.DatabaseError(
+                    "cannot open {}".format(index_path)
+                )
+
+        def lookup(kind, ids):
+            row = connection.execute(
+                "SELECT name FROM ids WHERE kind = ? AND key = ?",
+                (kind, _index_key(ids)),
+            ).fetchone()
+            return row[0] if row else None
+
+        return lookup
+
+    def _connect(self, index_path, signature):
+        """Open the index, return None if it is missing or out of date."""
+        if not os.path.isfile(index_path):
+            return None
+        connection = sqlite3.connect(
+            "file:{}?mode=ro".format(index_path),
+            uri=True,
+            check_same_thread=False,
+        )
+        try:
+            row = connection.execute(
+                "SELECT value FROM meta WHERE key = 'signature'"
+            ).fetchone()
+        except sqlite3.DatabaseError:
+            row = None
+        if row is None or row[0] != signature:
+            connection.close()
+            return None
+        return connection
+
+    def _build_index(self, path, index_path, signature):
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(index_path), suffix=".tmp"
+        )
+        os.close(fd)
+        try:
+            connection = sqlite3.connect(tmp_path)
+            with connection:
+                connection.execute(
+                    "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)"
+                )
+                connection.execute(
+                    "CREATE TABLE ids (kind TEXT, key TEXT, name TEXT, "
+                    "PRIMARY KEY (kind, key)) WITHOUT ROWID"
+                )
+                connection.executemany(
+                    "INSERT OR REPLACE INTO ids VALUES (?, ?, ?)",
+                    (
+                        (kind, _index_key(ids), name)
+                        for kind, ids, name in self.parse(self._read(path))
+                    ),
+                )
+                connection.execute(
+                    "INSERT INTO meta VALUES ('signature', ?)", (signature,)
+                )
+            connection.close()
+            # replacing the file keeps concurrent readers of the old index
+            # working
+            os.replace(tmp_path, index_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+class PciIds(HwIdsDatabase):
+    """PCI IDs database reference."""
+
+    name = "pci"
+    default_paths = (
+        "/usr/share/misc/pci.ids",
+        "/usr/share/hwdata/pci.ids",
+        "/usr/share/pci.ids",
+    )
+
+    def decode_vendor(self, vid):
+        """Translate vendor ID to a Vendor Name."""
+        name = self.lookup("vendor", vid)
+        if name is None:
+            raise KeyError(vid)
+        return name
+
+    def decode_device(self, vid, did):
+        """Translate vendor ID and device ID to a device name."""
+        name = self.lookup("device", vid, did)
+        if name is None:
+            raise KeyError((vid, did))
+        return "{} {}".format(self.decode_vendor(vid), name)
+
+    def decode_subsystem(self, vid, did, svid, sdid):
+        """Translate a subsystem to its name, "" if unknown."""
+        return self.lookup("subsystem", vid, did, svid, sdid) or ""
+
+    def decode_class(self, cid, scid, piid):
+        """
+        Translate class, subclass and programming interface IDs to a
+        human-readable name, falling back to the more generic entries.
+        """
+        return (
+            self.lookup("prog-if", cid, scid, piid)
+            or self.lookup("subclass", cid, scid)
+            or self.lookup("class", cid)
+            or ""
+        )
+
+    def parse(self, content):
+        """Parse the contents of pci.ids file."""
+        context = None
+        vid = did = cid = scid = None
+        class_name = subclass_name = None
+        for line in content.splitlines():
+            if not line or line[0] == "#":
+                # empty line or a comment
+                continue
+            if ishex(line[:4]):
+                vid = int(line[:4], 16)
+                did = None
+                context = "vendor"
+                yield "vendor", (vid,), line[6:]
+            elif line.startswith("C "):
+                cid = int(line[2:4], 16)
+                class_name = line[6:]
+                scid = None
+                context = "class"
+                yield "class", (cid,), class_name
+            elif line[:2] == "\t\t":
+                if context == "vendor" and did is not None:
+                    ids = line[2:].split(None, 2)
+                    if len(ids) == 3:
+                        subsystem = (int(ids[0], 16), int(ids[1], 16))
+                        yield "subsystem", (vid, did) + subsystem, ids[2]
+                elif context == "class" and scid is not None:
+                    yield "prog-if", (cid, scid, int(line[2:4], 16)), (
+                        "{}:{}".format(subclass_name, line[6:])
+                    )
+            elif line[0] == "\t":
+                if context == "vendor":
+                    did = int(line[1:5], 16)
+                    yield "device", (vid, did), line[7:]
+                elif context == "class":
+                    scid = int(line[1:3], 16)
+                    subclass_name = "{}:{}".format(class_name, line[5:])
+                    yield "subclass", (cid, scid), subclass_name
+            else:
+                # some other section (e.g. the list of known subsystems)
+                context = None
@@ -24,28 +24,37 @@ import contextlib
 import glob
 import os
 import re
-import string
 
-from collections import OrderedDict
-from enum import Enum
 from functools import partial
 
+from checkbox_support.parsers.hwids import HwIdsDatabase
+from checkbox_support.parsers.hwids import ishex  # noqa: F401
 
-def ishex(chars):
-    """Checks if all `chars` are hexdigits [0-9a-f]."""
-    return all([x in string.hexdigits for x in chars])
 
-
-class UsbIds:
+class UsbIds(HwIdsDatabase):
     """USB IDs database reference."""
 
+    name = "usb"
+    default_paths = (
+        # focal, bionic, xenial, and debian(s)
+        "/var/lib/usbutils/usb.ids",
+        # fallback - used in kernel maintainer's repos
+        "/usr/share/usb.ids",
+    )
+
     def decode_vendor(self, vid):
         """Translate vendor ID to a Vendor Name."""
-        return self._vendors[vid]
+        name = self.lookup("vendor", vid)
+        if name is None:
+            raise KeyError(vid)
+        return name
 
     def decode_product(self, vid, pid):
         """Transate vendor ID and product ID to a device name."""
-        return "{} {}".format(self._vendors[vid], self._products[vid, pid])
+        name = self.lookup("product", vid, pid)
+        if name is None:
+            raise KeyError((vid, pid))
+        return "{} {}".format(self.decode_vendor(vid), name)
 
     def decode_protocol(self, cid, scid, prid):
         """
@@ -55,51 +64,17 @@ class UsbIds:
         See implementation for details.
         """
         return (
-            self._protocols.get((cid, scid, prid))
-            or self._subclasses.get((cid, scid))
-            or self._classes.get(cid)
+            self.lookup("protocol", cid, scid, prid)
+            or self.lookup("subclass", cid, scid)
+            or self.lookup("class", cid)
             or ""
         )
 
-    def __init__(self, usb_ids_path=None):
-        self._vendors = OrderedDict()
-        self._products = OrderedDict()
-        self._classes = OrderedDict()
-        self._subclasses = OrderedDict()
-        self._protocols = OrderedDict()
-        if usb_ids_path:
-            paths = [usb_ids_path]
-        else:
-            paths = [
-                # focal, bionic, xenial, and debian(s)
-                "/var/lib/usbutils/usb.ids",
-                # fallback - used in kernel maintainer's repos
-                "/usr/share/usb.ids",
-            ]
-        for path in paths:
-            if os.path.isfile(path):
-                # at the time of writing this the usb_ids has one line that
-                # uses character from beyond standard ascii 7-bit set. namely
-                # 0xb4 (Accent Acute). I couldn't find information about the
-                # file's encoding, but iso match it nicely.  The other way to
-                # cover for those cases would be to use surrogates and then
-                # have some pass to interpret them.
-                with open(path, "rt", encoding="iso8859") as usb_ids_file:
-                    self._parse_usb_ids(usb_ids_file.read())
-
-    def _parse_usb_ids(self, content):
+    def parse(self, content):
         """Parse the contents of usb.ids file."""
-
-        class ParserContext(Enum):
-            """Context marker for usb.ids parser."""
-
-            DEFAULT = 0
-            VENDOR = 1
-            CLASS = 2
-            OTHER = 3
-
-        context = ParserContext.DEFAULT
-
+        context = None
+        vid = class_id = subclass_id = None
+        class_name = subclass_name = None
         for line in content.splitlines():
             if not line or line[0] == "#":
                 # empty line or a comment
@@ -107,47 +82,45 @@ class UsbIds:
             if ishex(line[:4]):
                 # vendor information
                 vid = int(line[:4], 16)
-                self._vendors[vid] = line[6:]
-                context = ParserContext.VENDOR
+                context = "vendor"
+                yield "vendor", (vid,), line[6:]
                 continue
             if line[0] == "\t" and ishex(line[1:3]):
                 # classes use only 2 hex digits, devices use 4
-                if context == ParserContext.VENDOR:
+                if context == "vendor":
                     pid = int(line[1:5], 16)
-                    # last added vendor is the current vendor
-                    vid = list(self._vendors.keys())[-1]
-                    self._products[vid, pid] = line[7:]
+                    yield "product", (vid, pid), line[7:]
                     continue
-                if context == ParserContext.CLASS:
+                if context == "class":
                     subclass_id = int(line[1:5], 16)
                     name = line[5:]
-                    class_id = list(self._classes.keys())[-1]
-                    description = "{}:{}".format(
-                        self._classes[class_id],
-                        name if name != "Unused" else "",
+                    subclass_name = "{}:{}".format(
+                        class_name, name if name != "Unused" else ""
                     )
-                    self._subclasses[class_id, subclass_id] = description
+                    yield "subclass", (class_id, subclass_id), subclass_name
                     continue
             if line[0] == "C":
-                context = ParserContext.CLASS
+                context = "class"
                 class_id = int(line[2:4], 16)
                 class_name = line[6:]
-                self._classes[class_id] = class_name
+                subclass_id = None
+                yield "class", (class_id,), class_name
                 continue
-            if line[0:2] == "\t\t" and ishex(line[2:4]):
+            if (
+                line[0:2] == "\t\t"
+                and ishex(line[2:4])
+                and subclass_id is not None
+            ):
                 protocol_id = int(line[2:4], 16)
-                class_id, subclass_id = list(self._subclasses.keys())[-1]
-                description = "{}:{}".format(
-                    self._subclasses[class_id, subclass_id], line[6:]
-                )
-                self._protocols[class_id, subclass_id, protocol_id] = (
-                    description
+                yield "protocol", (class_id, subclass_id, protocol_id), (
+                    "{}:{}".format(subclass_name, line[6:])
                 )
                 continue
             # if we got here without satisfying any of the above ifs
             # then we need to set paraser into a state where lines won't be
             # consumed
-            context = ParserContext.OTHER
+            context = None
+            subclass_id = None
 
 
 def read_entry(sysfs_path, field):
@@ -0,0 +1,156 @@
+# This file is part of Checkbox.
+#
+# Copyright 2026 Canonical Ltd.
+#
+# Checkbox is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# Checkbox is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Checkbox.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for the checkbox-support-parse entry point."""
+import io
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from checkbox_support import parsers
+from checkbox_support.parsers import kernel_cmdline
+
+
+class TestLazyParsers(TestCase):
+    def test_lazy_import(self):
+        lazy = parsers.LazyParsers(
+            {"kernelcmdline": "kernel_cmdline:parse_kernel_cmdline"}
+        )
+        self.assertEqual(lazy._loaded, {})
+        self.assertEqual(list(lazy), ["kernelcmdline"])
+        self.assertIs(
+            lazy["kernelcmdline"], kernel_cmdline.parse_kernel_cmdline
+        )
+        self.assertIn("kernelcmdline", lazy._loaded)
+
+    def test_every_parser_resolves(self):
+        for name in parsers.PARSER_LIST:
+            self.assertTrue(callable(parsers.AVAILABLE_PARSERS[name]))
+
+    def test_unknown(self):
+        with self.assertRaises(KeyError):
+            parsers.AVAILABLE_PARSERS["nope"]
+
+
+class TestBatch(TestCase):
+    def test_handle_request(self):
+        response = parsers.handle_request(
+            json.dumps({"id": 3, "parser": "kernelcmdline", "text": "ro a=b"})
+        )
+        self.assertEqual(
+            json.loads(response),
+            {"id": 3, "result": {"flags": ["ro"], "params": {"a": "b"}}},
+        )
+
+    def test_handle_request_errors(self):
+        response = json.loads(
+            parsers.handle_request('{"id": 4, "parser": "nope", "text": ""}')
+        )
+        self.assertEqual(response["id"], 4)
+        self.assertIn("Unknown parser", response["error"])
+        response = json.loads(parsers.handle_request("{not json"))
+        self.assertIsNone(response["id"])
+        self.assertIn("error", response)
+
+    def test_serve_stream(self):
+        requests = io.StringIO(
+            '{"id": 1, "parser": "kernelcmdline", "text": "ro"}\n'
+            "\n"
+            '{"id": 2, "parser": "kernelcmdline", "text": "rw"}\n'
+        )
+        responses = io.StringIO()
+        parsers.serve_stream(requests, responses)
+        lines = responses.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[1])["result"]["flags"], ["rw"])
+
+    def test_run_parsing_files(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        filenames = []
+        for name, text in (("a", "ro"), ("b", "quiet x=1")):
+            filenames.append(os.path.join(tmp, name))
+            with open(filenames[-1], "w") as f:
+                f.write(text)
+        result = json.loads(
+            parsers.run_parsing_files(
+                kernel_cmdline.parse_kernel_cmdline, filenames
+            )
+        )
+        self.assertEqual(result[filenames[0]]["flags"], ["ro"])
+        self.assertEqual(result[filenames[1]]["params"], {"x": "1"})
+
+    @patch("sys.argv", ["checkbox-support-parse", "--batch", "udevadm"])
+    def test_main_batch_with_parser_name(self):
+        with self.assertRaises(SystemExit), patch("sys.stderr"):
+            parsers.main()
+
+
+class TestServer(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, "parse.sock")
+
+    def test_serve_socket(self):
+        server = threading.Thread(
+            target=parsers.serve_socket, args=(self.path, 0.5)
+        )
+        server.start()
+        for _ in range(50):
+            if os.path.exists(self.path):
+                break
+            time.sleep(0.01)
+        for flag, value in (("ro", "1"), ("rw", "2")):
+            self.assertEqual(
+                parsers.parse_with_server(
+                    self.path, "kernelcmdline", "{} a={}".format(flag, value)
+                ),
+                {"flags": [flag], "params": {"a": value}},
+            )
+        with self.assertRaises(RuntimeError):
+            parsers.parse_with_server(self.path, "nope", "")
+        # the server exits after being idle for half a second
+        server.join(5)
+        self.assertFalse(server.is_alive())
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_serve_socket_stale_socket(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(self.path)
+        parsers.serve_socket(self.path, 0.01)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_serve_socket_not_a_socket(self):
+        with open(self.path, "w") as f:
+            f.write("keep me")
+        with self.assertRaises(FileExistsError):
+            parsers.serve_socket(self.path, 0.01)
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "keep me")
+
+    def test_parse_without_server(self):
+        self.assertEqual(
+            parsers.parse_with_server(self.path, "kernelcmdline", "ro"),
+            {"flags": ["ro"], "params": {}},
+        )
@@ -0,0 +1,112 @@
+# This file is part of Checkbox.
+#
+# Copyright 2026 Canonical Ltd.
+#
+# Checkbox is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# Checkbox is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Checkbox.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from checkbox_support.parsers.cycle_log import CycleLogAnalyzer
+
+LOG = """\
+2024-01-01 10:00:00,000 start
+2024-01-01 10:00:01,000 cycle 1
+error: one
+2024-01-01 10:00:04,500 cycle 2
+error: two
+error: three
+duration 1.5
+2024-01-01 10:00:05,000 done
+"""
+
+
+class CycleLogAnalyzerTests(TestCase):
+    def make_analyzer(self):
+        analyzer = CycleLogAnalyzer(
+            r"^(?P<timestamp>\S+ \S+)", "%Y-%m-%d %H:%M:%S,%f"
+        )
+        analyzer.on(
+            r"cycle (?P<number>\d+)",
+            lambda match, line: analyzer.start_cycle(
+                int(match.group("number"))
+            ),
+            hint="cycle",
+        )
+        analyzer.on(
+            r"^error: ", lambda match, line: analyzer.add_finding("error")
+        )
+        analyzer.on(
+            r"duration (?P<seconds>[\d.]+)",
+            lambda match, line: analyzer.add_timing(
+                "duration", float(match.group("seconds"))
+            ),
+        )
+        return analyzer
+
+    def test_analyze(self):
+        analyzer = self.make_analyzer().analyze(io.StringIO(LOG))
+        self.assertEqual(
+            analyzer.get_summary(),
+            {
+                "lines": 8,
+                "cycles": [
+                    {
+                        "cycle": 1,
+                        "line": 2,
+                        "duration": 3.5,
+                        "timings": {},
+                        "findings": {"error": 1},
+                    },
+                    {
+                        "cycle": 2,
+                        "line": 4,
+                        "duration": 0.5,
+                        "timings": {"duration": 1.5},
+                        "findings": {"error": 2},
+                    },
+                ],
+                "findings": {"error": 3},
+            },
+        )
+        self.assertEqual(analyzer.last_line, "2024-01-01 10:00:05,000 done\n")
+
+    def test_findings_outside_cycles(self):
+        analyzer = self.make_analyzer()
+        analyzer.feed("error: before")
+        analyzer.skip("anything")
+        analyzer.finish()
+        self.assertEqual(analyzer.findings, {"error": 1})
+        self.assertEqual(analyzer.cycles, [])
+        self.assertEqual(analyzer.line_number, 2)
+
+    def test_no_timestamps(self):
+        analyzer = CycleLogAnalyzer()
+        analyzer.feed("x")
+        cycle = analyzer.start_cycle()
+        analyzer.finish()
+        self.assertEqual(cycle.number, 1)
+        self.assertIsNone(cycle.duration)
+
+    def test_write_summary(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        filename = os.path.join(tmp, "summary.json")
+        analyzer = self.make_analyzer().analyze(io.StringIO(LOG))
+        analyzer.write_summary(filename)
+        with open(filename) as stream:
+            self.assertEqual(json.load(stream), analyzer.get_summary())
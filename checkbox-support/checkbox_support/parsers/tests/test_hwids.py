@@ -0,0 +1,167 @@
+# This file is part of Checkbox.
+#
+# Copyright 2026 Canonical Ltd.
+#
+# Checkbox is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# Checkbox is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Checkbox.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for the hwids module."""
+import os
+import shutil
+import tempfile
+import textwrap
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from checkbox_support.parsers.hwids import HwIdsDatabase
+from checkbox_support.parsers.hwids import PciIds
+from checkbox_support.parsers.hwids import get_cache_path
+from checkbox_support.parsers.sysfs_usb import UsbIds
+
+PCI_IDS = textwrap.dedent(
+    """\
+    # comment
+    8086  Intel Corporation
+    \t1234  Frobnicator
+    \t\t17aa 2233  ThinkFrob
+    10de  NVIDIA Corporation
+    C 03  Display controller
+    \t00  VGA compatible controller
+    \t\t00  VGA controller
+    \t02  3D controller
+    """
+)
+
+USB_IDS = textwrap.dedent(
+    """\
+    0042  ACME
+    \t0042  Seafourium
+    C 42  Explosives
+    \t06  Bomb
+    \t\t01  Boom
+    """
+)
+
+
+class HwIdsTestCase(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.cache_dir = os.path.join(self.tmp, "cache")
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp, name)
+        with open(path, "wt", encoding="iso8859") as f:
+            f.write(content)
+        return path
+
+
+class TestPciIds(HwIdsTestCase):
+    """Tests for the PciIds class."""
+
+    def test_decode(self):
+        ids = PciIds(self.write("pci.ids", PCI_IDS), self.cache_dir)
+        self.assertEqual(ids.decode_vendor(0x10DE), "NVIDIA Corporation")
+        self.assertEqual(
+            ids.decode_device(0x8086, 0x1234), "Intel Corporation Frobnicator"
+        )
+        self.assertEqual(
+            ids.decode_subsystem(0x8086, 0x1234, 0x17AA, 0x2233), "ThinkFrob"
+        )
+        self.assertEqual(ids.decode_subsystem(0x8086, 0x1234, 1, 1), "")
+        with self.assertRaises(KeyError):
+            ids.decode_device(0x10DE, 0x1234)
+
+    def test_decode_class(self):
+        ids = PciIds(self.write("pci.ids", PCI_IDS), self.cache_dir)
+        self.assertEqual(
+            ids.decode_class(3, 0, 0),
+            "Display controller:VGA compatible controller:VGA controller",
+        )
+        self.assertEqual(
+            ids.decode_class(3, 2, 0), "Display controller:3D controller"
+        )
+        self.assertEqual(ids.decode_class(3, 5, 0), "Display controller")
+        self.assertEqual(ids.decode_class(4, 0, 0), "")
+
+    @patch("os.path.isfile", return_value=False)
+    def test_no_database(self, m_isfile):
+        ids = PciIds()
+        self.assertEqual(ids.paths, [])
+        with self.assertRaises(KeyError):
+            ids.decode_vendor(0x8086)
+
+    def test_parse_is_abstract(self):
+        with self.assertRaises(TypeError):
+            HwIdsDatabase()
+
+
+class TestIndex(HwIdsTestCase):
+    """Tests for the on-disk index."""
+
+    def test_index_reused(self):
+        path = self.write("usb.ids", USB_IDS)
+        self.assertEqual(
+            UsbIds(path, self.cache_dir).decode_vendor(0x42), "ACME"
+        )
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        with patch.object(UsbIds, "parse") as m_parse:
+            ids = UsbIds(path, self.cache_dir)
+            self.assertEqual(ids.decode_product(0x42, 0x42), "ACME Seafourium")
+            self.assertEqual(
+                ids.decode_protocol(0x42, 6, 1), "Explosives:Bomb:Boom"
+            )
+        m_parse.assert_not_called()
+
+    def test_index_rebuilt_when_source_changes(self):
+        path = self.write("usb.ids", USB_IDS)
+        UsbIds(path, self.cache_dir).decode_vendor(0x42)
+        self.write("usb.ids", USB_IDS.replace("ACME", "ACME Corp."))
+        self.assertEqual(
+            UsbIds(path, self.cache_dir).decode_vendor(0x42), "ACME Corp."
+        )
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_broken_index_rebuilt(self):
+        path = self.write("usb.ids", USB_IDS)
+        ids = UsbIds(path, self.cache_dir)
+        os.makedirs(self.cache_dir)
+        with open(ids._index_path(path), "w") as f:
+            f.write("garbage")
+        self.assertEqual(ids.decode_vendor(0x42), "ACME")
+
+    def test_unusable_cache_dir(self):
+        path = self.write("usb.ids", USB_IDS)
+        # a regular file where the cache directory should be
+        cache_dir = self.write("cache", "")
+        ids = UsbIds(path, cache_dir)
+        self.assertEqual(ids.decode_vendor(0x42), "ACME")
+
+    def test_lookups_are_memoized(self):
+        path = self.write("usb.ids", USB_IDS)
+        ids = UsbIds(path, self.cache_dir)
+        self.assertEqual(ids.lookup("vendor", 0x42), "ACME")
+        with patch.object(ids, "_sources", []):
+            self.assertEqual(ids.lookup("vendor", 0x42), "ACME")
+            self.assertIsNone(ids.lookup("vendor", 0x43))
+
+    def test_get_cache_path(self):
+        with patch.dict(
+            os.environ, {"SNAP_USER_COMMON": "/snap", "XDG_CACHE_HOME": "/x"}
+        ):
+            self.assertEqual(
+                get_cache_path(), "/snap/.cache/checkbox-support/hwids"
+            )
+        with patch.dict(os.environ, {"XDG_CACHE_HOME": "/x"}):
+            os.environ.pop("SNAP_USER_COMMON", None)
+            self.assertEqual(get_cache_path(), "/x/checkbox-support/hwids")
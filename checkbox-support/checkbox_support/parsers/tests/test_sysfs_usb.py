@@ -18,6 +18,7 @@
 
 
 """Tests for the sysfs_usb module."""
+import tempfile
 import textwrap
 
 from unittest import TestCase
@@ -61,6 +62,17 @@ class TestIsHex(TestCase):
 class TestUsbIds(TestCase):
     """Test for the UsbIds class."""
 
+    def setUp(self):
+        # keep the indexes of any real usb.ids out of the user's cache
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        patcher = patch(
+            "checkbox_support.parsers.hwids.get_cache_path",
+            return_value=cache_dir.name,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     def test_empty(self):
         """Test empty database."""
         mopen = mock_open(read_data="")
@@ -149,3 +161,20 @@ class TestUsbIds(TestCase):
             self.assertEqual(
                 ids.decode_protocol(0x42, 0x06, 0x01), "Explosives"
             )
+
+    @patch("os.path.isfile")
+    def test_many_vendors(self, m_isfile):
+        """Test products are attached to the vendor just above them."""
+        m_isfile.return_value = True
+        usb_ids_content = "".join(
+            "{:04x}  Vendor {}\n\t0001  Product {}\n".format(i, i, i)
+            for i in range(1000)
+        )
+        mopen = mock_open(read_data=usb_ids_content)
+        with patch("builtins.open", mopen):
+            ids = UsbIds()
+            self.assertEqual(
+                ids.decode_product(0x3E7, 1), "Vendor 999 Product 999"
+            )
+            with self.assertRaises(KeyError):
+                ids.decode_product(0x3E7, 2)
@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
 import socket
 import argparse
+import asyncio
+import collections
 import threading
 import logging
+import math
+import os
+import resource
 import time
 import string
 import random
@@ -25,6 +30,12 @@ class StatusEnum(Enum):
     FAIL = 2
 
 
+# Send buffer size used by the thread engine unless told otherwise
+DEFAULT_SNDBUF = 4096
+
+PAYLOAD_PATTERNS = ("random", "zeros", "sequence", "urandom")
+
+
 def generate_random_string(length):
     letters_and_digits = string.ascii_letters + string.digits
     random_string = "".join(
@@ -33,6 +44,121 @@ def generate_random_string(length):
     return random_string
 
 
+def generate_payload(length, pattern="random"):
+    """
+    Generate a payload of the given length in bytes.
+
+    Args:
+    - length (int): Size of the payload in bytes.
+    - pattern (str): One of PAYLOAD_PATTERNS. "random" is made of ASCII
+      letters and digits, "zeros" of null bytes, "sequence" repeats all the
+      byte values in order and "urandom" is random binary data.
+    """
+    if pattern == "random":
+        return generate_random_string(length).encode()
+    if pattern == "zeros":
+        return bytes(length)
+    if pattern == "sequence":
+        return (bytes(range(256)) * (length // 256 + 1))[:length]
+    if pattern == "urandom":
+        return os.urandom(length)
+    raise ValueError("Unknown payload pattern: {}".format(pattern))
+
+
+def set_buffer_sizes(sock, sndbuf=None, rcvbuf=None):
+    """Set the send and receive buffer sizes of a socket, if given."""
+    if sndbuf:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, sndbuf)
+    if rcvbuf:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+
+
+def raise_fd_limit(count=None):
+    """
+    Raise the limit of open files so that count sockets can be opened.
+
+    The soft limit can be raised up to the hard limit (which is used when
+    count is None), a warning is logged if that is not enough.
+    """
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if count is None:
+        if hard == resource.RLIM_INFINITY:
+            return
+        needed = hard
+    else:
+        # leave some room for the files that are already open
+        needed = count + 64
+    if needed <= soft:
+        return
+    new_soft = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (new_soft, hard))
+    except (ValueError, OSError) as e:
+        logging.warning("Unable to raise the open files limit: %s", e)
+        new_soft = soft
+    if new_soft < needed:
+        logging.warning(
+            "Open files limit (%s) is too low for %s connections",
+            new_soft,
+            count,
+        )
+
+
+class Histogram:
+    """
+    Histogram of values with power of two buckets.
+
+    A value is counted in the smallest bucket (..., 0.5, 1, 2, 4, ...) that
+    is greater than or equal to it.
+    """
+
+    def __init__(self):
+        self.buckets = collections.Counter()
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    @staticmethod
+    def bucket(value):
+        if value <= 0:
+            return 0
+        return 2 ** math.ceil(math.log2(value))
+
+    def add(self, value):
+        self.buckets[self.bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        self.buckets.update(other.buckets)
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def __str__(self):
+        if not self.count:
+            return "no samples"
+        return "min={:.3f} mean={:.3f} max={:.3f} [{}]".format(
+            self.min,
+            self.mean,
+            self.max,
+            ", ".join(
+                "<={:g}: {}".format(bucket, self.buckets[bucket])
+                for bucket in sorted(self.buckets)
+            ),
+        )
+
+
 def sorting_data(dict_status):
     list_times = []
     fail_records = []
@@ -97,30 +223,35 @@ def check_result(results):
         logging.info("Run TCP multi-connections test Passed!")
 
 
-def server(start_port, end_port):
+def server(start_port, end_port, sndbuf=DEFAULT_SNDBUF, rcvbuf=None):
     """
     Start the server to listen on a range of ports.
 
     Args:
     - start_port (int): Starting port for the server.
     - end_port (int): Ending port for the server.
+    - sndbuf (int): Send buffer size of the sockets, 0 for system default.
+    - rcvbuf (int): Receive buffer size of the sockets, None for default.
     """
     for port in range(start_port, end_port + 1):
-        threading.Thread(target=handle_port, args=(port,)).start()
+        threading.Thread(
+            target=handle_port, args=(port, sndbuf, rcvbuf)
+        ).start()
 
 
-def handle_port(port):
+def handle_port(port, sndbuf=DEFAULT_SNDBUF, rcvbuf=None):
     """
     Handle incoming connections on the specified port.
 
     Args:
     - port (int): Port to handle connections.
+    - sndbuf (int): Send buffer size of the socket, 0 for system default.
+    - rcvbuf (int): Receive buffer size of the socket, None for default.
     """
     server = ("0.0.0.0", port)
     try:
         with socket.create_server(server) as server_socket:
-            # Set send buffer size to 4096
-            server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+            set_buffer_sizes(server_socket, sndbuf, rcvbuf)
             server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             server_socket.listen()
 
@@ -145,7 +276,16 @@ def handle_port(port):
         )
 
 
-def client(host, start_port, end_port, payload, start_time, results):
+def client(
+    host,
+    start_port,
+    end_port,
+    payload,
+    start_time,
+    results,
+    sndbuf=DEFAULT_SNDBUF,
+    rcvbuf=None,
+):
     """
     Start the client to connect to a range of server ports.
 
@@ -156,13 +296,15 @@ def client(host, start_port, end_port, payload, start_time, results):
     - payload (int): Payload to send to the server.
     - done_event (threading.Event): Event to single when the client is done.
     - start_time (datetime): Time until which the client should run.
+    - sndbuf (int): Send buffer size of the sockets, 0 for system default.
+    - rcvbuf (int): Receive buffer size of the sockets, None for default.
     """
     threads = []
     payload = generate_random_string(payload * 1024)
     for port in range(start_port, end_port + 1):
         thread = threading.Thread(
             target=send_payload,
-            args=(host, port, payload, start_time, results),
+            args=(host, port, payload, start_time, results, sndbuf, rcvbuf),
         )
         threads.append(thread)
         thread.start()
@@ -175,7 +317,15 @@ def client(host, start_port, end_port, payload, start_time, results):
     check_result(results)
 
 
-def send_payload(host, port, payload, start_time, results):
+def send_payload(
+    host,
+    port,
+    payload,
+    start_time,
+    results,
+    sndbuf=DEFAULT_SNDBUF,
+    rcvbuf=None,
+):
     """
     Send a payload to the specified port and handle the server response.
 
@@ -184,6 +334,8 @@ def send_payload(host, port, payload, start_time, results):
     - port (int): Port to connect to.
     - payload (int): Payload size in KB for the client.
     - start_time (datetime): Time until which the client should run.
+    - sndbuf (int): Send buffer size of the socket, 0 for system default.
+    - rcvbuf (int): Receive buffer size of the socket, None for default.
     """
     # Retry connect to server port for 5 times.
     message = ""
@@ -192,10 +344,7 @@ def send_payload(host, port, payload, start_time, results):
         try:
             server_host = (host, port)
             with socket.create_connection(server_host) as client_socket:
-                # Set send buffer size to 4096
-                client_socket.setsockopt(
-                    socket.SOL_SOCKET, socket.SO_SNDBUF, 4096
-                )
+                set_buffer_sizes(client_socket, sndbuf, rcvbuf)
                 logging.info("Connect to port %s", port)
                 # Sleep until start time)
                 start_time = start_time - datetime.now()
@@ -236,6 +385,302 @@ def send_payload(host, port, payload, start_time, results):
     return results
 
 
+def listen_sockets(host, ports, sndbuf=None, rcvbuf=None, backlog=1024):
+    """
+    Open a listening socket on each of the given ports.
+
+    The buffer sizes are set before listening so that the accepted sockets
+    inherit them.
+    """
+    sockets = []
+    try:
+        for port in ports:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sockets.append(sock)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            set_buffer_sizes(sock, sndbuf, rcvbuf)
+            sock.bind((host, port))
+            sock.listen(backlog)
+            sock.setblocking(False)
+    except OSError:
+        for sock in sockets:
+            sock.close()
+        raise
+    return sockets
+
+
+async def echo(reader, writer, read_size=65536):
+    """Send back everything received on a connection."""
+    try:
+        while True:
+            data = await reader.read(read_size)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except ConnectionError as e:
+        logging.debug("Connection lost: %s", e)
+    finally:
+        writer.close()
+
+
+async def serve(sockets, backlog=1024):
+    """Echo the data received by the connections made to the sockets."""
+    servers = []
+    for sock in sockets:
+        # the backlog is passed again as the server listens on the socket
+        servers.append(
+            await asyncio.start_server(echo, sock=sock, backlog=backlog)
+        )
+        logging.info("Server listening on port %s", sock.getsockname()[1])
+    try:
+        # Serve until cancelled
+        await asyncio.Future()
+    finally:
+        for srv in servers:
+            srv.close()
+            await srv.wait_closed()
+
+
+async def open_connection(
+    host, port, sndbuf=None, rcvbuf=None, retries=5, retry_delay=3
+):
+    """
+    Connect to host:port, retrying a few times.
+
+    Returns a (reader, writer, message) tuple, reader and writer being None
+    and message describing the error if no connection could be made.
+    """
+    message = ""
+    for attempt in range(retries):
+        if attempt:
+            await asyncio.sleep(retry_delay)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            set_buffer_sizes(sock, sndbuf, rcvbuf)
+            sock.setblocking(False)
+            await asyncio.get_event_loop().sock_connect(sock, (host, port))
+            reader, writer = await asyncio.open_connection(sock=sock)
+            return reader, writer, ""
+        except OSError as e:
+            sock.close()
+            logging.error("%s on %s", e, port)
+            message = str(e)
+    return None, None, message
+
+
+async def read_echo(reader, payload, read_size=65536):
+    """Read len(payload) bytes, return True if they match the payload."""
+    view = memoryview(payload)
+    offset = 0
+    correct = True
+    while offset < len(payload):
+        data = await reader.read(min(read_size, len(payload) - offset))
+        if not data:
+            return False
+        if view[offset : offset + len(data)] != data:
+            correct = False
+        offset += len(data)
+    return correct
+
+
+async def exchange(reader, writer, payload, iterations=10, timeout=30):
+    """
+    Send the payload and check the echoed data, iterations times.
+
+    Returns a tuple (status, latency, throughput): the status of each
+    iteration in the format expected by format_output(), the histogram of
+    the round trip times in milliseconds and the one of the throughput in
+    KB/s.
+    """
+    loop = asyncio.get_event_loop()
+    status = {}
+    latency = Histogram()
+    throughput = Histogram()
+    for x in range(iterations):
+        start = loop.time()
+        # The echo is read while the payload is being sent, draining first
+        # would stall when the payload is larger than the socket buffers
+        writer.write(payload)
+        try:
+            correct = await asyncio.wait_for(
+                read_echo(reader, payload), timeout
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            correct = False
+        elapsed = loop.time() - start
+        status[x] = {"time": timedelta(seconds=elapsed), "status": correct}
+        latency.add(elapsed * 1000)
+        if elapsed > 0:
+            throughput.add(len(payload) / 1024 / elapsed)
+        if not correct:
+            # the stream is out of sync, don't go on
+            break
+    return status, latency, throughput
+
+
+async def run_connections(
+    host,
+    ports,
+    connections,
+    payload,
+    iterations=10,
+    sndbuf=None,
+    rcvbuf=None,
+    timeout=30,
+    retry_delay=3,
+):
+    """
+    Open connections to each port, then exchange the payload on all of them.
+
+    The payload is only sent once all connections are established.
+    Returns one format_output() result per connection, with the added
+    "connection", "latency" and "throughput" keys.
+    """
+    targets = [(port, index) for port in ports for index in range(connections)]
+    opened = await asyncio.gather(
+        *(
+            open_connection(
+                host, port, sndbuf, rcvbuf, retry_delay=retry_delay
+            )
+            for port, index in targets
+        )
+    )
+    logging.info(
+        "%s/%s connections established, sending payload",
+        sum(1 for reader, writer, message in opened if writer),
+        len(targets),
+    )
+
+    async def run(target, connection):
+        port, index = target
+        reader, writer, message = connection
+        latency = Histogram()
+        throughput = Histogram()
+        status = {}
+        if writer is not None:
+            try:
+                status, latency, throughput = await exchange(
+                    reader, writer, payload, iterations, timeout
+                )
+            finally:
+                writer.close()
+        result = format_output(port, message, status)
+        result["connection"] = index
+        result["latency"] = latency
+        result["throughput"] = throughput
+        return result
+
+    return await asyncio.gather(
+        *(run(target, conn) for target, conn in zip(targets, opened))
+    )
+
+
+def report_histograms(results):
+    """Log the latency and throughput histograms of each connection."""
+    latency = Histogram()
+    throughput = Histogram()
+    for result in results:
+        logging.info(
+            "Port %s connection %s: latency (ms) %s; throughput (KB/s) %s",
+            result["port"],
+            result["connection"],
+            result["latency"],
+            result["throughput"],
+        )
+        latency.merge(result["latency"])
+        throughput.merge(result["throughput"])
+    logging.info("All connections: latency (ms) %s", latency)
+    logging.info("All connections: throughput (KB/s) %s", throughput)
+
+
+def run_in_new_loop(coroutine):
+    """
+    Run the coroutine in a new event loop and close the loop afterwards.
+
+    asyncio.get_event_loop() is not reliable outside of a running loop, the
+    loop is created explicitly instead.
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+        asyncio.set_event_loop(None)
+
+
+def async_server(start_port, end_port, sndbuf=None, rcvbuf=None):
+    """
+    Serve a range of ports from a single event loop.
+
+    Args:
+    - start_port (int): Starting port for the server.
+    - end_port (int): Ending port for the server.
+    - sndbuf (int): Send buffer size of the sockets, None for default.
+    - rcvbuf (int): Receive buffer size of the sockets, None for default.
+    """
+    # the number of connections is up to the clients
+    raise_fd_limit()
+    sockets = listen_sockets(
+        "0.0.0.0", range(start_port, end_port + 1), sndbuf, rcvbuf
+    )
+    try:
+        run_in_new_loop(serve(sockets))
+    except KeyboardInterrupt:
+        pass
+
+
+def async_client(
+    host,
+    start_port,
+    end_port,
+    payload,
+    connections=1,
+    pattern="random",
+    iterations=10,
+    sndbuf=None,
+    rcvbuf=None,
+    timeout=30,
+):
+    """
+    Drive connections to a range of server ports from a single event loop.
+
+    Args:
+    - host (str): Server host.
+    - start_port (int): Starting port for the client.
+    - end_port (int): Ending port for the client.
+    - payload (int): Payload size in KB.
+    - connections (int): Number of connections to each port.
+    - pattern (str): Payload pattern, one of PAYLOAD_PATTERNS.
+    - iterations (int): Number of times the payload is sent.
+    - sndbuf (int): Send buffer size of the sockets, None for default.
+    - rcvbuf (int): Receive buffer size of the sockets, None for default.
+    - timeout (int): Seconds to wait for the payload to come back.
+    """
+    ports = range(start_port, end_port + 1)
+    raise_fd_limit(len(ports) * connections)
+    start_time = datetime.now()
+    results = run_in_new_loop(
+        run_connections(
+            host,
+            ports,
+            connections,
+            generate_payload(payload * 1024, pattern),
+            iterations,
+            sndbuf,
+            rcvbuf,
+            timeout,
+        )
+    )
+    logging.info(
+        "Running TCP multi-connections in %s", (datetime.now() - start_time)
+    )
+    report_histograms(results)
+    check_result(results)
+
+
 if __name__ == "__main__":
     """
     TCP Ping Test
@@ -249,6 +694,10 @@ if __name__ == "__main__":
     - To run as a server: ./script.py server -p <star_port> -e <end_port>
     - To run as a client: ./script.py client -H <server_host> -p <start_port>
       -e <end_port> -P <payload_size>
+    - To open thousands of connections from a single process:
+      ./script.py server --engine asyncio -p <start_port> -e <end_port>
+      ./script.py client --engine asyncio -H <server_host> -p <start_port>
+      -e <end_port> -c <connections_per_port>
 
     Arguments:
     - mode (str): Specify whether to run as a server or client.
@@ -257,6 +706,16 @@ if __name__ == "__main__":
       Default is 1024.
     - payload (int): Payload size in KB for the client. Default is 64.
     - end_port (int): Ending port for the server. Default is 1223.
+    - engine (str): "thread" (one thread per port, default) or "asyncio"
+      (all the connections are handled by a single event loop).
+    - sndbuf/rcvbuf (int): Socket buffer sizes in bytes, 0 keeps the system
+      default. The thread engine uses a 4096 bytes send buffer by default.
+
+    Asyncio engine client options:
+    - connections (int): Number of connections to each port. Default is 1.
+    - pattern (str): Payload pattern (random, zeros, sequence, urandom).
+    - iterations (int): Times the payload is sent on each connection.
+    The latency and throughput histograms of every connection are logged.
 
     Server Mode:
     - The server listens on a range of ports concurrently, handling
@@ -276,8 +735,30 @@ if __name__ == "__main__":
         dest="mode", help="Run as server or client"
     )
 
+    common_parser = argparse.ArgumentParser(add_help=False)
+    common_parser.add_argument(
+        "--engine",
+        choices=("thread", "asyncio"),
+        default="thread",
+        help="Use a thread per port or a single asyncio event loop",
+    )
+    common_parser.add_argument(
+        "--sndbuf",
+        type=int,
+        default=None,
+        help="Socket send buffer size in bytes (0 for system default)",
+    )
+    common_parser.add_argument(
+        "--rcvbuf",
+        type=int,
+        default=None,
+        help="Socket receive buffer size in bytes (0 for system default)",
+    )
+
     # Subparser for the server command
-    server_parser = subparsers.add_parser("server", help="Run as server")
+    server_parser = subparsers.add_parser(
+        "server", help="Run as server", parents=[common_parser]
+    )
     server_parser.add_argument(
         "-p",
         "--port",
@@ -294,7 +775,9 @@ if __name__ == "__main__":
     )
 
     # Subparser for the client command
-    client_parser = subparsers.add_parser("client", help="Run as client")
+    client_parser = subparsers.add_parser(
+        "client", help="Run as client", parents=[common_parser]
+    )
     client_parser.add_argument(
         "-H", "--host", required=True, help="Server host (client mode)"
     )
@@ -319,15 +802,64 @@ if __name__ == "__main__":
         default=1223,
         help="Ending port for the client",
     )
+    client_parser.add_argument(
+        "-c",
+        "--connections",
+        type=int,
+        help="Number of connections to each port (asyncio engine only)",
+    )
+    client_parser.add_argument(
+        "--pattern",
+        choices=PAYLOAD_PATTERNS,
+        help="Payload pattern (asyncio engine only)",
+    )
+    client_parser.add_argument(
+        "--iterations",
+        type=int,
+        help="Times the payload is sent on each connection "
+        "(asyncio engine only)",
+    )
     args = parser.parse_args()
 
+    if args.mode == "client":
+        asyncio_options = {
+            "connections": ("--connections", 1),
+            "pattern": ("--pattern", "random"),
+            "iterations": ("--iterations", 10),
+        }
+        for dest, (option, default) in asyncio_options.items():
+            if getattr(args, dest) is None:
+                setattr(args, dest, default)
+            elif args.engine != "asyncio":
+                parser.error("{} requires --engine asyncio".format(option))
+
     results = []
     # Ramp up time to wait until all ports are connected before
     # starting to send the payload.
     start_time = datetime.now() + timedelta(seconds=20)
 
-    if args.mode == "server":
-        server(args.port, args.end_port)
+    if args.mode and args.engine == "asyncio":
+        if args.mode == "server":
+            async_server(args.port, args.end_port, args.sndbuf, args.rcvbuf)
+        else:
+            async_client(
+                args.host,
+                args.port,
+                args.end_port,
+                args.payload,
+                args.connections,
+                args.pattern,
+                args.iterations,
+                args.sndbuf,
+                args.rcvbuf,
+            )
+    elif args.mode == "server":
+        server(
+            args.port,
+            args.end_port,
+            DEFAULT_SNDBUF if args.sndbuf is None else args.sndbuf,
+            args.rcvbuf,
+        )
     elif args.mode == "client":
         client(
             args.host,
@@ -336,4 +868,6 @@ if __name__ == "__main__":
             args.payload,
             start_time,
             results,
+            DEFAULT_SNDBUF if args.sndbuf is None else args.sndbuf,
+            args.rcvbuf,
         )
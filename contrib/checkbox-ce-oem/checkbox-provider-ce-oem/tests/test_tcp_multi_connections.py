@@ -1,9 +1,11 @@
 #!/usr/bin/python3
 
+import asyncio
+import socket
 import unittest
 from datetime import timedelta, datetime
 import tcp_multi_connections
-from tcp_multi_connections import StatusEnum
+from tcp_multi_connections import Histogram, StatusEnum
 from unittest.mock import patch, Mock
 
 
@@ -139,5 +141,143 @@ class TestTcpMulitConnections(unittest.TestCase):
         self.assertEqual(result[0]["port"], "1234")
 
 
+class TestAsyncioEngine(unittest.TestCase):
+    """
+    Test the asyncio engine over loopback
+    """
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(self.loop.close)
+
+    def run_with_server(self, coroutine_fn, ports=2):
+        sockets = tcp_multi_connections.listen_sockets(
+            "127.0.0.1", [0] * ports, sndbuf=8192
+        )
+        port_list = [sock.getsockname()[1] for sock in sockets]
+        server = self.loop.create_task(tcp_multi_connections.serve(sockets))
+        try:
+            return self.loop.run_until_complete(coroutine_fn(port_list))
+        finally:
+            server.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                self.loop.run_until_complete(server)
+
+    def test_run_connections(self):
+        payload = tcp_multi_connections.generate_payload(300000, "sequence")
+        results = self.run_with_server(
+            lambda ports: tcp_multi_connections.run_connections(
+                "127.0.0.1", ports, 20, payload, iterations=2
+            )
+        )
+        self.assertEqual(len(results), 40)
+        for result in results:
+            self.assertEqual(result["status"], StatusEnum.SUCCESS)
+            self.assertEqual(result["latency"].count, 2)
+            self.assertEqual(result["throughput"].count, 2)
+        self.assertEqual(
+            sorted(set(result["connection"] for result in results)),
+            list(range(20)),
+        )
+        tcp_multi_connections.check_result(results)
+
+    @patch("tcp_multi_connections.read_echo")
+    def test_run_connections_bad_echo(self, mock_read_echo):
+        async def read_echo(reader, payload):
+            return False
+
+        mock_read_echo.side_effect = read_echo
+        results = self.run_with_server(
+            lambda ports: tcp_multi_connections.run_connections(
+                "127.0.0.1", ports, 1, b"payload", iterations=3
+            ),
+            ports=1,
+        )
+        self.assertEqual(results[0]["status"], StatusEnum.FAIL)
+        # the exchange stops at the first failure
+        self.assertEqual(len(results[0]["fail"]), 1)
+        with self.assertRaises(RuntimeError):
+            tcp_multi_connections.check_result(results)
+
+    def test_run_connections_refused(self):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        results = self.loop.run_until_complete(
+            tcp_multi_connections.run_connections(
+                "127.0.0.1", [port], 2, b"payload", retry_delay=0
+            )
+        )
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]["status"], StatusEnum.ERROR)
+        self.assertTrue(results[0]["message"])
+        self.assertEqual(results[0]["latency"].count, 0)
+
+    def test_run_in_new_loop(self):
+        async def coroutine():
+            return asyncio.get_event_loop()
+
+        loop = tcp_multi_connections.run_in_new_loop(coroutine())
+        self.assertIsNot(loop, self.loop)
+        self.assertTrue(loop.is_closed())
+
+
+class TestHelpers(unittest.TestCase):
+    """
+    Test the payload generation and the histograms
+    """
+
+    def test_generate_payload(self):
+        for pattern in tcp_multi_connections.PAYLOAD_PATTERNS:
+            self.assertEqual(
+                len(tcp_multi_connections.generate_payload(1000, pattern)),
+                1000,
+            )
+        self.assertEqual(
+            tcp_multi_connections.generate_payload(3, "zeros"), b"\0\0\0"
+        )
+        self.assertEqual(
+            tcp_multi_connections.generate_payload(258, "sequence")[-3:],
+            b"\xff\x00\x01",
+        )
+        with self.assertRaises(ValueError):
+            tcp_multi_connections.generate_payload(3, "nope")
+
+    def test_histogram(self):
+        histogram = Histogram()
+        self.assertEqual(str(histogram), "no samples")
+        for value in (0.3, 1, 3, 4, 100):
+            histogram.add(value)
+        self.assertEqual(histogram.buckets, {0.5: 1, 1: 1, 4: 2, 128: 1})
+        other = Histogram()
+        other.add(1000)
+        histogram.merge(other)
+        self.assertEqual(histogram.count, 6)
+        self.assertEqual(histogram.min, 0.3)
+        self.assertEqual(histogram.max, 1000)
+        self.assertAlmostEqual(histogram.mean, 1108.3 / 6)
+        self.assertEqual(
+            str(histogram),
+            "min=0.300 mean=184.717 max=1000.000 "
+            "[<=0.5: 1, <=1: 1, <=4: 2, <=128: 1, <=1024: 1]",
+        )
+
+    @patch("resource.setrlimit")
+    @patch("resource.getrlimit", return_value=(1024, 4096))
+    def test_raise_fd_limit(self, mock_getrlimit, mock_setrlimit):
+        tcp_multi_connections.raise_fd_limit(100)
+        mock_setrlimit.assert_not_called()
+        tcp_multi_connections.raise_fd_limit(2000)
+        mock_setrlimit.assert_called_with(
+            tcp_multi_connections.resource.RLIMIT_NOFILE, (2064, 4096)
+        )
+        tcp_multi_connections.raise_fd_limit()
+        mock_setrlimit.assert_called_with(
+            tcp_multi_connections.resource.RLIMIT_NOFILE, (4096, 4096)
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
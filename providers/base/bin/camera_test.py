@@ -34,10 +34,14 @@ import ctypes
 import errno
 import fcntl
 import logging
+import mmap
 import os
 import re
+import select
+import statistics
 import struct
 import sys
+import time
 
 from glob import glob
 from subprocess import check_call, CalledProcessError, STDOUT
@@ -74,6 +78,10 @@ def _IOR(type_, nr, size):
     return _IOC(_IOC_READ, type_, nr, ctypes.sizeof(size))
 
 
+def _IOW(type_, nr, size):
+    return _IOC(_IOC_WRITE, type_, nr, ctypes.sizeof(size))
+
+
 def _IOWR(type_, nr, size):
     return _IOC(_IOC_READ | _IOC_WRITE, type_, nr, _IOC_TYPECHECK(size))
 
@@ -89,7 +97,8 @@ class v4l2_capability(ctypes.Structure):
         ("bus_info", ctypes.c_char * 32),
         ("version", ctypes.c_uint32),
         ("capabilities", ctypes.c_uint32),
-        ("reserved", ctypes.c_uint32 * 4),
+        ("device_caps", ctypes.c_uint32),
+        ("reserved", ctypes.c_uint32 * 3),
     ]
 
 
@@ -99,6 +108,7 @@ V4L2_CAP_VIDEO_CAPTURE_MPLANE = 0x00001000
 V4L2_CAP_VIDEO_OVERLAY = 0x00000004
 V4L2_CAP_READWRITE = 0x01000000
 V4L2_CAP_STREAMING = 0x04000000
+V4L2_CAP_DEVICE_CAPS = 0x80000000
 
 v4l2_frmsizetypes = ctypes.c_uint
 (
@@ -159,10 +169,353 @@ V4L2_FMT_FLAG_COMPRESSED = 0x0001
 V4L2_FMT_FLAG_EMULATED = 0x0002
 
 
+class v4l2_pix_format(ctypes.Structure):
+    _fields_ = [
+        ("width", ctypes.c_uint32),
+        ("height", ctypes.c_uint32),
+        ("pixelformat", ctypes.c_uint32),
+        ("field", ctypes.c_uint32),
+        ("bytesperline", ctypes.c_uint32),
+        ("sizeimage", ctypes.c_uint32),
+        ("colorspace", ctypes.c_uint32),
+        ("priv", ctypes.c_uint32),
+        ("flags", ctypes.c_uint32),
+        ("ycbcr_enc", ctypes.c_uint32),
+        ("quantization", ctypes.c_uint32),
+        ("xfer_func", ctypes.c_uint32),
+    ]
+
+
+class v4l2_format(ctypes.Structure):
+    class _u(ctypes.Union):
+        _fields_ = [
+            ("pix", v4l2_pix_format),
+            ("raw_data", ctypes.c_uint8 * 200),
+            # the other members of the union hold pointers
+            ("_align", ctypes.c_void_p),
+        ]
+
+    _fields_ = [
+        ("type", ctypes.c_uint32),
+        ("fmt", _u),
+    ]
+
+
+class v4l2_fract(ctypes.Structure):
+    _fields_ = [
+        ("numerator", ctypes.c_uint32),
+        ("denominator", ctypes.c_uint32),
+    ]
+
+
+class v4l2_captureparm(ctypes.Structure):
+    _fields_ = [
+        ("capability", ctypes.c_uint32),
+        ("capturemode", ctypes.c_uint32),
+        ("timeperframe", v4l2_fract),
+        ("extendedmode", ctypes.c_uint32),
+        ("readbuffers", ctypes.c_uint32),
+        ("reserved", ctypes.c_uint32 * 4),
+    ]
+
+
+class v4l2_streamparm(ctypes.Structure):
+    class _u(ctypes.Union):
+        _fields_ = [
+            ("capture", v4l2_captureparm),
+            ("raw_data", ctypes.c_uint8 * 200),
+        ]
+
+    _fields_ = [
+        ("type", ctypes.c_uint32),
+        ("parm", _u),
+    ]
+
+
+class v4l2_requestbuffers(ctypes.Structure):
+    _fields_ = [
+        ("count", ctypes.c_uint32),
+        ("type", ctypes.c_uint32),
+        ("memory", ctypes.c_uint32),
+        ("capabilities", ctypes.c_uint32),
+        ("reserved", ctypes.c_uint32),
+    ]
+
+
+class timeval(ctypes.Structure):
+    _fields_ = [
+        ("tv_sec", ctypes.c_long),
+        ("tv_usec", ctypes.c_long),
+    ]
+
+
+class v4l2_timecode(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_uint32),
+        ("flags", ctypes.c_uint32),
+        ("frames", ctypes.c_uint8),
+        ("seconds", ctypes.c_uint8),
+        ("minutes", ctypes.c_uint8),
+        ("hours", ctypes.c_uint8),
+        ("userbits", ctypes.c_uint8 * 4),
+    ]
+
+
+class v4l2_buffer(ctypes.Structure):
+    class _m(ctypes.Union):
+        _fields_ = [
+            ("offset", ctypes.c_uint32),
+            ("userptr", ctypes.c_ulong),
+            ("planes", ctypes.c_void_p),
+            ("fd", ctypes.c_int32),
+        ]
+
+    _fields_ = [
+        ("index", ctypes.c_uint32),
+        ("type", ctypes.c_uint32),
+        ("bytesused", ctypes.c_uint32),
+        ("flags", ctypes.c_uint32),
+        ("field", ctypes.c_uint32),
+        ("timestamp", timeval),
+        ("timecode", v4l2_timecode),
+        ("sequence", ctypes.c_uint32),
+        ("memory", ctypes.c_uint32),
+        ("m", _m),
+        ("length", ctypes.c_uint32),
+        ("reserved2", ctypes.c_uint32),
+        ("request_fd", ctypes.c_int32),
+    ]
+
+
+V4L2_BUF_TYPE_VIDEO_CAPTURE = 1
+V4L2_MEMORY_MMAP = 1
+V4L2_FIELD_ANY = 0
+
+V4L2_BUF_FLAG_ERROR = 0x00000040
+V4L2_BUF_FLAG_TIMESTAMP_MASK = 0x0000E000
+V4L2_BUF_FLAG_TIMESTAMP_MONOTONIC = 0x00002000
+
 # ioctl code for video devices
 VIDIOC_QUERYCAP = _IOR("V", 0, v4l2_capability)
 VIDIOC_ENUM_FRAMESIZES = _IOWR("V", 74, v4l2_frmsizeenum)
 VIDIOC_ENUM_FMT = _IOWR("V", 2, v4l2_fmtdesc)
+VIDIOC_S_FMT = _IOWR("V", 5, v4l2_format)
+VIDIOC_REQBUFS = _IOWR("V", 8, v4l2_requestbuffers)
+VIDIOC_QUERYBUF = _IOWR("V", 9, v4l2_buffer)
+VIDIOC_QBUF = _IOWR("V", 15, v4l2_buffer)
+VIDIOC_DQBUF = _IOWR("V", 17, v4l2_buffer)
+VIDIOC_STREAMON = _IOW("V", 18, ctypes.c_int)
+VIDIOC_STREAMOFF = _IOW("V", 19, ctypes.c_int)
+VIDIOC_G_PARM = _IOWR("V", 21, v4l2_streamparm)
+
+
+class StreamStats:
+    """
+    Statistics of the frames captured from a stream
+    """
+
+    def __init__(self):
+        self.frames = 0
+        self.dropped = 0
+        self.errors = 0
+        self.first_time = None
+        self.last_time = None
+        self.last_sequence = None
+        self.intervals = []
+        self.latencies = []
+
+    def add_frame(self, sequence, timestamp, dequeue_time=None, error=False):
+        """
+        Record a frame
+
+        :param sequence:
+            Sequence number given to the frame by the driver. Gaps in the
+            sequence are frames the driver had to drop.
+        :param timestamp:
+            Time when the frame was captured, in seconds
+        :param dequeue_time:
+            Time when the frame was received, on the same clock as the
+            capture time, or None if the clocks differ
+        :param error:
+            True if the driver flagged the frame as corrupted
+        """
+        self.frames += 1
+        if error:
+            self.errors += 1
+        if self.last_sequence is None:
+            self.first_time = timestamp
+        else:
+            self.dropped += max(0, sequence - self.last_sequence - 1)
+            self.intervals.append(timestamp - self.last_time)
+        self.last_sequence = sequence
+        self.last_time = timestamp
+        if dequeue_time is not None:
+            self.latencies.append(dequeue_time - timestamp)
+
+    @property
+    def fps(self):
+        if self.frames < 2 or self.last_time <= self.first_time:
+            return 0.0
+        return (self.frames - 1) / (self.last_time - self.first_time)
+
+    @property
+    def jitter(self):
+        """Standard deviation of the time between frames, in seconds"""
+        if len(self.intervals) < 2:
+            return 0.0
+        return statistics.pstdev(self.intervals)
+
+    def __str__(self):
+        text = "%.2f fps, %d frames, %d dropped, %d errors, jitter %.2f ms" % (
+            self.fps,
+            self.frames,
+            self.dropped,
+            self.errors,
+            self.jitter * 1000,
+        )
+        if self.latencies:
+            text += ", latency %.2f ms (max %.2f ms)" % (
+                statistics.mean(self.latencies) * 1000,
+                max(self.latencies) * 1000,
+            )
+        return text
+
+
+class V4L2Stream:
+    """
+    Capture frames from a video device using v4l2 mmap streaming
+
+    The device is opened in non-blocking mode, :meth:`read_frames()` is to
+    be called when it is ready to be read, so that many devices can be
+    streamed from the same loop.
+    """
+
+    BUFFER_COUNT = 4
+
+    def __init__(self, device):
+        self.device = device
+        self.fd = None
+        self.buffers = []
+        self.width = None
+        self.height = None
+        self.nominal_fps = None
+        self.stats = StreamStats()
+
+    def fileno(self):
+        return self.fd
+
+    def start(self, pixelformat, width, height):
+        """
+        Set the format of the device and start streaming
+        """
+        self.fd = os.open(self.device, os.O_RDWR | os.O_NONBLOCK)
+        try:
+            self._setup(pixelformat, width, height)
+        except OSError:
+            self.stop()
+            raise
+
+    def _setup(self, pixelformat, width, height):
+        fmt = v4l2_format()
+        fmt.type = V4L2_BUF_TYPE_VIDEO_CAPTURE
+        fmt.fmt.pix.width = width
+        fmt.fmt.pix.height = height
+        fmt.fmt.pix.pixelformat = pixelformat
+        fmt.fmt.pix.field = V4L2_FIELD_ANY
+        fcntl.ioctl(self.fd, VIDIOC_S_FMT, fmt)
+        # the driver may have picked a different resolution
+        self.width = fmt.fmt.pix.width
+        self.height = fmt.fmt.pix.height
+
+        parm = v4l2_streamparm()
+        parm.type = V4L2_BUF_TYPE_VIDEO_CAPTURE
+        try:
+            fcntl.ioctl(self.fd, VIDIOC_G_PARM, parm)
+            timeperframe = parm.parm.capture.timeperframe
+            if timeperframe.numerator:
+                self.nominal_fps = (
+                    timeperframe.denominator / timeperframe.numerator
+                )
+        except OSError:
+            # not all the drivers tell their frame rate
+            pass
+
+        req = v4l2_requestbuffers()
+        req.count = self.BUFFER_COUNT
+        req.type = V4L2_BUF_TYPE_VIDEO_CAPTURE
+        req.memory = V4L2_MEMORY_MMAP
+        fcntl.ioctl(self.fd, VIDIOC_REQBUFS, req)
+        for index in range(req.count):
+            buf = self._new_buffer()
+            buf.index = index
+            fcntl.ioctl(self.fd, VIDIOC_QUERYBUF, buf)
+            self.buffers.append(
+                mmap.mmap(
+                    self.fd,
+                    buf.length,
+                    mmap.MAP_SHARED,
+                    mmap.PROT_READ,
+                    offset=buf.m.offset,
+                )
+            )
+            fcntl.ioctl(self.fd, VIDIOC_QBUF, buf)
+        fcntl.ioctl(
+            self.fd,
+            VIDIOC_STREAMON,
+            ctypes.c_int(V4L2_BUF_TYPE_VIDEO_CAPTURE),
+        )
+
+    def _new_buffer(self):
+        buf = v4l2_buffer()
+        buf.type = V4L2_BUF_TYPE_VIDEO_CAPTURE
+        buf.memory = V4L2_MEMORY_MMAP
+        return buf
+
+    def read_frames(self):
+        """
+        Record the frames captured so far and give their buffers back
+        """
+        buf = self._new_buffer()
+        while True:
+            try:
+                fcntl.ioctl(self.fd, VIDIOC_DQBUF, buf)
+            except OSError as e:
+                if e.errno == errno.EAGAIN:
+                    return
+                raise
+            now = time.clock_gettime(time.CLOCK_MONOTONIC)
+            timestamp = buf.timestamp.tv_sec + buf.timestamp.tv_usec / 1e6
+            monotonic = (
+                buf.flags & V4L2_BUF_FLAG_TIMESTAMP_MASK
+                == V4L2_BUF_FLAG_TIMESTAMP_MONOTONIC
+            )
+            self.stats.add_frame(
+                buf.sequence,
+                timestamp,
+                now if monotonic else None,
+                bool(buf.flags & V4L2_BUF_FLAG_ERROR) or not buf.bytesused,
+            )
+            fcntl.ioctl(self.fd, VIDIOC_QBUF, buf)
+
+    def stop(self):
+        """
+        Stop streaming and release the device
+        """
+        if self.fd is None:
+            return
+        try:
+            fcntl.ioctl(
+                self.fd,
+                VIDIOC_STREAMOFF,
+                ctypes.c_int(V4L2_BUF_TYPE_VIDEO_CAPTURE),
+            )
+        except OSError:
+            pass
+        for buffer in self.buffers:
+            buffer.close()
+        self.buffers = []
+        os.close(self.fd)
+        self.fd = None
 
 
 class CameraTest:
@@ -176,6 +529,8 @@ class CameraTest:
         - resolutions: After querying the webcam for supported formats and
             resolutions, take multiple images using the first format returned
             by the driver, and see if they are valid.
+        - benchmark: Stream from all the cameras at the same time and
+            measure the frame rate, dropped frames, jitter and latency.
     """
 
     def __init__(self, **kwargs):
@@ -186,6 +541,9 @@ class CameraTest:
         self.headless = kwargs.get("headless", False)
         self.output = kwargs.get("output", "")
         self.log_level = kwargs.get("log_level", logging.INFO)
+        self.devices = kwargs.get("devices")
+        self.duration = kwargs.get("duration", 5)
+        self.all_resolutions = kwargs.get("all_resolutions", False)
 
         self.main_loop = None
         self.pipeline = None
@@ -637,6 +995,140 @@ class CameraTest:
                 return 1
         return 0
 
+    def benchmark(self):
+        """
+        Stream from all the capture devices at the same time using v4l2
+        mmap streaming, once for each of their formats (at their highest
+        resolution, or at all of them), and report the frame statistics.
+
+        Devices with fewer formats or resolutions than the others are
+        streamed again with their last one, so that the load stays the
+        same during the whole benchmark.
+        """
+        devices = self.devices or self._get_capture_devices()
+        if not devices:
+            raise SystemExit("No capture device found")
+        configs = {}
+        for device in devices:
+            configs[device] = []
+            for format in self._get_supported_formats(device):
+                if "pixelformat_int" not in format:
+                    # not reported by the driver, nothing to stream
+                    continue
+                resolutions = format["resolutions"]
+                if not self.all_resolutions:
+                    resolutions = sorted(
+                        resolutions, key=lambda r: r[0] * r[1]
+                    )[-1:]
+                for resolution in resolutions:
+                    configs[device].append((format, resolution))
+        if not any(configs.values()):
+            raise SystemExit("No supported formats found")
+
+        status = 0
+        rounds = max(
+            len(device_configs) for device_configs in configs.values()
+        )
+        for index in range(rounds):
+            # (stream, pixel format, whether it was already measured)
+            streams = []
+            for device, device_configs in configs.items():
+                if not device_configs:
+                    continue
+                format, (width, height) = device_configs[
+                    min(index, len(device_configs) - 1)
+                ]
+                stream = V4L2Stream(device)
+                try:
+                    stream.start(format["pixelformat_int"], width, height)
+                except OSError as e:
+                    print(
+                        "%s %s %sx%s: unable to stream: %s"
+                        % (device, format["pixelformat"], width, height, e),
+                        file=sys.stderr,
+                    )
+                    status = 1
+                    continue
+                streams.append(
+                    (
+                        stream,
+                        format["pixelformat"],
+                        index >= len(device_configs),
+                    )
+                )
+            try:
+                self._run_streams([stream for stream, _, _ in streams])
+            finally:
+                for stream, _, _ in streams:
+                    stream.stop()
+            for stream, pixelformat, repeated in streams:
+                if repeated:
+                    continue
+                nominal = ""
+                if stream.nominal_fps is not None:
+                    nominal = " (nominal %.2f fps)" % stream.nominal_fps
+                print(
+                    "%s %s %sx%s: %s%s"
+                    % (
+                        stream.device,
+                        pixelformat,
+                        stream.width,
+                        stream.height,
+                        stream.stats,
+                        nominal,
+                    )
+                )
+                if not stream.stats.frames or stream.stats.errors:
+                    status = 1
+        return status
+
+    def _run_streams(self, streams):
+        """
+        Read the frames of all the streams for the duration of the benchmark
+        """
+        poller = select.poll()
+        streams_by_fd = {}
+        for stream in streams:
+            poller.register(stream, select.POLLIN)
+            streams_by_fd[stream.fileno()] = stream
+        end = time.monotonic() + self.duration
+        while streams_by_fd:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            for fd, event in poller.poll(remaining * 1000):
+                stream = streams_by_fd[fd]
+                try:
+                    stream.read_frames()
+                except OSError as e:
+                    print("%s: %s" % (stream.device, e), file=sys.stderr)
+                    stream.stats.errors += 1
+                    poller.unregister(fd)
+                    del streams_by_fd[fd]
+
+    def _get_capture_devices(self):
+        """
+        Get the video devices that can stream captured frames
+        """
+        devices = []
+        for device in sorted(
+            glob("/dev/video[0-9]*"),
+            key=lambda d: int(re.search(r"\d+$", d).group(0)),
+        ):
+            cp = v4l2_capability()
+            try:
+                with open(device, "r") as vd:
+                    fcntl.ioctl(vd, VIDIOC_QUERYCAP, cp)
+            except IOError:
+                continue
+            caps = cp.capabilities
+            if caps & V4L2_CAP_DEVICE_CAPS:
+                # capabilities of this node, not of the whole device
+                caps = cp.device_caps
+            if caps & V4L2_CAP_VIDEO_CAPTURE and caps & V4L2_CAP_STREAMING:
+                devices.append(device)
+        return devices
+
     def _save_debug_image(self, format, device, output):
         """
         Save an image to a file
@@ -937,6 +1429,31 @@ def parse_arguments(argv):
     )
     add_device_parameter(resolutions_parser)
 
+    # Benchmark subparser
+    benchmark_parser = subparsers.add_parser("benchmark")
+    benchmark_parser.add_argument(
+        "-d",
+        "--device",
+        dest="devices",
+        action="append",
+        help=(
+            "Device for a webcam to use, can be repeated "
+            "(all the capture devices by default)"
+        ),
+    )
+    benchmark_parser.add_argument(
+        "-t",
+        "--duration",
+        type=float,
+        default=5,
+        help="Seconds to stream each format for (%(default)s by default)",
+    )
+    benchmark_parser.add_argument(
+        "--all-resolutions",
+        action="store_true",
+        help="Stream each resolution, not only the highest one",
+    )
+
     args = parser.parse_args(argv)
 
     # Handle the selection of the highest or lowest device
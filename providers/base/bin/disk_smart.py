@@ -73,9 +73,11 @@ import time
 import logging
 import shlex
 
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from subprocess import Popen, PIPE, check_call, check_output
 from subprocess import CalledProcessError
-from argparse import ArgumentParser
 
 # NOTE: If raid_types changes, also change it in block_device_resource script!
 raid_types = ["megaraid", "cciss", "3ware", "areca"]
@@ -344,7 +346,8 @@ def poll_for_status(args, disk, raid_element, raid_type, previous_entries):
     others show a status line at the END of the list of tests
     (and then move it to the top once the tests are done).
     :param args:
-        Script's command-line arguments
+        Script's command-line arguments, args.timeout applies to this
+        call only
     :param disk:
         Disk device (e.g., /dev/sda)
     :param raid_element:
@@ -360,6 +363,8 @@ def poll_for_status(args, disk, raid_element, raid_type, previous_entries):
     # immediate after it beginsAccording to.
     logging.debug("Polling SMART selftest log for status")
     keep_going = True
+    # Count down a copy, every disk and RAID element gets the full timeout
+    timeout = args.timeout
 
     while keep_going:
         # Poll every sleep seconds until test is complete
@@ -376,12 +381,12 @@ def poll_for_status(args, disk, raid_element, raid_type, previous_entries):
                 )
                 keep_going = False
 
-        if args.timeout is not None:
-            if args.timeout <= 0:
+        if timeout is not None:
+            if timeout <= 0:
                 logging.debug("Polling timed out")
                 return "Polling timed out", 1
             else:
-                args.timeout -= args.sleep
+                timeout -= args.sleep
 
     if isinstance(current_entries[0], str):
         return current_entries[0], returncode
@@ -472,6 +477,215 @@ def run_smart_test(args, disk, raid_element, raid_type):
         return True
 
 
+def describe_target(disk, raid_element, raid_type):
+    if raid_type == "none":
+        return disk
+    return "{}, element {}".format(disk, raid_element)
+
+
+def smart_available(disk):
+    """Check if smartctl reports SMART support for a disk (or RAID array).
+
+    See also smart_support() in block_device_resource script.
+    :param disk:
+        disk device filename (e.g., /dev/sda)
+    :returns:
+        True if SMART is available, False otherwise
+    """
+    try:
+        diskinfo = check_output(
+            ["smartctl", "-i", disk], universal_newlines=True
+        ).splitlines()
+    except CalledProcessError as err:
+        diskinfo = (err.output or "").splitlines()
+    for line in diskinfo:
+        if "SMART support is" in line and "Available" in line:
+            return True
+        if any("-d {},N".format(type) in line for type in raid_types):
+            return True
+    return False
+
+
+def find_smart_disks(sys_block="/sys/block"):
+    """Find all the disks that report SMART support.
+
+    :param sys_block:
+        Path to the sysfs directory listing block devices
+    :returns:
+        Sorted list of disk device filenames (e.g., ["/dev/sda"])
+    """
+    disks = []
+    for path in sorted(Path(sys_block).glob("*/device")):
+        disk = "/dev/{}".format(path.parent.name)
+        if smart_available(disk):
+            disks.append(disk)
+        else:
+            logging.debug("SMART is not available on {}".format(disk))
+    return disks
+
+
+class SmartTestTarget:
+    """State of the SMART self-test running on one disk or RAID element."""
+
+    def __init__(self, disk, raid_element, raid_type):
+        self.disk = disk
+        self.raid_element = raid_element
+        self.raid_type = raid_type
+        self.previous_entries = []
+        self.deadline = None
+        self.started = None
+        self.elapsed = None
+        self.status = "Not started"
+        self.returncode = None
+
+    @property
+    def name(self):
+        return describe_target(self.disk, self.raid_element, self.raid_type)
+
+    def get_entries(self, verbose=False):
+        return get_smart_entries(
+            self.disk, self.raid_element, self.raid_type, verbose
+        )
+
+    def start(self, timeout=None):
+        """Record the current log and start the self-test.
+
+        :param timeout:
+            Number of seconds after which polling this target gives up
+        :returns:
+            True if the test was started, False otherwise
+        """
+        self.previous_entries, output, returncode = self.get_entries()
+        logging.info("Starting SMART self-test on {}".format(self.name))
+        if initiate_smart_test(self.disk, self.raid_element, self.raid_type):
+            logging.error(
+                "Error reported during smartctl test on {}".format(self.name)
+            )
+            self.status = "Error reported during smartctl test"
+            self.returncode = 1
+            return False
+        if len(self.previous_entries) > 20:
+            # See run_smart_test() for the reason behind the restart
+            logging.debug(
+                "Log of {} is 20+ entries long. Restarting test to add an"
+                " abort message to make the log diff easier".format(self.name)
+            )
+            initiate_smart_test(self.disk, self.raid_element, self.raid_type)
+            self.previous_entries, output, returncode = self.get_entries()
+        self.started = time.monotonic()
+        if timeout is not None:
+            self.deadline = self.started + timeout
+        return True
+
+    def poll(self):
+        """Check the self-test log once.
+
+        :returns:
+            True if the test is over (finished or timed out), False otherwise
+        """
+        current_entries, output, returncode = self.get_entries()
+        now = time.monotonic()
+        if current_entries != self.previous_entries and not in_progress(
+            current_entries
+        ):
+            if isinstance(current_entries[0], str):
+                self.status = current_entries[0]
+            else:
+                self.status = current_entries[0]["status"]
+            self.returncode = returncode
+        elif self.deadline is not None and now >= self.deadline:
+            logging.debug("Polling {} timed out".format(self.name))
+            self.status = "Polling timed out"
+            self.returncode = 1
+        else:
+            return False
+        self.elapsed = now - self.started
+        return True
+
+
+def run_smart_tests_concurrently(args, targets):
+    """Run SMART self-tests on several disks or RAID elements at once.
+
+    All the self-tests are started first, then a single scheduler polls
+    every device still running a test each ``args.sleep`` seconds (the
+    smartctl calls of one round run in parallel). Each device has its own
+    ``args.timeout``.
+    :param args:
+        Command-line arguments passed to script
+    :param targets:
+        List of SmartTestTarget to test
+    :returns:
+        True if the self-test passed on all targets, False otherwise
+    """
+    pending = [target for target in targets if target.start(args.timeout)]
+    max_workers = max(1, min(len(pending), args.max_parallel))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending:
+            time.sleep(args.sleep)
+            done = list(executor.map(SmartTestTarget.poll, pending))
+            for target, finished in zip(pending, done):
+                if finished:
+                    logging.debug(
+                        "{}: {} after {:.0f}s".format(
+                            target.name, target.status, target.elapsed
+                        )
+                    )
+            pending = [t for t, finished in zip(pending, done) if not finished]
+
+    success = True
+    for target in targets:
+        if target.returncode != 0:
+            success = False
+            log, output, returncode = target.get_entries(True)
+            logging.error(
+                "FAIL: SMART Self-Test on {} appears to have failed "
+                "for some reason.".format(target.name)
+            )
+            logging.error("\tLast smartctl return code: %d", returncode)
+            logging.error("\tLast smartctl run status: %s", target.status)
+            logging.error("\n%s", output)
+        else:
+            logging.info(
+                "PASS: SMART Self-Test on {} completed without error".format(
+                    target.name
+                )
+            )
+    logging.info("Summary:")
+    for target in targets:
+        logging.info(
+            "{:<30} {:<4} {} ({})".format(
+                target.name,
+                "PASS" if target.returncode == 0 else "FAIL",
+                target.status,
+                (
+                    "{:.0f}s".format(target.elapsed)
+                    if target.elapsed is not None
+                    else "n/a"
+                ),
+            )
+        )
+    return success
+
+
+def run_disk_smart_tests(args, disk):
+    """Run SMART self-tests on a disk, one RAID element after another."""
+    num_disks, raid_type = count_raid_disks(disk)
+    if num_disks == 0:
+        success = enable_smart(disk, -1, raid_type)
+        success = success and run_smart_test(args, disk, -1, raid_type)
+    else:
+        success = True
+        for raid_element in range(0, num_disks):
+            if enable_smart(disk, raid_element, raid_type):
+                success = (
+                    run_smart_test(args, disk, raid_element, raid_type)
+                    and success
+                )
+            else:
+                success = False
+    return success
+
+
 def main():
     """Test SMART capabilities on disks that support SMART functions."""
     description = (
@@ -482,8 +696,35 @@ def main():
         "-b",
         "--block-dev",
         metavar="DISK",
-        default="/dev/sda",
-        help=("the DISK to run this test against " "[default: %(default)s]"),
+        nargs="+",
+        default=["/dev/sda"],
+        help=(
+            "the DISK(s) to run this test against " "[default: %(default)s]"
+        ),
+    )
+    parser.add_argument(
+        "-a",
+        "--all-disks",
+        action="store_true",
+        help="test all the disks reporting SMART support",
+    )
+    parser.add_argument(
+        "-p",
+        "--parallel",
+        action="store_true",
+        help=(
+            "run the self-tests of all disks and RAID elements at once "
+            "instead of one after another"
+        ),
+    )
+    parser.add_argument(
+        "--max-parallel",
+        type=int,
+        default=16,
+        help=(
+            "maximum number of smartctl processes polling at the same time "
+            "in parallel mode [default: %(default)s]"
+        ),
     )
     parser.add_argument(
         "-d",
@@ -526,21 +767,31 @@ def main():
     if not os.geteuid() == 0:
         parser.error("You must be root to run this program")
 
-    disk = args.block_dev
-    num_disks, raid_type = count_raid_disks(disk)
-    if num_disks == 0:
-        success = enable_smart(disk, -1, raid_type)
-        success = success and run_smart_test(args, disk, -1, raid_type)
+    if args.all_disks:
+        disks = find_smart_disks()
+        if not disks:
+            logging.error("No disk with SMART support found")
+            return 1
     else:
+        disks = args.block_dev
+
+    if args.parallel:
         success = True
-        for raid_element in range(0, num_disks):
-            if enable_smart(disk, raid_element, raid_type):
-                success = (
-                    run_smart_test(args, disk, raid_element, raid_type)
-                    and success
-                )
-            else:
-                success = False
+        targets = []
+        for disk in disks:
+            num_disks, raid_type = count_raid_disks(disk)
+            for raid_element in range(0, num_disks) if num_disks else [-1]:
+                if enable_smart(disk, raid_element, raid_type):
+                    targets.append(
+                        SmartTestTarget(disk, raid_element, raid_type)
+                    )
+                else:
+                    success = False
+        success = run_smart_tests_concurrently(args, targets) and success
+    else:
+        success = True
+        for disk in disks:
+            success = run_disk_smart_tests(args, disk) and success
     if success is False:
         return 1
     else:
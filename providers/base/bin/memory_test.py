@@ -3,10 +3,94 @@
 import os
 import sys
 import re
+import resource
+import selectors
+import shutil
 
 from argparse import ArgumentParser
 from subprocess import Popen, PIPE
 
+NUMA_SYSFS = "/sys/devices/system/node"
+
+
+def parse_cpu_list(text):
+    """Parse a sysfs CPU list such as "0-3,8" into a list of CPU numbers"""
+    cpus = []
+    for chunk in text.strip().split(","):
+        if not chunk:
+            continue
+        first, _, last = chunk.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+class NumaNode:
+    def __init__(self, node_id, cpus, total_memory, free_memory):
+        self.node_id = node_id
+        self.cpus = cpus
+        # MB
+        self.total_memory = total_memory
+        self.free_memory = free_memory
+        self.workers = []
+
+    @property
+    def errors(self):
+        return sum(worker.errors for worker in self.workers)
+
+    @property
+    def loops_per_second(self):
+        return sum(worker.loops_per_second or 0 for worker in self.workers)
+
+
+def get_numa_nodes(sysfs=NUMA_SYSFS):
+    """Get the NUMA nodes that have memory, sorted by node number"""
+    nodes = []
+    try:
+        names = os.listdir(sysfs)
+    except OSError:
+        return nodes
+    for name in names:
+        match = re.match(r"node(\d+)$", name)
+        if not match:
+            continue
+        meminfo = {}
+        try:
+            with open(os.path.join(sysfs, name, "meminfo")) as stream:
+                for line in stream:
+                    # Node 0 MemFree:         4241416 kB
+                    tokens = line.split()
+                    if len(tokens) >= 4:
+                        meminfo[tokens[2].rstrip(":")] = int(tokens[3]) // 1024
+            with open(os.path.join(sysfs, name, "cpulist")) as stream:
+                cpus = parse_cpu_list(stream.read())
+        except (OSError, ValueError) as e:
+            print("ERROR: Unable to read %s: %s" % (name, e), file=sys.stderr)
+            continue
+        if not meminfo.get("MemTotal"):
+            # CPU-only node
+            continue
+        nodes.append(
+            NumaNode(
+                int(match.group(1)),
+                cpus,
+                meminfo["MemTotal"],
+                meminfo.get("MemFree", 0) + meminfo.get("FilePages", 0),
+            )
+        )
+    nodes.sort(key=lambda node: node.node_id)
+    return nodes
+
+
+class Worker:
+    """A threaded_memtest process"""
+
+    def __init__(self, name, proc, node=None):
+        self.name = name
+        self.proc = proc
+        self.node = node
+        self.errors = 0
+        self.loops_per_second = None
+
 
 class MemoryTest:
 
@@ -92,7 +176,7 @@ class MemoryTest:
             return False
         return True
 
-    def run(self):
+    def run(self, numa=False, run_time=60):
         PASSED = 0
         FAILED = 1
 
@@ -100,8 +184,15 @@ class MemoryTest:
         if not limits:
             return FAILED
 
+        nodes = get_numa_nodes() if numa else []
+        if numa and not nodes:
+            print("No NUMA node with memory found")
+        if nodes:
+            print("Running NUMA Memory Test")
+            if not self.run_numa_test(nodes, run_time):
+                return FAILED
         # if process memory is limited, run multiple processes
-        if self.is_process_limited:
+        elif self.is_process_limited:
             print("Running Multiple Process Memory Test")
             if not self.run_multiple_process_test():
                 return FAILED
@@ -209,37 +300,178 @@ class MemoryTest:
         return process.returncode == 0
 
     def run_processes(self, number, command):
-        passed = True
-        pipe = []
+        workers = []
         for i in range(number):
-            pipe.append(self._command(command))
-            print("Started: process %u pid %u: %s" % (i, pipe[i].pid, command))
+            proc = self._command(command)
+            print("Started: process %u pid %u: %s" % (i, proc.pid, command))
+            workers.append(Worker("process %u pid %u" % (i, proc.pid), proc))
         sys.stdout.flush()
-        waiting = True
-        while waiting:
-            waiting = False
-            for i in range(number):
-                if pipe[i]:
-                    line = pipe[i].communicate()[0]
-                    if line and len(line) > 1:
-                        print("process %u pid %u: %s" % (i, pipe[i].pid, line))
-                        sys.stdout.flush()
-                    if pipe[i].poll() == -1:
-                        waiting = True
-                    else:
-                        return_value = pipe[i].poll()
-                        if return_value != 0:
-                            print(
-                                "ERROR: process  %u pid %u retuned %u"
-                                % (i, pipe[i].pid, return_value),
-                                file=sys.stderr,
-                            )
-                            passed = False
-                        print(
-                            "process %u pid %u returned success"
-                            % (i, pipe[i].pid)
-                        )
-                        pipe[i] = None
+        self.collect_output(workers)
+        return self.check_workers(workers)
+
+    def get_process_limit(self):
+        """Get the most memory (MB) a single process can test"""
+        limit = self.process_memory if self.is_process_limited else None
+        soft, _ = resource.getrlimit(resource.RLIMIT_AS)
+        if soft != resource.RLIM_INFINITY:
+            # leave room for the program itself and the thread stacks
+            rlimit = max(soft // (1024 * 1024) - 256, 64)
+            limit = min(limit, rlimit) if limit else rlimit
+        return limit
+
+    def run_numa_test(self, nodes, run_time):
+        """Test the memory of every NUMA node concurrently"""
+        numactl = shutil.which("numactl")
+        limit = self.get_process_limit()
+        workers = []
+        for node in nodes:
+            if not node.cpus and not numactl:
+                print(
+                    "Skipping node %u: it has no CPU and numactl is missing"
+                    % node.node_id
+                )
+                continue
+            # split the free memory of the node between enough processes
+            # to respect the per-process limit
+            count = 1
+            if limit:
+                count = max(1, -(-node.free_memory // limit))
+            memory = node.free_memory // count
+            threads = max(1, 2 * len(node.cpus) // count)
+            print(
+                "Node %u: %u MB free of %u MB, CPUs %s, %u process(es) of "
+                "%u MB"
+                % (
+                    node.node_id,
+                    node.free_memory,
+                    node.total_memory,
+                    ",".join(str(cpu) for cpu in node.cpus) or "none",
+                    count,
+                    memory,
+                )
+            )
+            command = [
+                self.threaded_memtest_script,
+                "-qv",
+                "-m%um" % memory,
+                "-t%u" % run_time,
+                "-n%u" % threads,
+            ]
+            preexec_fn = None
+            if numactl:
+                bind = ["--membind=%u" % node.node_id]
+                if node.cpus:
+                    bind.append("--cpunodebind=%u" % node.node_id)
+                command = [numactl] + bind + command
+            else:
+                # without a memory policy, the memory of the node is used by
+                # allocating it from its CPUs
+
+                def preexec_fn(cpus=node.cpus):
+                    os.sched_setaffinity(0, cpus)
+
+            for i in range(count):
+                proc = Popen(
+                    command, stdout=PIPE, stderr=PIPE, preexec_fn=preexec_fn
+                )
+                worker = Worker(
+                    "node %u worker %u pid %u" % (node.node_id, i, proc.pid),
+                    proc,
+                    node,
+                )
+                node.workers.append(worker)
+                workers.append(worker)
+                print("Started: %s: %s" % (worker.name, " ".join(command)))
+        sys.stdout.flush()
+        if not workers:
+            print("ERROR: no NUMA node could be tested", file=sys.stderr)
+            return False
+        self.collect_output(workers)
+        passed = self.check_workers(workers)
+        print("NUMA test summary:")
+        for node in nodes:
+            if not node.workers:
+                continue
+            print(
+                "Node %u: %u process(es), %.2f loops per second, %u error(s)"
+                % (
+                    node.node_id,
+                    len(node.workers),
+                    node.loops_per_second,
+                    node.errors,
+                )
+            )
+        sys.stdout.flush()
+        return passed
+
+    def collect_output(self, workers):
+        """Report the output of all the workers as it comes, until they exit"""
+        selector = selectors.DefaultSelector()
+        for worker in workers:
+            selector.register(worker.proc.stdout, selectors.EVENT_READ, worker)
+            selector.register(worker.proc.stderr, selectors.EVENT_READ, worker)
+        partial_lines = {}
+        while selector.get_map():
+            for key, _ in selector.select():
+                data = os.read(key.fd, 65536)
+                if not data:
+                    selector.unregister(key.fileobj)
+                    line = partial_lines.pop(key.fd, b"")
+                    if line:
+                        self.handle_line(key.data, line)
+                    continue
+                lines = (partial_lines.pop(key.fd, b"") + data).split(b"\n")
+                partial_lines[key.fd] = lines.pop()
+                for line in lines:
+                    self.handle_line(key.data, line)
+        selector.close()
+        for worker in workers:
+            worker.proc.wait()
+            worker.proc.stdout.close()
+            worker.proc.stderr.close()
+
+    def handle_line(self, worker, line):
+        line = line.decode("utf-8", "replace").strip()
+        if not line:
+            return
+        print("%s: %s" % (worker.name, line))
+        if "MEMORY CORRUPTION DETECTED" in line:
+            worker.errors += 1
+            if worker.node:
+                print(
+                    "ERROR: node %u: %u memory corruption(s) so far"
+                    % (worker.node.node_id, worker.node.errors),
+                    file=sys.stderr,
+                )
+        match = re.match(r"Total loops per second: ([\d.]+)", line)
+        if match:
+            worker.loops_per_second = float(match.group(1))
+            if worker.node:
+                print(
+                    "Node %u: %.2f loops per second so far"
+                    % (worker.node.node_id, worker.node.loops_per_second)
+                )
+        sys.stdout.flush()
+
+    def check_workers(self, workers):
+        passed = True
+        for worker in workers:
+            if worker.proc.returncode != 0:
+                print(
+                    "ERROR: %s returned %d"
+                    % (worker.name, worker.proc.returncode),
+                    file=sys.stderr,
+                )
+                passed = False
+            elif worker.errors:
+                print(
+                    "ERROR: %s detected %u memory corruption(s)"
+                    % (worker.name, worker.errors),
+                    file=sys.stderr,
+                )
+                passed = False
+            else:
+                print("%s returned success" % worker.name)
         sys.stdout.flush()
         return passed
 
@@ -249,6 +481,17 @@ def main(args):
     parser.add_argument(
         "-q", "--quiet", action="store_true", help="Suppress output."
     )
+    parser.add_argument(
+        "--numa",
+        action="store_true",
+        help="Test the memory of all the NUMA nodes concurrently.",
+    )
+    parser.add_argument(
+        "--runtime",
+        type=int,
+        default=60,
+        help="Duration of the NUMA test in seconds (default: %(default)s).",
+    )
     args = parser.parse_args(args)
 
     if args.quiet:
@@ -256,7 +499,7 @@ def main(args):
         sys.stderr = open(os.devnull, "a")
 
     test = MemoryTest()
-    return test.run()
+    return test.run(numa=args.numa, run_time=args.runtime)
 
 
 if __name__ == "__main__":
@@ -24,6 +24,7 @@ from argparse import ArgumentParser, RawTextHelpFormatter
 import datetime
 import fcntl
 import ipaddress
+import json
 import logging
 import math
 import os
@@ -51,6 +52,205 @@ import time
 results = []
 
 
+def iperf3_json_option():
+    """Return the iperf3 option that makes it print machine-readable output.
+
+    iperf3 3.17 and newer can stream one JSON object per line while the test
+    is running (--json-stream); older releases only print a single JSON
+    document once the test is over (--json)."""
+    try:
+        version = check_output(
+            ["iperf3", "--version"], universal_newlines=True, stderr=STDOUT
+        )
+    except (OSError, CalledProcessError):
+        return "--json"
+    match = re.search(r"iperf (\d+)\.(\d+)", version)
+    if match and tuple(map(int, match.groups())) >= (3, 17):
+        return "--json-stream"
+    return "--json"
+
+
+class IPerf3Result:
+    """Structured result of a single iperf3 client process.
+
+    Lines printed by ``iperf3 --json-stream`` (one event per line) or by
+    ``iperf3 --json`` (one document spread over many lines) are passed to
+    feed(); finish() must be called once the process has exited."""
+
+    def __init__(self, port_num=None, core=None):
+        self.port_num = port_num
+        self.core = core
+        self.intervals = []
+        self.error = None
+        self._summary = {}
+        self._document = []
+
+    def feed(self, line):
+        """Process one line of output.
+
+        Return the interval sample it contained, if any."""
+        if not self._document:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                event = None
+            if isinstance(event, dict) and "event" in event:
+                return self._handle_event(event["event"], event.get("data"))
+        if line.strip():
+            self._document.append(line)
+
+    def finish(self):
+        """Process the --json document collected by feed(), if any."""
+        if not self._document:
+            return
+        text = "".join(self._document)
+        self._document = []
+        try:
+            document = json.loads(text)
+        except ValueError:
+            self.error = self.error or text.strip()
+            return
+        for interval in document.get("intervals", []):
+            self._handle_event("interval", interval)
+        self._handle_event("end", document.get("end"))
+        if document.get("error"):
+            self._handle_event("error", document["error"])
+
+    def _handle_event(self, name, data):
+        if name == "interval":
+            total = data.get("sum", {})
+            if total.get("omitted"):
+                return None
+            sample = {
+                "start": total.get("start", 0.0),
+                "end": total.get("end", 0.0),
+                "throughput": total.get("bits_per_second", 0.0) / 1e6,
+                "retransmits": total.get("retransmits", 0),
+            }
+            self.intervals.append(sample)
+            return sample
+        if name == "end" and data:
+            # TCP tests report what was sent and what was received, UDP tests
+            # only have a single "sum" entry
+            received = data.get("sum_received", data.get("sum", {}))
+            sent = data.get("sum_sent", {})
+            if "bits_per_second" in received:
+                self._summary["throughput"] = received["bits_per_second"] / 1e6
+            if "retransmits" in sent:
+                self._summary["retransmits"] = sent["retransmits"]
+            cpu = data.get("cpu_utilization_percent", {})
+            if "host_total" in cpu:
+                self._summary["cpu"] = cpu["host_total"]
+        elif name == "error":
+            self.error = data
+        return None
+
+    @property
+    def throughput(self):
+        """Throughput in Mb/s, from the final summary if iperf3 could print
+        one, averaged from the interval samples otherwise."""
+        if "throughput" in self._summary:
+            return self._summary["throughput"]
+        if self.intervals:
+            return sum(i["throughput"] for i in self.intervals) / len(
+                self.intervals
+            )
+        return 0.0
+
+    @property
+    def retransmits(self):
+        if "retransmits" in self._summary:
+            return self._summary["retransmits"]
+        return sum(i["retransmits"] for i in self.intervals)
+
+    @property
+    def cpu(self):
+        """Total CPU load of the local host, or None if not reported."""
+        return self._summary.get("cpu")
+
+    def as_dict(self):
+        return {
+            "port": self.port_num,
+            "core": self.core,
+            "throughput": self.throughput,
+            "retransmits": self.retransmits,
+            "cpu": self.cpu,
+            "error": self.error,
+            "intervals": self.intervals,
+        }
+
+
+def aggregate_iperf3_results(streams):
+    """Combine the results of iperf3 clients that ran in parallel.
+
+    Interval samples are lined up by their position in each stream and
+    summed, so the "intervals" entry shows the aggregate throughput and
+    retransmits the interface saw every second of the test."""
+    intervals = []
+    for stream in streams:
+        for index, sample in enumerate(stream.intervals):
+            if index == len(intervals):
+                intervals.append(
+                    {
+                        "start": sample["start"],
+                        "end": sample["end"],
+                        "throughput": 0.0,
+                        "retransmits": 0,
+                        "streams": 0,
+                    }
+                )
+            total = intervals[index]
+            total["throughput"] += sample["throughput"]
+            total["retransmits"] += sample["retransmits"]
+            total["streams"] += 1
+    cpu_loads = [stream.cpu for stream in streams if stream.cpu is not None]
+    return {
+        "streams": len(streams),
+        "throughput": sum(stream.throughput for stream in streams),
+        "retransmits": sum(stream.retransmits for stream in streams),
+        "cpu": sum(cpu_loads) / len(cpu_loads) if cpu_loads else 0.0,
+        "intervals": intervals,
+    }
+
+
+def wait_for_port(host, port, timeout=10):
+    """Wait until something accepts TCP connections on host:port."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with suppress(OSError), socket.create_connection((host, port), 1):
+            return True
+        time.sleep(0.1)
+    return False
+
+
+@contextmanager
+def iperf3_local_servers(ports, host="127.0.0.1"):
+    """Run one iperf3 server per port on the loopback interface.
+
+    This makes it possible to exercise the iperf3 client side of this script
+    without a test server on the network."""
+    servers = []
+    try:
+        for port in ports:
+            servers.append(
+                subprocess.Popen(
+                    ["iperf3", "-s", "-B", host, "-p", str(port)],
+                    stdout=DEVNULL,
+                    stderr=DEVNULL,
+                )
+            )
+            if not wait_for_port(host, port):
+                raise SystemExit(
+                    "iperf3 server did not start on port {}".format(port)
+                )
+        yield host
+    finally:
+        for server in servers:
+            server.terminate()
+        for server in servers:
+            server.wait()
+
+
 class IPerfPerformanceTest(object):
     """Measures performance of interface using iperf client
     and target. Calculated speed is measured against theorectical
@@ -85,6 +285,9 @@ class IPerfPerformanceTest(object):
         self.scan_timeout = scan_timeout
         self.iface_timeout = iface_timeout
         self.reverse = reverse
+        # Machine-readable record of every run (iperf3 only)
+        self.reports = []
+        self.optimization = []
 
     def run_one_thread(self, cmd, port_num):
         """Run a single test thread, storing the output in the global results[]
@@ -133,9 +336,79 @@ class IPerfPerformanceTest(object):
                 iperf_return = iperf_exception.output
         results.append(iperf_return)
 
+    def run_one_iperf3_thread(self, cmd, port_num, core=None):
+        """Run a single iperf3 client with JSON output, storing an
+        IPerf3Result in the global results[] variable."""
+        cmd = cmd + " -p {}".format(port_num)
+        logging.debug("Executing command {}".format(cmd))
+        logging.info("Connecting to port {} on server....".format(port_num))
+        result = IPerf3Result(port_num, core)
+        with subprocess.Popen(
+            shlex.split(cmd),
+            stdout=subprocess.PIPE,
+            stderr=DEVNULL,
+            universal_newlines=True,
+        ) as iperf:
+            for line in iperf.stdout:
+                sample = result.feed(line)
+                if sample:
+                    logging.debug(
+                        "Port {}: {:.1f}-{:.1f} sec {:.2f} Mb/s, "
+                        "{} retransmits".format(
+                            port_num,
+                            sample["start"],
+                            sample["end"],
+                            sample["throughput"],
+                            sample["retransmits"],
+                        )
+                    )
+        result.finish()
+        returncode = iperf.returncode
+        if returncode == 124:
+            # timeout command will return 124 if iperf timed out; iperf3
+            # still prints whatever it measured before being stopped
+            logging.warning("iperf timed out - this should be OK")
+        elif returncode or result.error:
+            if result.error and "unable to connect" in result.error:
+                logging.error(
+                    "Unable to connect to server on port {}".format(port_num)
+                )
+                if port_num == 5202:
+                    # 5202 is 2nd port in high-speed configs
+                    logging.warning("Your iperf3 server is not configured")
+                    logging.warning("for high-speed network testing. See")
+                    logging.warning("the Self-Test Guide's 'Network")
+                    logging.warning("Performance Tuning' appendix for")
+                    logging.warning("more information.")
+            else:
+                logging.error(
+                    "Failed executing iperf on port {}.".format(port_num)
+                )
+                logging.error("Error is '{}'".format(result.error))
+            return returncode or 1
+        results.append(result)
+
     def summarize_speeds(self):
         """Search the global results[] variable, computing the throughput for
         each thread and returning the total throughput for all threads."""
+        if self.iperf3:
+            for n, run in enumerate(results):
+                speeds = [i["throughput"] for i in run.intervals]
+                logging.debug(
+                    "Throughput for thread {} is {}".format(n, run.throughput)
+                )
+                if speeds:
+                    logging.debug(
+                        "Min Transfer speed for thread {}: {} Mb/s".format(
+                            n, min(speeds)
+                        )
+                    )
+                    logging.debug(
+                        "Max Transfer speed for thread {}: {} Mb/s".format(
+                            n, max(speeds)
+                        )
+                    )
+            return aggregate_iperf3_results(results)["throughput"]
         total_throughput = 0
         n = 0
         for run in results:
@@ -167,6 +440,13 @@ class IPerfPerformanceTest(object):
         """Return the average CPU load of all the threads, as reported by
         iperf3. (Version 2 of iperf does not return CPU loads, in which case
         this function returns 0.)"""
+        if self.iperf3:
+            for n, run in enumerate(results):
+                if run.cpu is not None:
+                    logging.debug(
+                        "CPU load for thread {}: {}%".format(n, run.cpu)
+                    )
+            return aggregate_iperf3_results(results)["cpu"]
         sum_cpu = 0.0
         avg_cpu = 0.0
         n = 0
@@ -269,7 +549,7 @@ class IPerfPerformanceTest(object):
         # for running iperf -- but only one; within that thread, iperf 2's
         # own multi-threading handles that detail.)
         if self.iperf3:
-            self.executable = "iperf3 -V"
+            self.executable = "iperf3 {}".format(iperf3_json_option())
             start_port = 5201
             iperf_threads = 1
             python_threads = threads
@@ -327,13 +607,19 @@ class IPerfPerformanceTest(object):
                 core = core_list[thread_num % len(core_list)]
                 full_cmd = cmd + " -A {}".format(core)
             else:
+                core = None
                 full_cmd = cmd
             port_num = start_port + thread_num
-            t.append(
-                threading.Thread(
+            if self.iperf3:
+                thread = threading.Thread(
+                    target=self.run_one_iperf3_thread,
+                    args=(full_cmd, port_num, core),
+                )
+            else:
+                thread = threading.Thread(
                     target=self.run_one_thread, args=(full_cmd, port_num)
                 )
-            )
+            t.append(thread)
             t[thread_num].start()
         for thread_num in range(0, python_threads):
             t[thread_num].join()
@@ -349,6 +635,15 @@ class IPerfPerformanceTest(object):
             percent = 0
             invalid_speed = True
         logging.info("Avg Transfer speed: {} Mb/s".format(throughput))
+        if self.iperf3:
+            summary = aggregate_iperf3_results(results)
+            logging.info("Retransmits: {}".format(summary["retransmits"]))
+            speeds = [i["throughput"] for i in summary["intervals"]]
+            if speeds:
+                logging.info(
+                    "Interval throughput: min {:.2f} Mb/s, "
+                    "max {:.2f} Mb/s".format(min(speeds), max(speeds))
+                )
         if invalid_speed:
             # If we have no link_speed (e.g. wireless interfaces don't
             # report this), then we shouldn't penalize them because
@@ -356,6 +651,7 @@ class IPerfPerformanceTest(object):
             # we'll exit with a pass-warning.
             logging.warning("Unable to obtain maximum speed.")
             logging.warning("Considering the test as passed.")
+            self.record_run(None, "pass")
             return 0
         # Below is guaranteed to not throw an exception because we'll
         # have exited above if it did.
@@ -395,9 +691,40 @@ class IPerfPerformanceTest(object):
                         self.cpu_load_fail_threshold
                     )
                 )
+            self.record_run(percent, "fail")
             return 30
 
         logging.debug("Passed benchmark against {}".format(self.target))
+        self.record_run(percent, "pass")
+
+    def record_run(self, percent, outcome):
+        """Keep a machine-readable summary of the last iperf3 run."""
+        if not self.iperf3:
+            return
+        summary = aggregate_iperf3_results(results)
+        summary.update(
+            {
+                "target": self.target,
+                "reverse": self.reverse,
+                "max_speed": self.iface.max_speed,
+                "percent": percent,
+                "outcome": outcome,
+                "threads": [run.as_dict() for run in results],
+            }
+        )
+        self.reports.append(summary)
+
+    def write_report(self, filename):
+        """Save the summaries of all the iperf3 runs as JSON."""
+        report = {
+            "interface": self.interface,
+            "fail_threshold": self.fail_threshold,
+            "cpu_load_fail_threshold": self.cpu_load_fail_threshold,
+            "optimization": self.optimization,
+            "runs": self.reports,
+        }
+        with open(filename, "w") as stream:
+            json.dump(report, stream, indent=2)
 
     def optimize_num_threads(self):
         """Find the approximate optimal number of threads."""
@@ -428,9 +755,14 @@ class IPerfPerformanceTest(object):
                     int(throughput), self.num_threads
                 )
             )
+            self.optimization.append(
+                {"threads": self.num_threads, "throughput": throughput}
+            )
             if throughput > max_throughput:
                 max_throughput = throughput
                 max_multiple = multiple
+        # the optimization runs are only kept as a summary
+        self.reports.clear()
         self.run_time = orig_run_time
         self.scan_timeout = orig_scan_timeout
         self.num_threads = int(max_multiple * orig_num_threads)
@@ -698,6 +1030,8 @@ def run_test(args, test_target):
             logging.info(" Test Run Number %s ".center(60, "-"), run_num)
             error_number = iperf_benchmark.run()
             logging.info("")
+        if vars(args).get("json_output") and args.iperf3:
+            iperf_benchmark.write_report(args.json_output)
     elif args.test_type.lower() == "stress":
         stress_benchmark = StressPerformanceTest(
             args.interface, test_target, args.iperf3
@@ -976,6 +1310,9 @@ def interface_test(args):
     if not ("test_type" in vars(args)):
         return
 
+    if vars(args).get("local_server"):
+        return local_server_test(args)
+
     # Get the actual test data from one of two possible sources
     test_parameters = get_test_parameters(args, os.environ)
 
@@ -1051,6 +1388,20 @@ def interface_test(args):
         return 3
 
 
+def local_server_test(args):
+    """Run the iperf3 test against servers started on the loopback interface.
+
+    This is meant for debugging this script, the interface under test is
+    always "lo" and there is no theoretical maximum speed to compare to."""
+    args.interface = "lo"
+    args.iperf3 = True
+    if args.num_threads == -1:
+        args.num_threads = 1
+    ports = range(5201, 5201 + args.num_threads)
+    with iperf3_local_servers(ports) as target:
+        return run_test(args, target)
+
+
 def interface_info(args):
 
     info_set = ""
@@ -1257,6 +1608,23 @@ TEST_TARGET_IPERF = iperf-server.example.com
         action="store_true",
         help="Do not turn of other interfaces while testing.",
     )
+    test_parser.add_argument(
+        "--json-output",
+        metavar="FILE",
+        help=(
+            "iperf3 test ONLY. Save per-run, per-thread and per-interval "
+            "results to FILE as JSON"
+        ),
+    )
+    test_parser.add_argument(
+        "--local-server",
+        default=False,
+        action="store_true",
+        help=(
+            "Start iperf3 servers on the loopback interface and test "
+            "against them (implies --iperf3, ignores --interface)"
+        ),
+    )
 
     # Sub info options
     info_parser.add_argument("-i", "--interface", type=str, required=True)
@@ -6,6 +6,8 @@ import difflib
 import logging
 from argparse import ArgumentParser
 
+from checkbox_support.parsers.cycle_log import CycleLogAnalyzer
+
 # Script return codes
 SUCCESS = 0
 NOT_MATCH = 1
@@ -24,9 +26,11 @@ def main():
 
     LoggingConfiguration.set(args.log_level, args.output_log_filename)
     parser = Parser(args.input_log_filename)
-    results = parser.parse()
+    success = parser.parse()
+    if args.cycle_summary:
+        parser.analyzer.write_summary(args.cycle_summary)
 
-    if not compare_results(results):
+    if not success:
         sys.exit(NOT_MATCH)
 
     sys.exit(SUCCESS)
@@ -35,6 +39,10 @@ def main():
 class Parser(object):
     """
     Reboot test log file parser
+
+    The log is parsed in a single pass: the results of each iteration are
+    compared to the ones of the first iteration (the baseline) as soon as
+    the iteration is complete, so only those two are kept in memory.
     """
 
     is_logging_line = re.compile(
@@ -50,121 +58,152 @@ class Parser(object):
     ).match
     is_test_complete_line = re.compile(r"test complete$").search
 
+    timestamp_pattern = (
+        r"^(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3})"
+    )
+    timestamp_format = "%Y-%m-%d %H:%M:%S,%f"
+
+    # States of the parser
+    OUTSIDE = "outside"
+    AWAITING_OUTPUT = "awaiting-output"
+    FIELDS = "fields"
+    FIELD_VALUE = "field-value"
+
     def __init__(self, filename):
         self.filename = filename
+        self.analyzer = CycleLogAnalyzer(
+            self.timestamp_pattern, self.timestamp_format
+        )
+        self.baseline = None
+        self.iterations = 0
+        self.success = True
 
     def parse(self):
         """
-        Parse log file and return results
-        """
-        with open(self.filename) as f:
-            results = self._parse_file(LineIterator(f))
-        return results
+        Parse log file and compare the results of every iteration
 
-    def _parse_file(self, iterator):
+        :returns:
+            True if all the iterations match the first one
         """
-        Parse all lines in iterator and return results
-        """
-        results = []
-        result = {}
-
-        for line in iterator:
-            if self.is_getting_info_line(line):
-                if result:
-                    # Add last result to list of results
-                    results.append(result)
-
-                # Initialize for a new iteration results
-                result = {}
-
-            match = self.is_executing_line(line)
-            if match:
-                command = match.group("command")
-                command_output = self._parse_command_output(iterator)
-
-                if command_output is not None:
-                    result[command] = command_output
-        else:
-            if result:
-                # Add last result to list of results
-                results.append(result)
-
-        if not self.is_test_complete_line(line):
+        # Nothing is compared (or logged) if the test didn't finish
+        if not self.is_finished():
             sys.stderr.write("Test didn't finish properly according to logs\n")
             sys.exit(NOT_FINISHED)
+        with open(self.filename) as f:
+            self._parse_file(f)
+        return self.success
 
-        return results
+    def is_finished(self):
+        """
+        Check that the last line of the log says that the test is complete
 
-    def _parse_command_output(self, iterator):
+        Only the end of the log is read.
         """
-        Parse one command output
+        with open(self.filename, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            chunk_size = 4096
+            while True:
+                start = max(size - chunk_size, 0)
+                f.seek(start)
+                lines = f.read(size - start).splitlines(True)
+                # The first line of the chunk may be incomplete
+                if start == 0 or len(lines) > 1:
+                    break
+                chunk_size *= 2
+        if not lines:
+            return False
+        last_line = lines[-1].decode("utf-8", "replace")
+        return bool(self.is_test_complete_line(last_line))
+
+    def _parse_file(self, lines):
         """
-        command_output = None
-
-        # Skip all lines until command output is found
-        for line in iterator:
-            if self.is_output_line(line):
-                command_output = {}
-                break
-            if self.is_executing_line(line) or self.is_getting_info_line(line):
-                # Skip commands with no output
-                iterator.unnext(line)
-                return None
-
-        # Parse command output message
-        for line in iterator:
+        Parse all lines and compare the results of each iteration
+        """
+        self._state = self.OUTSIDE
+        self._result = {}
+        self._command = None
+        self._command_output = None
+        self._field = None
+        self._value = []
+        for line in lines:
+            if self._state == self.FIELD_VALUE and not (
+                line[:1].isdigit() or line[:1] == "-"
+            ):
+                # Fast path for the field values: a line that starts with
+                # neither a digit or "-" can't be a logging or a field line
+                self._value.append(line)
+                self.analyzer.skip(line)
+                continue
+            self.analyzer.feed(line)
+            self._parse_line(line)
+        # End of the log: terminate what was being parsed
+        if self._state == self.FIELD_VALUE:
+            self._end_field()
+        if self._state in (self.FIELDS, self.FIELD_VALUE):
+            self._end_command()
+        self.analyzer.finish()
+        if self._result:
+            # Add last result to list of results
+            self._end_iteration()
+
+    def _parse_line(self, line):
+        if self._state == self.FIELD_VALUE:
+            # Accummulate as many lines as needed for the field value
+            if not (self.is_logging_line(line) or self.is_field_line(line)):
+                self._value.append(line)
+                return
+            self._end_field()
+        if self._state == self.FIELDS:
             match = self.is_field_line(line)
             if match:
-                field = match.group("field")
-                value = self._parse_command_output_field(iterator)
-                command_output[field] = value
-            # Exit when all command output fields
-            # have been gathered
-            else:
-                iterator.unnext(line)
-                break
-
-        return command_output
-
-    def _parse_command_output_field(self, iterator):
-        """
-        Parse one command output field
-        """
-        # Accummulate as many lines as needed
-        # for the field value
-        value = []
-        for line in iterator:
-            if self.is_logging_line(line) or self.is_field_line(line):
-                iterator.unnext(line)
-                break
-
-            value.append(line)
-
-        value = "".join(value)
-        return value
-
-
-class LineIterator:
-    """
-    Iterator wrapper to make it possible
-    to push back lines that shouldn't have been consumed
-    """
-
-    def __init__(self, iterator):
-        self.iterator = iterator
-        self.buffer = []
-
-    def __iter__(self):
-        return self
-
-    def __next__(self):
-        if self.buffer:
-            return self.buffer.pop()
-
-        return next(self.iterator)
-
-    def unnext(self, line):
-        self.buffer.append(line)
+                self._field = match.group("field")
+                self._value = []
+                self._state = self.FIELD_VALUE
+                return
+            # Exit when all command output fields have been gathered
+            self._end_command()
+        if self._state == self.AWAITING_OUTPUT:
+            # Skip all lines until command output is found
+            if self.is_output_line(line):
+                self._command_output = {}
+                self._state = self.FIELDS
+                return
+            if not (
+                self.is_executing_line(line) or self.is_getting_info_line(line)
+            ):
+                return
+            # Skip commands with no output
+            self._state = self.OUTSIDE
+        if self.is_getting_info_line(line):
+            if self._result:
+                self._end_iteration()
+            # Initialize for a new iteration results
+            self._result = {}
+            self.analyzer.start_cycle(self.iterations)
+        match = self.is_executing_line(line)
+        if match:
+            self._command = match.group("command")
+            self._state = self.AWAITING_OUTPUT
+
+    def _end_field(self):
+        self._command_output[self._field] = "".join(self._value)
+        self._state = self.FIELDS
+
+    def _end_command(self):
+        self._result[self._command] = self._command_output
+        self._state = self.OUTSIDE
+
+    def _end_iteration(self):
+        if self.baseline is None:
+            self.baseline = self._result
+        else:
+            mismatches = compare_result(
+                self.baseline, self._result, self.iterations
+            )
+            if mismatches:
+                self.success = False
+                self.analyzer.add_finding("mismatch", mismatches)
+        self.iterations += 1
 
 
 class LoggingConfiguration(object):
@@ -202,50 +241,61 @@ def compare_results(results):
 
     success = True
     for index, result in enumerate(results[1:]):
-        for command in baseline.keys():
-            baseline_output = baseline[command]
-            result_output = result[command]
-
-            error_messages = []
-            fields = set(baseline_output.keys()) | set(result_output.keys())
-            for field in fields:
-                baseline_field = baseline_output.get(field, "")
-                result_field = result_output.get(field, "")
-
-                if baseline_field != result_field:
-                    differ = difflib.Differ()
-
-                    message = [
-                        "** {field!r} field doesn't match:".format(field=field)
-                    ]
-                    comparison = differ.compare(
-                        baseline_field.splitlines(), result_field.splitlines()
-                    )
-                    message.extend(list(comparison))
-                    error_messages.append("\n".join(message))
-
-            if not error_messages:
-                logging.debug(
-                    "[Iteration {0}] {1}...\t[OK]".format(index + 1, command)
+        if compare_result(baseline, result, index + 1):
+            success = False
+    return success
+
+
+def compare_result(baseline, result, index):
+    """
+    Compare the result of an iteration to the baseline
+
+    :returns:
+        The number of commands whose output doesn't match
+    """
+    mismatches = 0
+    for command in baseline.keys():
+        baseline_output = baseline[command]
+        result_output = result.get(command, {})
+
+        error_messages = []
+        fields = sorted(
+            set(baseline_output.keys()) | set(result_output.keys())
+        )
+        for field in fields:
+            baseline_field = baseline_output.get(field, "")
+            result_field = result_output.get(field, "")
+
+            if baseline_field != result_field:
+                differ = difflib.Differ()
+
+                message = [
+                    "** {field!r} field doesn't match:".format(field=field)
+                ]
+                comparison = differ.compare(
+                    baseline_field.splitlines(), result_field.splitlines()
+                )
+                message.extend(list(comparison))
+                error_messages.append("\n".join(message))
+
+        if not error_messages:
+            logging.debug(
+                "[Iteration {0}] {1}...\t[OK]".format(index, command)
+            )
+        else:
+            mismatches += 1
+            if command.startswith("fwts"):
+                logging.error(
+                    "[Iteration {0}] {1}...\t[FAIL]".format(index, command)
                 )
             else:
-                success = False
-                if command.startswith("fwts"):
-                    logging.error(
-                        "[Iteration {0}] {1}...\t[FAIL]".format(
-                            index + 1, command
-                        )
-                    )
-                else:
-                    logging.error(
-                        "[Iteration {0}] {1}...\t[FAIL]\n".format(
-                            index + 1, command
-                        )
-                    )
-                    for message in error_messages:
-                        logging.error(message)
+                logging.error(
+                    "[Iteration {0}] {1}...\t[FAIL]\n".format(index, command)
+                )
+                for message in error_messages:
+                    logging.error(message)
 
-    return success
+    return mismatches
 
 
 def parse_args():
@@ -278,6 +328,14 @@ def parse_args():
             )
         ),
     )
+    parser.add_argument(
+        "--cycle-summary",
+        metavar="FILE",
+        help=(
+            "Write a JSON summary of the duration and of the mismatches "
+            "of each iteration to FILE"
+        ),
+    )
     args = parser.parse_args()
     args.log_level = getattr(logging, args.log_level.upper())
 
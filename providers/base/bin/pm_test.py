@@ -4,6 +4,7 @@ If you're debugging this program, set PM_TEST_DRY_RUN in your environment.
 It will make the script not run actual S3, S4, reboot and poweroff commands.
 """
 import gi
+import hashlib
 import json
 import logging
 import logging.handlers
@@ -18,7 +19,7 @@ from argparse import ArgumentParser, SUPPRESS
 from calendar import timegm
 from configparser import ConfigParser
 from datetime import datetime, timedelta
-from time import localtime, time
+from time import localtime, monotonic, time
 
 gi.require_version("Gtk", "3.0")
 from gi.repository import GObject, Gtk  # noqa: E402
@@ -55,8 +56,12 @@ def main():
     if dry_run:
         logging.info("Running in dry-run mode")
 
+    if args.fast_cycle:
+        operation_class = FastCycleOperation
+    else:
+        operation_class = PowerManagementOperation
     try:
-        operation = PowerManagementOperation(
+        operation = operation_class(
             args, extra_args, user=username, dry_run=dry_run
         )
         operation.setup()
@@ -77,6 +82,9 @@ def main():
         }
         with open(os.path.join(args.log_dir, "__result"), "wt") as f:
             json.dump(result, f)
+        if args.fast_cycle:
+            operation.respawn_checkbox()
+            return 0
         env = os.environ.copy()
         # remove following envvars
         for key in ["LD_LIBRARY_PATH", "PYTHONPATH", "PYTHONHOME"]:
@@ -149,11 +157,17 @@ class PowerManagementOperation:
                 self.args.suspends_before_reboot, self.args.fwts
             )
             self.run_pm_command()
-            if self.args.check_hardware_list:
-                self.check_hw_list()
+            self.check_after_pm_command()
         else:
             self.summary()
 
+    def check_after_pm_command(self):
+        """
+        Check the system once the power management command returned
+        """
+        if self.args.check_hardware_list:
+            self.check_hw_list()
+
     def run_pm_command(self):
         """
         Run power managment command and check result if needed
@@ -167,12 +181,17 @@ class PowerManagementOperation:
             self.args.total - self.args.repetitions,
             self.args.total,
         ).run()
+        self.execute_pm_command(self.SLEEP_TIME)
 
+    def execute_pm_command(self, sleep_time):
+        """
+        Run power management command and wait for it to happen
+        """
         # A small sleep time is added to reboot and poweroff
         # so that script has time to return a value
         # (useful when running it as an automated test)
         command_str = "sleep {0}; {1}".format(
-            self.SLEEP_TIME, self.args.pm_operation
+            sleep_time, self.args.pm_operation
         )
         if self.extra_args:
             command_str += " {0}".format(" ".join(self.extra_args))
@@ -282,6 +301,19 @@ class PowerManagementOperation:
         message = "{0} test complete".format(
             self.args.pm_operation.capitalize()
         )
+        self.check_suspend_count()
+
+        if self.args.silent:
+            logging.info(message)
+        else:
+            title = "{0} test".format(self.args.pm_operation.capitalize())
+            MessageDialog(title, message).run()
+        self.respawn_checkbox()
+
+    def check_suspend_count(self):
+        """
+        Check that all the suspend cycles happened, when there were some
+        """
         if self.args.suspends_before_reboot:
             total_suspends_expected = (
                 self.args.suspends_before_reboot * self.args.total
@@ -314,11 +346,10 @@ class PowerManagementOperation:
                 with open(result_filename, "wt") as result_f:
                     json.dump(result, result_f)
 
-        if self.args.silent:
-            logging.info(message)
-        else:
-            title = "{0} test".format(self.args.pm_operation.capitalize())
-            MessageDialog(title, message).run()
+    def respawn_checkbox(self):
+        """
+        Bring Checkbox back once the test is over
+        """
         if self.args.checkbox_respawn_cmd:
             try:
                 subprocess.run(
@@ -382,6 +413,314 @@ class PowerManagementOperation:
             raise TestFailed(message)
 
 
+BOOT_TIMESTAMPS = (
+    "FirmwareTimestampMonotonic",
+    "UserspaceTimestampMonotonic",
+    "FinishTimestampMonotonic",
+)
+
+CYCLE_STEPS = ("shutdown", "firmware", "kernel", "userspace", "ready")
+
+
+def get_sysfs_hw_list(sysfs="/sys"):
+    """
+    Get the PCI and USB devices found in sysfs, one line per device
+
+    This is what lspci and lsusb would list, without running them.
+    """
+    buses = (
+        ("pci", ("vendor", "device", "class")),
+        ("usb", ("idVendor", "idProduct")),
+    )
+    hw_list = []
+    for bus, attributes in buses:
+        devices_dir = os.path.join(sysfs, "bus", bus, "devices")
+        try:
+            devices = sorted(os.listdir(devices_dir))
+        except OSError:
+            continue
+        for device in devices:
+            values = []
+            for attribute in attributes:
+                filename = os.path.join(devices_dir, device, attribute)
+                try:
+                    with open(filename, "rt") as f:
+                        values.append(f.read().strip())
+                except OSError:
+                    # USB interfaces and hubs ports have no IDs
+                    break
+            else:
+                hw_list.append(
+                    "{} {} {}".format(bus, device, " ".join(values))
+                )
+    return "\n".join(hw_list)
+
+
+def get_hw_digest(hw_list):
+    return hashlib.sha256(hw_list.encode("utf-8")).hexdigest()
+
+
+def get_boot_timestamps():
+    """
+    Get the monotonic timestamps of the boot steps from systemd
+
+    The values are in microseconds. The firmware and loader ones count
+    backwards from the start of the kernel, 0 means unknown.
+    """
+    output = subprocess.check_output(
+        [
+            "systemctl",
+            "show",
+            "--property=" + ",".join(BOOT_TIMESTAMPS),
+        ],
+        universal_newlines=True,
+    )
+    timestamps = dict.fromkeys(BOOT_TIMESTAMPS, 0)
+    for line in output.splitlines():
+        key, _, value = line.partition("=")
+        if key in timestamps and value.isdigit():
+            timestamps[key] = int(value)
+    return timestamps
+
+
+def get_cycle_timings(command_time, boot_time, timestamps, ready):
+    """
+    Split the time spent in a power management cycle in steps
+
+    :param command_time:
+        Time when the power management command was run
+    :param boot_time:
+        Time when the kernel started
+    :param timestamps:
+        Boot timestamps as returned by get_boot_timestamps()
+    :param ready:
+        Monotonic time when the test was ready to go on
+
+    The steps are:
+
+    - shutdown: from the command to the start of the firmware (this
+      includes the time spent powered off for poweroff, and the firmware
+      when its start is not known)
+    - firmware: firmware and boot loader
+    - kernel: kernel and initrd
+    - userspace: from the start of init to the end of the boot
+    - ready: from the end of the boot to the test being ready to go on
+
+    Each step lasts a number of seconds, or None when unknown.
+    """
+    firmware = timestamps["FirmwareTimestampMonotonic"] / 1e6 or None
+    userspace_start = timestamps["UserspaceTimestampMonotonic"] / 1e6
+    finish = timestamps["FinishTimestampMonotonic"] / 1e6
+    timings = dict.fromkeys(CYCLE_STEPS)
+    if command_time:
+        timings["shutdown"] = boot_time - (firmware or 0) - command_time
+    timings["firmware"] = firmware
+    if userspace_start:
+        timings["kernel"] = userspace_start
+        if finish:
+            timings["userspace"] = finish - userspace_start
+    timings["ready"] = ready - max(finish, userspace_start)
+    return timings
+
+
+def format_timings(timings):
+    return ", ".join(
+        "{0}={1}".format(
+            step, "?" if timings[step] is None else "%.3f" % timings[step]
+        )
+        for step in CYCLE_STEPS
+    )
+
+
+class FastCycleOperation(PowerManagementOperation):
+    """
+    Power management operation looping in a minimal resident agent
+
+    Instead of logging in a desktop session to start again from an
+    autostart file after each cycle, this script is started as a system
+    service as soon as possible on boot. It keeps its progress in a state
+    file, checks the hardware list through sysfs and records how long each
+    step of the cycle took.
+
+    Checkbox is not started again when the cycles are done, as the service
+    runs outside of any user session. A failure is left in the __result
+    file of the log directory, which Checkbox reads when the session is
+    resumed (a remote Checkbox agent resumes it on boot, otherwise Checkbox
+    has to be started again by hand).
+    """
+
+    def __init__(self, args, extra_args, user=None, dry_run=False):
+        super().__init__(args, extra_args, user, dry_run)
+        self.hw_list_start = os.path.join(
+            self.args.log_dir, "hardware.sysfs.at_start"
+        )
+        self.state_filename = os.path.join(
+            self.args.log_dir, "pm_test.fast_cycle.json"
+        )
+        self.timings_filename = "{0}.timings.jsonl".format(
+            os.path.splitext(self.args.log_filename)[0]
+        )
+        self.service = FastCycleService(self.args, user=self.user)
+        self.state = {}
+        # Time when the kernel started
+        self.boot_time = time() - monotonic()
+
+    def setup(self):
+        """
+        Create or load the state of the test
+        """
+        if self.args.append:
+            with open(self.state_filename, "rt") as f:
+                self.state = json.load(f)
+            self.args.repetitions = self.state["repetitions"]
+            return
+
+        # First cycle, started from Checkbox
+        self.state = {"repetitions": self.args.repetitions}
+        if self.args.check_hardware_list:
+            if not os.path.exists(self.hw_list_start):
+                with open(self.hw_list_start, "wt") as f:
+                    f.write(get_sysfs_hw_list())
+            with open(self.hw_list_start, "rt") as f:
+                self.state["hw_digest"] = get_hw_digest(f.read())
+        if os.path.exists(self.timings_filename):
+            os.remove(self.timings_filename)
+        self.save_state()
+        self.service.enable()
+
+    def save_state(self):
+        new_filename = self.state_filename + ".new"
+        with open(new_filename, "wt") as f:
+            json.dump(self.state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(new_filename, self.state_filename)
+
+    def run(self):
+        """
+        Check the last cycle and start the next one
+        """
+        if self.state.get("command_time"):
+            self.wait_for_boot()
+            self.record_timings()
+            if self.args.check_hardware_list:
+                self.check_hw_list()
+        super().run()
+
+    def wait_for_boot(self):
+        """
+        Wait for the boot to be finished, like the desktop session would
+        """
+        try:
+            subprocess.run(
+                ["systemctl", "is-system-running", "--wait"],
+                stdout=subprocess.DEVNULL,
+                timeout=self.args.max_pm_time,
+            )
+        except subprocess.TimeoutExpired:
+            logging.warning(
+                "Boot not finished after %ss", self.args.max_pm_time
+            )
+
+    def check_after_pm_command(self):
+        """
+        Nothing to check: the system is going down, the hardware list is
+        checked once it booted again, in run()
+        """
+
+    def record_timings(self):
+        ready = monotonic()
+        try:
+            timestamps = get_boot_timestamps()
+        except (OSError, subprocess.CalledProcessError) as exc:
+            logging.warning("Unable to get boot timestamps: %s", exc)
+            timestamps = dict.fromkeys(BOOT_TIMESTAMPS, 0)
+        timings = get_cycle_timings(
+            self.state["command_time"], self.boot_time, timestamps, ready
+        )
+        timings["cycle"] = self.args.total - self.args.repetitions
+        logging.info(
+            "Cycle {0} timings: {1}".format(
+                timings["cycle"], format_timings(timings)
+            )
+        )
+        with open(self.timings_filename, "at") as f:
+            f.write(json.dumps(timings) + "\n")
+
+    def run_pm_command(self):
+        """
+        Save the progress and run power managment command
+        """
+        # Only the first cycle is run by Checkbox, which waits for a result
+        sleep_time = 0 if self.args.append else self.SLEEP_TIME
+        self.state["repetitions"] = self.args.repetitions - 1
+        self.state["command_time"] = time() + sleep_time
+        self.save_state()
+        self.execute_pm_command(sleep_time)
+
+    def summary(self):
+        """
+        Log the timings of the cycles and bring Checkbox back
+        """
+        self.teardown()
+        self.log_timings_summary()
+        self.check_suspend_count()
+        logging.info(
+            "{0} test complete".format(self.args.pm_operation.capitalize())
+        )
+        self.respawn_checkbox()
+
+    def respawn_checkbox(self):
+        """
+        Don't start Checkbox, see the class documentation
+        """
+        logging.info(
+            "Start Checkbox again to resume the session, unless it runs as "
+            "a service"
+        )
+
+    def log_timings_summary(self):
+        steps = {step: [] for step in CYCLE_STEPS}
+        try:
+            with open(self.timings_filename, "rt") as f:
+                for line in f:
+                    timings = json.loads(line)
+                    for step, values in steps.items():
+                        if timings.get(step) is not None:
+                            values.append(timings[step])
+        except FileNotFoundError:
+            return
+        message = ["Cycle timings in seconds (minimum/average/maximum):"]
+        for step, values in steps.items():
+            if values:
+                message.append(
+                    "- {0}: {1:.3f}/{2:.3f}/{3:.3f}".format(
+                        step,
+                        min(values),
+                        sum(values) / len(values),
+                        max(values),
+                    )
+                )
+        logging.info("\n".join(message))
+
+    def teardown(self):
+        """
+        Don't start the test again on next boot
+        """
+        self.service.disable()
+        if os.path.exists(self.state_filename):
+            os.remove(self.state_filename)
+
+    def get_hw_list(self):
+        return get_sysfs_hw_list()
+
+    def check_hw_list(self):
+        hw_list = self.get_hw_list()
+        if get_hw_digest(hw_list) != self.state.get("hw_digest"):
+            # Only look for the differences when there are some
+            super().check_hw_list()
+
+
 class TestCancelled(Exception):
     RETURN_CODE = 1
     MESSAGE = "{0} test cancelled by user"
@@ -958,6 +1297,81 @@ Hidden=false
             os.remove(self.desktop_filename)
 
 
+class FastCycleService:
+    """
+    Generate a systemd service running the test on boot and enable it
+    """
+
+    UNIT_DIRECTORY = "/etc/systemd/system"
+    UNIT_NAME = "checkbox-pm-test.service"
+    TEMPLATE = """
+[Unit]
+Description={pm_operation} test
+After=local-fs.target
+
+[Service]
+Type=simple
+Environment=NORMAL_USER={user}
+ExecStart={script} --fast-cycle -w {wakeup} --max-pm-time {max_pm_time} --append --total {total} --start {start} --log-level={log_level} --log-dir={log_dir} --suspends-before-reboot={suspend_cycles} --checkbox-respawn-cmd={checkbox_respawn} {check_hardware} {fwts} {pm_operation}
+
+[Install]
+WantedBy=multi-user.target
+"""  # noqa: E501
+
+    def __init__(self, args, user=None):
+        self.args = args
+        self.user = user
+        self.unit_filename = os.path.join(self.UNIT_DIRECTORY, self.UNIT_NAME)
+
+    def enable(self):
+        """
+        Write the service and enable it, once for all the cycles
+        """
+        logging.debug("Writing service ({0!r})...".format(self.unit_filename))
+        snap_name = os.getenv("SNAP_NAME")
+        if snap_name:
+            script = "/snap/bin/{}.pm-test".format(snap_name)
+        else:
+            script = "/usr/bin/python3 {}".format(os.path.realpath(__file__))
+        contents = self.TEMPLATE.format(
+            script=script,
+            user=self.user,
+            wakeup=self.args.wakeup,
+            max_pm_time=self.args.max_pm_time,
+            total=self.args.total,
+            start=self.args.start,
+            log_level=self.args.log_level_str,
+            log_dir=self.args.log_dir,
+            fwts="--fwts" if self.args.fwts else "",
+            suspend_cycles=self.args.suspends_before_reboot,
+            pm_operation=self.args.pm_operation,
+            checkbox_respawn=self.args.checkbox_respawn_cmd,
+            check_hardware=(
+                "--check-hardware-list"
+                if self.args.check_hardware_list
+                else ""
+            ),
+        )
+        logging.debug(contents)
+
+        with open(self.unit_filename, "w") as f:
+            f.write(contents)
+        subprocess.check_call(["systemctl", "daemon-reload"])
+        subprocess.check_call(["systemctl", "enable", self.UNIT_NAME])
+
+    def disable(self):
+        """
+        Disable and remove the service
+        """
+        if os.path.exists(self.unit_filename):
+            logging.debug(
+                "Removing service ({0!r})...".format(self.unit_filename)
+            )
+            subprocess.call(["systemctl", "disable", self.UNIT_NAME])
+            os.remove(self.unit_filename)
+            subprocess.call(["systemctl", "daemon-reload"])
+
+
 class LoggingConfiguration:
     @classmethod
     def set(cls, log_level, log_filename, append):
@@ -1180,6 +1594,17 @@ class MyArgumentParser:
             ),
             default=False,
         )
+        parser.add_argument(
+            "--fast-cycle",
+            action="store_true",
+            help=(
+                "Run the cycles from a system service started on boot, "
+                "without dialogs, and record the time spent in each step "
+                "of the cycles (implies --silent). Checkbox is not started "
+                "again at the end: it picks up the result when the session "
+                "is resumed"
+            ),
+        )
         self.parser = parser
 
     def parse(self):
@@ -1189,6 +1614,10 @@ class MyArgumentParser:
         args, extra_args = self.parser.parse_known_args()
         args.log_level = getattr(logging, args.log_level_str.upper())
 
+        # There is nobody to click on dialogs when running from a service
+        if args.fast_cycle:
+            args.silent = True
+
         # Total number of repetitions
         # is the number of repetitions passed through the command line
         # the first time the script is executed
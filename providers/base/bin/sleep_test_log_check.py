@@ -38,6 +38,8 @@ import re
 from argparse import ArgumentParser
 import logging
 
+from checkbox_support.parsers.cycle_log import CycleLogAnalyzer
+
 # Definitions of when a level starts, how a failure looks,
 # and when a level ends.
 start_level_re = r"^(?P<level>.+) failures: (?P<numfails>NONE|\d+)$"
@@ -45,96 +47,122 @@ start_level_re = re.compile(start_level_re)
 failure_re = re.compile(r"^ (?P<test>(\w*)): (?P<details>.+)$")
 end_level_re = re.compile(r"$^")
 
+# Definitions of the start of a suspend/hibernate cycle, of the timings
+# and of the failures reported for each cycle.
+cycle_re = r"\b(?P<test>S3|S4|s2idle) cycle (?P<cycle>\d+) of (?P<total>\d+)"
+timing_re = (
+    r"\b(?P<phase>Suspend|Resume|Hibernate)\s*:\s+"
+    r"(?P<seconds>\d+(?:\.\d+)?) seconds"
+)
+cycle_failure_re = r"\bFAILED \[(?P<level>[A-Z]+)\]"
+
 
-def parse_summary(summary, results, filter_test, ignore_warning):
+class FailureSummaryParser:
     """
-    Parses an entire "Test Failure Summary" section, which contains a short
-    summary of failures observed per level. Returns nothing, but adds the
-    results to the passed results dictionary.
-
-    :param summary:
-        A list of lines comprised in this summary section.
-    :param results:
-        The results dictionary into which to put the end result. Should be a
-        dict with keys for each level, the values are dicts with keys for each
-        test (s3, s4) which in turn contain a list of all the failures observed
-        for that level and test.
+    Streaming parser of the "Test Failure Summary" sections of a fwts log,
+    which contain a short summary of failures observed per level.
+
+    The results are a dictionary with keys for each level, the values are
+    dicts with keys for each test (s3, s4) which in turn count each failure
+    observed for that level and test.
+
     :param filter_test:
         A string to filter out the results is match with the test type.
         And `all` will not filter anything.
     :param ignore_warning:
         A bool if warning message need to be ignored.
-    :return:
-        None
     """
-    current_level = None
-    current_acum = []
 
-    for logline in summary:
-        level_matches = start_level_re.search(logline)
+    def __init__(self, filter_test, ignore_warning):
+        self.filter_test = filter_test
+        self.ignore_warning = ignore_warning
+        self.results = collections.defaultdict(
+            lambda: collections.defaultdict(collections.Counter)
+        )
+        self.summaries_found = 0
+        self._level = None
+        # failures seen since the end of the last level
+        self._pending = []
+
+    def start_summary(self):
+        """Handle a "Test Failure Summary" line"""
+        self.summaries_found += 1
+        self._level = None
+        self._pending = []
+
+    def feed(self, logline):
+        # the substring checks skip most lines faster than the expressions
+        level_matches = " failures: " in logline and start_level_re.search(
+            logline
+        )
         if level_matches:
             logging.debug("Found a level: %s", level_matches.group("level"))
-            current_level = level_matches.group("level")
-        elif end_level_re.search(logline) and current_level:
-            if current_level:
-                logging.debug(
-                    "Current level (%s) has %s", current_level, current_acum
-                )
-                # By passing results[current_level] a key in results will be
-                # created for every level we see, regardless of whether it
-                # reports failures or not.  This is OK because we can later
-                # check results' keys to ensure we saw at least one level; if
-                # results has no keys, it could mean a malformed fwts log file.
-                parse_level(
-                    current_acum,
-                    results[current_level],
-                    filter_test,
-                    ignore_warning,
-                )
-            else:
-                logging.debug("Discarding junk")
-            current_acum = []
-            current_level = None
-        else:
-            current_acum.append(logline)
+            self._level = level_matches.group("level")
+        elif self._level and end_level_re.search(logline):
+            logging.debug(
+                "Current level (%s) has %s", self._level, self._pending
+            )
+            # By using results[level] a key in results will be created for
+            # every level we see, regardless of whether it reports failures
+            # or not.  This is OK because we can later check results' keys
+            # to ensure we saw at least one level; if results has no keys,
+            # it could mean a malformed fwts log file.
+            level_results = self.results[self._level]
+            for test, details in self._pending:
+                level_results[test][details] += 1
+            self._level = None
+            self._pending = []
+        elif logline.startswith(" "):
+            failure_matches = failure_re.search(logline)
+            if failure_matches:
+                test = failure_matches.group("test")
+                details = failure_matches.group("details")
+                logging.debug("fail %s was %s", test, details)
+                if self.filter_test != "all" and self.filter_test not in test:
+                    return
+                if self.ignore_warning and "Warning:" in details:
+                    return
+                self._pending.append((test, details))
 
 
-def parse_level(
-    level_lines, level_results, level_filter_test, level_ignore_warning
-):
+def analyze_log(stream, filter_test="all", ignore_warning=False):
     """
-    Parses the level's lines, appending the failures to the level's results.
-    level_results is a dictionary with a key per test type (s3, s4, and so on).
-    Returns nothing, but adds the results to the passed results dictionary for
-    this level.
-
-    :param level_lines:
-        A list of lines comprised in this level's list of failures.
-
-    :param level_results:
-        A dictionary containing this level's results. Should be a dict with
-        keys for each test, to which the failures for the level will be
-        appended.
-    :param level_filter_test:
-        A string to filter out the results is match with the test type.
-        And `all` will not filter anything.
-    :param level_ignore_warning:
-        A bool if warning message need to be ignored.
-    :return:
-        None
+    Parse a fwts log in a single pass.
+
+    :returns:
+        A tuple with the FailureSummaryParser and the CycleLogAnalyzer of the
+        suspend/hibernate cycles of the log.
     """
-    for failureline in level_lines:
-        failure_matches = failure_re.search(failureline)
-        if failure_matches:
-            test = failure_matches.group("test")
-            details = failure_matches.group("details")
-            logging.debug("fail %s was %s", test, details)
-            if level_filter_test == "all" or level_filter_test in test:
-                if level_ignore_warning:
-                    if "Warning:" not in details:
-                        level_results[test].append(details)
-                else:
-                    level_results[test].append(details)
+    summary = FailureSummaryParser(filter_test, ignore_warning)
+    analyzer = CycleLogAnalyzer()
+    analyzer.on(
+        cycle_re,
+        lambda match, line: analyzer.start_cycle(int(match.group("cycle"))),
+        hint=" cycle ",
+    )
+    analyzer.on(
+        timing_re,
+        lambda match, line: analyzer.add_timing(
+            match.group("phase").lower(), float(match.group("seconds"))
+        ),
+        hint=" seconds",
+    )
+    analyzer.on(
+        cycle_failure_re,
+        lambda match, line: analyzer.add_finding(match.group("level").lower()),
+        hint="FAILED [",
+    )
+    for logline in stream:
+        logline = logline.rstrip()
+        # Each "Test Failure Summary" section is parsed to extract levels
+        # and tests.
+        if "Test Failure Summary" in logline:
+            summary.start_summary()
+        else:
+            summary.feed(logline)
+        analyzer.feed(logline)
+    analyzer.finish()
+    return summary, analyzer
 
 
 def main():
@@ -178,38 +206,27 @@ def main():
                               not show any warning items. \
                               Default is [%(default)s]",
     )
+    parser.add_argument(
+        "--cycle-summary",
+        metavar="FILE",
+        help="Write a JSON summary of the findings and timings of each \
+                              suspend/hibernate cycle to FILE.",
+    )
 
     args = parser.parse_args()
 
     logging.basicConfig(level=args.debug)
 
-    # Create a generator and get our lines
-    log = (
-        line.rstrip() for line in open(args.logfile, "rt", encoding="UTF-8")
-    )
-
-    # End result will be a dictionary with a key per level, value is another
-    # dictionary with a key per test (s3, s4, ...) and a list of all failures
-    # for each test.  Duplicates are possible, because we should also indicate
-    # the number of instances for each failure.
-    results = collections.defaultdict(lambda: collections.defaultdict(list))
+    with open(args.logfile, "rt", encoding="UTF-8") as log:
+        summary, analyzer = analyze_log(log, args.test, args.ignore_warning)
+    if args.cycle_summary:
+        analyzer.write_summary(args.cycle_summary)
 
-    sum_acum = []
-    summaries_found = 0
-
-    # Start parsing the fwts log. Gather each "Test Failure Summary" section
-    # and when it's complete, pass it to the parse_summary function to extract
-    # levels and tests.
-    for logline in log:
-        if "Test Failure Summary" in logline:
-            parse_summary(sum_acum, results, args.test, args.ignore_warning)
-            summaries_found += 1
-            sum_acum = []
-        else:
-            sum_acum.append(logline)
-    # We reached the end, so add the last accumulated summary
-    if sum_acum:
-        parse_summary(sum_acum, results, args.test, args.ignore_warning)
+    # End result is a dictionary with a key per level, value is another
+    # dictionary with a key per test (s3, s4, ...) and a count of each
+    # failure for each test.
+    results = summary.results
+    summaries_found = summary.summaries_found
 
     # Report what I found
     for level in sorted(results.keys()):
@@ -217,12 +234,10 @@ def main():
             # We may have seen the levelheader but had it report no failures.
             print("{} failures:".format(level))
             for test in results[level].keys():
-                print(
-                    "  {}: {} failures".format(test, len(results[level][test]))
-                )
+                counts = results[level][test]
+                print("  {}: {} failures".format(test, sum(counts.values())))
                 if args.verbose:
                     print("=" * 40)
-                    counts = collections.Counter(results[level][test])
                     for failure in counts:
                         print("    {} (x {})".format(failure, counts[failure]))
 
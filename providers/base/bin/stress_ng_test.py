@@ -32,14 +32,20 @@ from subprocess import (
     STDOUT,
     TimeoutExpired,
 )
+from collections import OrderedDict
+from pathlib import Path
+import glob
 import os
 import shlex
 import shutil
 import stat
 import sys
+import tempfile
+import threading
 import time
 import uuid
 import psutil
+import yaml
 from checkbox_support.disk_support import Disk
 
 # Swap filename
@@ -69,8 +75,8 @@ class StressNg:
         self.results = ""
         self.returncode = 0
 
-    def run(self):
-        """Run a stress-ng test, storing results in self.results."""
+    def command(self):
+        """Return the stress-ng command line for this test."""
 
         stressor_list = "--" + " {} --".format(self.thread_count).join(
             self.stressors
@@ -78,9 +84,14 @@ class StressNg:
         # LP:1983122 ensure the final stressor in the list is properly defined
         stressor_list = stressor_list + " {}".format(self.thread_count)
 
-        command = "stress-ng --aggressive --verify --timeout {} {} {}".format(
+        return "stress-ng --aggressive --verify --timeout {} {} {}".format(
             self.sng_timeout, self.extra_options, stressor_list
         )
+
+    def run(self):
+        """Run a stress-ng test, storing results in self.results."""
+
+        command = self.command()
         time_str = time.strftime("%d %b %H:%M", time.gmtime())
         if len(self.stressors) == 1:
             print(
@@ -117,6 +128,358 @@ class StressNg:
         return self.returncode
 
 
+class StressNgJob(StressNg):
+    """A stress-ng test started in the background by StressOrchestrator.
+
+    stress-ng saves its per-stressor metrics to a YAML file (--metrics-brief
+    --yaml) and its output is echoed, prefixed with the job name, while the
+    test runs."""
+
+    def __init__(
+        self,
+        name,
+        stressors,
+        wrapper_timeout,
+        sng_timeout,
+        thread_count=0,
+        extra_options="",
+        numa_node=None,
+        queue=None,
+    ):
+        super().__init__(
+            stressors,
+            wrapper_timeout,
+            sng_timeout,
+            thread_count,
+            extra_options,
+        )
+        self.name = name
+        self.numa_node = numa_node
+        self.queue = queue
+        self.yaml_file = None
+        self.metrics = []
+        self._process = None
+        self._reader = None
+        self._start_time = None
+
+    def command(self):
+        command = "{} --metrics-brief --yaml {}".format(
+            super().command(), self.yaml_file
+        )
+        if self.numa_node is not None:
+            command = "numactl --cpunodebind={0} --membind={0} {1}".format(
+                self.numa_node, command
+            )
+        return command
+
+    def start(self, yaml_dir):
+        """Start stress-ng, saving its metrics in yaml_dir."""
+        self.yaml_file = os.path.join(
+            yaml_dir, "{}.yaml".format(self.name.replace("/", "_"))
+        )
+        time_str = time.strftime("%d %b %H:%M", time.gmtime())
+        print(
+            "{}: Starting {} ({}) for {:.0f} seconds...".format(
+                time_str, self.name, " ".join(self.stressors), self.sng_timeout
+            ),
+            flush=True,
+        )
+        self._start_time = time.monotonic()
+        try:
+            self._process = Popen(
+                shlex.split(self.command()),
+                stdout=PIPE,
+                stderr=STDOUT,
+                universal_newlines=True,
+            )
+        except FileNotFoundError:
+            print("** stress-ng binary not found!")
+            self.returncode = 1
+            return
+        self._reader = threading.Thread(target=self._echo, daemon=True)
+        self._reader.start()
+
+    def _echo(self):
+        for line in self._process.stdout:
+            print("[{}] {}".format(self.name, line.rstrip()), flush=True)
+
+    def poll(self):
+        """Return the exit status, or None while stress-ng is still running.
+
+        stress-ng is killed once wrapper_timeout seconds have elapsed."""
+        if self._process is None:
+            return self.returncode
+        if self._process.poll() is None:
+            elapsed = time.monotonic() - self._start_time
+            if elapsed < self.wrapper_timeout:
+                return None
+            print(
+                "** {}: stress-ng timed out and was forcefully "
+                "terminated".format(self.name)
+            )
+            self._process.kill()
+            self._process.wait()
+            self.returncode = 1
+        else:
+            self.returncode = self._process.returncode
+            if self.returncode:
+                print(
+                    "** {}: stress-ng exited with code {}".format(
+                        self.name, self.returncode
+                    )
+                )
+        self._reader.join()
+        self._process = None
+        self.metrics = load_stress_ng_metrics(self.yaml_file)
+        return self.returncode
+
+    def stop(self):
+        """Kill stress-ng if it is still running."""
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+            self.returncode = 1
+
+
+def load_stress_ng_metrics(filename):
+    """Return the list of per-stressor metrics saved by stress-ng --yaml."""
+    try:
+        with open(filename) as f:
+            data = yaml.safe_load(f)
+    except (OSError, yaml.YAMLError):
+        return []
+    if not isinstance(data, dict):
+        return []
+    return data.get("metrics") or []
+
+
+def max_temperature(thermal_dir="/sys/class/thermal"):
+    """Return the temperature of the hottest thermal zone, in Celsius, or
+    None if no thermal zone can be read."""
+    temperatures = []
+    for zone in glob.glob(os.path.join(thermal_dir, "thermal_zone*", "temp")):
+        try:
+            with open(zone) as f:
+                temperatures.append(int(f.read()) / 1000)
+        except (OSError, ValueError):
+            continue
+    return max(temperatures, default=None)
+
+
+class StressOrchestrator:
+    """Run stress-ng jobs concurrently, one queue per NUMA node or disk.
+
+    Each queue runs up to jobs_per_queue jobs at a time. No new job is
+    started while the hottest thermal zone is above max_temp degrees
+    Celsius, or while less than min_available_memory percent of the RAM is
+    available; the running jobs are left alone."""
+
+    def __init__(
+        self,
+        jobs,
+        jobs_per_queue=1,
+        max_temp=None,
+        min_available_memory=0,
+        poll_interval=5,
+    ):
+        self.jobs = jobs
+        self.jobs_per_queue = jobs_per_queue
+        self.max_temp = max_temp
+        self.min_available_memory = min_available_memory
+        self.poll_interval = poll_interval
+        self.peak_temp = None
+        self.lowest_available_memory = None
+
+    def estimated_run_time(self):
+        """Return the run time of the longest queue, in seconds."""
+        queue_times = {}
+        for job in self.jobs:
+            queue_times.setdefault(job.queue, 0)
+            queue_times[job.queue] += job.sng_timeout
+        return max(queue_times.values(), default=0) / self.jobs_per_queue
+
+    def under_pressure(self):
+        """Return a reason not to start more jobs, or None."""
+        temp = max_temperature()
+        if temp is not None:
+            self.peak_temp = max(temp, self.peak_temp or temp)
+            if self.max_temp is not None and temp > self.max_temp:
+                return "temperature is {:.1f} C".format(temp)
+        memory = psutil.virtual_memory()
+        available = memory.available / memory.total * 100
+        self.lowest_available_memory = min(
+            available, self.lowest_available_memory or available
+        )
+        if available < self.min_available_memory:
+            return "only {:.1f}% of memory is available".format(available)
+        return None
+
+    def run(self):
+        """Run all the jobs and return the OR-ed exit status."""
+        queues = OrderedDict()
+        for job in self.jobs:
+            queues.setdefault(job.queue, []).append(job)
+        running = []
+        retval = 0
+        with tempfile.TemporaryDirectory(prefix="stress-ng-") as yaml_dir:
+            try:
+                while running or any(queues.values()):
+                    for job in list(running):
+                        if job.poll() is not None:
+                            running.remove(job)
+                            retval |= job.returncode
+                    reason = self.under_pressure()
+                    if reason and running:
+                        print("Holding back new stressors: {}".format(reason))
+                    else:
+                        for queue, pending in queues.items():
+                            busy = sum(
+                                1 for job in running if job.queue == queue
+                            )
+                            while pending and busy < self.jobs_per_queue:
+                                job = pending.pop(0)
+                                job.start(yaml_dir)
+                                running.append(job)
+                                busy += 1
+                    if running:
+                        time.sleep(self.poll_interval)
+            finally:
+                for job in running:
+                    job.stop()
+        return retval
+
+    def metrics(self):
+        """Return the metrics of every stressor, tagged with the job name."""
+        metrics = []
+        for job in self.jobs:
+            for metric in job.metrics:
+                metric = dict(metric)
+                metric["job"] = job.name
+                metrics.append(metric)
+        return metrics
+
+
+def metric_key(metric):
+    return "{} {}".format(metric.get("job"), metric.get("stressor"))
+
+
+def print_metrics(metrics):
+    """Print a bogo-ops table of the given stress-ng metrics."""
+    print("{:<40} {:>16} {:>16}".format("stressor", "bogo ops", "bogo ops/s"))
+    for metric in metrics:
+        print(
+            "{:<40} {:>16} {:>16.2f}".format(
+                metric_key(metric),
+                metric.get("bogo-ops", 0),
+                metric.get("bogo-ops-per-second-real-time", 0.0),
+            )
+        )
+
+
+def compare_metrics(metrics, reference, max_regression=None):
+    """Compare bogo-ops/s figures to the ones of a previous run.
+
+    Return 1 if a stressor got slower by more than max_regression percent,
+    0 otherwise."""
+    retval = 0
+    reference = {metric_key(metric): metric for metric in reference}
+    for metric in metrics:
+        key = metric_key(metric)
+        previous = reference.get(key, {}).get("bogo-ops-per-second-real-time")
+        current = metric.get("bogo-ops-per-second-real-time")
+        if not previous or current is None:
+            print("{}: no reference data".format(key))
+            continue
+        change = (current - previous) / previous * 100
+        print("{}: {:+.1f}% bogo ops/s".format(key, change))
+        if max_regression is not None and -change > max_regression:
+            print(
+                "** {} is more than {}% slower than the reference".format(
+                    key, max_regression
+                )
+            )
+            retval = 1
+    return retval
+
+
+def run_stress_jobs(args, jobs):
+    """Run jobs concurrently and report their metrics."""
+    orchestrator = StressOrchestrator(
+        jobs,
+        jobs_per_queue=args.jobs_per_queue,
+        max_temp=args.max_temp,
+        min_available_memory=args.min_available_memory,
+    )
+    print(
+        "Running {} stress-ng jobs in {} queue(s)".format(
+            len(jobs), len({job.queue for job in jobs})
+        )
+    )
+    print(
+        "Estimated total run time is {:.0f} minutes\n".format(
+            orchestrator.estimated_run_time() / 60
+        )
+    )
+    retval = orchestrator.run()
+    if orchestrator.peak_temp is not None:
+        print("Peak temperature: {:.1f} C".format(orchestrator.peak_temp))
+    if orchestrator.lowest_available_memory is not None:
+        print(
+            "Lowest available memory: {:.1f}%".format(
+                orchestrator.lowest_available_memory
+            )
+        )
+    metrics = orchestrator.metrics()
+    print_metrics(metrics)
+    if args.metrics_file:
+        with open(args.metrics_file, "w") as f:
+            # no sort_keys, it needs PyYAML 5.1 or newer
+            yaml.safe_dump({"metrics": metrics}, f, default_flow_style=False)
+    if args.compare:
+        retval |= compare_metrics(
+            metrics, load_stress_ng_metrics(args.compare), args.max_regression
+        )
+    return retval
+
+
+def count_cpus(cpulist):
+    """Return the number of CPUs in a sysfs cpulist such as "0-3,8"."""
+    count = 0
+    for cpu_range in cpulist.strip().split(","):
+        if not cpu_range:
+            continue
+        first, _, last = cpu_range.partition("-")
+        count += int(last or first) - int(first) + 1
+    return count
+
+
+def numa_layout(sys_node="/sys/devices/system/node"):
+    """Return the (node, CPU count) pairs stress-ng jobs can be pinned to.
+
+    A single (None, 0) pair is returned on single-node systems or when
+    numactl is missing, a thread count of 0 telling stress-ng to start one
+    instance per online CPU."""
+    nodes = []
+    for path in sorted(Path(sys_node).glob("node[0-9]*")):
+        try:
+            cpus = count_cpus((path / "cpulist").read_text())
+        except (OSError, ValueError):
+            continue
+        if cpus:
+            nodes.append((int(path.name[4:]), cpus))
+    if len(nodes) < 2 or shutil.which("numactl") is None:
+        return [(None, 0)]
+    return nodes
+
+
+def instances_per_job(cpus, jobs_per_queue):
+    """Split the CPUs of a queue between the jobs running in it."""
+    if jobs_per_queue == 1:
+        return cpus
+    return max(1, (cpus or os.cpu_count()) // jobs_per_queue)
+
+
 # Define CPU-related functions...
 
 
@@ -144,6 +507,22 @@ def stress_cpu(args):
     # Add 10% to runtime; will forcefully terminate if stress-ng
     # fails to return in that time.
     end_time = 1.1 * args.base_time
+    if args.parallel:
+        # One job per NUMA node, each running all the stressors
+        jobs = [
+            StressNgJob(
+                name="cpu" if node is None else "cpu-node{}".format(node),
+                stressors=stressors,
+                sng_timeout=args.base_time,
+                wrapper_timeout=end_time,
+                thread_count=cpus,
+                extra_options="--tz --times",
+                numa_node=node,
+                queue=node,
+            )
+            for node, cpus in numa_layout()
+        ]
+        return run_stress_jobs(args, jobs)
     print(
         "Estimated total run time is {:.0f} minutes\n".format(
             args.base_time / 60
@@ -285,6 +664,16 @@ def stress_memory(args):
     # Low-thread-count stressors -- throttle to >8 threads...
     ltc_stressors = ["stack", "bigheap", "brk"]
 
+    if args.parallel:
+        retval = run_stress_jobs(
+            args,
+            memory_jobs(
+                args, crt_stressors, vrt_stressors, ltc_stressors, vrt
+            ),
+        )
+        remove_swap(args)
+        return retval
+
     est_runtime = (
         len(crt_stressors) * args.base_time + len(vrt_stressors) * vrt
     )
@@ -318,12 +707,52 @@ def stress_memory(args):
         )  # throttle to 8 threads
         retval = retval | test_object.run()
         print(test_object.results)
+    remove_swap(args)
+    return retval
+
+
+def remove_swap(args):
+    """Delete the swap file added by swap_space_ok(), unless asked not to."""
     if my_swap is not None and args.keep_swap is False:
         print("Deleting temporary swap file....")
         cmd = "swapoff {}".format(my_swap)
         Popen(shlex.split(cmd), stderr=STDOUT, stdout=PIPE).communicate()[0]
         os.remove(my_swap)
-    return retval
+
+
+def memory_jobs(args, crt_stressors, vrt_stressors, ltc_stressors, vrt):
+    """Spread the memory stressors over one queue per NUMA node."""
+    layout = numa_layout()
+    jobs = []
+    stressors = (
+        [(stressor, args.base_time, None) for stressor in crt_stressors]
+        + [(stressor, vrt, None) for stressor in vrt_stressors]
+        + [(stressor, vrt, 8) for stressor in ltc_stressors]
+    )
+    for index, (stressor, sng_timeout, max_threads) in enumerate(stressors):
+        node, cpus = layout[index % len(layout)]
+        thread_count = instances_per_job(cpus, args.jobs_per_queue)
+        if max_threads:
+            # throttle to 8 threads
+            thread_count = min(thread_count or max_threads, max_threads)
+        jobs.append(
+            StressNgJob(
+                name=(
+                    stressor
+                    if node is None
+                    else "{}-node{}".format(stressor, node)
+                ),
+                stressors=[stressor],
+                sng_timeout=sng_timeout,
+                wrapper_timeout=sng_timeout * 2,
+                thread_count=thread_count,
+                # the numa stressor moves pages between nodes, so it must
+                # not be bound to one
+                numa_node=None if stressor == "numa" else node,
+                queue=node,
+            )
+        )
+    return jobs
 
 
 def stress_disk(args):
@@ -359,45 +788,72 @@ def stress_disk(args):
     ]
 
     retval = 0
-    if "/dev" not in args.device and args.device != "":
-        args.device = "/dev/" + args.device
-
-    test_disk = Disk(args.device)
-    if not test_disk.is_block_device():
-        print("** {} is not a block device! Aborting!".format(args.device))
-        return 1
-    if test_disk.mount_filesystem(args.simulate):
-        est_runtime = len(disk_stressors) * args.base_time
+    devices = [
+        device if "/dev" in device or device == "" else "/dev/" + device
+        for device in args.device
+    ]
+    test_disks = [Disk(device) for device in devices]
+    for device, test_disk in zip(devices, test_disks):
+        if not test_disk.is_block_device():
+            print("** {} is not a block device! Aborting!".format(device))
+            return 1
+    mounted_disks = []
+    for test_disk in test_disks:
+        if not test_disk.mount_filesystem(args.simulate):
+            print("** Unable to find a suitable partition! Aborting!")
+            retval = 1
+            break
         print("Using test directory: '{}'".format(test_disk.test_dir))
-        print(
-            "Estimated total run time is {:.0f} minutes\n".format(
-                est_runtime / 60
-            )
-        )
-        retval = 0
-        if not args.simulate:
-            for stressor in disk_stressors:
-                disk_options = (
-                    "--temp-path {} ".format(test_disk.test_dir)
-                    + "--hdd-opts dsync --readahead-bytes 16M -k"
-                )
-                test_object = StressNg(
-                    stressors=stressor.split(),
+        mounted_disks.append(test_disk)
+    if not retval and not args.simulate:
+        if args.parallel:
+            # One queue per disk, the disks are stressed concurrently
+            jobs = [
+                StressNgJob(
+                    name="{}-{}".format(os.path.basename(device), stressor),
+                    stressors=[stressor],
                     sng_timeout=args.base_time,
                     wrapper_timeout=args.base_time * 5,
-                    extra_options=disk_options,
+                    extra_options=disk_options(test_disk),
+                    queue=device,
+                )
+                for device, test_disk in zip(devices, mounted_disks)
+                for stressor in disk_stressors
+            ]
+            retval = run_stress_jobs(args, jobs)
+        else:
+            est_runtime = (
+                len(disk_stressors) * args.base_time * len(mounted_disks)
+            )
+            print(
+                "Estimated total run time is {:.0f} minutes\n".format(
+                    est_runtime / 60
                 )
-                retval = retval | test_object.run()
-                print(test_object.results)
+            )
+            for test_disk in mounted_disks:
+                for stressor in disk_stressors:
+                    test_object = StressNg(
+                        stressors=stressor.split(),
+                        sng_timeout=args.base_time,
+                        wrapper_timeout=args.base_time * 5,
+                        extra_options=disk_options(test_disk),
+                    )
+                    retval = retval | test_object.run()
+                    print(test_object.results)
+    for test_disk in mounted_disks:
         if test_disk.test_dir != "/tmp" and not args.simulate:
             shutil.rmtree(test_disk.test_dir, ignore_errors=True)
-    else:
-        print("** Unable to find a suitable partition! Aborting!")
-        retval = 1
 
     return retval
 
 
+def disk_options(test_disk):
+    return (
+        "--temp-path {} ".format(test_disk.test_dir)
+        + "--hdd-opts dsync --readahead-bytes 16M -k"
+    )
+
+
 # Main program body...
 
 
@@ -410,10 +866,64 @@ def main():
     )
     subparsers = parser.add_subparsers()
 
+    # Options shared by all the tests
+    parallel_parser = ArgumentParser(add_help=False)
+    parallel_group = parallel_parser.add_argument_group(
+        "parallel mode",
+        "Run independent stressors concurrently, one queue per NUMA node "
+        "(cpu, memory) or per disk (disk), and collect per-stressor metrics",
+    )
+    parallel_group.add_argument(
+        "--parallel",
+        action="store_true",
+        help="Enable parallel mode",
+    )
+    parallel_group.add_argument(
+        "--jobs-per-queue",
+        type=int,
+        default=1,
+        help="Stressors run at the same time in each queue (default=1)",
+    )
+    parallel_group.add_argument(
+        "--max-temp",
+        type=float,
+        default=95,
+        help="Don't start stressors above this temperature, in Celsius "
+        + "(default=95)",
+    )
+    parallel_group.add_argument(
+        "--min-available-memory",
+        type=float,
+        default=5,
+        help="Don't start stressors when less than this percentage of the "
+        + "RAM is available (default=5)",
+    )
+    parallel_group.add_argument(
+        "--metrics-file",
+        help="Save the per-stressor metrics to this YAML file",
+    )
+    parallel_group.add_argument(
+        "--compare",
+        metavar="METRICS_FILE",
+        help="Compare bogo ops/s to the ones saved by a previous run",
+    )
+    parallel_group.add_argument(
+        "--max-regression",
+        type=float,
+        help="Fail if a stressor is this many percent slower than in the "
+        + "--compare file",
+    )
+
     # Main cli options
-    cpu_parser = subparsers.add_parser("cpu", help=("Run CPU tests"))
-    memory_parser = subparsers.add_parser("memory", help=("Run memory tests"))
-    disk_parser = subparsers.add_parser("disk", help=("Run disk tests"))
+    cpu_parser = subparsers.add_parser(
+        "cpu", help=("Run CPU tests"), parents=[parallel_parser]
+    )
+    memory_parser = subparsers.add_parser(
+        "memory", help=("Run memory tests"), parents=[parallel_parser]
+    )
+    disk_parser = subparsers.add_parser(
+        "disk", help=("Run disk tests"), parents=[parallel_parser]
+    )
 
     # CPU parameters
     cpu_parser.add_argument(
@@ -455,8 +965,9 @@ def main():
         "-d",
         "--device",
         type=str,
+        nargs="+",
         required=True,
-        help="Disk device (/dev/sda, etc.)",
+        help="Disk device(s) (/dev/sda, etc.)",
     )
     disk_parser.add_argument(
         "-b",
@@ -477,6 +988,8 @@ def main():
     disk_parser.set_defaults(func=stress_disk)
 
     args = parser.parse_args()
+    if not args.parallel and (args.metrics_file or args.compare):
+        parser.error("--metrics-file and --compare require --parallel")
 
     if shutil.which("stress-ng") is None:
         print("** The stress-ng utility is not installed; exiting!")
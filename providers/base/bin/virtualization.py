@@ -24,10 +24,14 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 """
 from argparse import ArgumentParser
+import hashlib
+import json
 import os
 import logging
 import requests
+import select
 import shlex
+import shutil
 from subprocess import (
     Popen,
     PIPE,
@@ -46,6 +50,12 @@ from uuid import uuid4
 
 DEFAULT_TIMEOUT = 500
 
+# How often the console of a booting KVM instance is checked, in seconds
+BOOT_POLL_INTERVAL = 0.5
+
+# How long to wait for an LXD event, in seconds
+LXD_EVENT_TIMEOUT = 60
+
 
 # The "TAR" type is a tarball that contains both
 # a disk image and a kernel binary. This is useful
@@ -164,6 +174,159 @@ def get_codename_to_test():
         lsb_release.get_distro_information()["CODENAME"]
 
 
+def get_image_store_path():
+    if os.environ.get("VIRT_IMAGE_STORE"):
+        return os.environ["VIRT_IMAGE_STORE"]
+    suc = os.environ.get("SNAP_USER_COMMON")
+    if suc:
+        return os.path.join(suc, ".cache", "checkbox", "images")
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+    if not xdg_cache_home:
+        xdg_cache_home = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(xdg_cache_home, "checkbox", "images")
+
+
+def get_file_digest(filename):
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ImageStore(object):
+    """
+    Local store of the images used by the tests
+
+    Images are stored once, in objects/ under the SHA-256 of their content,
+    and found by the URL they were downloaded from (see index.json). A lab
+    without network access can be pre-seeded with
+    "virtualization.py image-store add FILE URL".
+
+    When the server publishes a SHA256SUMS file next to an image, it is
+    used to download the image again if it changed and to check downloads.
+    Otherwise, or without network access, the stored image is used until
+    it is refreshed with "virtualization.py image-store refresh".
+    """
+
+    def __init__(self, path=None):
+        self.path = os.path.abspath(path or get_image_store_path())
+        self.index_filename = os.path.join(self.path, "index.json")
+
+    def get(self, url):
+        """
+        Return the path of the image stored for url, or None
+        """
+        relative_path = self.list().get(url)
+        if relative_path:
+            path = os.path.join(self.path, relative_path)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def add(self, filename, url):
+        """
+        Copy an image file in the store, as downloaded from url, and return
+        its path in the store
+        """
+        os.makedirs(os.path.join(self.path, "objects"), exist_ok=True)
+        new_path = self._get_new_path()
+        shutil.copyfile(filename, new_path)
+        return self._insert(new_path, url)
+
+    def fetch(self, url, refresh=False):
+        """
+        Return the path of the image that can be downloaded from url
+
+        The image is only downloaded if it is not in the store, if it
+        changed on the server or if refresh is set. Download errors and
+        checksum mismatches are raised as OSError.
+        """
+        expected_digest = self.get_published_digest(url)
+        path = None if refresh else self.get(url)
+        if path:
+            digest = os.path.basename(os.path.dirname(path))
+            if expected_digest in (None, digest):
+                logging.debug("Using {} from the image store".format(url))
+                return path
+            logging.info("{} changed, downloading it again".format(url))
+        logging.debug("Downloading {} to the image store".format(url))
+        os.makedirs(os.path.join(self.path, "objects"), exist_ok=True)
+        new_path = self._get_new_path()
+        try:
+            urllib.request.urlretrieve(url, new_path)
+            digest = get_file_digest(new_path)
+            if expected_digest not in (None, digest):
+                raise OSError(
+                    "Checksum mismatch for {}: expected {}, got {}".format(
+                        url, expected_digest, digest
+                    )
+                )
+        except BaseException:
+            if os.path.exists(new_path):
+                os.remove(new_path)
+            raise
+        return self._insert(new_path, url, digest)
+
+    def get_published_digest(self, url):
+        """
+        Return the SHA-256 published for url in the SHA256SUMS file next to
+        it, or None if there is none (or if it cannot be downloaded)
+        """
+        base_url, _, name = url.rpartition("/")
+        try:
+            with urllib.request.urlopen(
+                base_url + "/SHA256SUMS", timeout=10
+            ) as sums_file:
+                sums = sums_file.read().decode("utf-8", "replace")
+        except (OSError, ValueError):
+            return None
+        for line in sums.splitlines():
+            fields = line.split()
+            if len(fields) == 2 and fields[1].lstrip("*") == name:
+                return fields[0].lower()
+        return None
+
+    def list(self):
+        """
+        Return a dictionary mapping the URLs of the images to their path in
+        the store, relative to the store
+        """
+        try:
+            with open(self.index_filename, "rt") as index_file:
+                return json.load(index_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _get_new_path(self):
+        return os.path.join(self.path, "objects", "{}.new".format(uuid4().hex))
+
+    def _insert(self, new_path, url, digest=None):
+        if digest is None:
+            digest = get_file_digest(new_path)
+        object_dir = os.path.join(self.path, "objects", digest)
+        if os.path.isdir(object_dir) and os.listdir(object_dir):
+            # same content as another URL
+            os.remove(new_path)
+            path = os.path.join(object_dir, os.listdir(object_dir)[0])
+        else:
+            os.makedirs(object_dir, exist_ok=True)
+            # keep the file name, KVMTest looks for "cloud" in it
+            name = urlparse(url).path.split("/")[-1] or "image"
+            path = os.path.join(object_dir, name)
+            os.replace(new_path, path)
+        index = self.list()
+        index[url] = os.path.relpath(path, self.path)
+        new_index_filename = "{}.{}.new".format(
+            self.index_filename, uuid4().hex
+        )
+        with open(new_index_filename, "wt") as index_file:
+            json.dump(index, index_file, indent=2, sort_keys=True)
+        os.replace(new_index_filename, self.index_filename)
+        logging.debug("Stored {} as {}".format(url, digest))
+        return path
+
+
 class QemuRunner(object):
     def __init__(self, arch):
         self.arch = arch
@@ -213,15 +376,20 @@ class QemuRunner(object):
         if dtb:
             self.params = self.params + ["-dtb", dtb]
 
-    def add_drive(self, cloudimg):
+    def add_drive(self, cloudimg, snapshot=False):
+        # With snapshot, writes go to a temporary file, not to cloudimg
+        options = ",snapshot=on" if snapshot else ""
         drive = ["-drive"]
         if self.config["qemu_disk_type"] == QEMU_DISK_TYPE_SD:
-            drive = drive + ["file=%s,if=sd,cache=writeback" % (cloudimg)]
+            drive = drive + [
+                "file=%s,if=sd,cache=writeback%s" % (cloudimg, options)
+            ]
         elif self.config["qemu_disk_type"] == QEMU_DISK_TYPE_VIRTIO:
-            drive = drive + ["file=%s,if=virtio" % (cloudimg)]
+            drive = drive + ["file=%s,if=virtio%s" % (cloudimg, options)]
         elif self.config["qemu_disk_type"] == QEMU_DISK_TYPE_VIRTIO_BLK:
             drive = drive + [
-                "file=%s,if=none,id=disk.%d" % (cloudimg, self.drive_id)
+                "file=%s,if=none,id=disk.%d%s"
+                % (cloudimg, self.drive_id, options)
             ]
             drive = drive + [
                 "-device",
@@ -248,6 +416,7 @@ class KVMTest(object):
         ).strip()
         self.qemu_config = QEMU_ARCH_CONFIG[self.arch]
         self.release = get_codename_to_test()
+        self.image_store = ImageStore()
 
     def url_to_path(self, image_path):
         """
@@ -263,6 +432,33 @@ class KVMTest(object):
             # Gives us the stuff needed to build the URL to download the image
             return self.download_image(image_path)
 
+    def construct_filename(self, alt_pattern=None, initial_url=None):
+        if self.qemu_config["cloudimg_type"] == CLOUD_IMAGE_TYPE_TAR:
+            cloud_iso = "%s-server-cloudimg-%s.tar.gz" % (
+                self.release,
+                self.qemu_config["cloudimg_arch"],
+            )
+        elif alt_pattern == "modern":
+            # LP 1635345 - yakkety and beyond have a new naming scheme
+            cloud_iso = "%s-server-cloudimg-%s.img" % (
+                self.release,
+                self.qemu_config["cloudimg_arch"],
+            )
+        elif self.qemu_config["cloudimg_type"] == CLOUD_IMAGE_TYPE_DISK:
+            cloud_iso = "%s-server-cloudimg-%s-disk1.img" % (
+                self.release,
+                self.qemu_config["cloudimg_arch"],
+            )
+        elif initial_url:
+            # LP 1662580 - if we pass a full URL, assume the last piece is
+            # the filname and return that.
+            cloud_iso = initial_url.split("/")[-1]
+        else:
+            logging.error("Unknown cloud image type")
+            sys.exit(1)
+
+        return cloud_iso
+
     def get_image_name_and_url(self, image_url=None):
         """
         Build a URL for official Ubuntu images hosted either at
@@ -270,33 +466,6 @@ class KVMTest(object):
         cloud-images.ubuntu.com
         """
 
-        def _construct_filename(alt_pattern=None, initial_url=None):
-            if self.qemu_config["cloudimg_type"] == CLOUD_IMAGE_TYPE_TAR:
-                cloud_iso = "%s-server-cloudimg-%s.tar.gz" % (
-                    self.release,
-                    self.qemu_config["cloudimg_arch"],
-                )
-            elif alt_pattern == "modern":
-                # LP 1635345 - yakkety and beyond have a new naming scheme
-                cloud_iso = "%s-server-cloudimg-%s.img" % (
-                    self.release,
-                    self.qemu_config["cloudimg_arch"],
-                )
-            elif self.qemu_config["cloudimg_type"] == CLOUD_IMAGE_TYPE_DISK:
-                cloud_iso = "%s-server-cloudimg-%s-disk1.img" % (
-                    self.release,
-                    self.qemu_config["cloudimg_arch"],
-                )
-            elif initial_url:
-                # LP 1662580 - if we pass a full URL, assume the last piece is
-                # the filname and return that.
-                cloud_iso = initial_url.split("/")[-1]
-            else:
-                logging.error("Unknown cloud image type")
-                sys.exit(1)
-
-            return cloud_iso
-
         def _construct_url(initial_url, cloud_iso):
             return "/".join((initial_url, cloud_iso))
 
@@ -317,7 +486,7 @@ class KVMTest(object):
         if image_url is None:
             # If we have not specified a URL to get our images from, default
             # to ubuntu.com
-            cloud_iso = _construct_filename()
+            cloud_iso = self.construct_filename()
             initial_url = "/".join(
                 ("http://cloud-images.ubuntu.com", self.release, "current")
             )
@@ -330,7 +499,7 @@ class KVMTest(object):
                     "file. Retrying with a different filename "
                     "schema."
                 )
-                cloud_iso = _construct_filename("modern")
+                cloud_iso = self.construct_filename("modern")
                 full_url = _construct_url(initial_url, cloud_iso)
                 # retest one more time then exit if it still fails
                 if not _test_cloud_url(full_url):
@@ -352,7 +521,7 @@ class KVMTest(object):
             ):
                 # If we have a relative URL (local copies of official images)
                 # http://192.168.0.1/ or http://192.168.0.1/images/
-                cloud_iso = _construct_filename()
+                cloud_iso = self.construct_filename()
                 full_url = _construct_url(image_url.rstrip("/"), cloud_iso)
                 if not _test_cloud_url(full_url):
                     logging.warn("Cloud Image URL not valid: %s" % full_url)
@@ -361,7 +530,7 @@ class KVMTest(object):
                         "file. Retrying with a different filename "
                         "schema."
                     )
-                    cloud_iso = _construct_filename("modern")
+                    cloud_iso = self.construct_filename("modern")
                     full_url = _construct_url(image_url.rstrip("/"), cloud_iso)
                     if not _test_cloud_url(full_url):
                         logging.error("Cloud URL is not valid: %s" % full_url)
@@ -379,23 +548,48 @@ class KVMTest(object):
                     sys.exit(1)
                 else:
                     full_url = image_url
-                    cloud_iso = _construct_filename(initial_url=full_url)
+                    cloud_iso = self.construct_filename(initial_url=full_url)
 
         return full_url, cloud_iso
 
+    def get_image_urls(self, image_url=None):
+        """
+        Return the URLs get_image_name_and_url() may choose the image from,
+        without accessing the network
+        """
+        if image_url is not None:
+            path = urlparse(image_url).path
+            if path.endswith(".img") or path.endswith(".tar.gz"):
+                return [image_url]
+            initial_url = image_url.rstrip("/")
+        else:
+            initial_url = "/".join(
+                ("http://cloud-images.ubuntu.com", self.release, "current")
+            )
+        return [
+            "/".join((initial_url, self.construct_filename(alt_pattern)))
+            for alt_pattern in (None, "modern")
+        ]
+
     def download_image(self, image_url=None):
         """
         Downloads Cloud image for same release as host machine
         """
-        if image_url is None:
-            full_url, cloud_iso = self.get_image_name_and_url()
+        stored_urls = [
+            url
+            for url in self.get_image_urls(image_url)
+            if self.image_store.get(url)
+        ]
+        if stored_urls:
+            full_url = stored_urls[0]
+            logging.debug("Cloud image found in the image store")
         else:
-            full_url, cloud_iso = self.get_image_name_and_url(image_url)
+            full_url, _ = self.get_image_name_and_url(image_url)
         logging.debug("Acquiring cloud image from: {}".format(full_url))
 
         # Attempt download
         try:
-            urllib.request.urlretrieve(full_url, cloud_iso)
+            cloud_iso = self.image_store.fetch(full_url)
         except (
             IOError,
             OSError,
@@ -409,9 +603,13 @@ class KVMTest(object):
 
         # Unpack img file from tar
         if self.qemu_config["cloudimg_type"] == CLOUD_IMAGE_TYPE_TAR:
-            cloud_iso_tgz = tarfile.open(cloud_iso)
-            cloud_iso = cloud_iso.replace("tar.gz", "img")
-            cloud_iso_tgz.extract(cloud_iso)
+            with tarfile.open(cloud_iso) as cloud_iso_tgz:
+                cloud_iso = (
+                    urlparse(full_url)
+                    .path.split("/")[-1]
+                    .replace("tar.gz", "img")
+                )
+                cloud_iso_tgz.extract(cloud_iso)
 
         if not os.path.isfile(cloud_iso):
             return False
@@ -439,7 +637,11 @@ class KVMTest(object):
                     qemu.add_boot_files(kernel=kernel, initrd=initrd)
                     break
 
-        qemu.add_drive(data_disk)
+        # Never modify the images of the image store
+        qemu.add_drive(
+            data_disk,
+            snapshot=data_disk.startswith(self.image_store.path + os.sep),
+        )
 
         # Should we attach the cloud config disk
         if os.path.isfile("seed.iso"):
@@ -507,6 +709,38 @@ class KVMTest(object):
         else:
             return 1
 
+    def wait_for_boot(self):
+        """
+        Follow the console output of the VM until it reports a complete boot
+
+        Returns 0 as soon as the VM booted, or 1 if it did not boot before
+        the timeout or if qemu exited.
+        """
+        deadline = time.monotonic() + self.timeout
+        stream = ""
+        with open(self.debug_file, "r", errors="replace") as debug_file:
+            while True:
+                data = debug_file.read()
+                stream += data
+                if self.log_check(stream) == 0:
+                    return 0
+                if data:
+                    continue
+                if self.process.poll() is not None:
+                    logging.error(
+                        "qemu exited with code {}".format(
+                            self.process.returncode
+                        )
+                    )
+                    break
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(BOOT_POLL_INTERVAL)
+        logging.error("KVM instance failed to boot.")
+        logging.error("Console output".center(72, "="))
+        logging.error(stream)
+        return 1
+
     def start(self):
         if self.arch == "arm64":
             # lp:1548539 - For arm64, we need to make sure we're using qemu
@@ -557,6 +791,7 @@ class KVMTest(object):
                     self.create_cloud_disk()
 
                 # Boot Virtual Machine
+                boot_start = time.monotonic()
                 self.boot_image(self.image)
 
                 # If running in console, reset console window to regain
@@ -564,32 +799,14 @@ class KVMTest(object):
                 if sys.stdout.isatty():
                     call("reset")
                 # Check to be sure VM boot was successful
-                self.elapsed_time = 0
-                status = 1
-                while self.elapsed_time <= self.timeout:
-                    # Check log every 30 seconds to see if the VM boots
-                    with open(self.debug_file, "r") as debug_file:
-                        status = self.log_check(debug_file.read())
-                        if status == 0:
-                            logging.info("Booted successfully.")
-                            break
-                        else:
-                            # Sleep 30 seconds and log check again
-                            time.sleep(30)
-                            self.elapsed_time += 30
-                else:
-                    # Finally, if we didn't get the Success message by now try
-                    # one more time and return 1 if we still haven't booted
-                    if status != 0:
-                        with open(self.debug_file, "r") as debug_file:
-                            stream = debug_file.read()
-                            status = self.log_check(stream)
-                            if status == 0:
-                                logging.info("Booted successfully.")
-                            else:
-                                logging.error("KVM instance failed to boot.")
-                                logging.error("Console output".center(72, "="))
-                                logging.error(stream)
+                status = self.wait_for_boot()
+                if status == 0:
+                    logging.info("Booted successfully.")
+                    print(
+                        "Boot to ready: {:.1f} s".format(
+                            time.monotonic() - boot_start
+                        )
+                    )
                 self.process.terminate()
             elif not self.image:
                 logging.error("Could not find downloaded image")
@@ -640,6 +857,7 @@ class LXDTest(object):
         self.image_alias = uuid4().hex
         self.default_remote = "ubuntu:"
         self.os_version = get_release_to_test()
+        self.image_store = ImageStore()
 
     def run_command(self, cmd):
         task = RunCommand(cmd)
@@ -674,48 +892,21 @@ class LXDTest(object):
         # Retrieve and insert LXD images
         if self.template_url is not None:
             logging.debug("Downloading template.")
-            targetfile = urlparse(self.template_url).path.split("/")[-1]
-            filename = os.path.join("/tmp", targetfile)
-            if not os.path.isfile(filename):
-                self.template_tarball = self.download_images(
-                    self.template_url, filename
-                )
-                if not self.template_tarball:
-                    logging.error(
-                        "Unable to download {} from "
-                        "{}".format(self.template_tarball, self.template_url)
-                    )
-                    logging.error("Aborting")
-                    result = False
-            else:
-                logging.debug(
-                    "Template file {} already exists. "
-                    "Skipping Download.".format(filename)
+            self.template_tarball = self.download_images(self.template_url)
+            if not self.template_tarball:
+                logging.error(
+                    "Unable to download {}".format(self.template_url)
                 )
-                self.template_tarball = filename
+                logging.error("Aborting")
+                result = False
 
         if self.rootfs_url is not None:
             logging.debug("Downloading rootfs.")
-            targetfile = urlparse(self.rootfs_url).path.split("/")[-1]
-            filename = os.path.join("/tmp", targetfile)
-            if not os.path.isfile(filename):
-                self.rootfs_tarball = self.download_images(
-                    self.rootfs_url, filename
-                )
-                if not self.rootfs_tarball:
-                    logging.error(
-                        "Unable to download {} from{}".format(
-                            self.rootfs_tarball, self.rootfs_url
-                        )
-                    )
-                    logging.error("Aborting")
-                    result = False
-            else:
-                logging.debug(
-                    "Template file {} already exists. "
-                    "Skipping Download.".format(filename)
-                )
-                self.rootfs_tarball = filename
+            self.rootfs_tarball = self.download_images(self.rootfs_url)
+            if not self.rootfs_tarball:
+                logging.error("Unable to download {}".format(self.rootfs_url))
+                logging.error("Aborting")
+                result = False
 
         # Insert images
         if self.template_url is not None and self.rootfs_url is not None:
@@ -750,16 +941,16 @@ class LXDTest(object):
                 retry -= 1
         return result
 
-    def download_images(self, url, filename):
+    def download_images(self, url):
         """
         Downloads LXD files for same release as host machine
+
+        Files are kept in the image store, and only downloaded once.
         """
         # TODO: Clean this up to use a non-internet simplestream on MAAS server
-        logging.debug(
-            "Attempting download of {} from {}".format(filename, url)
-        )
+        logging.debug("Attempting download of {}".format(url))
         try:
-            urllib.request.urlretrieve(url, filename)
+            return self.image_store.fetch(url)
         except (
             IOError,
             OSError,
@@ -775,12 +966,6 @@ class LXDTest(object):
             logging.error("%s" % verr)
             return False
 
-        if not os.path.isfile(filename):
-            logging.warn("Can not find {}".format(filename))
-            return False
-
-        return filename
-
     def cleanup(self):
         """
         Clean up test files an containers created
@@ -832,6 +1017,7 @@ class LXDTest_vm(object):
         self.image_alias = uuid4().hex
         self.default_remote = "ubuntu:"
         self.os_version = get_release_to_test()
+        self.image_store = ImageStore()
 
     def run_command(self, cmd, log_stderr=True):
         task = RunCommand(cmd)
@@ -867,48 +1053,21 @@ class LXDTest_vm(object):
         # Retrieve and insert LXD images
         if self.template_url is not None:
             logging.debug("Downloading template.")
-            targetfile = urlparse(self.template_url).path.split("/")[-1]
-            filename = os.path.join("/tmp", targetfile)
-            if not os.path.isfile(filename):
-                self.template_tarball = self.download_images(
-                    self.template_url, filename
-                )
-                if not self.template_tarball:
-                    logging.error(
-                        "Unable to download {} from "
-                        "{}".format(self.template_tarball, self.template_url)
-                    )
-                    logging.error("Aborting")
-                    result = False
-            else:
-                logging.debug(
-                    "Template file {} already exists. "
-                    "Skipping Download.".format(filename)
+            self.template_tarball = self.download_images(self.template_url)
+            if not self.template_tarball:
+                logging.error(
+                    "Unable to download {}".format(self.template_url)
                 )
-                self.template_tarball = filename
+                logging.error("Aborting")
+                result = False
 
         if self.image_url is not None:
             logging.debug("Downloading image.")
-            targetfile = urlparse(self.image_url).path.split("/")[-1]
-            filename = os.path.join("/tmp", targetfile)
-            if not os.path.isfile(filename):
-                self.image_tarball = self.download_images(
-                    self.image_url, filename
-                )
-                if not self.image_tarball:
-                    logging.error(
-                        "Unable to download {} from{}".format(
-                            self.image_tarball, self.image_url
-                        )
-                    )
-                    logging.error("Aborting")
-                    result = False
-            else:
-                logging.debug(
-                    "Template file {} already exists. "
-                    "Skipping Download.".format(filename)
-                )
-                self.image_tarball = filename
+            self.image_tarball = self.download_images(self.image_url)
+            if not self.image_tarball:
+                logging.error("Unable to download {}".format(self.image_url))
+                logging.error("Aborting")
+                result = False
 
         # Insert images
         if self.template_url is not None and self.image_url is not None:
@@ -925,16 +1084,16 @@ class LXDTest_vm(object):
                 result = False
         return result
 
-    def download_images(self, url, filename):
+    def download_images(self, url):
         """
         Downloads LXD files for same release as host machine
+
+        Files are kept in the image store, and only downloaded once.
         """
         # TODO: Clean this up to use a non-internet simplestream on MAAS server
-        logging.debug(
-            "Attempting download of {} from {}".format(filename, url)
-        )
+        logging.debug("Attempting download of {}".format(url))
         try:
-            urllib.request.urlretrieve(url, filename)
+            return self.image_store.fetch(url)
         except (
             IOError,
             OSError,
@@ -950,12 +1109,6 @@ class LXDTest_vm(object):
             logging.error("%s" % verr)
             return False
 
-        if not os.path.isfile(filename):
-            logging.warn("Can not find {}".format(filename))
-            return False
-
-        return filename
-
     def cleanup(self):
         """
         Clean up test files an Virtual Machines created
@@ -964,6 +1117,51 @@ class LXDTest_vm(object):
         self.run_command("lxc image delete {}".format(self.image_alias), False)
         self.run_command("lxc delete --force {}".format(self.name), False)
 
+    def start_monitor(self):
+        """
+        Start listening to the LXD lifecycle events, return the "lxc
+        monitor" process or None
+        """
+        try:
+            return Popen(
+                ["lxc", "monitor", "--type=lifecycle", "--format=json"],
+                stdout=PIPE,
+                stderr=DEVNULL,
+                bufsize=0,
+            )
+        except OSError as exception:
+            logging.debug("Unable to monitor LXD events: %s", exception)
+            return None
+
+    def wait_for_event(self, monitor, action, timeout):
+        """
+        Wait for a lifecycle event of the VM, as reported by monitor
+
+        Returns False if the event didn't come before timeout or if the
+        monitor exited (older LXD versions don't support the JSON format).
+        """
+        source = "/1.0/instances/{}".format(self.name)
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            readable, _, _ = select.select([monitor.stdout], [], [], remaining)
+            if not readable:
+                return False
+            line = monitor.stdout.readline()
+            if not line:
+                return False
+            try:
+                metadata = json.loads(line.decode("utf-8"))["metadata"]
+            except (ValueError, KeyError, TypeError):
+                continue
+            # the source has the project as query string, if any
+            event_source = metadata.get("source", "").split("?")[0]
+            if metadata.get("action") == action and event_source == source:
+                logging.debug("Received {} event".format(action))
+                return True
+
     def start_vm(self):
         """
         Creates an lxd virtual machine and performs the test
@@ -990,25 +1188,45 @@ class LXDTest_vm(object):
             return False
 
         logging.debug("Start VM:")
-        if not self.run_command("lxc start {} ".format(self.name)):
-            return False
+        # Listen to the events before starting the VM, not to miss any
+        monitor = self.start_monitor()
+        try:
+            boot_start = time.monotonic()
+            if not self.run_command("lxc start {} ".format(self.name)):
+                return False
+            if monitor and not self.wait_for_event(
+                monitor, "instance-started", LXD_EVENT_TIMEOUT
+            ):
+                logging.debug("No instance-started event received")
+        finally:
+            if monitor:
+                monitor.terminate()
+                monitor.wait()
 
         logging.debug("Virtual Machine listing:")
         if not self.run_command("lxc list"):
             return False
 
         logging.debug("Wait for vm to boot")
-        wait_interval = 5
+        # The VM can run commands as soon as its agent is up, which no event
+        # reports, so check right away and then back off
+        wait_interval = 0.5
         max_wait_duration = 300
         time_waited = 0
+        cmd = "lxc exec {} -- lsb_release -a".format(self.name)
         while time_waited < max_wait_duration:
-            time.sleep(wait_interval)
-            cmd = "lxc exec {} -- lsb_release -a".format(self.name)
             if self.run_command(cmd, False):
                 print("Vm started and booted successfully")
+                print(
+                    "Boot to ready: {:.1f} s".format(
+                        time.monotonic() - boot_start
+                    )
+                )
                 return True
             logging.debug("Re-verify VM booted")
+            time.sleep(wait_interval)
             time_waited += wait_interval
+            wait_interval = min(wait_interval * 2, 5)
 
         logging.debug("testing vm failed")
         return False
@@ -1110,6 +1328,28 @@ def test_kvm(args):
     sys.exit(result)
 
 
+def image_store(args):
+    store = ImageStore()
+    if args.action == "add":
+        path = store.add(args.file, args.url)
+        logging.info(
+            "Added {} to the image store as {}".format(args.url, path)
+        )
+    elif args.action == "refresh":
+        result = 0
+        for url in args.urls or list(store.list()):
+            try:
+                store.fetch(url, refresh=True)
+            except (OSError, ValueError) as exception:
+                logging.error("Unable to refresh %s: %s", url, exception)
+                result = 1
+        if result:
+            sys.exit(result)
+    print("Image store: {}".format(store.path))
+    for url, path in sorted(store.list().items()):
+        print("{}  {}".format(path.split(os.sep)[1], url))
+
+
 def main():
 
     parser = ArgumentParser(description="Virtualization Test")
@@ -1125,6 +1365,13 @@ def main():
     lxd_test_vm_parser = subparsers.add_parser(
         "lxdvm", help=("Run the LXD VM validation test")
     )
+    image_store_parser = subparsers.add_parser(
+        "image-store",
+        help=(
+            "List the images of the local image store, add images to it "
+            "(for offline use) or refresh them"
+        ),
+    )
     parser.add_argument(
         "--debug",
         dest="log_level",
@@ -1154,6 +1401,19 @@ def main():
     lxd_test_vm_parser.add_argument("--image", type=str, default=None)
     lxd_test_vm_parser.set_defaults(func=test_lxd_vm)
 
+    # Image store options
+    image_store_subparsers = image_store_parser.add_subparsers(dest="action")
+    image_store_add_parser = image_store_subparsers.add_parser(
+        "add", help="Add an image file, as downloaded from URL"
+    )
+    image_store_add_parser.add_argument("file", metavar="FILE")
+    image_store_add_parser.add_argument("url", metavar="URL")
+    image_store_refresh_parser = image_store_subparsers.add_parser(
+        "refresh", help="Download images again (all of them by default)"
+    )
+    image_store_refresh_parser.add_argument("urls", nargs="*", metavar="URL")
+    image_store_parser.set_defaults(func=image_store)
+
     args = parser.parse_args()
 
     try:
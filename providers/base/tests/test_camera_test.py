@@ -16,6 +16,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import errno
+import fcntl
 import logging
 import textwrap
 import sys
@@ -25,6 +26,15 @@ from unittest.mock import patch, MagicMock, call, mock_open
 
 from camera_test import (
     CameraTest,
+    StreamStats,
+    V4L2Stream,
+    VIDIOC_DQBUF,
+    VIDIOC_QUERYCAP,
+    V4L2_BUF_FLAG_ERROR,
+    V4L2_BUF_FLAG_TIMESTAMP_MONOTONIC,
+    V4L2_CAP_DEVICE_CAPS,
+    V4L2_CAP_STREAMING,
+    V4L2_CAP_VIDEO_CAPTURE,
     v4l2_capability,
     V4L2_FRMSIZE_TYPE_DISCRETE,
     V4L2_FRMSIZE_TYPE_STEPWISE,
@@ -822,3 +832,226 @@ class CameraTestTests(unittest.TestCase):
     def tearDown(self):
         # release stdout
         sys.stdout = sys.__stdout__
+
+
+class StreamStatsTests(unittest.TestCase):
+    def test_add_frame(self):
+        stats = StreamStats()
+        stats.add_frame(0, 10.0, 10.002)
+        stats.add_frame(1, 10.1, 10.101)
+        # two frames dropped by the driver
+        stats.add_frame(4, 10.4, 10.403, error=True)
+        self.assertEqual(stats.frames, 3)
+        self.assertEqual(stats.dropped, 2)
+        self.assertEqual(stats.errors, 1)
+        self.assertAlmostEqual(stats.fps, 5.0)
+        self.assertAlmostEqual(stats.jitter, 0.1)
+        self.assertEqual(
+            str(stats),
+            "5.00 fps, 3 frames, 2 dropped, 1 errors, jitter 100.00 ms, "
+            "latency 2.00 ms (max 3.00 ms)",
+        )
+
+    def test_no_frames(self):
+        stats = StreamStats()
+        self.assertEqual(stats.fps, 0.0)
+        self.assertEqual(stats.jitter, 0.0)
+        self.assertEqual(
+            str(stats),
+            "0.00 fps, 0 frames, 0 dropped, 0 errors, jitter 0.00 ms",
+        )
+
+
+class V4L2StreamTests(unittest.TestCase):
+    @patch("time.clock_gettime", return_value=5.5)
+    @patch("fcntl.ioctl")
+    def test_read_frames(self, mock_ioctl, mock_clock):
+        frames = [(7, 5.25, 0), (8, 5.375, V4L2_BUF_FLAG_ERROR)]
+
+        def ioctl(fd, request, buf):
+            if request != VIDIOC_DQBUF:
+                return 0
+            if not frames:
+                raise OSError(errno.EAGAIN, "Try again")
+            buf.sequence, timestamp, flags = frames.pop(0)
+            buf.timestamp.tv_sec = int(timestamp)
+            buf.timestamp.tv_usec = int(timestamp % 1 * 1e6)
+            buf.flags = flags | V4L2_BUF_FLAG_TIMESTAMP_MONOTONIC
+            buf.bytesused = 100
+            return 0
+
+        mock_ioctl.side_effect = ioctl
+        stream = V4L2Stream("/dev/video0")
+        stream.fd = 3
+        stream.read_frames()
+        self.assertEqual(stream.stats.frames, 2)
+        self.assertEqual(stream.stats.errors, 1)
+        self.assertEqual(stream.stats.latencies, [0.25, 0.125])
+        self.assertAlmostEqual(stream.stats.fps, 8.0)
+        # each frame is given back to the driver
+        self.assertEqual(mock_ioctl.call_count, 5)
+
+    @patch("os.close")
+    @patch("os.open", return_value=3)
+    @patch("fcntl.ioctl", side_effect=OSError(errno.EBUSY, "Busy"))
+    def test_start_error(self, mock_ioctl, mock_open, mock_close):
+        stream = V4L2Stream("/dev/video0")
+        with self.assertRaises(OSError):
+            stream.start(0x56595559, 640, 480)
+        mock_close.assert_called_once_with(3)
+        self.assertIsNone(stream.fd)
+
+
+class BenchmarkTests(unittest.TestCase):
+    FORMATS = [
+        {
+            "pixelformat": "YUYV",
+            "pixelformat_int": 0x56595559,
+            "resolutions": [[1280, 720], [640, 480]],
+        },
+        {
+            "pixelformat": "MJPG",
+            "pixelformat_int": 0x47504A4D,
+            "resolutions": [[1920, 1080]],
+        },
+    ]
+
+    def make_stream(self, device):
+        stream = MagicMock(device=device, width=640, height=480)
+        stream.nominal_fps = 30.0
+        stream.stats = StreamStats()
+        stream.stats.add_frame(0, 1.0)
+        stream.stats.add_frame(1, 1.5)
+        self.streams.append(stream)
+        return stream
+
+    def setUp(self):
+        self.streams = []
+        self.camera = CameraTest(devices=["/dev/video0", "/dev/video2"])
+        self.camera._run_streams = MagicMock()
+
+    @patch("camera_test.V4L2Stream")
+    def test_benchmark(self, mock_stream):
+        mock_stream.side_effect = self.make_stream
+        formats = {
+            "/dev/video0": self.FORMATS,
+            "/dev/video2": self.FORMATS[:1],
+        }
+        self.camera._get_supported_formats = formats.get
+        with patch("builtins.print") as mock_print:
+            self.assertEqual(self.camera.benchmark(), 0)
+        # both devices streamed during both rounds
+        self.assertEqual(self.camera._run_streams.call_count, 2)
+        self.assertEqual(len(self.streams), 4)
+        self.streams[0].start.assert_called_once_with(0x56595559, 1280, 720)
+        self.streams[2].start.assert_called_once_with(0x47504A4D, 1920, 1080)
+        # but the repeated configuration is only reported once
+        self.assertEqual(mock_print.call_count, 3)
+        self.assertIn(
+            "/dev/video0 YUYV 640x480: 2.00 fps, 2 frames",
+            mock_print.call_args_list[0][0][0],
+        )
+        self.assertIn(
+            "(nominal 30.00 fps)", mock_print.call_args_list[0][0][0]
+        )
+        for stream in self.streams:
+            stream.stop.assert_called_once_with()
+
+    @patch("camera_test.V4L2Stream")
+    def test_benchmark_all_resolutions(self, mock_stream):
+        mock_stream.side_effect = self.make_stream
+        self.camera.devices = ["/dev/video0"]
+        self.camera.all_resolutions = True
+        self.camera._get_supported_formats = lambda device: self.FORMATS
+        with patch("builtins.print"):
+            self.assertEqual(self.camera.benchmark(), 0)
+        self.assertEqual(len(self.streams), 3)
+
+    @patch("camera_test.V4L2Stream")
+    def test_benchmark_failures(self, mock_stream):
+        mock_stream.side_effect = self.make_stream
+        self.camera._get_supported_formats = lambda device: self.FORMATS[:1]
+
+        def start(stream):
+            stream.start.side_effect = OSError(errno.ENOSPC, "No space")
+            return stream
+
+        mock_stream.side_effect = lambda device: (
+            start(self.make_stream(device))
+            if device == "/dev/video2"
+            else self.make_stream(device)
+        )
+        with patch("builtins.print") as mock_print:
+            self.assertEqual(self.camera.benchmark(), 1)
+        self.assertEqual(
+            mock_print.call_args_list[0][0][0],
+            "/dev/video2 YUYV 1280x720: unable to stream: [Errno 28] No space",
+        )
+        # the other device was still measured
+        self.assertIn("/dev/video0", mock_print.call_args_list[1][0][0])
+
+    def test_benchmark_no_formats(self):
+        self.camera._get_supported_formats = lambda device: [
+            {"pixelformat": "YUYV", "resolutions": [[640, 480]]}
+        ]
+        with self.assertRaises(SystemExit):
+            self.camera.benchmark()
+
+    @patch("camera_test.glob")
+    @patch("builtins.open", MagicMock())
+    @patch("fcntl.ioctl")
+    def test_get_capture_devices(self, mock_ioctl, mock_glob):
+        mock_glob.return_value = ["/dev/video10", "/dev/video1", "/dev/video2"]
+        caps = {
+            # capture node of a device with a metadata node
+            "/dev/video1": V4L2_CAP_VIDEO_CAPTURE | V4L2_CAP_STREAMING,
+            # metadata node
+            "/dev/video2": 0,
+            "/dev/video10": V4L2_CAP_VIDEO_CAPTURE | V4L2_CAP_STREAMING,
+        }
+        devices = iter(["/dev/video1", "/dev/video2", "/dev/video10"])
+
+        def ioctl(fd, request, cp):
+            cp.capabilities = (
+                V4L2_CAP_VIDEO_CAPTURE
+                | V4L2_CAP_STREAMING
+                | V4L2_CAP_DEVICE_CAPS
+            )
+            cp.device_caps = caps[next(devices)]
+
+        mock_ioctl.side_effect = ioctl
+        self.assertEqual(
+            self.camera._get_capture_devices(), ["/dev/video1", "/dev/video10"]
+        )
+
+    def test_benchmark_subparser(self):
+        args = parse_arguments(
+            ["benchmark", "-d", "/dev/video0", "-d", "/dev/video2", "-t", "2"]
+        )
+        self.assertEqual(args["devices"], ["/dev/video0", "/dev/video2"])
+        self.assertEqual(args["duration"], 2.0)
+        self.assertFalse(args["all_resolutions"])
+        args = parse_arguments(["benchmark"])
+        self.assertIsNone(args["devices"])
+
+
+def get_vivid_devices():
+    devices = []
+    for device in CameraTest()._get_capture_devices():
+        cp = v4l2_capability()
+        with open(device, "r") as vd:
+            fcntl.ioctl(vd, VIDIOC_QUERYCAP, cp)
+        if cp.driver == b"vivid":
+            devices.append(device)
+    return devices
+
+
+class VividBenchmarkTests(unittest.TestCase):
+    """Stream from the vivid virtual driver, when it is loaded"""
+
+    def test_benchmark(self):
+        devices = get_vivid_devices()
+        if not devices:
+            self.skipTest("vivid is not loaded")
+        camera = CameraTest(devices=devices, duration=1)
+        self.assertEqual(camera.benchmark(), 0)
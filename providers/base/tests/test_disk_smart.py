@@ -0,0 +1,219 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, call, patch
+
+import disk_smart
+
+IN_PROGRESS = [
+    {
+        "number": 1,
+        "description": "Short offline",
+        "status": "Self-test routine in progress",
+        "remaining": "90%",
+        "lifetime": "100",
+        "lba": "-",
+    }
+]
+COMPLETED = [
+    {
+        "number": 1,
+        "description": "Short offline",
+        "status": "Completed without error",
+        "remaining": "00%",
+        "lifetime": "100",
+        "lba": "-",
+    }
+]
+
+
+class TestSmartTestTarget(unittest.TestCase):
+    def test_name(self):
+        target = disk_smart.SmartTestTarget("/dev/sda", -1, "none")
+        self.assertEqual(target.name, "/dev/sda")
+        target = disk_smart.SmartTestTarget("/dev/sda", 2, "megaraid")
+        self.assertEqual(target.name, "/dev/sda, element 2")
+
+    @patch("disk_smart.initiate_smart_test", return_value=0)
+    @patch("disk_smart.get_smart_entries")
+    def test_start(self, mock_entries, mock_initiate):
+        mock_entries.return_value = (["No entries found in log yet"], "", 0)
+        target = disk_smart.SmartTestTarget("/dev/sda", -1, "none")
+        with patch("time.monotonic", return_value=100):
+            self.assertTrue(target.start(timeout=30))
+        self.assertEqual(target.deadline, 130)
+        mock_initiate.assert_called_once_with("/dev/sda", -1, "none")
+
+    @patch("disk_smart.initiate_smart_test", return_value=4)
+    @patch("disk_smart.get_smart_entries")
+    def test_start_failure(self, mock_entries, mock_initiate):
+        mock_entries.return_value = (["No entries found in log yet"], "", 0)
+        target = disk_smart.SmartTestTarget("/dev/sda", -1, "none")
+        self.assertFalse(target.start())
+        self.assertEqual(target.returncode, 1)
+
+    @patch("disk_smart.initiate_smart_test", return_value=0)
+    @patch("disk_smart.get_smart_entries")
+    def test_start_restarts_on_long_log(self, mock_entries, mock_initiate):
+        mock_entries.return_value = (COMPLETED * 21, "", 0)
+        target = disk_smart.SmartTestTarget("/dev/sda", -1, "none")
+        target.start()
+        self.assertEqual(mock_initiate.call_count, 2)
+
+    @patch("disk_smart.get_smart_entries")
+    def test_poll(self, mock_entries):
+        target = disk_smart.SmartTestTarget("/dev/sda", -1, "none")
+        target.previous_entries = []
+        target.started = 0
+        mock_entries.return_value = (IN_PROGRESS, "", 0)
+        self.assertFalse(target.poll())
+        mock_entries.return_value = (COMPLETED, "", 0)
+        self.assertTrue(target.poll())
+        self.assertEqual(target.status, "Completed without error")
+        self.assertEqual(target.returncode, 0)
+
+    @patch("disk_smart.get_smart_entries")
+    def test_poll_timeout(self, mock_entries):
+        target = disk_smart.SmartTestTarget("/dev/sda", -1, "none")
+        target.started = 0
+        target.deadline = 10
+        mock_entries.return_value = (IN_PROGRESS, "", 0)
+        with patch("time.monotonic", return_value=11):
+            self.assertTrue(target.poll())
+        self.assertEqual(target.status, "Polling timed out")
+        self.assertEqual(target.returncode, 1)
+
+
+class TestRunSmartTestsConcurrently(unittest.TestCase):
+    @patch("time.sleep")
+    @patch("disk_smart.initiate_smart_test", return_value=0)
+    @patch("disk_smart.get_smart_entries")
+    def test_all_started_before_polling(
+        self, mock_entries, mock_initiate, mock_sleep
+    ):
+        log = {"/dev/sda": [[], IN_PROGRESS, COMPLETED]}
+        log["/dev/sdb"] = [[], COMPLETED]
+
+        def entries(disk, raid_element, raid_type, verbose=False):
+            history = log[disk]
+            value = history.pop(0) if len(history) > 1 else history[0]
+            return value, "", 0
+
+        mock_entries.side_effect = entries
+        args = MagicMock(sleep=5, timeout=None, max_parallel=4)
+        targets = [
+            disk_smart.SmartTestTarget("/dev/sda", -1, "none"),
+            disk_smart.SmartTestTarget("/dev/sdb", -1, "none"),
+        ]
+        self.assertTrue(disk_smart.run_smart_tests_concurrently(args, targets))
+        self.assertEqual(
+            mock_initiate.call_args_list,
+            [call("/dev/sda", -1, "none"), call("/dev/sdb", -1, "none")],
+        )
+        # sdb finished in the first round, sda in the second one
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    @patch("time.sleep")
+    @patch("disk_smart.initiate_smart_test", return_value=0)
+    @patch("disk_smart.get_smart_entries")
+    def test_one_failure(self, mock_entries, mock_initiate, mock_sleep):
+        def entries(disk, raid_element, raid_type, verbose=False):
+            if disk == "/dev/sdb":
+                return COMPLETED, "", 64
+            return COMPLETED, "", 0
+
+        mock_entries.side_effect = entries
+        args = MagicMock(sleep=5, timeout=None, max_parallel=4)
+        targets = [
+            disk_smart.SmartTestTarget("/dev/sda", -1, "none"),
+            disk_smart.SmartTestTarget("/dev/sdb", -1, "none"),
+        ]
+        # the log of each disk is the same before and after the test
+        targets[0].previous_entries = targets[1].previous_entries = []
+        with patch.object(
+            disk_smart.SmartTestTarget, "start", return_value=True
+        ), patch("time.monotonic", return_value=0):
+            for target in targets:
+                target.started = 0
+            self.assertFalse(
+                disk_smart.run_smart_tests_concurrently(args, targets)
+            )
+        self.assertEqual(targets[0].returncode, 0)
+        self.assertEqual(targets[1].returncode, 64)
+
+
+class TestFindSmartDisks(unittest.TestCase):
+    @patch("disk_smart.check_output")
+    def test_smart_available(self, mock_check_output):
+        mock_check_output.return_value = "SMART support is: Available\n"
+        self.assertTrue(disk_smart.smart_available("/dev/sda"))
+        mock_check_output.return_value = "SMART support is: Unavailable\n"
+        self.assertFalse(disk_smart.smart_available("/dev/sda"))
+        mock_check_output.return_value = "use -d megaraid,N\n"
+        self.assertTrue(disk_smart.smart_available("/dev/sda"))
+
+    @patch("disk_smart.smart_available")
+    def test_find_smart_disks(self, mock_smart_available):
+        mock_smart_available.side_effect = lambda disk: disk != "/dev/sdb"
+        with tempfile.TemporaryDirectory() as sys_block:
+            for name in ("sdb", "sda", "nvme0n1"):
+                os.makedirs(os.path.join(sys_block, name, "device"))
+            os.makedirs(os.path.join(sys_block, "loop0"))
+            disks = disk_smart.find_smart_disks(sys_block)
+        self.assertEqual(disks, ["/dev/nvme0n1", "/dev/sda"])
+
+
+@patch("logging.getLogger", MagicMock())
+class TestMain(unittest.TestCase):
+    @patch("os.geteuid", return_value=0)
+    @patch("disk_smart.run_smart_tests_concurrently", return_value=True)
+    @patch("disk_smart.enable_smart", return_value=True)
+    @patch("disk_smart.count_raid_disks")
+    def test_parallel_targets(
+        self, mock_count, mock_enable, mock_run, mock_geteuid
+    ):
+        mock_count.side_effect = [(0, "none"), (2, "megaraid")]
+        argv = ["disk_smart.py", "-p", "-b", "/dev/sda", "/dev/sdb"]
+        with patch("sys.argv", argv):
+            self.assertEqual(disk_smart.main(), 0)
+        targets = mock_run.call_args[0][1]
+        self.assertEqual(
+            [target.name for target in targets],
+            ["/dev/sda", "/dev/sdb, element 0", "/dev/sdb, element 1"],
+        )
+
+    @patch("os.geteuid", return_value=0)
+    @patch("disk_smart.run_disk_smart_tests", return_value=False)
+    def test_serial(self, mock_run, mock_geteuid):
+        argv = ["disk_smart.py", "-b", "/dev/sda", "/dev/sdb"]
+        with patch("sys.argv", argv):
+            self.assertEqual(disk_smart.main(), 1)
+        self.assertEqual(mock_run.call_count, 2)
+
+    @patch("os.geteuid", return_value=0)
+    @patch("time.sleep")
+    @patch("disk_smart.initiate_smart_test", return_value=0)
+    @patch("disk_smart.enable_smart", return_value=True)
+    @patch("disk_smart.count_raid_disks", return_value=(0, "none"))
+    @patch("disk_smart.get_smart_entries")
+    def test_serial_timeout_per_disk(
+        self,
+        mock_entries,
+        mock_count,
+        mock_enable,
+        mock_initiate,
+        mock_sleep,
+        mock_geteuid,
+    ):
+        # each disk completes on the second poll, using up the whole
+        # timeout: the second disk must not inherit what the first left
+        mock_entries.side_effect = [
+            ([], "", 0),
+            (IN_PROGRESS, "", 0),
+            (COMPLETED, "", 0),
+        ] * 2
+        argv = ["disk_smart.py", "-b", "/dev/sda", "/dev/sdb"]
+        argv += ["-s", "5", "-t", "10"]
+        with patch("sys.argv", argv):
+            self.assertEqual(disk_smart.main(), 0)
+        self.assertEqual(mock_entries.call_count, 6)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from subprocess import PIPE, Popen
+from unittest.mock import patch
+
+from memory_test import (
+    MemoryTest,
+    NumaNode,
+    Worker,
+    get_numa_nodes,
+    parse_cpu_list,
+)
+
+MEMINFO = """\
+Node {0} MemTotal:        {1} kB
+Node {0} MemFree:         {2} kB
+Node {0} MemUsed:         1754864 kB
+Node {0} FilePages:       {3} kB
+"""
+
+FAKE_MEMTEST = """\
+#!/bin/sh
+echo "Testing $2 RAM"
+if [ -n "$CORRUPT" ]; then echo "MEMORY CORRUPTION DETECTED" >&2; fi
+echo "Total loops per second: 100.00"
+"""
+
+
+class NumaTopologyTests(unittest.TestCase):
+    def setUp(self):
+        self.sysfs = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.sysfs)
+
+    def add_node(self, node_id, cpulist, total, free, file_pages):
+        path = os.path.join(self.sysfs, "node%u" % node_id)
+        os.mkdir(path)
+        with open(os.path.join(path, "meminfo"), "w") as stream:
+            stream.write(MEMINFO.format(node_id, total, free, file_pages))
+        with open(os.path.join(path, "cpulist"), "w") as stream:
+            stream.write(cpulist + "\n")
+
+    def test_parse_cpu_list(self):
+        self.assertEqual(parse_cpu_list("0-3,8\n"), [0, 1, 2, 3, 8])
+        self.assertEqual(parse_cpu_list("\n"), [])
+
+    def test_get_numa_nodes(self):
+        self.add_node(10, "4-5", 2048 * 1024, 1024 * 1024, 512 * 1024)
+        self.add_node(2, "0-3", 4096 * 1024, 2048 * 1024, 0)
+        # CPU-only node
+        self.add_node(3, "6", 0, 0, 0)
+        os.mkdir(os.path.join(self.sysfs, "power"))
+        nodes = get_numa_nodes(self.sysfs)
+        self.assertEqual([node.node_id for node in nodes], [2, 10])
+        self.assertEqual(nodes[0].cpus, [0, 1, 2, 3])
+        self.assertEqual(nodes[0].total_memory, 4096)
+        self.assertEqual(nodes[1].free_memory, 1536)
+
+    def test_get_numa_nodes_missing(self):
+        self.assertEqual(get_numa_nodes(os.path.join(self.sysfs, "x")), [])
+
+
+class MemoryTestWorkersTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.script = os.path.join(self.tmp, "threaded_memtest")
+        with open(self.script, "w") as stream:
+            stream.write(FAKE_MEMTEST)
+        os.chmod(self.script, 0o755)
+        patcher = patch.object(
+            MemoryTest,
+            "threaded_memtest_script",
+            new=self.script,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_collect_output(self):
+        test = MemoryTest()
+        workers = [
+            Worker(
+                "w%u" % i,
+                Popen(
+                    ["sh", "-c", "echo a; sleep 0.%u; printf b" % i],
+                    stdout=PIPE,
+                    stderr=PIPE,
+                ),
+            )
+            for i in range(3)
+        ]
+        with patch("sys.stdout", new=io.StringIO()) as stdout:
+            test.collect_output(workers)
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(
+            sorted(lines),
+            sorted(["w0: a", "w1: a", "w2: a", "w0: b", "w1: b", "w2: b"]),
+        )
+        self.assertTrue(all(w.proc.returncode == 0 for w in workers))
+
+    def test_run_processes(self):
+        test = MemoryTest()
+        with patch("sys.stdout", new=io.StringIO()) as stdout:
+            self.assertTrue(test.run_processes(2, self.script + " -m 1m"))
+        self.assertIn("process 1", stdout.getvalue())
+
+    @patch("shutil.which", return_value=None)
+    @patch("os.sched_setaffinity")
+    def test_run_numa_test(self, mock_affinity, mock_which):
+        test = MemoryTest()
+        test.is_process_limited = True
+        test.process_memory = 1024
+        nodes = [
+            NumaNode(0, [0, 1], 4096, 1500),
+            NumaNode(1, [2, 3], 4096, 800),
+            NumaNode(2, [], 4096, 800),
+        ]
+        with patch("sys.stdout", new=io.StringIO()) as stdout:
+            self.assertTrue(test.run_numa_test(nodes, 1))
+        # split to respect the per-process limit
+        self.assertEqual(len(nodes[0].workers), 2)
+        self.assertEqual(len(nodes[1].workers), 1)
+        # no way to use a node without CPU and numactl
+        self.assertEqual(nodes[2].workers, [])
+        self.assertEqual(nodes[0].loops_per_second, 200.0)
+        output = stdout.getvalue()
+        self.assertIn("Testing -m750m RAM", output)
+        self.assertIn(
+            "Node 1: 1 process(es), 100.00 loops per second, 0 error(s)",
+            output,
+        )
+
+    @patch("shutil.which", return_value=None)
+    @patch("os.sched_setaffinity")
+    def test_run_numa_test_corruption(self, mock_affinity, mock_which):
+        test = MemoryTest()
+        nodes = [NumaNode(0, [0], 4096, 100)]
+        with patch.dict(os.environ, {"CORRUPT": "1"}), patch(
+            "sys.stdout", new=io.StringIO()
+        ), patch("sys.stderr", new=io.StringIO()) as stderr:
+            self.assertFalse(test.run_numa_test(nodes, 1))
+        self.assertEqual(nodes[0].errors, 1)
+        self.assertIn(
+            "node 0: 1 memory corruption(s) so far", stderr.getvalue()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,6 +12,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
 import unittest
 import subprocess
 from unittest.mock import patch, mock_open, Mock, call
@@ -43,6 +44,185 @@ class IPerfPerfomanceTestTests(unittest.TestCase):
             self.assertEqual(returned, -1)
 
 
+def iperf3_interval(start, mbps, retransmits=0, omitted=False):
+    return {
+        "streams": [],
+        "sum": {
+            "start": start,
+            "end": start + 1.0,
+            "bits_per_second": mbps * 1e6,
+            "retransmits": retransmits,
+            "omitted": omitted,
+        },
+    }
+
+
+IPERF3_END = {
+    "sum_sent": {"bits_per_second": 905e6, "retransmits": 3},
+    "sum_received": {"bits_per_second": 900e6},
+    "cpu_utilization_percent": {"host_total": 12.5, "remote_total": 3.0},
+}
+
+
+class IPerf3ResultTests(unittest.TestCase):
+    def test_json_stream(self):
+        events = [
+            {"event": "start", "data": {"version": "iperf 3.17"}},
+            {"event": "interval", "data": iperf3_interval(0, 880, 1)},
+            {"event": "interval", "data": iperf3_interval(1, 920, 2)},
+            {"event": "end", "data": IPERF3_END},
+        ]
+        result = network.IPerf3Result(5201)
+        samples = [result.feed(json.dumps(e) + "\n") for e in events]
+        result.finish()
+        self.assertEqual(samples[0], None)
+        self.assertEqual(samples[1]["throughput"], 880)
+        self.assertEqual(len(result.intervals), 2)
+        self.assertEqual(result.throughput, 900)
+        self.assertEqual(result.retransmits, 3)
+        self.assertEqual(result.cpu, 12.5)
+        self.assertIsNone(result.error)
+
+    def test_json_document(self):
+        document = {
+            "start": {},
+            "intervals": [
+                iperf3_interval(0, 100, omitted=True),
+                iperf3_interval(1, 880),
+            ],
+            "end": IPERF3_END,
+        }
+        result = network.IPerf3Result()
+        for line in json.dumps(document, indent=4).splitlines(True):
+            self.assertIsNone(result.feed(line))
+        result.finish()
+        self.assertEqual(len(result.intervals), 1)
+        self.assertEqual(result.throughput, 900)
+
+    def test_interrupted_stream_uses_intervals(self):
+        result = network.IPerf3Result()
+        for mbps in (800, 1000):
+            result.feed(
+                json.dumps(
+                    {"event": "interval", "data": iperf3_interval(0, mbps, 2)}
+                )
+            )
+        result.finish()
+        self.assertEqual(result.throughput, 900)
+        self.assertEqual(result.retransmits, 4)
+        self.assertIsNone(result.cpu)
+
+    def test_error(self):
+        document = {
+            "start": {},
+            "intervals": [],
+            "end": {},
+            "error": "unable to connect to server: Connection refused",
+        }
+        result = network.IPerf3Result()
+        for line in json.dumps(document, indent=4).splitlines(True):
+            result.feed(line)
+        result.finish()
+        self.assertIn("unable to connect", result.error)
+        self.assertEqual(result.throughput, 0)
+
+    def test_aggregate(self):
+        streams = []
+        for retransmits in (1, 2):
+            result = network.IPerf3Result()
+            result.feed(
+                json.dumps(
+                    {
+                        "event": "interval",
+                        "data": iperf3_interval(0, 450, retransmits),
+                    }
+                )
+            )
+            result.feed(json.dumps({"event": "end", "data": IPERF3_END}))
+            streams.append(result)
+        summary = network.aggregate_iperf3_results(streams)
+        self.assertEqual(summary["streams"], 2)
+        self.assertEqual(summary["throughput"], 1800)
+        self.assertEqual(summary["retransmits"], 6)
+        self.assertEqual(summary["cpu"], 12.5)
+        self.assertEqual(summary["intervals"][0]["throughput"], 900)
+        self.assertEqual(summary["intervals"][0]["retransmits"], 3)
+        self.assertEqual(summary["intervals"][0]["streams"], 2)
+
+    @patch("network.check_output")
+    def test_json_option(self, mock_check_output):
+        mock_check_output.return_value = "iperf 3.17.1 (cJSON 1.7.15)\n"
+        self.assertEqual(network.iperf3_json_option(), "--json-stream")
+        mock_check_output.return_value = "iperf 3.9 (cJSON 1.7.13)\n"
+        self.assertEqual(network.iperf3_json_option(), "--json")
+        mock_check_output.side_effect = FileNotFoundError
+        self.assertEqual(network.iperf3_json_option(), "--json")
+
+
+class IPerf3ThreadTests(unittest.TestCase):
+    def setUp(self):
+        network.results.clear()
+        self.addCleanup(network.results.clear)
+        self.benchmark = network.IPerfPerformanceTest.__new__(
+            network.IPerfPerformanceTest
+        )
+        self.benchmark.iperf3 = True
+
+    def popen(self, lines, returncode=0):
+        process = Mock(stdout=lines, returncode=returncode)
+        process.__enter__ = Mock(return_value=process)
+        process.__exit__ = Mock(return_value=False)
+        return process
+
+    @patch("subprocess.Popen")
+    def test_run_one_iperf3_thread(self, mock_popen):
+        mock_popen.return_value = self.popen(
+            [
+                json.dumps(
+                    {"event": "interval", "data": iperf3_interval(0, 1)}
+                ),
+                json.dumps({"event": "end", "data": IPERF3_END}),
+            ]
+        )
+        self.assertIsNone(
+            self.benchmark.run_one_iperf3_thread("iperf3 -c x", 5201, 3)
+        )
+        self.assertEqual(mock_popen.call_args[0][0][-2:], ["-p", "5201"])
+        self.assertEqual(self.benchmark.summarize_speeds(), 900)
+        self.assertEqual(self.benchmark.summarize_cpu(), 12.5)
+        self.assertEqual(network.results[0].core, 3)
+
+    @patch("subprocess.Popen")
+    def test_run_one_iperf3_thread_error(self, mock_popen):
+        error = {"event": "error", "data": "unable to connect to server"}
+        mock_popen.return_value = self.popen([json.dumps(error)], 1)
+        with self.assertLogs(level="ERROR"):
+            returned = self.benchmark.run_one_iperf3_thread("iperf3", 5201)
+        self.assertEqual(returned, 1)
+        self.assertEqual(network.results, [])
+
+    @patch("subprocess.Popen")
+    def test_run_one_iperf3_thread_timeout(self, mock_popen):
+        interval = {"event": "interval", "data": iperf3_interval(0, 10)}
+        mock_popen.return_value = self.popen([json.dumps(interval)], 124)
+        with self.assertLogs(level="WARNING"):
+            self.benchmark.run_one_iperf3_thread("iperf3", 5201)
+        self.assertEqual(self.benchmark.summarize_speeds(), 10)
+
+    def test_write_report(self):
+        self.benchmark.interface = "eth0"
+        self.benchmark.fail_threshold = 80
+        self.benchmark.cpu_load_fail_threshold = 90
+        self.benchmark.optimization = [{"threads": 2, "throughput": 10.0}]
+        self.benchmark.reports = [{"outcome": "pass"}]
+        with patch("builtins.open", mock_open()) as mo:
+            self.benchmark.write_report("report.json")
+        written = "".join(c.args[0] for c in mo().write.call_args_list)
+        report = json.loads(written)
+        self.assertEqual(report["interface"], "eth0")
+        self.assertEqual(report["runs"], [{"outcome": "pass"}])
+
+
 class NetworkTests(unittest.TestCase):
     @patch("network.Interface")
     @patch("pathlib.Path.glob")
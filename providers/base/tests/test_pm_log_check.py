@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from pm_log_check import NOT_FINISHED, Parser
+
+PREFIX = "2026-01-01 00:00:{:02d},000 "
+
+LSPCI = "00:02.0 VGA compatible controller\n- not a field\n00:14.0 USB\n"
+
+
+def iteration(second, outputs):
+    """
+    Log of one iteration, outputs maps the commands to their stdout (or to
+    None for a command with no output)
+    """
+    lines = [
+        PREFIX.format(second) + "INFO     Gathering hardware information..."
+    ]
+    for command, stdout in outputs:
+        lines.append(
+            PREFIX.format(second)
+            + "DEBUG    Executing: {!r}...".format(command)
+        )
+        if stdout is not None:
+            lines.append(PREFIX.format(second) + "DEBUG    Output:")
+            lines.append("- returncode:\n0")
+            lines.append("- stdout:\n" + stdout.rstrip("\n"))
+    return "\n".join(lines) + "\n"
+
+
+COMPLETE = PREFIX.format(59) + "INFO     Reboot test complete\n"
+
+
+class ParserTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def parse(self, log):
+        filename = os.path.join(self.tmp, "pm.log")
+        with open(filename, "w") as f:
+            f.write(log)
+        parser = Parser(filename)
+        return parser, parser.parse()
+
+    def test_matching_iterations(self):
+        outputs = [("lspci", LSPCI), ("true", None), ("lsusb", "Bus 001\n")]
+        log = iteration(1, outputs) + iteration(2, outputs) + COMPLETE
+        with patch("pm_log_check.logging") as logging_mock:
+            parser, success = self.parse(log)
+        self.assertTrue(success)
+        self.assertEqual(parser.iterations, 2)
+        logging_mock.error.assert_not_called()
+        # Commands with no output are not compared
+        self.assertEqual(list(parser.baseline), ["lspci", "lsusb"])
+        # Field values span as many lines as needed
+        self.assertEqual(
+            parser.baseline["lspci"], {"returncode": "0\n", "stdout": LSPCI}
+        )
+
+    def test_mismatching_iterations(self):
+        log = (
+            iteration(1, [("lspci", LSPCI), ("lsusb", "Bus 001\n")])
+            + iteration(2, [("lspci", LSPCI), ("lsusb", "Bus 002\n")])
+            + iteration(3, [("lspci", LSPCI), ("lsusb", "Bus 001\n")])
+            + COMPLETE
+        )
+        with self.assertLogs(level="ERROR") as logs:
+            parser, success = self.parse(log)
+        self.assertFalse(success)
+        self.assertEqual(parser.iterations, 3)
+        self.assertIn("[Iteration 1] lsusb...\t[FAIL]", logs.output[0])
+        self.assertFalse(
+            any("[Iteration 2]" in output for output in logs.output)
+        )
+        self.assertFalse(any("lspci" in output for output in logs.output))
+
+    def test_command_without_output_in_one_iteration(self):
+        log = (
+            iteration(1, [("lspci", None), ("lsusb", "Bus 001\n")])
+            + iteration(2, [("lspci", LSPCI), ("lsusb", "Bus 001\n")])
+            + COMPLETE
+        )
+        with patch("pm_log_check.logging"):
+            parser, success = self.parse(log)
+        # Only the commands of the baseline are compared
+        self.assertTrue(success)
+        self.assertEqual(list(parser.baseline), ["lsusb"])
+
+    @patch("sys.stderr")
+    def test_unfinished_log(self, stderr_mock):
+        log = iteration(1, [("lsusb", "Bus 001\n")]) + iteration(
+            2, [("lsusb", "Bus 002\n")]
+        )
+        with patch("pm_log_check.logging") as logging_mock:
+            with self.assertRaises(SystemExit) as context:
+                self.parse(log)
+        self.assertEqual(context.exception.code, NOT_FINISHED)
+        logging_mock.error.assert_not_called()
+
+    @patch("sys.stderr")
+    def test_empty_log(self, stderr_mock):
+        with self.assertRaises(SystemExit) as context:
+            self.parse("")
+        self.assertEqual(context.exception.code, NOT_FINISHED)
+
+
+if __name__ == "__main__":
+    unittest.main()
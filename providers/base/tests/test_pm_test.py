@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.modules["gi"] = MagicMock()
+sys.modules["gi.repository"] = MagicMock()
+
+import pm_test  # noqa: E402
+from pm_test import (  # noqa: E402
+    FastCycleOperation,
+    MyArgumentParser,
+    get_cycle_timings,
+    get_sysfs_hw_list,
+)
+
+
+class SysfsHwListTests(unittest.TestCase):
+    def setUp(self):
+        self.sysfs = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.sysfs)
+
+    def add_device(self, bus, name, **attributes):
+        path = os.path.join(self.sysfs, "bus", bus, "devices", name)
+        os.makedirs(path)
+        for attribute, value in attributes.items():
+            with open(os.path.join(path, attribute), "w") as f:
+                f.write(value + "\n")
+
+    def test_get_sysfs_hw_list(self):
+        self.add_device(
+            "pci",
+            "0000:00:02.0",
+            vendor="0x8086",
+            device="0x46a6",
+            **{"class": "0x030000"}
+        )
+        self.add_device("usb", "1-1", idVendor="046d", idProduct="c52b")
+        # interface
+        self.add_device("usb", "1-1:1.0")
+        self.assertEqual(
+            get_sysfs_hw_list(self.sysfs),
+            "pci 0000:00:02.0 0x8086 0x46a6 0x030000\nusb 1-1 046d c52b",
+        )
+
+    def test_get_sysfs_hw_list_nothing(self):
+        self.assertEqual(get_sysfs_hw_list(self.sysfs), "")
+
+
+class CycleTimingsTests(unittest.TestCase):
+    def test_get_cycle_timings(self):
+        timestamps = {
+            "FirmwareTimestampMonotonic": 8000000,
+            "UserspaceTimestampMonotonic": 3000000,
+            "FinishTimestampMonotonic": 13000000,
+        }
+        self.assertEqual(
+            get_cycle_timings(1000.0, 1020.0, timestamps, 14.5),
+            {
+                "shutdown": 12.0,
+                "firmware": 8.0,
+                "kernel": 3.0,
+                "userspace": 10.0,
+                "ready": 1.5,
+            },
+        )
+
+    def test_get_cycle_timings_unknown(self):
+        timestamps = {
+            "FirmwareTimestampMonotonic": 0,
+            "UserspaceTimestampMonotonic": 3000000,
+            "FinishTimestampMonotonic": 0,
+        }
+        self.assertEqual(
+            get_cycle_timings(1000.0, 1020.0, timestamps, 4.0),
+            {
+                "shutdown": 20.0,
+                "firmware": None,
+                "kernel": 3.0,
+                "userspace": None,
+                "ready": 1.0,
+            },
+        )
+
+
+@patch("pm_test.FastCycleService", new=MagicMock())
+class FastCycleOperationTests(unittest.TestCase):
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.log_dir)
+
+    def make_operation(self, *argv):
+        argv = [
+            "pm_test.py",
+            "--fast-cycle",
+            "--log-dir",
+            self.log_dir,
+            "--check-hardware-list",
+        ] + list(argv)
+        with patch("sys.argv", argv):
+            args, extra_args = MyArgumentParser().parse()
+        return FastCycleOperation(args, extra_args, user="ubuntu")
+
+    @patch("pm_test.get_sysfs_hw_list", return_value="pci a\nusb b")
+    @patch.object(FastCycleOperation, "execute_pm_command")
+    def test_cycles(self, mock_execute, mock_hw_list):
+        operation = self.make_operation("-r", "2", "reboot")
+        self.assertTrue(operation.args.silent)
+        operation.setup()
+        operation.service.enable.assert_called_once_with()
+        operation.run()
+        mock_execute.assert_called_once_with(operation.SLEEP_TIME)
+
+        # next boot, from the service
+        operation = self.make_operation("--append", "--total", "2", "reboot")
+        operation.setup()
+        self.assertEqual(operation.args.repetitions, 1)
+        with patch.object(operation, "wait_for_boot"), patch(
+            "pm_test.get_boot_timestamps",
+            return_value=dict.fromkeys(pm_test.BOOT_TIMESTAMPS, 0),
+        ):
+            operation.run()
+        mock_execute.assert_called_with(0)
+        with open(operation.timings_filename) as f:
+            timings = json.loads(f.read())
+        self.assertEqual(timings["cycle"], 1)
+        self.assertIsNone(timings["firmware"])
+
+        # last boot
+        operation = self.make_operation("--append", "--total", "2", "reboot")
+        operation.setup()
+        with patch.object(operation, "wait_for_boot"), patch(
+            "pm_test.get_boot_timestamps",
+            return_value=dict.fromkeys(pm_test.BOOT_TIMESTAMPS, 0),
+        ), patch.object(operation, "respawn_checkbox") as mock_respawn:
+            operation.run()
+        mock_respawn.assert_called_once_with()
+        operation.service.disable.assert_called_with()
+        self.assertFalse(os.path.exists(operation.state_filename))
+        with open(operation.timings_filename) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    @patch.object(FastCycleOperation, "execute_pm_command")
+    def test_hardware_checked_once_after_boot(self, mock_execute):
+        operation = self.make_operation("-r", "2", "reboot")
+        with patch.object(operation, "check_hw_list") as mock_check:
+            operation.setup()
+            operation.run()
+        # Not while the system goes down
+        mock_check.assert_not_called()
+        operation = self.make_operation("--append", "--total", "2", "reboot")
+        operation.setup()
+        with patch.object(operation, "wait_for_boot"), patch.object(
+            operation, "record_timings"
+        ), patch.object(operation, "check_hw_list") as mock_check:
+            operation.run()
+        mock_check.assert_called_once_with()
+
+    @patch("pm_test.subprocess")
+    def test_respawn_checkbox(self, mock_subprocess):
+        operation = self.make_operation("-r", "2", "reboot")
+        operation.respawn_checkbox()
+        mock_subprocess.run.assert_not_called()
+
+    @patch.object(FastCycleOperation, "execute_pm_command")
+    def test_hardware_changed(self, mock_execute):
+        operation = self.make_operation("-r", "2", "reboot")
+        with patch("pm_test.get_sysfs_hw_list", return_value="pci a"):
+            operation.setup()
+            operation.run()
+        operation = self.make_operation("--append", "--total", "2", "reboot")
+        operation.setup()
+        with patch.object(operation, "wait_for_boot"), patch.object(
+            operation, "record_timings"
+        ), patch("pm_test.get_sysfs_hw_list", return_value="pci b"):
+            with self.assertRaises(pm_test.TestFailed) as context:
+                operation.run()
+        self.assertIn(
+            "Hardware lost after pm operation", str(context.exception)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3,
+# as published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import unittest
+
+from sleep_test_log_check import analyze_log
+
+FWTS_LOG = """\
+s3              S3 cycle 1 of 2
+s3              Suspend/Resume Timings:
+s3                Suspend: 1.250 seconds.
+s3                Resume:  2.500 seconds.
+s3              FAILED [HIGH] KlogErr: Test 1, error in kernel log
+s3              S3 cycle 2 of 2
+s3                Suspend: 1.000 seconds.
+
+Test Failure Summary
+====================
+
+Critical failures: NONE
+
+High failures: 3
+ s3: Found 1 error in kernel log.
+ s3: Found 1 error in kernel log.
+ klog: Warning: something
+
+Medium failures: 1
+ s4: Not terminated by an empty line
+"""
+
+
+class AnalyzeLogTests(unittest.TestCase):
+    def test_summary(self):
+        summary, _ = analyze_log(io.StringIO(FWTS_LOG))
+        self.assertEqual(summary.summaries_found, 1)
+        self.assertEqual(
+            {level: dict(tests) for level, tests in summary.results.items()},
+            {
+                "Critical": {},
+                "High": {
+                    "s3": {"Found 1 error in kernel log.": 2},
+                    "klog": {"Warning: something": 1},
+                },
+            },
+        )
+
+    def test_summary_filters(self):
+        summary, _ = analyze_log(io.StringIO(FWTS_LOG), "s3", True)
+        self.assertEqual(list(summary.results["High"]), ["s3"])
+        summary, _ = analyze_log(io.StringIO(FWTS_LOG), "all", True)
+        self.assertEqual(list(summary.results["High"]), ["s3"])
+
+    def test_cycles(self):
+        _, analyzer = analyze_log(io.StringIO(FWTS_LOG))
+        cycles = analyzer.get_summary()["cycles"]
+        self.assertEqual([cycle["cycle"] for cycle in cycles], [1, 2])
+        self.assertEqual(
+            cycles[0]["timings"], {"suspend": 1.25, "resume": 2.5}
+        )
+        self.assertEqual(cycles[0]["findings"], {"high": 1})
+        self.assertEqual(cycles[1]["findings"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
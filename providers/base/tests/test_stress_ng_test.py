@@ -16,11 +16,43 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+import tempfile
 import unittest
 from subprocess import CalledProcessError, TimeoutExpired
 from unittest.mock import MagicMock, mock_open, patch
 
-from stress_ng_test import main, num_numa_nodes, swap_space_ok
+import yaml
+
+from stress_ng_test import (
+    StressNgJob,
+    StressOrchestrator,
+    compare_metrics,
+    count_cpus,
+    load_stress_ng_metrics,
+    main,
+    memory_jobs,
+    num_numa_nodes,
+    numa_layout,
+    run_stress_jobs,
+    swap_space_ok,
+)
+
+STRESS_NG_YAML = """\
+---
+system-info:
+      stress-ng-version: 0.17.06
+metrics:
+    - stressor: cpu
+      bogo-ops: 12000
+      bogo-ops-per-second-usr-sys-time: 1210.5
+      bogo-ops-per-second-real-time: 1200.0
+      wall-clock-time: 10.0
+    - stressor: matrix
+      bogo-ops: 500
+      bogo-ops-per-second-real-time: 50.0
+...
+"""
 
 
 class TestMemoryFunctions(unittest.TestCase):
@@ -257,3 +289,195 @@ class TestMainFunction(unittest.TestCase):
         self, shutil_which_mock, os_geteuid_mock, disk_mock
     ):
         self.assertEqual(main(), 1)
+
+
+class TestParallelMode(unittest.TestCase):
+    def test_count_cpus(self):
+        self.assertEqual(count_cpus("0-3,8-11\n"), 8)
+        self.assertEqual(count_cpus("5"), 1)
+        self.assertEqual(count_cpus("\n"), 0)
+
+    @patch("shutil.which", return_value="/usr/bin/numactl")
+    def test_numa_layout(self, which_mock):
+        with tempfile.TemporaryDirectory() as tmp:
+            for node, cpulist in (("node0", "0-3"), ("node1", "4-7")):
+                os.mkdir(os.path.join(tmp, node))
+                with open(os.path.join(tmp, node, "cpulist"), "w") as f:
+                    f.write(cpulist)
+            # memory-only node
+            os.mkdir(os.path.join(tmp, "node2"))
+            with open(os.path.join(tmp, "node2", "cpulist"), "w") as f:
+                f.write("\n")
+            self.assertEqual(numa_layout(tmp), [(0, 4), (1, 4)])
+            which_mock.return_value = None
+            self.assertEqual(numa_layout(tmp), [(None, 0)])
+
+    def test_load_stress_ng_metrics(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".yaml") as f:
+            f.write(STRESS_NG_YAML)
+            f.flush()
+            metrics = load_stress_ng_metrics(f.name)
+        self.assertEqual(len(metrics), 2)
+        self.assertEqual(metrics[0]["stressor"], "cpu")
+        self.assertEqual(metrics[0]["bogo-ops"], 12000)
+        self.assertEqual(load_stress_ng_metrics("/nonexistent"), [])
+
+    def test_compare_metrics(self):
+        reference = [
+            {
+                "job": "cpu",
+                "stressor": "cpu",
+                "bogo-ops-per-second-real-time": 100,
+            }
+        ]
+        metrics = [
+            {
+                "job": "cpu",
+                "stressor": "cpu",
+                "bogo-ops-per-second-real-time": 80,
+            },
+            {
+                "job": "cpu",
+                "stressor": "str",
+                "bogo-ops-per-second-real-time": 1,
+            },
+        ]
+        self.assertEqual(compare_metrics(metrics, reference), 0)
+        self.assertEqual(compare_metrics(metrics, reference, 25), 0)
+        self.assertEqual(compare_metrics(metrics, reference, 10), 1)
+
+    def test_job_command(self):
+        job = StressNgJob(
+            "cpu-node1", ["cpu", "str"], 110, 100, 4, "--tz", numa_node=1
+        )
+        job.yaml_file = "/tmp/cpu.yaml"
+        self.assertEqual(
+            job.command(),
+            "numactl --cpunodebind=1 --membind=1 stress-ng --aggressive "
+            "--verify --timeout 100 --tz --cpu 4 --str 4 "
+            "--metrics-brief --yaml /tmp/cpu.yaml",
+        )
+
+    @patch("stress_ng_test.Popen")
+    def test_job_start_poll(self, popen_mock):
+        popen_mock.return_value.stdout = ["stress-ng: info: passed\n"]
+        popen_mock.return_value.poll.return_value = 0
+        popen_mock.return_value.returncode = 0
+        job = StressNgJob("cpu", ["cpu"], 110, 100)
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "cpu.yaml"), "w") as f:
+                f.write(STRESS_NG_YAML)
+            job.start(tmp)
+            self.assertEqual(job.poll(), 0)
+        self.assertEqual(job.metrics[1]["stressor"], "matrix")
+
+    @patch("stress_ng_test.time.monotonic", side_effect=[0, 200])
+    @patch("stress_ng_test.Popen")
+    def test_job_wrapper_timeout(self, popen_mock, monotonic_mock):
+        popen_mock.return_value.stdout = []
+        popen_mock.return_value.poll.return_value = None
+        job = StressNgJob("cpu", ["cpu"], 110, 100)
+        job.start("/nonexistent")
+        self.assertEqual(job.poll(), 1)
+        popen_mock.return_value.kill.assert_called_once_with()
+
+    @patch("stress_ng_test.numa_layout", return_value=[(0, 8), (1, 8)])
+    def test_memory_jobs(self, numa_layout_mock):
+        args = MagicMock(base_time=300, jobs_per_queue=2)
+        jobs = memory_jobs(args, ["str", "numa"], ["vm"], ["stack"], 400)
+        self.assertEqual([job.queue for job in jobs], [0, 1, 0, 1])
+        self.assertEqual([job.numa_node for job in jobs], [0, None, 0, 1])
+        self.assertEqual([job.thread_count for job in jobs], [4, 4, 4, 4])
+        self.assertEqual(jobs[2].sng_timeout, 400)
+
+    @patch("stress_ng_test.time.sleep")
+    @patch("stress_ng_test.max_temperature", side_effect=[99.0, 50.0, 50.0])
+    def test_orchestrator(self, max_temperature_mock, sleep_mock):
+        jobs = []
+        for name, queue in (("a", 0), ("b", 0), ("c", 1)):
+            job = MagicMock(queue=queue, sng_timeout=100, returncode=0)
+            job.name = name
+            job.metrics = [{"stressor": name}]
+            job.poll.return_value = 0
+            jobs.append(job)
+        jobs[2].returncode = 2
+        orchestrator = StressOrchestrator(jobs, max_temp=90)
+        self.assertEqual(orchestrator.estimated_run_time(), 200)
+        self.assertEqual(orchestrator.run(), 2)
+        for job in jobs:
+            job.start.assert_called_once_with(unittest.mock.ANY)
+        self.assertEqual(orchestrator.peak_temp, 99.0)
+        self.assertEqual(
+            orchestrator.metrics(),
+            [
+                {"stressor": "a", "job": "a"},
+                {"stressor": "b", "job": "b"},
+                {"stressor": "c", "job": "c"},
+            ],
+        )
+
+    @patch("stress_ng_test.StressOrchestrator")
+    def test_run_stress_jobs_metrics_file(self, orchestrator_mock):
+        orchestrator = orchestrator_mock.return_value
+        orchestrator.run.return_value = 0
+        orchestrator.estimated_run_time.return_value = 60
+        orchestrator.peak_temp = None
+        orchestrator.lowest_available_memory = None
+        orchestrator.metrics.return_value = [
+            {"stressor": "cpu", "bogo-ops": 12000, "job": "cpu-node0"}
+        ]
+        safe_dump = yaml.safe_dump
+
+        def old_safe_dump(data, stream=None, **kwargs):
+            # PyYAML < 5.1 has no sort_keys
+            self.assertNotIn("sort_keys", kwargs)
+            return safe_dump(data, stream, **kwargs)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            args = MagicMock(
+                metrics_file=os.path.join(tmp, "metrics.yaml"), compare=None
+            )
+            with patch("yaml.safe_dump", old_safe_dump):
+                self.assertEqual(run_stress_jobs(args, []), 0)
+            self.assertEqual(
+                load_stress_ng_metrics(args.metrics_file),
+                orchestrator.metrics.return_value,
+            )
+
+    @patch("os.geteuid", return_value=0)
+    @patch("shutil.which", return_value="/usr/bin/stress-ng")
+    @patch("stress_ng_test.run_stress_jobs", return_value=0)
+    @patch("stress_ng_test.numa_layout", return_value=[(0, 4), (1, 4)])
+    @patch("sys.argv", ["stress_ng_test.py", "cpu", "--parallel"])
+    def test_main_stress_cpu_parallel(
+        self, numa_layout_mock, run_stress_jobs_mock, which_mock, euid_mock
+    ):
+        self.assertEqual(main(), 0)
+        jobs = run_stress_jobs_mock.call_args[0][1]
+        self.assertEqual(
+            [job.name for job in jobs], ["cpu-node0", "cpu-node1"]
+        )
+
+    @patch("shutil.rmtree")
+    @patch("stress_ng_test.run_stress_jobs", return_value=0)
+    @patch("stress_ng_test.Disk")
+    @patch(
+        "sys.argv",
+        ["stress_ng_test.py", "disk", "--device", "sda", "sdb", "--parallel"],
+    )
+    def test_stress_disk_parallel(
+        self, disk_mock, run_stress_jobs_mock, rmtree_mock
+    ):
+        disk_mock.return_value.test_dir = "/mnt/test"
+        with patch("os.geteuid", return_value=0), patch(
+            "shutil.which", return_value="/usr/bin/stress-ng"
+        ):
+            self.assertEqual(main(), 0)
+        jobs = run_stress_jobs_mock.call_args[0][1]
+        self.assertEqual({job.queue for job in jobs}, {"/dev/sda", "/dev/sdb"})
+        self.assertEqual(jobs[0].name, "sda-aio")
+
+    @patch("sys.argv", ["stress_ng_test.py", "cpu", "--compare", "old.yaml"])
+    def test_main_compare_requires_parallel(self):
+        with self.assertRaises(SystemExit), patch("sys.stderr"):
+            main()
@@ -16,11 +16,18 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
 import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
 from unittest import TestCase
 from unittest.mock import patch, MagicMock
 
-from virtualization import LXDTest_vm
+from virtualization import ImageStore, KVMTest, LXDTest_vm
 
 
 class TestLXDTest_vm(TestCase):
@@ -191,6 +198,23 @@ class TestLXDTest_vm(TestCase):
         self.assertTrue(self_mock.setup.called)
         self.assertFalse(start_result)
 
+    @patch("time.sleep")
+    @patch("virtualization.print")
+    @patch("virtualization.logging")
+    def test_start_vm_ready_at_once(
+        self, logging_mock, print_mock, time_sleep_mock
+    ):
+        self_mock = MagicMock()
+        self_mock.setup.return_value = True
+        self_mock.image_url = "image url"
+        self_mock.template_url = "template url"
+        self_mock.name = "vm name"
+        self_mock.run_command.return_value = True
+
+        self.assertTrue(LXDTest_vm.start_vm(self_mock))
+        time_sleep_mock.assert_not_called()
+        self.assertIn("Boot to ready", print_mock.call_args[0][0])
+
     @patch("time.sleep")
     @patch("virtualization.print")
     @patch("virtualization.logging")
@@ -208,6 +232,50 @@ class TestLXDTest_vm(TestCase):
         self.assertTrue(start_result)
         self.assertTrue(print_mock.called)
 
+    def start_fake_monitor(self, *events):
+        output = "".join(json.dumps(event) + "\n" for event in events)
+        monitor = subprocess.Popen(
+            [sys.executable, "-c", "print({!r}, end='')".format(output)],
+            stdout=subprocess.PIPE,
+            bufsize=0,
+        )
+        self.addCleanup(monitor.wait)
+        self.addCleanup(monitor.stdout.close)
+        return monitor
+
+    @patch("virtualization.logging")
+    def test_wait_for_event(self, logging_mock):
+        self_mock = MagicMock()
+        self_mock.name = "testbed"
+        monitor = self.start_fake_monitor(
+            {"metadata": {"action": "instance-started", "source": "/1.0/x"}},
+            {"type": "logging"},
+            {
+                "metadata": {
+                    "action": "instance-started",
+                    "source": "/1.0/instances/testbed?project=default",
+                }
+            },
+        )
+        self.assertTrue(
+            LXDTest_vm.wait_for_event(
+                self_mock, monitor, "instance-started", 10
+            )
+        )
+
+    @patch("virtualization.logging")
+    def test_wait_for_event_monitor_exited(self, logging_mock):
+        self_mock = MagicMock()
+        self_mock.name = "testbed"
+        monitor = self.start_fake_monitor(
+            {"metadata": {"action": "instance-stopped", "source": "/1.0/x"}}
+        )
+        self.assertFalse(
+            LXDTest_vm.wait_for_event(
+                self_mock, monitor, "instance-started", 10
+            )
+        )
+
     def test_setup_failure(self):
         self_mock = MagicMock()
         self_mock.run_command.return_value = False
@@ -217,3 +285,189 @@ class TestLXDTest_vm(TestCase):
         setup_return = LXDTest_vm.setup(self_mock)
 
         self.assertFalse(setup_return)
+
+
+@patch("virtualization.urllib.request.urlopen")
+class TestImageStore(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.store = ImageStore(os.path.join(self.tmp, "store"))
+        self.downloads = {}
+        patcher = patch("virtualization.urllib.request.urlretrieve")
+        self.addCleanup(patcher.stop)
+        patcher.start().side_effect = self.urlretrieve
+
+    def urlretrieve(self, url, filename):
+        with open(filename, "wb") as f:
+            f.write(self.downloads.get(url, b"partial"))
+        if url not in self.downloads:
+            raise OSError("no network")
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp, name)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def test_add(self, urlopen_mock):
+        url = "http://example.com/focal/disk1.img"
+        self.assertIsNone(self.store.get(url))
+        path = self.store.add(self.write("a.img", b"image"), url)
+        self.assertEqual(self.store.get(url), path)
+        self.assertEqual(os.path.basename(path), "disk1.img")
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"image")
+        # the same content is only stored once
+        self.store.add(self.write("b.img", b"image"), "http://b/b.img")
+        self.assertEqual(self.store.get("http://b/b.img"), path)
+        self.assertEqual(
+            len(os.listdir(os.path.join(self.store.path, "objects"))), 1
+        )
+
+    def test_fetch(self, urlopen_mock):
+        urlopen_mock.side_effect = OSError("no SHA256SUMS")
+        self.downloads = {
+            "http://mirror/focal/lxd.tar.xz": b"focal",
+            "http://mirror/jammy/lxd.tar.xz": b"jammy",
+        }
+        focal = self.store.fetch("http://mirror/focal/lxd.tar.xz")
+        jammy = self.store.fetch("http://mirror/jammy/lxd.tar.xz")
+        # same file name, different images
+        self.assertNotEqual(focal, jammy)
+        with open(jammy, "rb") as f:
+            self.assertEqual(f.read(), b"jammy")
+        # not downloaded again, unless refreshed
+        self.downloads = {"http://mirror/focal/lxd.tar.xz": b"new focal"}
+        self.assertEqual(
+            self.store.fetch("http://mirror/focal/lxd.tar.xz"), focal
+        )
+        focal = self.store.fetch(
+            "http://mirror/focal/lxd.tar.xz", refresh=True
+        )
+        with open(focal, "rb") as f:
+            self.assertEqual(f.read(), b"new focal")
+
+    def test_fetch_published_digest(self, urlopen_mock):
+        def sums(*digests):
+            text = "".join(
+                "{} *{}\n".format(hashlib.sha256(content).hexdigest(), name)
+                for name, content in digests
+            )
+            urlopen_mock.return_value.__enter__.return_value.read.return_value = (
+                text.encode()
+            )
+
+        url = "http://mirror/current/a.img"
+        self.downloads = {url: b"old"}
+        sums(("b.img", b"b"), ("a.img", b"old"))
+        path = self.store.fetch(url)
+        urlopen_mock.assert_called_with(
+            "http://mirror/current/SHA256SUMS", timeout=10
+        )
+        # unchanged on the server
+        self.downloads = {}
+        self.assertEqual(self.store.fetch(url), path)
+        # changed on the server
+        self.downloads = {url: b"new"}
+        sums(("a.img", b"new"))
+        path = self.store.fetch(url)
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"new")
+        # corrupted download
+        self.downloads = {url: b"corrupted"}
+        sums(("a.img", b"newer"))
+        with self.assertRaises(OSError):
+            self.store.fetch(url)
+        self.assertEqual(self.store.get(url), path)
+
+    def test_fetch_failure(self, urlopen_mock):
+        urlopen_mock.side_effect = OSError("no network")
+        url = "http://example.com/a.img"
+        self.downloads = {}
+        with self.assertRaises(OSError):
+            self.store.fetch(url)
+        self.assertIsNone(self.store.get(url))
+        self.assertEqual(
+            os.listdir(os.path.join(self.store.path, "objects")), []
+        )
+
+
+class TestKVMTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def test_get_image_urls(self):
+        self_mock = MagicMock()
+        self_mock.release = "jammy"
+        self_mock.construct_filename.side_effect = lambda alt_pattern: (
+            "new.img" if alt_pattern else "old.img"
+        )
+        self.assertEqual(
+            KVMTest.get_image_urls(self_mock),
+            [
+                "http://cloud-images.ubuntu.com/jammy/current/old.img",
+                "http://cloud-images.ubuntu.com/jammy/current/new.img",
+            ],
+        )
+        self.assertEqual(
+            KVMTest.get_image_urls(self_mock, "http://maas/images/"),
+            ["http://maas/images/old.img", "http://maas/images/new.img"],
+        )
+        self.assertEqual(
+            KVMTest.get_image_urls(self_mock, "http://maas/a.img"),
+            ["http://maas/a.img"],
+        )
+
+    @patch("virtualization.logging")
+    def test_download_image_stored(self, logging_mock):
+        self_mock = MagicMock()
+        self_mock.qemu_config = {"cloudimg_type": 2}
+        self_mock.get_image_urls.return_value = [
+            "http://a/1.img",
+            "http://a/2.img",
+        ]
+        self_mock.image_store.get.side_effect = lambda url: (
+            url == "http://a/2.img"
+        )
+        path = os.path.join(self.tmp, "2.img")
+        open(path, "w").close()
+        self_mock.image_store.fetch.return_value = path
+
+        self.assertEqual(KVMTest.download_image(self_mock), path)
+        self_mock.get_image_name_and_url.assert_not_called()
+        self_mock.image_store.fetch.assert_called_once_with("http://a/2.img")
+
+    @patch("time.sleep")
+    def test_wait_for_boot(self, time_sleep_mock):
+        self_mock = MagicMock()
+        self_mock.timeout = 500
+        self_mock.debug_file = os.path.join(self.tmp, "virt_debug")
+        self_mock.log_check = lambda stream: KVMTest.log_check(None, stream)
+        self_mock.process.poll.return_value = None
+        with open(self_mock.debug_file, "w") as f:
+            f.write("Booting\nCERTIFICATION BOOT")
+
+        def sleep(interval):
+            with open(self_mock.debug_file, "a") as f:
+                f.write(" COMPLETE\n")
+
+        time_sleep_mock.side_effect = sleep
+        self.assertEqual(KVMTest.wait_for_boot(self_mock), 0)
+        self.assertEqual(time_sleep_mock.call_count, 1)
+
+    @patch("time.sleep")
+    @patch("virtualization.logging")
+    def test_wait_for_boot_qemu_exited(self, logging_mock, time_sleep_mock):
+        self_mock = MagicMock()
+        self_mock.timeout = 500
+        self_mock.debug_file = os.path.join(self.tmp, "virt_debug")
+        self_mock.log_check = lambda stream: KVMTest.log_check(None, stream)
+        self_mock.process.poll.return_value = 1
+        with open(self_mock.debug_file, "w") as f:
+            f.write("Kernel panic\n")
+
+        self.assertEqual(KVMTest.wait_for_boot(self_mock), 1)
+        time_sleep_mock.assert_not_called()
+        self.assertTrue(logging_mock.error.called)